@@ -9,6 +9,7 @@ from pydantic import BaseModel, Field
 
 from app.core.logger import logger
 from app.services.ai.agents.whatsapp_agent.agent_service import agent_service
+from app.services.ai.agents.whatsapp_agent.scheduler import agent_scheduler
 from app.schemas import SuccessResponse
 from app.core.error_handling import handle_database_error
 from app.config.error_codes import get_error_response
@@ -71,6 +72,9 @@ async def toggle_autoreply(request: AutoReplyToggleRequest):
         )
         
         if result["success"]:
+            if not request.enabled:
+                agent_scheduler.cancel_conversation(request.conversation_id)
+            
             return SuccessResponse(
                 message=f"Auto-reply {'enabled' if request.enabled else 'disabled'} successfully",
                 data={
@@ -96,6 +100,26 @@ async def toggle_autoreply(request: AutoReplyToggleRequest):
         )
 
 
+@router.get("/runtime/stats", response_model=SuccessResponse)
+async def get_agent_runtime_stats():
+    """
+    Get shared agent runtime statistics.
+    Includes scheduler queue depth and wait times, graph registry and model pool.
+    """
+    try:
+        return SuccessResponse(
+            message="AI agent runtime statistics retrieved successfully",
+            data=agent_service.get_runtime_stats()
+        )
+        
+    except Exception as e:
+        logger.error(f"Error getting AI agent runtime stats: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get AI agent runtime stats: {str(e)}"
+        )
+
+
 @router.post("/conversations/{conversation_id}/process", response_model=SuccessResponse)
 async def process_message_manually(
     conversation_id: str,
@@ -152,6 +176,10 @@ async def trigger_knowledge_base_ingestion():
                     "documents_processed": result.documents_processed,
                     "chunks_created": result.chunks_created,
                     "chunks_stored": result.chunks_stored,
+                    "chunks_upserted": result.chunks_upserted,
+                    "chunks_unchanged": result.chunks_unchanged,
+                    "chunks_deleted": result.chunks_deleted,
+                    "chunks_per_second": result.chunks_per_second,
                     "processing_time_ms": result.processing_time_ms
                 }
             )
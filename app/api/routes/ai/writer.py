@@ -2,13 +2,17 @@
 Writer Agent API endpoints.
 """
 
-from typing import Optional
+from typing import Optional, Awaitable, Callable, AsyncIterator
+import asyncio
+import json
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from app.core.logger import logger
 from app.services.auth.utils.session_auth import get_current_user
 from app.services.ai.agents.writer.agent_service import writer_agent_service
+from app.services.ai.shared.streaming import PartialStreamer, websocket_sink
 from app.config.error_codes import get_error_response
 from app.schemas.ai.writer_response import StructuredWriterResponse, WriterAgentResult
 
@@ -34,6 +38,61 @@ class WriterResponse(BaseModel):
     error: Optional[str] = Field(None, description="Error message if failed")
 
 
+def _websocket_streamer(conversation_id: Optional[str], current_user) -> PartialStreamer:
+    """Stream draft tokens to the requesting agent's WebSocket connections."""
+    return PartialStreamer(
+        source="writer",
+        sink=websocket_sink(conversation_id, user_id=str(current_user.id))
+    )
+
+
+def _sse_response(run: Callable[[PartialStreamer], Awaitable[WriterAgentResult]]) -> StreamingResponse:
+    """
+    Run the Writer Agent and stream its output as Server-Sent Events.
+    
+    Emits ``ai_partial`` events while the draft is generated and a final
+    ``result`` event carrying the complete WriterAgentResult.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    async def _enqueue_partial(partial: dict) -> None:
+        await queue.put(("ai_partial", partial))
+    
+    async def _produce() -> None:
+        try:
+            result = await run(PartialStreamer(source="writer", sink=_enqueue_partial))
+        except Exception as e:
+            logger.error(f"Error in Writer Agent stream: {str(e)}")
+            result = WriterAgentResult(
+                success=False,
+                raw_response="",
+                error="There was an error connecting to the Writer Agent. Please try again or contact IT if the issue persists.",
+                metadata={}
+            )
+        await queue.put(("result", result.model_dump()))
+        await queue.put(None)
+    
+    async def _events() -> AsyncIterator[str]:
+        producer = asyncio.create_task(_produce())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                event, data = item
+                yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+        finally:
+            # Client disconnected: stop generating
+            if not producer.done():
+                producer.cancel()
+    
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/generate", response_model=WriterResponse)
 async def generate_response(
     request: WriterQueryRequest,
@@ -56,7 +115,8 @@ async def generate_response(
         result = await writer_agent_service.generate_response(
             user_query=request.query,
             conversation_id=request.conversation_id,
-            mode="custom"
+            mode="custom",
+            streamer=_websocket_streamer(request.conversation_id, current_user)
         )
         
         # Convert WriterAgentResult to dict for API response
@@ -110,10 +170,10 @@ async def generate_contextual_response(
             f"for conversation {request.conversation_id}"
         )
         
-        # Generate contextual response using prebuilt mode
-        result = await writer_agent_service.generate_response(
-            user_query="Generate the best possible response for current conversation context",
+        # Generate contextual response using prebuilt mode (cached until the customer writes again)
+        result = await writer_agent_service.generate_contextual_response(
             conversation_id=request.conversation_id,
+            streamer=_websocket_streamer(request.conversation_id, current_user),
             mode="prebuilt"
         )
         
@@ -172,7 +232,8 @@ async def generate_structured_response(
         result = await writer_agent_service.generate_response(
             user_query=request.query,
             conversation_id=request.conversation_id,
-            mode="custom"
+            mode="custom",
+            streamer=_websocket_streamer(request.conversation_id, current_user)
         )
         
         # Log the result
@@ -219,7 +280,8 @@ async def generate_structured_contextual_response(
         
         # Generate structured contextual response
         result = await writer_agent_service.generate_contextual_response(
-            conversation_id=request.conversation_id
+            conversation_id=request.conversation_id,
+            streamer=_websocket_streamer(request.conversation_id, current_user)
         )
         
         # Log the result
@@ -247,6 +309,56 @@ async def generate_structured_contextual_response(
         )
 
 
+@router.post("/generate/stream")
+async def stream_generated_response(
+    request: WriterQueryRequest,
+    current_user=Depends(get_current_user)
+):
+    """
+    Streaming variant of ``/generate-structured``.
+    
+    Returns Server-Sent Events: ``ai_partial`` events with draft tokens and
+    tool progress, followed by a ``result`` event with the WriterAgentResult.
+    """
+    logger.info(
+        f"Streaming Writer Agent request from user {current_user.id}: "
+        f"'{request.query[:100]}...' for conversation {request.conversation_id}"
+    )
+    
+    return _sse_response(
+        lambda streamer: writer_agent_service.generate_response(
+            user_query=request.query,
+            conversation_id=request.conversation_id,
+            mode="custom",
+            streamer=streamer
+        )
+    )
+
+
+@router.post("/contextual/stream")
+async def stream_contextual_response(
+    request: ContextualResponseRequest,
+    current_user=Depends(get_current_user)
+):
+    """
+    Streaming variant of ``/contextual-structured``.
+    
+    Returns Server-Sent Events: ``ai_partial`` events with draft tokens and
+    tool progress, followed by a ``result`` event with the WriterAgentResult.
+    """
+    logger.info(
+        f"Streaming contextual response request from user {current_user.id} "
+        f"for conversation {request.conversation_id}"
+    )
+    
+    return _sse_response(
+        lambda streamer: writer_agent_service.generate_contextual_response(
+            conversation_id=request.conversation_id,
+            streamer=streamer
+        )
+    )
+
+
 @router.get("/health")
 async def health_check():
     """
@@ -8,6 +8,7 @@ import re
 
 from app.core.logger import logger
 from app.db.client import database
+from app.services.business.reservation_slot_index import reservation_slot_index
 from app.schemas import SuccessResponse
 
 router = APIRouter()
@@ -108,19 +109,6 @@ async def book_reservation(reservation: ReservationRequest):
     try:
         db = await database.get_database()
         
-        # Check if the slot is already booked
-        existing_reservation = await db.installation_reservations.find_one({
-            "date": reservation.date,
-            "time_slot": reservation.time_slot
-        })
-        
-        if existing_reservation:
-            logger.warning(f"Slot already booked: {reservation.date} at {reservation.time_slot}")
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail=f"The requested slot ({reservation.date} at {reservation.time_slot}) is already booked"
-            )
-        
         # Prepare reservation document
         reservation_doc = {
             "date": reservation.date,
@@ -137,17 +125,16 @@ async def book_reservation(reservation: ReservationRequest):
             "updated_at": datetime.now(timezone.utc)
         }
         
-        # Insert the reservation
-        result = await db.installation_reservations.insert_one(reservation_doc)
+        # Atomic booking: unique (date, time_slot) upsert, with a Redis slot claim in front
+        reservation_id = await reservation_slot_index.book(db, reservation_doc)
         
-        if not result.inserted_id:
+        if reservation_id is None:
+            logger.warning(f"Slot already booked: {reservation.date} at {reservation.time_slot}")
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to create reservation"
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"The requested slot ({reservation.date} at {reservation.time_slot}) is already booked"
             )
         
-        reservation_id = str(result.inserted_id)
-        
         logger.info(f"Reservation created successfully: {reservation_id} for {reservation.date} at {reservation.time_slot}")
         logger.info(f"Customer: {reservation.customer_info.full_name} (ID: {reservation.customer_info.identification_number}, Mobile: {reservation.customer_info.mobile_number})")
         
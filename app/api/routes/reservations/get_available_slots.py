@@ -2,10 +2,10 @@
 
 from fastapi import APIRouter, HTTPException, status, Query
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional
 
 from app.core.logger import logger
 from app.db.client import database
+from app.services.business.reservation_slot_index import reservation_slot_index
 
 router = APIRouter()
 
@@ -37,47 +37,11 @@ async def get_available_slots():
         # Get database connection
         db = await database.get_database()
         
-        # Query all booked slots for the date range
-        booked_slots = await db.installation_reservations.find(
-            {
-                "date": {
-                    "$gte": start_date.strftime("%Y-%m-%d"),
-                    "$lte": end_date.strftime("%Y-%m-%d")
-                }
-            },
-            {"date": 1, "time_slot": 1}
-        ).to_list(length=None)
-        
-        logger.info(f"Found {len(booked_slots)} booked slots in the date range")
-        
-        # Create a set of booked date-time combinations for quick lookup
-        booked_datetime_set = set()
-        for slot in booked_slots:
-            booked_datetime_set.add(f"{slot['date']}_{slot['time_slot']}")
-        
-        # Generate all possible slots for the month
-        available_slots = {}
-        current_date = start_date
-        
-        # Define available time slots
-        time_slots = ["08:00", "13:00"]
-        
-        while current_date <= end_date:
-            date_str = current_date.strftime("%Y-%m-%d")
-            day_available_slots = []
-            
-            # Check each time slot for this date
-            for time_slot in time_slots:
-                datetime_key = f"{date_str}_{time_slot}"
-                if datetime_key not in booked_datetime_set:
-                    day_available_slots.append(time_slot)
-            
-            # Only include the date if there are available slots
-            if day_available_slots:
-                available_slots[date_str] = day_available_slots
-            
-            # Move to next day
-            current_date += timedelta(days=1)
+        # Booked slots come from the Redis bitmap index (one read for the whole range);
+        # the index falls back to a MongoDB range query when Redis is unavailable
+        available_slots = await reservation_slot_index.available_slots(
+            db, start_date.date(), (end_date - start_date).days + 1
+        )
         
         logger.info(f"Generated {len(available_slots)} days with available slots")
         
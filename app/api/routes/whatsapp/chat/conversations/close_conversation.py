@@ -10,6 +10,7 @@ from app.db.client import database
 from app.db.models.auth import User
 from app.schemas.whatsapp.chat.conversation import ConversationClose, ConversationResponse
 from app.services import audit_service
+from app.services.ai.agents.conversation_summarizer.prewarm_worker import summary_prewarm_worker
 from app.services.auth import require_permissions
 
 router = APIRouter()
@@ -110,6 +111,9 @@ async def close_conversation(
             correlation_id=correlation_id
         )
         
+        # Pre-warm the summary for whoever reopens the conversation
+        summary_prewarm_worker.submit(conversation_id, "close")
+        
         logger.info(f"Conversation {conversation_id} closed by user {current_user.id}")
         
         return ConversationResponse(**updated_conversation)
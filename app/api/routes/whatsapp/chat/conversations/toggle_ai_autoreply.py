@@ -88,6 +88,11 @@ async def toggle_ai_autoreply(
                 detail="Failed to update AI auto-reply setting"
             )
         
+        # A human agent is taking over: drop queued and in-flight AI turns
+        if not request.enabled:
+            from app.services.ai.agents.whatsapp_agent.scheduler import agent_scheduler
+            agent_scheduler.cancel_conversation(conversation_id)
+        
         # Log the action
         action = "enabled" if request.enabled else "disabled"
         logger.info(
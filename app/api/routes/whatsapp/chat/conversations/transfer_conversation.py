@@ -10,6 +10,7 @@ from app.db.client import database
 from app.db.models.auth import User
 from app.schemas.whatsapp.chat.conversation import ConversationTransfer, ConversationResponse
 from app.services import audit_service
+from app.services.ai.agents.conversation_summarizer.prewarm_worker import summary_prewarm_worker
 from app.services.auth import require_permissions
 
 router = APIRouter()
@@ -164,6 +165,9 @@ async def transfer_conversation(
             correlation_id=correlation_id
         )
         
+        # Pre-warm the summary so the receiving agent does not wait for the LLM
+        summary_prewarm_worker.submit(conversation_id, "transfer")
+        
         logger.info(f"Conversation {conversation_id} transferred by user {current_user.id}")
         
         return ConversationResponse(**updated_conversation)
@@ -24,6 +24,9 @@ from app.services import websocket_service
 from app.services import sentiment_analyzer_service
 from app.services.websocket.websocket_service import manager
 from app.services.ai.agents.whatsapp_agent.agent_service import agent_service
+from app.services.ai.agents.whatsapp_agent.scheduler import agent_scheduler
+from app.services.ai.agents.writer.agent_service import writer_agent_service
+from app.services.ai.shared.memory_service import memory_service
 from app.core.error_handling import handle_database_error
 
 router = APIRouter(prefix="/whatsapp", tags=["WhatsApp Webhooks"])
@@ -362,18 +365,40 @@ async def process_incoming_message(
             message_id=str(message["_id"])
         )
         
-        # Process with AI agent in background
-        asyncio.create_task(
-            process_with_ai_agent(
+        # Queue for the AI agent; rapid consecutive messages are merged into one turn
+        accepted = agent_scheduler.submit(
+            conversation_id=str(conversation["_id"]),
+            message_id=str(message["_id"]),
+            user_text=incoming_msg.text.body,
+            customer_phone=phone_number,
+            handler=process_with_ai_agent,
+            is_first_message=is_new_conversation,
+            on_dropped=notify_ai_turn_dropped
+        )
+        if not accepted:
+            await websocket_service.notify_ai_processing_completed(
                 conversation_id=str(conversation["_id"]),
                 message_id=str(message["_id"]),
-                user_text=incoming_msg.text.body,
-                customer_phone=phone_number,
-                is_first_message=is_new_conversation
+                success=False,
+                response_sent=False
             )
-        )
     else:
         logger.info(f"🚫 [AI] Skipping AI processing (autoreply: {ai_autoreply_enabled}, has_text: {bool(incoming_msg.text and incoming_msg.text.body)})")
+        
+        # Keep the AI memory window complete while a human handles the conversation
+        if incoming_msg.text and incoming_msg.text.body:
+            await memory_service.append_message(
+                conversation_id=str(conversation["_id"]),
+                role="user",
+                content=incoming_msg.text.body,
+                message_id=str(message["_id"])
+            )
+            
+            # Have the writer's suggestion ready when the agent opens the conversation
+            writer_agent_service.schedule_speculative(
+                conversation_id=str(conversation["_id"]),
+                message_id=str(message["_id"])
+            )
 
     # ===== SINGLE WEBSOCKET NOTIFICATION =====
     # Send a single notification that will trigger all necessary updates
@@ -641,8 +666,8 @@ async def process_with_ai_agent(
     
     Args:
         conversation_id: Conversation identifier
-        message_id: Incoming message identifier
-        user_text: Customer message text
+        message_id: Latest incoming message identifier of the turn
+        user_text: Customer message text (consecutive messages merged by the scheduler)
         customer_phone: Customer phone number
         is_first_message: Whether this is the first message in conversation
     """
@@ -698,6 +723,20 @@ async def process_with_ai_agent(
                 response_sent=False
             )
             
+    except asyncio.CancelledError:
+        # A human agent took over (auto-reply disabled) or the app is shutting down
+        logger.info(f"🛑 [AI] AI agent processing cancelled for conversation {conversation_id}")
+        try:
+            await websocket_service.notify_ai_processing_completed(
+                conversation_id=conversation_id,
+                message_id=message_id,
+                success=False,
+                response_sent=False
+            )
+        except Exception as ws_error:
+            logger.warning(f"⚠️ [WS] Failed to send cancellation notification: {str(ws_error)}")
+        raise
+        
     except Exception as e:
         logger.error(f"💥 [AI] Unexpected error in AI agent processing: {str(e)}")
         
@@ -715,6 +754,26 @@ async def process_with_ai_agent(
         # Don't raise - AI processing failure shouldn't break webhook processing
 
 
+async def notify_ai_turn_dropped(conversation_id: str, message_ids: List[str]):
+    """
+    Close the AI processing notifications of messages dropped before their turn ran.
+    
+    Args:
+        conversation_id: Conversation identifier
+        message_ids: Buffered incoming message identifiers
+    """
+    for message_id in message_ids:
+        try:
+            await websocket_service.notify_ai_processing_completed(
+                conversation_id=conversation_id,
+                message_id=message_id,
+                success=False,
+                response_sent=False
+            )
+        except Exception as ws_error:
+            logger.warning(f"⚠️ [WS] Failed to send dropped-turn notification: {str(ws_error)}")
+
+
 async def process_sentiment_analysis(
     conversation_id: str,
     message_id: str,
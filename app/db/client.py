@@ -88,6 +88,7 @@ class DatabaseClient:
             await self._create_company_profile_indexes()
             await self._create_conversation_summaries_indexes()
             await self._create_conversation_sentiments_indexes()
+            await self._create_installation_reservations_indexes()
             
             logger.info("Database initialization completed successfully")
             
@@ -399,6 +400,17 @@ class DatabaseClient:
         await collection.create_indexes(indexes)
         logger.info("Created indexes for conversation_sentiments collection")
     
+    async def _create_installation_reservations_indexes(self) -> None:
+        """Create indexes for installation_reservations collection (unique slot makes booking atomic)."""
+        collection = self.db.installation_reservations
+        indexes = [
+            # Same name as the index created by /reservations/create-collection
+            IndexModel([("date", ASCENDING), ("time_slot", ASCENDING)], unique=True, name="date_1_time_slot_1"),
+            IndexModel([("created_at", DESCENDING)], name="created_at_-1")
+        ]
+        await collection.create_indexes(indexes)
+        logger.info("Created indexes for installation_reservations collection")
+    
     @property
     def is_connected(self) -> bool:
         """Check if the database client is connected."""
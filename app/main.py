@@ -39,6 +39,22 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to connect to MongoDB: {str(e)}")
         raise
     
+    # Build shared AI agent components (compiled graph, pooled model clients)
+    try:
+        from app.services.ai.agents.whatsapp_agent.agent_service import agent_service
+        await agent_service.initialize()
+        logger.info("AI agent service initialized")
+    except Exception as e:
+        # The agent retries lazily on the first message
+        logger.warning(f"AI agent service initialization deferred: {str(e)}")
+
+    # Pre-warm conversation summaries on transfer, close and idle
+    try:
+        from app.services.ai.agents.conversation_summarizer.prewarm_worker import summary_prewarm_worker
+        summary_prewarm_worker.start()
+    except Exception as e:
+        logger.warning(f"Summary pre-warm worker not started: {str(e)}")
+
     # Initialize other services
     logger.info(f"Application initialized in {settings.ENVIRONMENT} environment")
     
@@ -47,6 +63,27 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down WhatsApp Business Platform Backend")
     
+    # Stop queued and running AI agent turns
+    try:
+        from app.services.ai.agents.whatsapp_agent.scheduler import agent_scheduler
+        await agent_scheduler.shutdown()
+    except Exception as e:
+        logger.error(f"Error stopping AI agent scheduler: {str(e)}")
+    
+    # Stop background summary pre-warming
+    try:
+        from app.services.ai.agents.conversation_summarizer.prewarm_worker import summary_prewarm_worker
+        await summary_prewarm_worker.shutdown()
+    except Exception as e:
+        logger.error(f"Error stopping summary pre-warm worker: {str(e)}")
+    
+    # Close pooled async Qdrant connections
+    try:
+        from app.services.ai.shared.connection_pool import connection_pool
+        await connection_pool.aclose()
+    except Exception as e:
+        logger.error(f"Error closing Qdrant connections: {str(e)}")
+    
     # Close MongoDB connection
     try:
         await database.disconnect()
@@ -10,12 +10,13 @@ from operator import itemgetter
 from langchain_core.language_models import BaseLanguageModel
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
 
 from app.core.logger import logger
 from app.services.ai.config import ai_config
+from app.services.ai.shared.models import get_chat_model
+from app.services.ai.shared.prompt_layout import prompt_layout
+from app.services.ai.shared.utils import estimate_tokens
 from app.core.config import settings
 from app.services.ai.agents.conversation_summarizer.prompts.summarization_prompts import (
     get_summary_prompt,
@@ -30,6 +31,10 @@ from app.services.ai.agents.conversation_summarizer.schemas import (
 )
 
 
+# Bump when the static summarization instructions change (memoized per version)
+SUMMARY_PROMPT_VERSION = "2"
+
+
 class CombinedSummarySchema(BaseModel):
     """Validated schema returned by a single LLM call for all summary artifacts."""
     summary: str = Field(..., description="Concise, faithful conversation summary.")
@@ -54,12 +59,13 @@ class SummarizationChains:
         self._chains = {}
     
     def _get_llm(self) -> BaseLanguageModel:
-        """Get or create the language model."""
+        """Get or create the language model (background class of the LLM gateway)."""
         if self._llm is None:
-            self._llm = ChatOpenAI(
-                api_key=settings.OPENAI_API_KEY,
-                model=settings.OPENAI_MODEL,
+            self._llm = get_chat_model(
+                settings.OPENAI_MODEL,
                 temperature=0.3,
+                caller="conversation_summarizer",
+                priority="background",
                 max_tokens=2000
             )
         return self._llm
@@ -80,24 +86,20 @@ class SummarizationChains:
         s_llm = llm.with_structured_output(CombinedSummarySchema)
 
         # Compact system+user prompt. Keep instructions minimal for speed.
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    "You are a precise conversation summarizer for customer support dialogs. "
-                    "Follow the schema exactly and be faithful to the provided transcript. "
-                    "Do not invent facts.",
-                ),
-                (
-                    "user",
-                    "Transcript:\n{conversation_text}\n\n"
-                    "Style: {summary_style}\n"
-                    "Max summary length (chars): {max_length}\n"
-                    "Human agents:\n{human_agents}\n"
-                    "AI message count: {ai_message_count}\n"
-                    "Return a concise summary, key points (<=10), and topics (<=5)."
-                ),
-            ]
+        # Static instructions form the system prefix; the user message is ordered from
+        # least to most volatile so repeated summaries of a conversation share a prefix.
+        prompt = prompt_layout.chat_prompt(
+            "conversation_summarizer",
+            SUMMARY_PROMPT_VERSION,
+            "You are a precise conversation summarizer for customer support dialogs. "
+            "Follow the schema exactly and be faithful to the provided transcript. "
+            "Do not invent facts. "
+            "Return a concise summary, key points (<=10), and topics (<=5).",
+            "Style: {summary_style}\n"
+            "Max summary length (chars): {max_length}\n"
+            "Human agents:\n{human_agents}\n\n"
+            "Transcript:\n{conversation_text}\n\n"
+            "AI message count: {ai_message_count}"
         )
 
         # Single-call chain: prompt -> structured LLM -> validated object
@@ -113,6 +115,42 @@ class SummarizationChains:
             | s_llm
         )
 
+        # Rolling update: previous summary + only the messages after its watermark
+        merge_prompt = prompt_layout.chat_prompt(
+            "conversation_summarizer_merge",
+            SUMMARY_PROMPT_VERSION,
+            "You are a precise conversation summarizer for customer support dialogs. "
+            "You update an existing summary with new messages. "
+            "Follow the schema exactly and be faithful to the provided content. "
+            "Do not invent facts. "
+            "Return the updated summary of the whole conversation: keep what is still relevant, "
+            "add the new developments and mark items the new messages resolve. "
+            "Key points (<=10) and topics (<=5) also cover the whole conversation.",
+            "Style: {summary_style}\n"
+            "Max summary length (chars): {max_length}\n"
+            "Human agents:\n{human_agents}\n\n"
+            "Previous summary:\n{previous_summary}\n\n"
+            "Previous key points:\n{previous_key_points}\n\n"
+            "Previous topics: {previous_topics}\n\n"
+            "New messages since that summary:\n{conversation_text}\n\n"
+            "AI message count: {ai_message_count}"
+        )
+
+        self._chains["merge"] = (
+            {
+                "previous_summary": itemgetter("previous_summary"),
+                "previous_key_points": itemgetter("previous_key_points"),
+                "previous_topics": itemgetter("previous_topics"),
+                "conversation_text": itemgetter("conversation_text"),
+                "summary_style": itemgetter("summary_style"),
+                "max_length": itemgetter("max_length"),
+                "human_agents": itemgetter("human_agents"),
+                "ai_message_count": itemgetter("ai_message_count"),
+            }
+            | merge_prompt
+            | s_llm
+        )
+
         self._chains_initialized = True
     
     @property
@@ -122,19 +160,43 @@ class SummarizationChains:
             self._setup_chains()
         return self._chains['combined']
     
+    @property
+    def merge_chain(self):
+        """Get the rolling-update chain, initializing if needed."""
+        if not self._chains_initialized:
+            self._setup_chains()
+        return self._chains['merge']
+    
     async def generate_summary(
         self,
         conversation_data: ConversationData,
-        config: SummarizationConfig
+        config: SummarizationConfig,
+        previous: Optional[ConversationSummaryResponse] = None
     ) -> SummarizationResult:
         """
-        Generate a comprehensive summary of a conversation via a single structured LLM call.
+        Generate or update the summary of a conversation.
+        
+        ``conversation_data`` holds only the messages that ``previous`` does not cover.
+        The transcript is split into chunks of at most ``summary_chunk_max_tokens``;
+        the first chunk of a new conversation is summarized in one structured call and
+        every following chunk is merged into the running summary, so each LLM call
+        stays within the context budget and the cost follows the new messages.
+        
+        Args:
+            conversation_data: Conversation with the messages to summarize
+            config: Summarization settings
+            previous: Summary covering the earlier messages, if any
+            
+        Returns:
+            SummarizationResult with the summary of the whole conversation
         """
         start_time = datetime.now()
 
         try:
-            conversation_text = self._prepare_conversation_text(conversation_data)
-            if not conversation_text.strip():
+            chunks = self._chunk_lines(
+                self._format_message_lines(conversation_data), ai_config.summary_chunk_max_tokens
+            )
+            if not any(msg.content.strip() for msg in conversation_data.messages):
                 return SummarizationResult(
                     success=False,
                     error="No conversation content to summarize",
@@ -144,24 +206,44 @@ class SummarizationChains:
             ai_message_count = sum(
                 1 for msg in conversation_data.messages if msg.role == "ai_assistant"
             )
-            human_agents_text = self._prepare_human_agents_text(conversation_data.human_agents)
-
-            chain_inputs = {
-                "conversation_text": conversation_text,
-                "summary_style": config.style,
-                "max_length": config.max_summary_length,
-                "human_agents": human_agents_text,
-                "ai_message_count": ai_message_count,
-            }
+            message_count = len(conversation_data.messages)
+            human_agents = list(conversation_data.human_agents)
+            if previous:
+                ai_message_count += previous.ai_message_count
+                message_count += previous.message_count
+                known = {agent.get("name") for agent in human_agents}
+                human_agents = [agent for agent in previous.human_agents if agent.get("name") not in known] + human_agents
+            human_agents_text = self._prepare_human_agents_text(human_agents)
 
-            # One fast, validated call returning all fields.
-            combined = await self.combined_analysis_chain.ainvoke(chain_inputs)
+            combined = (
+                CombinedSummarySchema(summary=previous.summary, key_points=previous.key_points, topics=previous.topics)
+                if previous else None
+            )
+            for chunk in chunks:
+                chain_inputs = {
+                    "conversation_text": chunk,
+                    "summary_style": config.style,
+                    "max_length": config.max_summary_length,
+                    "human_agents": human_agents_text,
+                    "ai_message_count": ai_message_count,
+                }
+                if combined is None:
+                    # One fast, validated call returning all fields.
+                    combined = await self.combined_analysis_chain.ainvoke(chain_inputs)
+                else:
+                    combined = await self.merge_chain.ainvoke({
+                        **chain_inputs,
+                        "previous_summary": combined.summary,
+                        "previous_key_points": "\n".join(f"- {point}" for point in combined.key_points) or "None",
+                        "previous_topics": ", ".join(combined.topics) or "None",
+                    })
 
-            # Duration in minutes if timestamps are present
+            # Duration in minutes from the first summarized message
+            first_message_at = (previous.first_message_at if previous else None) or conversation_data.start_time
             duration_minutes = None
-            if conversation_data.start_time and conversation_data.end_time:
+            if first_message_at and conversation_data.end_time:
                 duration_minutes = (
-                    (conversation_data.end_time - conversation_data.start_time).total_seconds() / 60
+                    (conversation_data.end_time - first_message_at).total_seconds() / 60
                 )
 
             summary_response = ConversationSummaryResponse(
@@ -176,20 +258,24 @@ class SummarizationChains:
                     # Include sentiment data from conversation metadata
                     "current_sentiment_emoji": conversation_data.metadata.get("current_sentiment_emoji"),
                     "sentiment_confidence": conversation_data.metadata.get("sentiment_confidence"),
-                    "last_sentiment_analysis_at": conversation_data.metadata.get("last_sentiment_analysis_at")
+                    "last_sentiment_analysis_at": conversation_data.metadata.get("last_sentiment_analysis_at"),
+                    "new_messages": len(conversation_data.messages),
+                    "llm_calls": len(chunks),
                 },
                 generated_at=datetime.now(),
-                message_count=len(conversation_data.messages),
+                message_count=message_count,
                 ai_message_count=ai_message_count,
-                human_agents=conversation_data.human_agents,
-                customer=conversation_data.customer,
+                human_agents=human_agents,
+                customer=conversation_data.customer or (previous.customer if previous else None),
                 duration_minutes=duration_minutes,
+                first_message_at=first_message_at,
             )
 
             processing_time = (datetime.now() - start_time).total_seconds()
             logger.info(
                 f"Generated summary for conversation {conversation_data.conversation_id} "
-                f"in {processing_time:.2f}s (single-call structured output)"
+                f"in {processing_time:.2f}s ({len(conversation_data.messages)} new messages, "
+                f"{len(chunks)} calls, {'rolling update' if previous else 'full'})"
             )
 
             return SummarizationResult(
@@ -201,6 +287,33 @@ class SummarizationChains:
             logger.error(f"Error generating summary: {str(e)}")
             return SummarizationResult(success=False, error=str(e), processing_time=processing_time)
     
+    def _chunk_lines(self, lines: List[str], max_tokens: int) -> List[str]:
+        """
+        Group transcript lines into chunks within a token budget.
+        
+        Args:
+            lines: Formatted transcript lines, in order
+            max_tokens: Estimated token budget per chunk
+            
+        Returns:
+            Chunk texts; a single line longer than the budget is truncated
+        """
+        chunks: List[str] = []
+        current: List[str] = []
+        current_tokens = 0
+        for line in lines:
+            if estimate_tokens(line) > max_tokens:
+                line = line[:max_tokens * 4] + "…"
+            tokens = estimate_tokens(line)
+            if current and current_tokens + tokens > max_tokens:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(line)
+            current_tokens += tokens
+        if current:
+            chunks.append("\n".join(current))
+        return chunks
+    
     def _prepare_human_agents_text(self, human_agents: List[Dict[str, str]]) -> str:
         """
         Prepare human agents information for the prompt.
@@ -232,8 +345,20 @@ class SummarizationChains:
         Returns:
             Formatted conversation text
         """
+        return "\n".join(self._format_message_lines(conversation_data))
+    
+    def _format_message_lines(self, conversation_data: ConversationData) -> List[str]:
+        """
+        Format conversation messages as transcript lines.
+        
+        Args:
+            conversation_data: Conversation data
+            
+        Returns:
+            One line per message, in chronological order
+        """
         if not conversation_data.messages:
-            return ""
+            return []
         
         # Sort messages by timestamp
         sorted_messages = sorted(conversation_data.messages, key=lambda x: x.timestamp)
@@ -262,4 +387,4 @@ class SummarizationChains:
             message_line = f"[{timestamp}] {speaker}: {message.content}"
             conversation_lines.append(message_line)
         
-        return "\n".join(conversation_lines)
+        return conversation_lines
@@ -0,0 +1,251 @@
+"""
+Background pre-warming of conversation summaries.
+
+Summaries are otherwise generated when an agent opens them, so the agent who
+receives a transfer (or reopens a closed conversation) waits for the LLM. The
+worker precomputes them when a conversation is transferred, closed or goes
+idle, and stores them through the summarizer service, so the on-demand
+endpoint finds a stored summary (or only a small rolling delta):
+
+- at most ``summary_prewarm_workers`` summaries are generated at a time;
+- transfers run before closes, closes before idle conversations;
+- a conversation is queued once, a more urgent event only raises its priority,
+  and an event that arrives while it is being summarized re-queues it.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import itertools
+import time
+
+from app.core.logger import logger
+from app.db.client import database
+from app.services.ai.agents.conversation_summarizer.schemas import (
+    ConversationSummaryRequest,
+    SummarizationResult
+)
+from app.services.ai.agents.conversation_summarizer.summarizer_service import summarizer_service
+from app.services.ai.config import ai_config
+
+
+SummaryHandler = Callable[[ConversationSummaryRequest], Awaitable[SummarizationResult]]
+
+# Lower runs first
+PREWARM_PRIORITIES = {"transfer": 0, "close": 1, "idle": 2}
+
+
+class SummaryPrewarmWorker:
+    """Prioritized, bounded worker pool that keeps stored summaries current."""
+
+    def __init__(
+        self,
+        summarize: Optional[SummaryHandler] = None,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+    ):
+        """
+        Args:
+            summarize: Coroutine function generating and storing a summary;
+                defaults to ``summarizer_service.summarize_conversation``
+            max_workers: Concurrent summaries
+            max_pending: Queued conversations before new events are rejected
+        """
+        self._summarize = summarize
+        self.max_workers = max_workers or ai_config.summary_prewarm_workers
+        self.max_pending = max_pending or ai_config.summary_prewarm_max_pending
+
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._sweeper: Optional[asyncio.Task] = None
+        self._sequence = itertools.count()
+        self._pending: Dict[str, str] = {}  # conversation_id -> most urgent queued reason
+        self._running: Set[str] = set()
+        self._last_idle_cutoff: Optional[datetime] = None
+        self._durations_ms: List[float] = []
+        self._counters = self._new_counters()
+
+    @staticmethod
+    def _new_counters() -> Dict[str, Any]:
+        return {
+            "submitted": 0,
+            "deduplicated": 0,
+            "upgraded": 0,
+            "rejected": 0,
+            "completed": 0,
+            "failed": 0,
+            "by_reason": {reason: 0 for reason in PREWARM_PRIORITIES},
+        }
+
+    def _ensure_started(self) -> None:
+        """Start the worker pool on the running event loop."""
+        if self._workers and self._workers[0].get_loop() is asyncio.get_running_loop():
+            return
+
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [
+            asyncio.create_task(self._worker(index), name=f"summary-prewarm-{index}")
+            for index in range(self.max_workers)
+        ]
+        # Conversations queued on a previous loop are re-queued on this one
+        for conversation_id, reason in self._pending.items():
+            self._push(conversation_id, reason)
+        logger.info(f"🔥 [PREWARM] Started {self.max_workers} summary pre-warm workers")
+
+    def start(self) -> None:
+        """Start the workers and the idle-conversation sweep (application startup)."""
+        if not ai_config.summary_prewarm_enabled:
+            return
+        self._ensure_started()
+        if ai_config.summary_prewarm_sweep_seconds > 0 and (self._sweeper is None or self._sweeper.done()):
+            self._sweeper = asyncio.create_task(self._sweep_loop(), name="summary-prewarm-sweep")
+
+    def submit(self, conversation_id: str, reason: str) -> bool:
+        """
+        Queue a conversation for a background summary.
+
+        Args:
+            conversation_id: Conversation identifier
+            reason: Triggering event: "transfer", "close" or "idle"
+
+        Returns:
+            False if pre-warming is disabled or the queue is full
+        """
+        if not ai_config.summary_prewarm_enabled:
+            return False
+        if reason not in PREWARM_PRIORITIES:
+            raise ValueError(f"Unknown summary pre-warm reason: {reason}")
+
+        self._ensure_started()
+
+        queued_reason = self._pending.get(conversation_id)
+        if queued_reason is not None:
+            if PREWARM_PRIORITIES[queued_reason] <= PREWARM_PRIORITIES[reason]:
+                self._counters["deduplicated"] += 1
+                return True
+            self._counters["upgraded"] += 1
+        elif len(self._pending) >= self.max_pending:
+            self._counters["rejected"] += 1
+            logger.warning(
+                f"⚠️ [PREWARM] Dropping {reason} summary for conversation {conversation_id}: "
+                f"{len(self._pending)} conversations already pending"
+            )
+            return False
+
+        self._pending[conversation_id] = reason
+        self._counters["submitted"] += 1
+        self._counters["by_reason"][reason] += 1
+
+        # A running conversation is re-queued by its worker when the summary ends
+        if conversation_id not in self._running:
+            self._push(conversation_id, reason)
+
+        logger.info(f"📥 [PREWARM] Queued {reason} summary for conversation {conversation_id}")
+        return True
+
+    def _push(self, conversation_id: str, reason: str) -> None:
+        entry: Tuple[int, int, str, str] = (
+            PREWARM_PRIORITIES[reason], next(self._sequence), conversation_id, reason
+        )
+        self._queue.put_nowait(entry)
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            _, _, conversation_id, reason = await self._queue.get()
+            try:
+                # Entries superseded by a more urgent event, or already summarized, are skipped
+                if self._pending.get(conversation_id) != reason or conversation_id in self._running:
+                    continue
+                del self._pending[conversation_id]
+                await self._run(conversation_id, reason)
+            finally:
+                self._queue.task_done()
+
+            # Events that arrived during the run need a summary of the newer messages
+            if conversation_id in self._pending and conversation_id not in self._running:
+                self._push(conversation_id, self._pending[conversation_id])
+
+    async def _run(self, conversation_id: str, reason: str) -> None:
+        summarize = self._summarize or summarizer_service.summarize_conversation
+        self._running.add(conversation_id)
+        started = time.monotonic()
+        try:
+            result = await summarize(ConversationSummaryRequest(conversation_id=conversation_id))
+            if result.success:
+                self._counters["completed"] += 1
+            else:
+                self._counters["failed"] += 1
+                logger.warning(
+                    f"⚠️ [PREWARM] No {reason} summary for conversation {conversation_id}: {result.error}"
+                )
+        except Exception as e:
+            self._counters["failed"] += 1
+            logger.error(f"❌ [PREWARM] {reason} summary failed for conversation {conversation_id}: {str(e)}")
+        finally:
+            self._running.discard(conversation_id)
+            self._durations_ms = (self._durations_ms + [(time.monotonic() - started) * 1000])[-500:]
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(ai_config.summary_prewarm_sweep_seconds)
+            try:
+                await self.sweep_idle_conversations()
+            except Exception as e:
+                logger.error(f"❌ [PREWARM] Idle conversation sweep failed: {str(e)}")
+
+    async def sweep_idle_conversations(self, now: Optional[datetime] = None) -> int:
+        """
+        Queue open conversations that went idle since the previous sweep.
+
+        Args:
+            now: Reference time (defaults to the current UTC time)
+
+        Returns:
+            Number of conversations queued
+        """
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - timedelta(minutes=ai_config.summary_prewarm_idle_minutes)
+        since = self._last_idle_cutoff or cutoff - timedelta(seconds=ai_config.summary_prewarm_sweep_seconds)
+        self._last_idle_cutoff = cutoff
+
+        cursor = database.db.conversations.find(
+            {"status": {"$ne": "resolved"}, "last_message_at": {"$gt": since, "$lte": cutoff}},
+            {"_id": 1}
+        ).limit(self.max_pending)
+        conversations = await cursor.to_list(length=self.max_pending)
+
+        queued = sum(1 for conversation in conversations if self.submit(str(conversation["_id"]), "idle"))
+        if queued:
+            logger.info(f"💤 [PREWARM] Queued {queued} idle conversations for summaries")
+        return queued
+
+    async def shutdown(self) -> None:
+        """Drop queued conversations and stop the workers and the sweep."""
+        self._pending.clear()
+
+        tasks = self._workers + ([self._sweeper] if self._sweeper is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        self._workers = []
+        self._sweeper = None
+        self._queue = None
+        logger.info("🛑 [PREWARM] Summary pre-warm worker stopped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, per-reason and duration statistics."""
+        durations = self._durations_ms
+        return {
+            "enabled": ai_config.summary_prewarm_enabled,
+            "workers": len(self._workers),
+            "max_workers": self.max_workers,
+            "pending_conversations": len(self._pending),
+            "running_conversations": len(self._running),
+            "avg_duration_ms": round(sum(durations) / len(durations), 2) if durations else 0.0,
+            **self._counters,
+        }
+
+
+# Global summary pre-warm worker instance
+summary_prewarm_worker = SummaryPrewarmWorker()
@@ -29,6 +29,8 @@ class ConversationSummaryResponse(BaseModel):
     human_agents: List[Dict[str, str]] = Field(default_factory=list, description="Human agents in conversation")
     customer: Optional[Dict[str, str]] = Field(None, description="Customer information")
     duration_minutes: Optional[float] = Field(None, description="Duration of conversation in minutes")
+    first_message_at: Optional[datetime] = Field(None, description="Timestamp of the first summarized message")
+    last_message_id: Optional[str] = Field(None, description="Newest message included in the summary (rolling watermark)")
 
 
 class MessageData(BaseModel):
@@ -53,6 +55,7 @@ class ConversationData(BaseModel):
     start_time: Optional[datetime] = Field(None, description="Conversation start time")
     end_time: Optional[datetime] = Field(None, description="Conversation end time")
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Conversation metadata")
+    has_more: bool = Field(False, description="Newer messages were left for the next round by the load budget")
 
 
 class SummarizationConfig(BaseModel):
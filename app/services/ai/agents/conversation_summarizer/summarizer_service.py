@@ -19,11 +19,20 @@ from app.services.ai.agents.conversation_summarizer.schemas import (
     SummarizationResult,
     StoredConversationSummary
 )
+from app.services.ai.config import ai_config
+from app.services.ai.shared.transcript_service import Transcript, message_text, transcript_service
 from app.services.ai.shared.utils import validate_conversation_id
-from app.services import conversation_service, cursor_message_service, audit_service
+from app.services import conversation_service, audit_service
 from app.services.base_service import BaseService
 
 
+# Message fields used to build the transcript, human agents and customer info
+_MESSAGE_PROJECTION = {
+    "_id": 1, "conversation_id": 1, "text_content": 1, "content": 1, "sender_role": 1, "timestamp": 1,
+    "type": 1, "sender_name": 1, "sender_email": 1, "sender_id": 1, "sender_phone": 1, "metadata": 1
+}
+
+
 class ConversationSummarizerService(BaseService):
     """
     Service for generating conversation summaries using AI.
@@ -43,6 +52,12 @@ class ConversationSummarizerService(BaseService):
         """
         Generate a summary for a conversation.
         
+        Summaries are rolling: the latest summary stores the ID of the newest message
+        it covers, and only messages after that watermark are loaded (oldest first)
+        and merged into it. A delta larger than the load budget is merged in rounds,
+        each advancing the watermark to the last message it merged. When nothing new
+        arrived, the latest summary is returned without an LLM call.
+        
         Args:
             request: Summarization request
             
@@ -58,8 +73,18 @@ class ConversationSummarizerService(BaseService):
                     processing_time=0.0
                 )
             
-            # Load conversation data first to check message count
-            conversation_data = await self._load_conversation_data(request.conversation_id)
+            # Latest summary (process cache, then MongoDB) and its message watermark
+            cache_key = f"{request.conversation_id}_{request.summary_type}"
+            previous = self._get_cached_summary(cache_key) or await self.get_stored_summary(request.conversation_id)
+            if previous and not previous.last_message_id:
+                previous = None  # Written before watermarks existed: summarize from scratch
+            
+            # Load only the messages the previous summary does not cover
+            conversation_data = await self._load_conversation_data(
+                request.conversation_id,
+                after_message_id=previous.last_message_id if previous else None,
+                known_agents=previous.human_agents if previous else None
+            )
             if not conversation_data:
                 return SummarizationResult(
                     success=False,
@@ -67,22 +92,15 @@ class ConversationSummarizerService(BaseService):
                     processing_time=0.0
                 )
             
-            # Check cache with message count validation
-            current_message_count = len(conversation_data.messages)
-            cache_key = f"{request.conversation_id}_{request.summary_type}_{current_message_count}"
-            cached_summary = self._get_cached_summary(cache_key)
-            
-            # Use cache if available (message count is part of the key)
-            if cached_summary:
-                logger.info(f"Returning cached summary for conversation {request.conversation_id} (message count: {current_message_count})")
+            if not conversation_data.messages:
+                logger.info(f"Returning cached summary for conversation {request.conversation_id} (no new messages)")
+                self._cache_summary(cache_key, previous)
                 return SummarizationResult(
                     success=True,
-                    summary=cached_summary,
+                    summary=previous,
                     processing_time=0.0
                 )
             
-
-            
             # Create summarization config
             config = SummarizationConfig(
                 max_summary_length=500,
@@ -93,13 +111,10 @@ class ConversationSummarizerService(BaseService):
                 style="professional"
             )
             
-            # Generate summary
-            result = await self.chains.generate_summary(conversation_data, config)
+            # Summarize the new messages and merge them into the previous summary
+            result = await self._merge_delta(request, conversation_data, config, previous)
             
             if result.success and result.summary:
-                # Set the user who generated the summary
-                result.summary.generated_by = request.user_id
-                
                 # Store summary in MongoDB
                 await self._store_summary(request.conversation_id, result.summary, request.user_id)
                 
@@ -119,6 +134,54 @@ class ConversationSummarizerService(BaseService):
                 processing_time=0.0
             )
     
+    async def _merge_delta(
+        self,
+        request: ConversationSummaryRequest,
+        conversation_data: ConversationData,
+        config: SummarizationConfig,
+        previous: Optional[ConversationSummaryResponse]
+    ) -> SummarizationResult:
+        """
+        Merge the messages after the watermark into the summary, one load budget per round.
+        
+        Args:
+            request: Summarization request
+            conversation_data: First round of messages after the watermark
+            config: Summarization config
+            previous: Summary covering the messages before the watermark, if any
+            
+        Returns:
+            SummarizationResult whose watermark is the last message actually merged
+        """
+        merged: Optional[SummarizationResult] = None
+        while True:
+            result = await self.chains.generate_summary(conversation_data, config, previous=previous)
+            if not (result.success and result.summary):
+                if merged is None:
+                    return result
+                # Keep the rounds merged so far; the next call resumes from their watermark
+                logger.warning(f"Summary round failed for conversation {request.conversation_id}: {result.error}")
+                return merged
+            
+            # Set the user who generated the summary and advance the watermark to the last merged message
+            result.summary.generated_by = request.user_id
+            result.summary.last_message_id = conversation_data.messages[-1].message_id
+            if merged is not None:
+                result.processing_time += merged.processing_time
+            merged = result
+            
+            if not conversation_data.has_more:
+                return merged
+            
+            previous = result.summary
+            conversation_data = await self._load_conversation_data(
+                request.conversation_id,
+                after_message_id=previous.last_message_id,
+                known_agents=previous.human_agents
+            )
+            if not conversation_data or not conversation_data.messages:
+                return merged
+    
     async def get_stored_summary(self, conversation_id: str) -> Optional[ConversationSummaryResponse]:
         """
         Get stored summary from MongoDB.
@@ -236,15 +299,23 @@ class ConversationSummarizerService(BaseService):
         except Exception as e:
             logger.error(f"Error logging summary generation: {str(e)}")
     
-    async def _load_conversation_data(self, conversation_id: str) -> Optional[ConversationData]:
+    async def _load_conversation_data(
+        self,
+        conversation_id: str,
+        after_message_id: Optional[str] = None,
+        known_agents: Optional[List[Dict[str, str]]] = None
+    ) -> Optional[ConversationData]:
         """
         Load conversation data from database.
         
         Args:
             conversation_id: Conversation ID
+            after_message_id: Only load messages newer than this one (rolling watermark)
+            known_agents: Human agents already resolved by the previous summary
             
         Returns:
-            ConversationData or None if not found
+            ConversationData (with no messages when nothing is new after the watermark),
+            or None if the conversation or its messages are not found
         """
         try:
             # Load conversation
@@ -253,20 +324,17 @@ class ConversationSummarizerService(BaseService):
                 logger.warning(f"Conversation {conversation_id} not found")
                 return None
             
-            # Load messages using cursor service
-            messages_result = await cursor_message_service.get_messages_cursor(
-                conversation_id=conversation_id,
-                limit=1000  # Limit to prevent memory issues
-            )
+            transcript = await self._load_messages(conversation_id, after_message_id)
+            messages = transcript.messages
             
-            messages = messages_result.get("messages", [])
-            
-            if not messages:
+            if not messages and not after_message_id:
                 logger.warning(f"No messages found for conversation {conversation_id}")
                 return None
             
-            # Extract human agents from messages
-            human_agents = await self._extract_human_agents(messages)
+            # Extract human agents from messages (agents known from the previous summary are not looked up again)
+            human_agents = await self._extract_human_agents(
+                messages, known_names={agent.get("name") for agent in known_agents or []}
+            )
             
             # Extract customer information
             customer = self._extract_customer_info(messages, conversation)
@@ -317,7 +385,8 @@ class ConversationSummarizerService(BaseService):
                     "current_sentiment_emoji": conversation.get("current_sentiment_emoji"),
                     "sentiment_confidence": conversation.get("sentiment_confidence"),
                     "last_sentiment_analysis_at": conversation.get("last_sentiment_analysis_at")
-                }
+                },
+                has_more=transcript.truncated
             )
             
             logger.info(f"Loaded {len(message_data_list)} messages for conversation {conversation_id}")
@@ -327,17 +396,53 @@ class ConversationSummarizerService(BaseService):
             logger.error(f"Error loading conversation data: {str(e)}")
             return None
     
-    async def _extract_human_agents(self, messages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    async def _load_messages(
+        self,
+        conversation_id: str,
+        after_message_id: Optional[str] = None
+    ) -> Transcript:
+        """
+        Load the oldest messages after the watermark, within ``summary_max_messages``
+        and ``summary_max_transcript_tokens``.
+        
+        Loading oldest first means a truncated load leaves only newer messages for
+        the next round, so advancing the watermark never skips a message.
+        
+        Args:
+            conversation_id: Conversation ID
+            after_message_id: Newest message already summarized (None for the whole conversation)
+            
+        Returns:
+            Transcript of the messages, oldest first (``truncated`` when more remain)
+        """
+        return await transcript_service.load(
+            conversation_id,
+            formatter=lambda msg: f"{msg.get('sender_role', 'user')}: {message_text(msg)}",
+            max_tokens=ai_config.summary_max_transcript_tokens,
+            max_messages=ai_config.summary_max_messages,
+            after_message_id=after_message_id,
+            projection=_MESSAGE_PROJECTION,
+            oldest_first=True,
+            db=await self._get_db()
+        )
+    
+    async def _extract_human_agents(
+        self,
+        messages: List[Dict[str, Any]],
+        known_names: Optional[set] = None
+    ) -> List[Dict[str, str]]:
         """
         Extract human agents from messages.
         
         Args:
             messages: List of message dictionaries
+            known_names: Agent names already resolved (skipped)
             
         Returns:
             List of human agents with name and email
         """
         human_agents = {}
+        known_names = known_names or set()
         
         for msg in messages:
             role = msg.get("sender_role", "customer")
@@ -345,6 +450,8 @@ class ConversationSummarizerService(BaseService):
             # Only include human agents (not AI assistant or customer)
             if role == "agent":
                 sender_name = msg.get("sender_name")
+                if sender_name in known_names or sender_name in human_agents:
+                    continue
                 sender_id = msg.get("sender_id")
                 sender_email = msg.get("sender_email")  # Try to get email from message first
                 
@@ -370,7 +477,7 @@ class ConversationSummarizerService(BaseService):
                 if not sender_email and sender_id:
                     try:
                         from app.services.conversation_service import conversation_service
-                        conversation = await conversation_service.get_conversation(msg.get("conversation_id"))
+                        conversation = await conversation_service.get_conversation(str(msg.get("conversation_id")))
                         if conversation and conversation.get("participants"):
                             for participant in conversation.get("participants", []):
                                 if participant.get("user_id") == str(sender_id) and participant.get("email"):
@@ -491,7 +598,7 @@ class ConversationSummarizerService(BaseService):
             conversation_id: Specific conversation to clear, or None for all
         """
         if conversation_id:
-            # Clear specific conversation cache (handles new format with message count)
+            # Clear specific conversation cache (all summary types)
             keys_to_remove = [
                 key for key in self._cache.keys()
                 if key.startswith(f"{conversation_id}_")
@@ -0,0 +1,122 @@
+"""
+Micro-batching of sentiment analyses across conversations.
+
+Analysis requests are held for up to ``batch_window_ms`` (or until
+``batch_max_items`` conversations are pending) and then handed to the service
+as one batch, so concurrent conversations share LLM requests and a single bulk
+write. A conversation appears at most once per batch: a newer request replaces
+the pending one, and both callers get the same result, because an analysis
+already covers every customer message after the stored watermark. Batches run
+one at a time, so a conversation is never analyzed twice concurrently and
+requests arriving during a slow batch simply accumulate into the next one.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+
+from app.core.logger import logger
+from app.services.ai.agents.sentiment_analyzer.config import sentiment_config
+from app.services.ai.agents.sentiment_analyzer.schemas import (
+    SentimentAnalysisRequest,
+    SentimentAnalysisResult
+)
+
+
+BatchHandler = Callable[[List[SentimentAnalysisRequest]], Awaitable[List[SentimentAnalysisResult]]]
+
+
+class SentimentBatcher:
+    """Collects pending sentiment analyses and flushes them as micro-batches."""
+
+    def __init__(
+        self,
+        handler: BatchHandler,
+        window_ms: Optional[int] = None,
+        max_items: Optional[int] = None
+    ):
+        """
+        Args:
+            handler: Coroutine function analyzing a list of requests (one per conversation)
+            window_ms: Maximum wait before a batch is flushed
+            max_items: Pending conversations that trigger an immediate flush
+        """
+        self.handler = handler
+        self.window_ms = sentiment_config.batch_window_ms if window_ms is None else window_ms
+        self.max_items = max_items or sentiment_config.batch_max_items
+
+        self._batch: Dict[str, Tuple[SentimentAnalysisRequest, asyncio.Future]] = {}
+        self._timer: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._stats = {"requests": 0, "coalesced": 0, "batches": 0, "batched_conversations": 0}
+
+    async def submit(self, request: SentimentAnalysisRequest) -> SentimentAnalysisResult:
+        """
+        Queue a request for the next batch and wait for its result.
+
+        Args:
+            request: Sentiment analysis request
+
+        Returns:
+            SentimentAnalysisResult for the request's conversation
+        """
+        self._stats["requests"] += 1
+        loop = asyncio.get_running_loop()
+
+        pending = self._batch.get(request.conversation_id)
+        if pending is not None:
+            previous, future = pending
+            self._stats["coalesced"] += 1
+            if previous.is_first_message and not request.is_first_message:
+                request = request.model_copy(update={"is_first_message": True})
+        else:
+            future = loop.create_future()
+        self._batch[request.conversation_id] = (request, future)
+
+        if len(self._batch) >= self.max_items:
+            self._cancel_timer()
+            loop.create_task(self._flush())
+        elif self._timer is None:
+            self._timer = loop.create_task(self._flush_after(self.window_ms / 1000))
+
+        return await asyncio.shield(future)
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    async def _flush_after(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._timer = None
+        await self._flush()
+
+    async def _flush(self) -> None:
+        async with self._flush_lock:
+            batch, self._batch = self._batch, {}
+            if batch:
+                await self._run_batch(batch)
+
+    async def _run_batch(self, batch: Dict[str, Tuple[SentimentAnalysisRequest, asyncio.Future]]) -> None:
+        self._stats["batches"] += 1
+        self._stats["batched_conversations"] += len(batch)
+        logger.info(f"📦 [SENTIMENT] Flushing sentiment batch of {len(batch)} conversations")
+
+        entries = list(batch.values())
+        try:
+            results = await self.handler([request for request, _ in entries])
+            for (_, future), result in zip(entries, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            logger.error(f"❌ [SENTIMENT] Sentiment batch failed: {str(e)}")
+            for _, future in entries:
+                if not future.done():
+                    future.set_exception(e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Request, coalescing and batch-size counters."""
+        stats: Dict[str, Any] = dict(self._stats, pending=len(self._batch))
+        stats["avg_batch_size"] = (
+            round(stats["batched_conversations"] / stats["batches"], 2) if stats["batches"] else 0.0
+        )
+        return stats
@@ -5,22 +5,27 @@ Uses structured output to analyze message sentiment and return appropriate emoji
 
 import asyncio
 import time
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from pathlib import Path
 
-from langchain_openai import ChatOpenAI
+from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 
 from app.core.logger import logger
-from app.services.ai.config import ai_config
+from app.services.ai.shared.models import get_chat_model
+from app.services.ai.shared.prompt_layout import prompt_layout, split_template
 from app.services.ai.agents.sentiment_analyzer.config import sentiment_config
 from app.services.ai.agents.sentiment_analyzer.schemas import (
-    SentimentType, SentimentEmoji, SentimentAnalysisResponse
+    SentimentType, SentimentEmoji, SentimentAnalysisResponse, ConversationSentimentData
 )
 
 
+# Bump when the static part of the sentiment prompts changes (memoized per version)
+SENTIMENT_PROMPT_VERSION = "2"
+
+
 class SentimentAnalysisSchema(BaseModel):
     """Structured output schema for sentiment analysis."""
     sentiment_emoji: SentimentEmoji = Field(..., description="The most appropriate emoji from the list")
@@ -31,7 +36,7 @@ class SentimentChains:
     LangChain chains for sentiment analysis.
     """
     
-    def __init__(self, llm: Optional[ChatOpenAI] = None):
+    def __init__(self, llm: Optional[BaseChatModel] = None):
         """
         Initialize sentiment analysis chains.
         
@@ -39,20 +44,34 @@ class SentimentChains:
             llm: Language model to use for sentiment analysis
         """
         self._llm = llm
+        self._batch_llm = llm  # Injected models also serve multi-conversation prompts
         self._chains_initialized = False
         self._parser = PydanticOutputParser(pydantic_object=SentimentAnalysisSchema)
         
-    def _get_llm(self) -> ChatOpenAI:
-        """Get or create the language model."""
+    def _get_llm(self) -> BaseChatModel:
+        """Get or create the language model (background class of the LLM gateway)."""
         if self._llm is None:
-            self._llm = ChatOpenAI(
-                api_key=ai_config.openai_api_key,
-                model=sentiment_config.model_name,
+            self._llm = get_chat_model(
+                sentiment_config.model_name,
                 temperature=sentiment_config.temperature,
+                caller="sentiment_analyzer",
+                priority="background",
                 max_tokens=sentiment_config.max_tokens
             )
         return self._llm
     
+    def _get_batch_llm(self) -> BaseChatModel:
+        """Get or create the model for multi-conversation prompts (one answer line per conversation)."""
+        if self._batch_llm is None:
+            self._batch_llm = get_chat_model(
+                sentiment_config.model_name,
+                temperature=sentiment_config.temperature,
+                caller="sentiment_analyzer_batch",
+                priority="background",
+                max_tokens=sentiment_config.max_tokens * sentiment_config.batch_size
+            )
+        return self._batch_llm
+    
     def _setup_chains(self):
         """Initialize the sentiment analysis chain."""
         if self._chains_initialized:
@@ -65,55 +84,110 @@ class SentimentChains:
         
         # Create the chain (no structured output for simple emoji response)
         self._sentiment_chain = prompt_template | self._llm
+        self._batch_chain = self._load_batch_prompt() | self._get_batch_llm()
         
         self._chains_initialized = True
         logger.info("Sentiment analysis chains initialized")
     
     def _load_sentiment_prompt(self) -> ChatPromptTemplate:
-        """Load the sentiment analysis prompt template."""
+        """Load the sentiment analysis prompt template (static instructions as a memoized prefix)."""
+        prompt_content = None
         try:
             # Try to load from file first
             prompt_path = Path("app/services/ai/agents/sentiment_analyzer/prompts/sentiment_analysis.md")
             if prompt_path.exists():
                 prompt_content = prompt_path.read_text(encoding="utf-8")
-                return ChatPromptTemplate.from_template(prompt_content)
         except Exception as e:
             logger.warning(f"Could not load sentiment prompt from file: {str(e)}")
         
         # Fallback to inline prompt
-        fallback_prompt = """
-        You are a sentiment analysis expert. Your task is to analyze the customer's emotional state based on ALL their messages in the conversation and respond with ONLY the most appropriate emoji.
+        if prompt_content is None:
+            prompt_content = """
+        You are a sentiment analysis expert. Your task is to update the customer's emotional state using the previous assessment of the conversation and the customer's NEW messages.
         
         ## Available Emojis
         {sentiment_emojis}
         
-        ## Customer Messages Context
+        ## Instructions
+        1. Start from the previous assessment; it summarizes the customer's earlier messages
+        2. Update it with the new messages, giving them more weight when the mood has changed
+        3. Respond on a single line: emoji | confidence between 0 and 1 | rationale of at most 12 words
+        4. Use exactly one emoji from the provided list and no other text
+        
+        <!-- dynamic -->
+        
+        ## Previous Assessment
+        {previous_sentiment_context}
+        
+        ## New Customer Messages
         {customer_messages_context}
         
+        ## Response
+        """
+        
+        return self._layout_prompt("sentiment_analyzer", prompt_content)
+    
+    def _load_batch_prompt(self) -> ChatPromptTemplate:
+        """Load the multi-conversation sentiment prompt template (static instructions as a memoized prefix)."""
+        prompt_content = None
+        try:
+            prompt_path = Path("app/services/ai/agents/sentiment_analyzer/prompts/sentiment_batch_analysis.md")
+            if prompt_path.exists():
+                prompt_content = prompt_path.read_text(encoding="utf-8")
+        except Exception as e:
+            logger.warning(f"Could not load batch sentiment prompt from file: {str(e)}")
+        
+        if prompt_content is None:
+            prompt_content = """
+        You are a sentiment analysis expert. Below are independent customer conversations.
+        For each one, update the customer's emotional state from its previous assessment and its NEW messages.
+        
+        ## Available Emojis
+        {sentiment_emojis}
+        
         ## Instructions
-        1. Analyze the customer's emotional state across ALL their messages
-        2. Consider the progression of their mood throughout the conversation
-        3. Respond with ONLY the emoji that best represents their current emotional state
-        4. Do not provide any explanation, reasoning, or additional text
-        5. Respond with exactly one emoji from the provided list
+        Respond with exactly one line per conversation, in order:
+        conversation number | emoji | confidence between 0 and 1 | rationale of at most 12 words
+        
+        <!-- dynamic -->
+        
+        ## Conversations ({conversation_count})
+        {conversations_context}
         
         ## Response
-        Respond with ONLY the emoji:
         """
         
-        return ChatPromptTemplate.from_template(fallback_prompt)
+        return self._layout_prompt("sentiment_analyzer_batch", prompt_content)
+    
+    @staticmethod
+    def _layout_prompt(agent: str, prompt_content: str) -> ChatPromptTemplate:
+        """Split a prompt at its dynamic marker; the static part is rendered once with the emoji list."""
+        static_template, dynamic_template = split_template(prompt_content)
+        return prompt_layout.chat_prompt(
+            agent,
+            SENTIMENT_PROMPT_VERSION,
+            static_template,
+            dynamic_template,
+            sentiment_emojis=sentiment_config.sentiment_emojis
+        )
     
     async def analyze_sentiment(
         self, 
         conversation_id: str,
-        customer_messages: List[Dict[str, Any]]
+        customer_messages: List[Dict[str, Any]],
+        previous_state: Optional[ConversationSentimentData] = None
     ) -> SentimentAnalysisResponse:
         """
-        Analyze sentiment based on all customer messages in the conversation.
+        Update the conversation sentiment with new customer messages.
+        
+        The prompt is bounded: the previous assessment (emoji, confidence, rationale)
+        stands in for earlier messages, and only the newest
+        ``incremental_max_messages`` messages are included.
         
         Args:
             conversation_id: Conversation ID
-            customer_messages: List of all customer messages in the conversation
+            customer_messages: Customer messages not yet analyzed (oldest first)
+            previous_state: Rolling sentiment state of the conversation, if any
             
         Returns:
             SentimentAnalysisResponse with analysis results
@@ -125,13 +199,15 @@ class SentimentChains:
             if not self._chains_initialized:
                 self._setup_chains()
             
-            # Format customer messages context
-            customer_messages_context = self._format_customer_messages(customer_messages)
+            # Format bounded prompt context
+            customer_messages_context = self._format_customer_messages(
+                customer_messages[-sentiment_config.incremental_max_messages:]
+            )
             
             # Prepare prompt variables
             prompt_vars = {
                 "customer_messages_context": customer_messages_context,
-                "sentiment_emojis": sentiment_config.sentiment_emojis
+                "previous_sentiment_context": self._format_previous_state(previous_state)
             }
             
             # Run sentiment analysis with timeout
@@ -147,21 +223,18 @@ class SentimentChains:
             # Calculate processing time
             processing_time_ms = (time.time() - start_time) * 1000
             
-            # Extract emoji from response
             response_text = result.content.strip()
             logger.info(f"Raw sentiment response: {response_text}")
             
-            # Find the emoji in the response
-            sentiment_emoji = self._extract_emoji_from_response(response_text)
+            sentiment_emoji, confidence, rationale = self._parse_response(response_text)
             
-            # Create response with default values for removed fields
             response = SentimentAnalysisResponse(
                 conversation_id=conversation_id,
                 message_id="",  # Will be set by caller
                 sentiment_type="neutral",  # Default since we removed it from schema
                 sentiment_emoji=sentiment_emoji,
-                confidence=0.8,  # Default confidence since we removed it from schema
-                reasoning="Analysis based on all customer messages",  # Default reasoning
+                confidence=confidence,
+                reasoning=rationale,
                 language="auto",  # Default language since we removed it from schema
                 processing_time_ms=processing_time_ms
             )
@@ -176,6 +249,27 @@ class SentimentChains:
             logger.error(f"Traceback: {traceback.format_exc()}")
             raise
     
+    def _format_previous_state(self, previous_state: Optional[ConversationSentimentData]) -> str:
+        """
+        Format the rolling sentiment state for the prompt.
+        
+        Args:
+            previous_state: Stored conversation sentiment, if any
+            
+        Returns:
+            One-line summary of the previous assessment
+        """
+        if not previous_state or not previous_state.current_sentiment:
+            return "None (first analysis of this conversation)."
+        
+        emoji = getattr(previous_state.current_sentiment, "value", previous_state.current_sentiment)
+        confidence = previous_state.confidence if previous_state.confidence is not None else 0.8
+        rationale = previous_state.rationale or "no rationale recorded"
+        return (
+            f"{emoji} (confidence {confidence:.2f}) after {previous_state.inbound_messages_analyzed} "
+            f"customer messages: {rationale}"
+        )
+    
     def _format_customer_messages(self, customer_messages: List[Dict[str, Any]]) -> str:
         """
         Format customer messages for the prompt context.
@@ -184,14 +278,17 @@ class SentimentChains:
             customer_messages: List of customer message dictionaries
             
         Returns:
-            Formatted string with all customer messages
+            Formatted string with the customer messages (each truncated)
         """
         if not customer_messages:
             return "No customer messages available."
         
+        max_chars = sentiment_config.incremental_message_chars
         formatted_messages = []
         for i, msg in enumerate(customer_messages, 1):
             content = msg.get("text_content", "") or msg.get("content", "")
+            if len(content) > max_chars:
+                content = content[:max_chars] + "…"
             timestamp = msg.get("timestamp", msg.get("created_at", ""))
             
             # Format timestamp if available
@@ -207,6 +304,29 @@ class SentimentChains:
         
         return "\n".join(formatted_messages)
     
+    def _parse_response(self, response_text: str) -> Tuple[str, float, str]:
+        """
+        Parse an "emoji | confidence | rationale" response.
+        
+        Args:
+            response_text: Raw response from LLM
+            
+        Returns:
+            Tuple of (emoji, confidence, rationale); missing parts get defaults
+        """
+        parts = [part.strip() for part in response_text.split("|")]
+        sentiment_emoji = self._extract_emoji_from_response(parts[0] if len(parts) > 1 else response_text)
+        
+        confidence = 0.8
+        if len(parts) > 1:
+            try:
+                confidence = min(1.0, max(0.0, float(parts[1])))
+            except ValueError:
+                pass
+        
+        rationale = parts[2] if len(parts) > 2 else ""
+        return sentiment_emoji, confidence, rationale[:sentiment_config.rationale_max_chars]
+    
     def _extract_emoji_from_response(self, response_text: str) -> str:
         """
         Extract emoji from LLM response.
@@ -243,15 +363,20 @@ class SentimentChains:
     async def analyze_sentiment_batch(
         self, 
         conversations_messages: List[Dict[str, Any]]
-    ) -> List[SentimentAnalysisResponse]:
+    ) -> List[Any]:
         """
-        Analyze sentiment for multiple conversations in batch.
+        Analyze sentiment for multiple conversations with as few LLM requests as possible.
+        
+        Conversations are sent ``batch_size`` at a time as one multi-conversation prompt;
+        a conversation missing from the answer is retried on its own. At most
+        ``max_concurrent_llm_calls`` requests are in flight.
         
         Args:
-            conversations_messages: List of conversation data with customer messages
+            conversations_messages: List of dicts with ``conversation_id``,
+                ``customer_messages`` and optionally ``previous_state``
             
         Returns:
-            List of SentimentAnalysisResponse objects
+            One SentimentAnalysisResponse per input, or the exception it failed with
         """
         if not conversations_messages:
             return []
@@ -260,30 +385,122 @@ class SentimentChains:
         if not self._chains_initialized:
             self._setup_chains()
         
-        results = []
+        semaphore = asyncio.Semaphore(sentiment_config.max_concurrent_llm_calls)
         
-        # Process in batches
-        batch_size = sentiment_config.batch_size
-        for i in range(0, len(conversations_messages), batch_size):
-            batch = conversations_messages[i:i + batch_size]
-            
-            # Process batch concurrently
-            batch_tasks = []
-            for conv_data in batch:
-                task = self.analyze_sentiment(
+        async def analyze_one(conv_data: Dict[str, Any]) -> SentimentAnalysisResponse:
+            async with semaphore:
+                return await self.analyze_sentiment(
                     conversation_id=conv_data["conversation_id"],
-                    customer_messages=conv_data["customer_messages"]
+                    customer_messages=conv_data["customer_messages"],
+                    previous_state=conv_data.get("previous_state")
                 )
-                batch_tasks.append(task)
+        
+        async def analyze_chunk(chunk: List[Dict[str, Any]]) -> List[Any]:
+            if len(chunk) == 1:
+                return await asyncio.gather(analyze_one(chunk[0]), return_exceptions=True)
             
-            batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
+            try:
+                async with semaphore:
+                    parsed = await self._analyze_chunk(chunk)
+            except Exception as e:
+                logger.warning(f"⚠️ Batch sentiment prompt failed, analyzing {len(chunk)} conversations individually: {str(e)}")
+                parsed = {}
             
-            # Handle results
-            for j, result in enumerate(batch_results):
-                if isinstance(result, Exception):
-                    logger.error(f"Error analyzing conversation {i + j}: {str(result)}")
-                    continue
-                
-                results.append(result)
+            retries = [index for index in range(len(chunk)) if index not in parsed]
+            retried = await asyncio.gather(*[analyze_one(chunk[index]) for index in retries], return_exceptions=True)
+            parsed.update(zip(retries, retried))
+            return [parsed[index] for index in range(len(chunk))]
+        
+        batch_size = max(1, sentiment_config.batch_size)
+        chunks = [conversations_messages[i:i + batch_size] for i in range(0, len(conversations_messages), batch_size)]
+        chunk_results = await asyncio.gather(*[analyze_chunk(chunk) for chunk in chunks])
+        
+        results = [result for chunk_result in chunk_results for result in chunk_result]
+        for conv_data, result in zip(conversations_messages, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error analyzing conversation {conv_data['conversation_id']}: {str(result)}")
         
         return results
+    
+    async def _analyze_chunk(self, chunk: List[Dict[str, Any]]) -> Dict[int, SentimentAnalysisResponse]:
+        """
+        Run one multi-conversation prompt.
+        
+        Args:
+            chunk: Conversations to analyze together
+            
+        Returns:
+            Responses by position in ``chunk`` (conversations missing from the answer are absent)
+        """
+        start_time = time.time()
+        prompt_vars = {
+            "conversation_count": len(chunk),
+            "conversations_context": self._format_conversations(chunk)
+        }
+        
+        try:
+            result = await asyncio.wait_for(
+                self._batch_chain.ainvoke(prompt_vars),
+                timeout=sentiment_config.timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            raise Exception(f"Batch sentiment analysis timed out after {sentiment_config.timeout_seconds} seconds")
+        
+        processing_time_ms = (time.time() - start_time) * 1000
+        responses: Dict[int, SentimentAnalysisResponse] = {}
+        for index, (sentiment_emoji, confidence, rationale) in self._parse_batch_response(result.content, len(chunk)).items():
+            responses[index] = SentimentAnalysisResponse(
+                conversation_id=chunk[index]["conversation_id"],
+                message_id="",  # Will be set by caller
+                sentiment_type="neutral",
+                sentiment_emoji=sentiment_emoji,
+                confidence=confidence,
+                reasoning=rationale,
+                language="auto",
+                processing_time_ms=processing_time_ms
+            )
+        
+        logger.info(f"Batch sentiment analysis completed: {len(responses)}/{len(chunk)} conversations in one request")
+        return responses
+    
+    def _format_conversations(self, chunk: List[Dict[str, Any]]) -> str:
+        """
+        Format several conversations for the multi-conversation prompt.
+        
+        Args:
+            chunk: Conversation dicts with customer messages and previous state
+            
+        Returns:
+            Numbered conversation sections
+        """
+        sections = []
+        for number, conv_data in enumerate(chunk, 1):
+            messages = conv_data["customer_messages"][-sentiment_config.incremental_max_messages:]
+            sections.append(
+                f"### Conversation {number}\n"
+                f"Previous assessment: {self._format_previous_state(conv_data.get('previous_state'))}\n"
+                f"New customer messages:\n{self._format_customer_messages(messages)}"
+            )
+        return "\n\n".join(sections)
+    
+    def _parse_batch_response(self, response_text: str, count: int) -> Dict[int, Tuple[str, float, str]]:
+        """
+        Parse "number | emoji | confidence | rationale" lines.
+        
+        Args:
+            response_text: Raw response from LLM
+            count: Number of conversations in the prompt
+            
+        Returns:
+            (emoji, confidence, rationale) by zero-based conversation position
+        """
+        parsed: Dict[int, Tuple[str, float, str]] = {}
+        for line in response_text.strip().splitlines():
+            number, _, rest = line.partition("|")
+            number = number.strip().strip("#.:)").strip()
+            if not number.isdigit() or not any(emoji in rest for emoji in sentiment_config.sentiment_emojis):
+                continue
+            index = int(number) - 1
+            if 0 <= index < count and index not in parsed:
+                parsed[index] = self._parse_response(rest.strip())
+        return parsed
@@ -25,7 +25,7 @@ class SentimentAnalyzerConfig(BaseModel):
     # Model Configuration
     model_name: str = Field(default=ai_config.openai_model, description="Model for sentiment analysis")
     temperature: float = Field(0.1, description="Temperature for sentiment analysis")
-    max_tokens: int = Field(10, description="Maximum tokens for sentiment response (just emoji)")
+    max_tokens: int = Field(40, description="Maximum tokens for sentiment response (emoji, confidence, short rationale)")
     
     # Processing Settings
     enable_async_processing: bool = Field(True, description="Enable async background processing")
@@ -38,8 +38,24 @@ class SentimentAnalyzerConfig(BaseModel):
     analyze_first_message: bool = Field(True, description="Analyze sentiment on first message")
     analyze_replies: bool = Field(True, description="Analyze sentiment on agent replies")
     
+    # Incremental Analysis (rolling state + only new inbound messages)
+    incremental_max_messages: int = Field(8, description="Maximum new customer messages sent per analysis")
+    incremental_message_chars: int = Field(300, description="Characters kept per customer message in the prompt")
+    rationale_max_chars: int = Field(120, description="Characters kept of the stored rationale")
+    
+    # Local Pre-classifier (lexicon + TextBlob; escalates to the LLM when unsure or the mood shifts)
+    local_classifier_enabled: bool = Field(True, description="Classify new messages locally before calling the LLM")
+    local_confidence_threshold: float = Field(0.75, description="Minimum local confidence to skip the LLM")
+    local_workers: int = Field(2, description="Thread pool size for local classification")
+    
+    # Micro-batching (pending analyses across conversations share LLM requests and one bulk write)
+    batching_enabled: bool = Field(True, description="Collect pending analyses into micro-batches")
+    batch_window_ms: int = Field(150, description="Maximum time a pending analysis waits for its batch")
+    batch_max_items: int = Field(20, description="Conversations that trigger an immediate batch flush")
+    max_concurrent_llm_calls: int = Field(4, description="Sentiment LLM requests in flight per batch")
+    
     # Performance Settings
-    batch_size: int = Field(5, description="Batch size for processing multiple messages")
+    batch_size: int = Field(5, description="Conversations per multi-conversation sentiment prompt")
     rate_limit_per_minute: int = Field(20, description="Rate limit for sentiment analysis calls")
     
     class Config:
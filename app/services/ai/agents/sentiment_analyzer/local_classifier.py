@@ -0,0 +1,325 @@
+"""
+Local sentiment pre-classifier.
+
+Scores customer messages without calling the LLM: a small English/Spanish
+service-domain lexicon with negation handling, an emoji lexicon, a list of bare
+acknowledgements ("ok", "gracias", 👍) and TextBlob polarity for English text.
+Language comes from the lexicon hits, with langdetect only for longer messages
+that none of the lexicons recognise.
+
+Each result carries a confidence; the sentiment service keeps the local result
+when it is confident and consistent with the conversation's current mood, and
+escalates to the LLM otherwise. Batches are classified in one call on a small
+thread pool so the event loop never runs the (pure Python) scoring.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import re
+import threading
+import unicodedata
+
+from app.core.logger import logger
+from app.services.ai.agents.sentiment_analyzer.config import sentiment_config
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_sentiment_executor() -> ThreadPoolExecutor:
+    """Get the thread pool shared by local sentiment classification."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=sentiment_config.local_workers, thread_name_prefix="sentiment"
+                )
+    return _executor
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9ñ']+")
+
+# Whole-message acknowledgements: calm/content with high confidence
+_ACKNOWLEDGEMENTS = {
+    "ok", "okay", "oki", "okey", "vale", "listo", "perfecto", "dale", "si", "yes", "sure",
+    "thanks", "thank you", "thx", "gracias", "muchas gracias", "ok gracias", "ok thanks",
+    "si gracias", "listo gracias", "perfecto gracias", "de acuerdo", "entendido", "got it",
+    "👍", "👌", "🙏", "🙂",
+}
+_SPANISH_ACKNOWLEDGEMENTS = {
+    "vale", "listo", "perfecto", "dale", "si", "gracias", "muchas gracias", "ok gracias", "si gracias",
+    "listo gracias", "perfecto gracias", "de acuerdo", "entendido",
+}
+
+# Word scores in [-1, 1]; accent-folded, lowercase
+_LEXICON_EN: Dict[str, float] = {
+    "thanks": 0.4, "thank": 0.4, "great": 0.7, "excellent": 0.9, "perfect": 0.8, "awesome": 0.8,
+    "love": 0.8, "happy": 0.7, "good": 0.5, "fast": 0.4, "works": 0.4, "working": 0.4, "solved": 0.6,
+    "bad": -0.6, "terrible": -0.9, "horrible": -0.9, "awful": -0.9, "worst": -1.0, "unacceptable": -0.9,
+    "angry": -0.8, "furious": -1.0, "ridiculous": -0.8, "useless": -0.8, "slow": -0.5, "broken": -0.6,
+    "waiting": -0.3, "nobody": -0.4, "cancel": -0.6, "complaint": -0.7, "scam": -1.0,
+    "disappointed": -0.7, "frustrated": -0.8, "down": -0.4, "outage": -0.6,
+}
+_LEXICON_ES: Dict[str, float] = {
+    "gracias": 0.4, "excelente": 0.9, "genial": 0.8, "perfecto": 0.8, "bueno": 0.5, "buena": 0.5,
+    "feliz": 0.7, "contento": 0.7, "contenta": 0.7, "encanta": 0.8, "rapido": 0.4, "funciona": 0.4,
+    "sirve": 0.4, "resuelto": 0.6, "amable": 0.6,
+    "malo": -0.6, "mala": -0.6, "pesimo": -1.0, "pesima": -1.0, "terrible": -0.9, "horrible": -0.9,
+    "inaceptable": -0.9, "molesto": -0.7, "molesta": -0.7, "enojado": -0.8, "enojada": -0.8,
+    "harto": -0.9, "harta": -0.9, "lento": -0.5, "lenta": -0.5, "cancelar": -0.6, "queja": -0.7,
+    "estafa": -1.0, "esperando": -0.3, "nadie": -0.4, "decepcionado": -0.7,
+    "decepcionada": -0.7, "falla": -0.6, "caido": -0.5,
+}
+_NEGATIONS = {"no", "not", "never", "nunca", "ni", "dont", "don't", "isnt", "isn't", "doesnt", "doesn't"}
+_CONFUSION = {
+    "confused", "understand", "unclear", "what", "how", "confundido", "confundida", "entiendo",
+    "que", "como", "cual",
+}
+_EMOJI_SCORES: Dict[str, float] = {
+    "👍": 0.5, "👌": 0.5, "🙏": 0.4, "🙂": 0.4, "😊": 0.6, "😀": 0.6, "😁": 0.7, "😃": 0.6, "😂": 0.5,
+    "❤": 0.8, "😍": 0.9, "🥰": 0.9, "🎉": 0.7, "👎": -0.6, "😞": -0.6, "😢": -0.6, "😭": -0.7,
+    "😔": -0.5, "😤": -0.7, "😠": -0.8, "😡": -0.9, "🤬": -1.0, "😰": -0.5,
+}
+
+_POSITIVE_EMOJIS = {"😊", "😌", "😍"}
+_NEGATIVE_EMOJIS = {"😞", "😤", "😡", "😰", "😔"}
+
+
+def _fold(text: str) -> str:
+    """Lowercase and strip accents (keeps ñ and emoji)."""
+    text = text.lower().replace("ñ", "\0")
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in text if not unicodedata.combining(char)).replace("\0", "ñ")
+
+
+def polarity_group(emoji: Optional[Any]) -> str:
+    """Coarse mood of an emoji: positive, negative or neutral."""
+    emoji = getattr(emoji, "value", emoji)
+    if emoji in _POSITIVE_EMOJIS:
+        return "positive"
+    if emoji in _NEGATIVE_EMOJIS:
+        return "negative"
+    return "neutral"
+
+
+@dataclass(frozen=True)
+class LocalSentiment:
+    """Local classification of one message."""
+    emoji: str
+    sentiment_type: str
+    polarity: float
+    confidence: float
+    language: str
+
+
+class LocalSentimentClassifier:
+    """Lexicon + TextBlob sentiment classifier with LLM escalation stats."""
+
+    def __init__(self):
+        """Initialize counters; TextBlob and langdetect are imported on first use."""
+        self._textblob = None
+        self._detect_langs = None
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, Any] = {
+            "batches": 0,
+            "messages": 0,
+            "local_decisions": 0,
+            "llm_escalations": 0,
+            "escalation_reasons": {"low_confidence": 0, "mixed": 0, "shift": 0},
+        }
+
+    def _english_polarity(self, text: str) -> Optional[float]:
+        if self._textblob is None:
+            try:
+                from textblob import TextBlob
+                self._textblob = TextBlob
+            except ImportError:
+                self._textblob = False
+        if not self._textblob:
+            return None
+        try:
+            return float(self._textblob(text).sentiment.polarity)
+        except Exception:
+            return None
+
+    def _detect_language(self, text: str) -> str:
+        if self._detect_langs is None:
+            try:
+                from langdetect import DetectorFactory, detect_langs
+                DetectorFactory.seed = 0
+                self._detect_langs = detect_langs
+            except ImportError:
+                self._detect_langs = False
+        if not self._detect_langs:
+            return "unknown"
+        try:
+            best = self._detect_langs(text)[0]
+            return best.lang if best.prob >= 0.8 else "unknown"
+        except Exception:
+            return "unknown"
+
+    def _lexicon_scores(self, tokens: Sequence[str]) -> Tuple[List[float], int, int]:
+        """Word scores with negation flips, plus English/Spanish hit counts."""
+        scores: List[float] = []
+        hits_en = hits_es = 0
+        negate_until = -1
+        for index, token in enumerate(tokens):
+            if token in _NEGATIONS:
+                negate_until = index + 2
+                continue
+            hits_es += token in _LEXICON_ES
+            hits_en += token in _LEXICON_EN
+            score = _LEXICON_ES.get(token, _LEXICON_EN.get(token))
+            if score is None:
+                continue
+            scores.append(-score if index <= negate_until else score)
+        return scores, hits_en, hits_es
+
+    def classify(self, text: str) -> LocalSentiment:
+        """
+        Classify one message.
+
+        Args:
+            text: Customer message text
+
+        Returns:
+            LocalSentiment with a provisional emoji and confidence
+        """
+        folded = _fold(text or "").strip()
+        bare = re.sub(r"[!¡.,¿?\s]+", " ", folded).strip()
+
+        if bare in _ACKNOWLEDGEMENTS:
+            language = "es" if bare in _SPANISH_ACKNOWLEDGEMENTS else "en" if bare.isascii() else "unknown"
+            return LocalSentiment("😌", "positive", 0.3, 0.9, language)
+
+        tokens = _TOKEN_RE.findall(folded)
+        scores, hits_en, hits_es = self._lexicon_scores(tokens)
+        emoji_scores = [score for emoji, score in _EMOJI_SCORES.items() for _ in range(folded.count(emoji))]
+
+        if hits_es > hits_en:
+            language = "es"
+        elif hits_en:
+            language = "en"
+        elif len(tokens) >= 4:
+            language = self._detect_language(text)
+        else:
+            language = "unknown"
+
+        if language == "en" and len(tokens) >= 2:
+            blob_polarity = self._english_polarity(folded)
+            if blob_polarity:
+                scores.append(blob_polarity)
+
+        evidence = scores + emoji_scores
+        is_question = "?" in folded
+        confused = is_question and any(token in _CONFUSION for token in tokens) and not any(s <= -0.5 for s in evidence)
+
+        if not evidence:
+            emoji = "🤔" if confused else "😐"
+            # No sentiment-bearing words: only trust "neutral" for very short messages
+            confidence = 0.8 if len(tokens) <= 2 and not is_question else 0.4
+            return LocalSentiment(emoji, "neutral", 0.0, confidence, language)
+
+        polarity = max(-1.0, min(1.0, sum(evidence) / len(evidence)))
+        mixed = any(s >= 0.3 for s in evidence) and any(s <= -0.3 for s in evidence)
+
+        if confused:
+            emoji = "🤔"
+        elif polarity >= 0.6:
+            emoji = "😍"
+        elif polarity >= 0.2:
+            emoji = "😊"
+        elif polarity > -0.2:
+            emoji = "😐"
+        elif polarity > -0.5:
+            emoji = "😞"
+        elif polarity > -0.8:
+            emoji = "😤"
+        else:
+            emoji = "😡"
+
+        if mixed:
+            sentiment_type = "mixed"
+            confidence = 0.4
+        else:
+            if confused or -0.2 < polarity < 0.2:
+                sentiment_type = "neutral"
+            else:
+                sentiment_type = "positive" if polarity > 0 else "negative"
+            confidence = min(0.95, 0.5 + 0.1 * len(evidence) + 0.3 * abs(polarity))
+        return LocalSentiment(emoji, sentiment_type, round(polarity, 3), round(confidence, 3), language)
+
+    def classify_batch(self, texts: Sequence[str]) -> List[LocalSentiment]:
+        """Classify a batch of messages in one pass."""
+        return [self.classify(text) for text in texts]
+
+    async def aclassify_batch(self, texts: Sequence[str]) -> List[LocalSentiment]:
+        """
+        Classify a batch of messages on the sentiment thread pool.
+
+        Args:
+            texts: Customer message texts, oldest first
+
+        Returns:
+            One LocalSentiment per text
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_sentiment_executor(), self.classify_batch, list(texts))
+
+    def escalation_reason(
+        self,
+        results: Sequence[LocalSentiment],
+        previous_emoji: Optional[Any] = None,
+        threshold: Optional[float] = None
+    ) -> Optional[str]:
+        """
+        Decide whether the local result is enough or the LLM must decide, and count it.
+
+        Args:
+            results: Local results for the new messages (oldest first)
+            previous_emoji: Current conversation sentiment, if any
+            threshold: Minimum confidence of the latest message (config default)
+
+        Returns:
+            None to keep the local result, otherwise the escalation reason
+            ("low_confidence", "mixed" or "shift")
+        """
+        threshold = sentiment_config.local_confidence_threshold if threshold is None else threshold
+        latest = results[-1]
+        groups = {polarity_group(result.emoji) for result in results} - {"neutral"}
+
+        if latest.confidence < threshold:
+            reason = "low_confidence"
+        elif latest.sentiment_type == "mixed" or len(groups) > 1:
+            reason = "mixed"
+        elif previous_emoji and polarity_group(previous_emoji) != polarity_group(latest.emoji):
+            reason = "shift"
+        else:
+            reason = None
+
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            self._stats["messages"] += len(results)
+            if reason is None:
+                self._stats["local_decisions"] += 1
+            else:
+                self._stats["llm_escalations"] += 1
+                self._stats["escalation_reasons"][reason] += 1
+        if reason:
+            logger.info(f"🧭 [SENTIMENT] Escalating to LLM ({reason}), local guess {latest.emoji} ({latest.confidence:.2f})")
+        return reason
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Local decision vs LLM escalation counters and the LLM skip rate."""
+        with self._stats_lock:
+            stats = dict(self._stats, escalation_reasons=dict(self._stats["escalation_reasons"]))
+        stats["skip_rate"] = round(stats["local_decisions"] / stats["batches"], 3) if stats["batches"] else 0.0
+        return stats
+
+
+# Global local classifier instance
+local_sentiment_classifier = LocalSentimentClassifier()
@@ -73,6 +73,10 @@ class ConversationSentimentData(BaseModel):
     )
     last_analyzed_message_id: Optional[str] = Field(None, description="Last analyzed message ID")
     message_count_at_last_analysis: int = Field(0, description="Message count at last analysis")
+    confidence: Optional[float] = Field(None, description="Confidence of the current sentiment")
+    rationale: Optional[str] = Field(None, description="Short rationale carried into the next analysis")
+    last_inbound_message_id: Optional[str] = Field(None, description="Newest customer message already analyzed (_id watermark)")
+    inbound_messages_analyzed: int = Field(0, description="Customer messages folded into the rolling sentiment")
     updated_at: datetime = Field(default_factory=datetime.now, description="Last update timestamp")
 
 
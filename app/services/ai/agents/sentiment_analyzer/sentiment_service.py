@@ -5,26 +5,39 @@ Analyzes customer messages and provides real-time sentiment emoji indicators.
 
 import asyncio
 import time
-from typing import Dict, Any, Optional, List
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, List, Tuple, Union
 from datetime import datetime, timezone
-from bson import ObjectId
+from pymongo import UpdateOne
 
 from app.core.logger import logger
+from app.services.ai.agents.sentiment_analyzer.batcher import SentimentBatcher
 from app.services.ai.agents.sentiment_analyzer.chains.sentiment_chains import SentimentChains
 from app.services.ai.agents.sentiment_analyzer.schemas import (
     SentimentAnalysisRequest,
     SentimentAnalysisResponse,
     SentimentAnalysisResult,
     ConversationSentimentData,
-    StoredConversationSentiment,
     SentimentWebSocketNotification
 )
 from app.services.ai.agents.sentiment_analyzer.config import sentiment_config
+from app.services.ai.agents.sentiment_analyzer.local_classifier import local_sentiment_classifier
+from app.services.ai.shared.transcript_service import transcript_service
 from app.services.ai.shared.utils import validate_conversation_id
-from app.services import conversation_service, message_service, websocket_service, cursor_message_service
+from app.services import conversation_service, message_service, websocket_service
 from app.services.base_service import BaseService
 
 
+@dataclass
+class _PendingAnalysis:
+    """A conversation analysis between preparation and storage."""
+    request: SentimentAnalysisRequest
+    current_sentiment: Optional[ConversationSentimentData]
+    new_messages: List[Dict[str, Any]]
+    start_time: float
+    response: Optional[SentimentAnalysisResponse] = None
+
+
 class SentimentAnalyzerService(BaseService):
     """
     Service for analyzing sentiment of customer messages and providing emoji indicators.
@@ -34,8 +47,9 @@ class SentimentAnalyzerService(BaseService):
         """Initialize the sentiment analyzer service."""
         super().__init__()
         self.chains = SentimentChains()
-        self._cache: Dict[str, ConversationSentimentData] = {}
+        self._cache: Dict[str, Tuple[float, ConversationSentimentData]] = {}  # key -> (cached_at, data)
         self._cache_ttl = sentiment_config.cache_duration_minutes * 60  # Convert to seconds
+        self.batcher = SentimentBatcher(self.analyze_batch)
     
     async def analyze_message_sentiment(
         self,
@@ -50,6 +64,113 @@ class SentimentAnalyzerService(BaseService):
         Returns:
             SentimentAnalysisResult with analysis results
         """
+        results = await self.analyze_batch([request])
+        return results[0]
+    
+    async def analyze_batch(
+        self,
+        requests: List[SentimentAnalysisRequest]
+    ) -> List[SentimentAnalysisResult]:
+        """
+        Analyze several conversations together.
+        
+        Each request is prepared on its own (state, new messages, local tier); the
+        analyses that still need the LLM share multi-conversation prompts, and every
+        result is persisted with one bulk write before the dashboard is notified.
+        
+        Args:
+            requests: Sentiment analysis requests, at most one per conversation
+            
+        Returns:
+            One SentimentAnalysisResult per request, in order
+        """
+        start_time = time.time()
+        results: Dict[int, SentimentAnalysisResult] = {}
+        
+        prepared = await asyncio.gather(*[self._prepare_analysis(request) for request in requests])
+        analyses: Dict[int, _PendingAnalysis] = {}
+        for index, item in enumerate(prepared):
+            if isinstance(item, SentimentAnalysisResult):
+                results[index] = item
+            else:
+                analyses[index] = item
+        
+        # Analyses the local tier could not settle go to the LLM together
+        llm_indexes = [index for index, analysis in analyses.items() if analysis.response is None]
+        if llm_indexes:
+            logger.info(f"😊 [SENTIMENT] Calling chains.analyze_sentiment_batch for {len(llm_indexes)} conversations")
+            responses = await self.chains.analyze_sentiment_batch([
+                {
+                    "conversation_id": analyses[index].request.conversation_id,
+                    "customer_messages": analyses[index].new_messages,
+                    "previous_state": analyses[index].current_sentiment
+                }
+                for index in llm_indexes
+            ])
+            for index, response in zip(llm_indexes, responses):
+                if isinstance(response, Exception):
+                    logger.error(f"❌ Error in sentiment analysis: {str(response)}")
+                    results[index] = SentimentAnalysisResult(
+                        success=False,
+                        error=str(response),
+                        processing_time=time.time() - analyses[index].start_time
+                    )
+                    del analyses[index]
+                else:
+                    analyses[index].response = response
+        
+        for analysis in analyses.values():
+            # Set conversation and message IDs
+            analysis.response.conversation_id = analysis.request.conversation_id
+            analysis.response.message_id = analysis.request.message_id
+        
+        if analyses:
+            try:
+                # Store sentiment data and advance the watermarks
+                await self._store_sentiment_batch(list(analyses.values()))
+            except Exception as e:
+                for index, analysis in analyses.items():
+                    results[index] = SentimentAnalysisResult(
+                        success=False,
+                        error=str(e),
+                        processing_time=time.time() - analysis.start_time
+                    )
+                analyses = {}
+            
+            await asyncio.gather(*[self._publish_sentiment(analysis) for analysis in analyses.values()])
+        
+        for index, analysis in analyses.items():
+            response = analysis.response
+            logger.info(
+                f"✅ Sentiment analysis completed for conversation {analysis.request.conversation_id}: "
+                f"{response.sentiment_emoji} (confidence: {response.confidence:.2f})"
+            )
+            results[index] = SentimentAnalysisResult(
+                success=True,
+                response=response,
+                processing_time=time.time() - analysis.start_time
+            )
+        
+        if len(requests) > 1:
+            logger.info(
+                f"📦 [SENTIMENT] Batch of {len(requests)} analyzed in {time.time() - start_time:.2f}s "
+                f"({len(llm_indexes)} needed the LLM)"
+            )
+        return [results[index] for index in range(len(requests))]
+    
+    async def _prepare_analysis(
+        self,
+        request: SentimentAnalysisRequest
+    ) -> Union[_PendingAnalysis, SentimentAnalysisResult]:
+        """
+        Load the rolling state and new messages of a conversation and try the local tier.
+        
+        Args:
+            request: Sentiment analysis request
+            
+        Returns:
+            _PendingAnalysis to complete, or a SentimentAnalysisResult when there is nothing to analyze
+        """
         start_time = time.time()
         
         try:
@@ -64,11 +185,15 @@ class SentimentAnalyzerService(BaseService):
                     processing_time=0.0
                 )
             
+            # Rolling sentiment state (cache or one DB read), shared by every step below
+            current_sentiment = await self.get_conversation_sentiment(request.conversation_id)
+            
             # Check if sentiment analysis should be performed
             should_analyze = await self._should_analyze_sentiment(
                 conversation_id=request.conversation_id,
                 message_count=request.message_count,
-                is_first_message=request.is_first_message
+                is_first_message=request.is_first_message,
+                current_sentiment=current_sentiment
             )
             
             logger.info(f"😊 [SENTIMENT] Should analyze: {should_analyze}")
@@ -90,49 +215,31 @@ class SentimentAnalyzerService(BaseService):
                     processing_time=0.0
                 )
             
-            # Load all customer messages for context
-            customer_messages = await self._load_customer_messages(request.conversation_id)
-            logger.info(f"😊 [SENTIMENT] Loaded {len(customer_messages)} customer messages")
-            
-            # Perform sentiment analysis with all customer messages context
-            logger.info(f"😊 [SENTIMENT] Calling chains.analyze_sentiment")
-            sentiment_response = await self.chains.analyze_sentiment(
-                conversation_id=request.conversation_id,
-                customer_messages=customer_messages
-            )
-            logger.info(f"😊 [SENTIMENT] chains.analyze_sentiment completed")
-            
-            # Set conversation and message IDs
-            sentiment_response.conversation_id = request.conversation_id
-            sentiment_response.message_id = request.message_id
-            
-            # Store sentiment data
-            await self._store_sentiment_data(sentiment_response)
-            
-            # Update conversation model with sentiment data
-            logger.info(f"😊 [SENTIMENT] Calling conversation_service.update_conversation_sentiment")
-            updated_conversation = await conversation_service.update_conversation_sentiment(
-                conversation_id=request.conversation_id,
-                sentiment_emoji=sentiment_response.sentiment_emoji,
-                confidence=sentiment_response.confidence
-            )
-            logger.info(f"😊 [SENTIMENT] conversation_service.update_conversation_sentiment completed: {updated_conversation is not None}")
-            
-            # Send WebSocket notification
-            await self._notify_sentiment_update(sentiment_response)
+            # Only customer messages newer than the watermark; earlier ones live in the rolling state
+            watermark = current_sentiment.last_inbound_message_id if current_sentiment else None
+            new_messages = await self._load_new_customer_messages(request.conversation_id, watermark)
+            logger.info(f"😊 [SENTIMENT] Loaded {len(new_messages)} new customer messages (watermark: {watermark})")
             
-            # Calculate processing time
-            processing_time = time.time() - start_time
+            if not new_messages:
+                return SentimentAnalysisResult(
+                    success=False,
+                    error="No new customer messages since last analysis",
+                    processing_time=time.time() - start_time
+                )
             
-            logger.info(
-                f"✅ Sentiment analysis completed for conversation {request.conversation_id}: "
-                f"{sentiment_response.sentiment_emoji} (confidence: {sentiment_response.confidence:.2f})"
-            )
+            # Local tier first: the LLM only sees low-confidence, mixed or mood-shifting batches
+            sentiment_response = None
+            if sentiment_config.local_classifier_enabled:
+                sentiment_response = await self._classify_locally(
+                    request.conversation_id, request.message_id, new_messages, current_sentiment
+                )
             
-            return SentimentAnalysisResult(
-                success=True,
-                response=sentiment_response,
-                processing_time=processing_time
+            return _PendingAnalysis(
+                request=request,
+                current_sentiment=current_sentiment,
+                new_messages=new_messages,
+                start_time=start_time,
+                response=sentiment_response
             )
             
         except Exception as e:
@@ -145,6 +252,81 @@ class SentimentAnalyzerService(BaseService):
                 processing_time=processing_time
             )
     
+    async def _publish_sentiment(self, analysis: _PendingAnalysis):
+        """
+        Push a stored analysis to the conversation model and the dashboard.
+        
+        Args:
+            analysis: Completed analysis
+        """
+        sentiment_response = analysis.response
+        try:
+            # Update conversation model with sentiment data
+            updated_conversation = await conversation_service.update_conversation_sentiment(
+                conversation_id=sentiment_response.conversation_id,
+                sentiment_emoji=sentiment_response.sentiment_emoji,
+                confidence=sentiment_response.confidence
+            )
+            logger.info(f"😊 [SENTIMENT] conversation_service.update_conversation_sentiment completed: {updated_conversation is not None}")
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to update conversation sentiment for {sentiment_response.conversation_id}: {str(e)}")
+        
+        # Send WebSocket notification
+        await self._notify_sentiment_update(sentiment_response)
+    
+    async def _classify_locally(
+        self,
+        conversation_id: str,
+        message_id: str,
+        new_messages: List[Dict[str, Any]],
+        current_sentiment: Optional[ConversationSentimentData]
+    ) -> Optional[SentimentAnalysisResponse]:
+        """
+        Classify new customer messages with the local pre-classifier.
+        
+        When the LLM is still needed, the local guess is pushed to the dashboard as a
+        provisional sentiment (not stored) so the badge updates without waiting for it.
+        
+        Args:
+            conversation_id: Conversation ID
+            message_id: Message that triggered the analysis
+            new_messages: Customer messages not yet analyzed (oldest first)
+            current_sentiment: Rolling sentiment state of the conversation, if any
+            
+        Returns:
+            SentimentAnalysisResponse to store, or None to escalate to the LLM
+        """
+        start_time = time.time()
+        try:
+            results = await local_sentiment_classifier.aclassify_batch(
+                [message.get("text_content", "") for message in new_messages]
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ [SENTIMENT] Local classification failed, using LLM: {str(e)}")
+            return None
+        
+        latest = results[-1]
+        reason = local_sentiment_classifier.escalation_reason(
+            results, current_sentiment.current_sentiment if current_sentiment else None
+        )
+        response = SentimentAnalysisResponse(
+            conversation_id=conversation_id,
+            message_id=message_id,
+            sentiment_type=latest.sentiment_type,
+            sentiment_emoji=latest.emoji,
+            confidence=latest.confidence,
+            reasoning=f"local: {latest.language} lexicon polarity {latest.polarity:+.2f}",
+            language=latest.language,
+            processing_time_ms=(time.time() - start_time) * 1000
+        )
+        
+        if reason is None:
+            logger.info(f"⚡ [SENTIMENT] Local sentiment {latest.emoji} ({latest.confidence:.2f}), LLM skipped")
+            return response
+        
+        await self._notify_sentiment_update(response)
+        return None
+    
     async def get_conversation_sentiment(
         self,
         conversation_id: str
@@ -161,12 +343,12 @@ class SentimentAnalyzerService(BaseService):
         try:
             # Check cache first
             cache_key = f"sentiment_{conversation_id}"
-            cached_data = self._cache.get(cache_key)
+            cached = self._cache.get(cache_key)
             
-            if cached_data:
+            if cached:
                 # Check if cache is still valid
-                cache_age = (datetime.now(timezone.utc) - cached_data.updated_at).total_seconds()
-                if cache_age < self._cache_ttl:
+                cached_at, cached_data = cached
+                if time.monotonic() - cached_at < self._cache_ttl:
                     return cached_data
             
             # Load from database
@@ -179,7 +361,7 @@ class SentimentAnalyzerService(BaseService):
                 sentiment_data = ConversationSentimentData(**sentiment_doc["sentiment_data"])
                 
                 # Update cache
-                self._cache[cache_key] = sentiment_data
+                self._cache[cache_key] = (time.monotonic(), sentiment_data)
                 
                 return sentiment_data
             
@@ -245,7 +427,8 @@ class SentimentAnalyzerService(BaseService):
         self,
         conversation_id: str,
         message_count: int,
-        is_first_message: bool
+        is_first_message: bool,
+        current_sentiment: Optional[ConversationSentimentData] = None
     ) -> bool:
         """
         Determine if sentiment analysis should be performed.
@@ -258,6 +441,7 @@ class SentimentAnalyzerService(BaseService):
             conversation_id: Conversation ID
             message_count: Current message count
             is_first_message: Whether this is the first message
+            current_sentiment: Stored sentiment already loaded by the caller
             
         Returns:
             True if analysis should be performed
@@ -271,9 +455,6 @@ class SentimentAnalyzerService(BaseService):
             logger.info(f"😊 [SENTIMENT] Analyzing first message for conversation {conversation_id}")
             return True
         
-        # Get current sentiment data to check if this is the first reply
-        current_sentiment = await self.get_conversation_sentiment(conversation_id)
-        
         # If no sentiment data exists, this might be the first reply
         if not current_sentiment:
             logger.info(f"😊 [SENTIMENT] No sentiment data found, analyzing for conversation {conversation_id}")
@@ -316,111 +497,176 @@ class SentimentAnalyzerService(BaseService):
         
         return True
     
-    async def _store_sentiment_data(self, sentiment_response: SentimentAnalysisResponse):
+    async def _store_sentiment_data(
+        self,
+        sentiment_response: SentimentAnalysisResponse,
+        previous: Optional[ConversationSentimentData] = None,
+        watermark: Optional[str] = None,
+        new_message_count: int = 0,
+        message_count: Optional[int] = None
+    ):
         """
-        Store sentiment data in database.
+        Store the rolling sentiment state in database (single upsert).
         
         Args:
             sentiment_response: Sentiment analysis response
+            previous: Stored sentiment already loaded by the caller (loaded here when omitted)
+            watermark: ID of the newest customer message included in this analysis
+            new_message_count: Customer messages included in this analysis
+            message_count: Conversation message count (looked up when omitted)
         """
         try:
             db = await self._get_db()
+            conversation_id = sentiment_response.conversation_id
+            now = datetime.now(timezone.utc)
             
-            # Get existing sentiment data
-            existing_doc = await db.conversation_sentiments.find_one(
-                {"conversation_id": sentiment_response.conversation_id}
+            if previous is None:
+                previous = await self.get_conversation_sentiment(conversation_id)
+            if message_count is None:
+                message_count = await self._get_message_count(conversation_id)
+            
+            sentiment_data = self._next_sentiment_data(
+                sentiment_response, previous, watermark, new_message_count, message_count, now
             )
+            await db.conversation_sentiments.update_one(*self._sentiment_upsert(sentiment_data, now), upsert=True)
             
-            if existing_doc:
-                # Update existing sentiment data
-                sentiment_data = ConversationSentimentData(**existing_doc["sentiment_data"])
-                sentiment_data.current_sentiment = sentiment_response.sentiment_emoji
-                sentiment_data.sentiment_history.append(sentiment_response)
-                sentiment_data.last_analyzed_message_id = sentiment_response.message_id
-                sentiment_data.message_count_at_last_analysis = await self._get_message_count(
-                    sentiment_response.conversation_id
-                )
-                sentiment_data.updated_at = datetime.now(timezone.utc)
-                
-                # Keep only last 10 sentiment analyses
-                if len(sentiment_data.sentiment_history) > 10:
-                    sentiment_data.sentiment_history = sentiment_data.sentiment_history[-10:]
-                
-                # Update in database
-                await db.conversation_sentiments.update_one(
-                    {"conversation_id": sentiment_response.conversation_id},
-                    {
-                        "$set": {
-                            "sentiment_data": sentiment_data.dict(),
-                            "updated_at": datetime.now(timezone.utc)
-                        }
-                    }
-                )
-                
-                # Update cache
-                cache_key = f"sentiment_{sentiment_response.conversation_id}"
-                self._cache[cache_key] = sentiment_data
-                
-            else:
-                # Create new sentiment data
-                sentiment_data = ConversationSentimentData(
-                    conversation_id=sentiment_response.conversation_id,
-                    current_sentiment=sentiment_response.sentiment_emoji,
-                    sentiment_history=[sentiment_response],
-                    last_analyzed_message_id=sentiment_response.message_id,
-                    message_count_at_last_analysis=await self._get_message_count(
-                        sentiment_response.conversation_id
-                    )
-                )
-                
-                # Store in database
-                stored_sentiment = StoredConversationSentiment(
-                    conversation_id=sentiment_response.conversation_id,
-                    sentiment_data=sentiment_data
-                )
-                
-                await db.conversation_sentiments.insert_one(stored_sentiment.dict())
-                
-                # Update cache
-                cache_key = f"sentiment_{sentiment_response.conversation_id}"
-                self._cache[cache_key] = sentiment_data
+            # Update cache
+            self._cache[f"sentiment_{conversation_id}"] = (time.monotonic(), sentiment_data)
             
-            logger.info(f"✅ Stored sentiment data for conversation {sentiment_response.conversation_id}")
+            logger.info(f"✅ Stored sentiment data for conversation {conversation_id}")
             
         except Exception as e:
             logger.error(f"❌ Error storing sentiment data: {str(e)}")
             raise
     
-    async def _load_customer_messages(self, conversation_id: str) -> List[Dict[str, Any]]:
+    async def _store_sentiment_batch(self, analyses: List[_PendingAnalysis]):
         """
-        Load all customer messages for a conversation.
+        Store the rolling sentiment state of several conversations with one bulk write.
         
         Args:
-            conversation_id: Conversation ID
-            
-        Returns:
-            List of customer message dictionaries
+            analyses: Completed analyses, at most one per conversation
         """
         try:
-            # Use cursor message service to get all messages
-            messages_result = await cursor_message_service.get_messages_cursor(
-                conversation_id=conversation_id,
-                limit=1000  # Get all messages
+            db = await self._get_db()
+            now = datetime.now(timezone.utc)
+            
+            states = [
+                self._next_sentiment_data(
+                    analysis.response,
+                    analysis.current_sentiment,
+                    str(analysis.new_messages[-1]["_id"]),
+                    len(analysis.new_messages),
+                    analysis.request.message_count,
+                    now
+                )
+                for analysis in analyses
+            ]
+            await db.conversation_sentiments.bulk_write(
+                [UpdateOne(*self._sentiment_upsert(state, now), upsert=True) for state in states],
+                ordered=False
             )
             
-            messages = messages_result.get("messages", [])
+            # Update cache
+            for state in states:
+                self._cache[f"sentiment_{state.conversation_id}"] = (time.monotonic(), state)
+            
+            logger.info(f"✅ Stored sentiment data for {len(states)} conversations")
+            
+        except Exception as e:
+            logger.error(f"❌ Error storing sentiment batch: {str(e)}")
+            raise
+    
+    def _next_sentiment_data(
+        self,
+        sentiment_response: SentimentAnalysisResponse,
+        previous: Optional[ConversationSentimentData],
+        watermark: Optional[str],
+        new_message_count: int,
+        message_count: int,
+        now: datetime
+    ) -> ConversationSentimentData:
+        """
+        Fold an analysis into the rolling sentiment state.
+        
+        Args:
+            sentiment_response: Sentiment analysis response
+            previous: Stored sentiment, if any
+            watermark: ID of the newest customer message included in this analysis
+            new_message_count: Customer messages included in this analysis
+            message_count: Conversation message count
+            now: Update timestamp
             
-            # Filter only customer messages
-            customer_messages = []
-            for msg in messages:
-                if msg.get("sender_role") == "customer" or msg.get("direction") == "inbound":
-                    customer_messages.append(msg)
+        Returns:
+            New ConversationSentimentData (``previous`` is not modified)
+        """
+        if previous:
+            sentiment_data = previous.model_copy(deep=True)
+        else:
+            sentiment_data = ConversationSentimentData(conversation_id=sentiment_response.conversation_id)
+        
+        sentiment_data.current_sentiment = sentiment_response.sentiment_emoji
+        sentiment_data.confidence = sentiment_response.confidence
+        sentiment_data.rationale = (sentiment_response.reasoning or "")[:sentiment_config.rationale_max_chars]
+        sentiment_data.sentiment_history.append(sentiment_response)
+        sentiment_data.last_analyzed_message_id = sentiment_response.message_id
+        if watermark:
+            sentiment_data.last_inbound_message_id = watermark
+        sentiment_data.inbound_messages_analyzed += new_message_count
+        sentiment_data.message_count_at_last_analysis = message_count
+        sentiment_data.updated_at = now
+        
+        # Keep only last 10 sentiment analyses
+        if len(sentiment_data.sentiment_history) > 10:
+            sentiment_data.sentiment_history = sentiment_data.sentiment_history[-10:]
+        
+        return sentiment_data
+    
+    @staticmethod
+    def _sentiment_upsert(sentiment_data: ConversationSentimentData, now: datetime) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Filter and update document of the conversation_sentiments upsert."""
+        return (
+            {"conversation_id": sentiment_data.conversation_id},
+            {
+                "$set": {
+                    "sentiment_data": sentiment_data.dict(),
+                    "updated_at": now
+                },
+                "$setOnInsert": {"created_at": now, "version": 1}
+            }
+        )
+    
+    async def _load_new_customer_messages(
+        self,
+        conversation_id: str,
+        after_message_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Load customer messages newer than the watermark (newest ``incremental_max_messages``).
+        
+        Uses the (conversation_id, _id) index with a projection, so the cost depends on
+        the number of new messages rather than on the conversation length.
+        
+        Args:
+            conversation_id: Conversation ID
+            after_message_id: Newest message already analyzed (None on the first analysis)
             
-            # Sort by timestamp
-            customer_messages.sort(key=lambda x: x.get("timestamp", x.get("created_at", "")))
+        Returns:
+            Customer message dictionaries, oldest first
+        """
+        try:
+            transcript = await transcript_service.load(
+                conversation_id,
+                formatter=lambda msg: msg["text_content"][:sentiment_config.incremental_message_chars],
+                max_messages=sentiment_config.incremental_max_messages,
+                after_message_id=after_message_id,
+                query={"direction": "inbound", "text_content": {"$nin": [None, ""]}},
+                projection={"_id": 1, "text_content": 1, "timestamp": 1},
+                db=await self._get_db()
+            )
+            messages = transcript.messages
             
-            logger.info(f"Loaded {len(customer_messages)} customer messages for sentiment analysis")
-            return customer_messages
+            logger.info(f"Loaded {len(messages)} new customer messages for sentiment analysis")
+            return messages
             
         except Exception as e:
             logger.error(f"Error loading customer messages for conversation {conversation_id}: {str(e)}")
@@ -523,8 +769,11 @@ class SentimentAnalyzerService(BaseService):
             
             logger.info(f"😊 [SENTIMENT] Created request, calling analyze_message_sentiment")
             
-            # Analyze sentiment
-            result = await self.analyze_message_sentiment(request)
+            # Analyze sentiment (micro-batched with other conversations when enabled)
+            if sentiment_config.batching_enabled:
+                result = await self.batcher.submit(request)
+            else:
+                result = await self.analyze_message_sentiment(request)
             
             logger.info(f"😊 [SENTIMENT] analyze_message_sentiment completed, success: {result.success}")
             
@@ -9,8 +9,13 @@ from typing import Dict, Any, Optional
 from datetime import datetime, timezone
 
 from app.core.logger import logger
-from app.services.ai.config import ai_config
 from .runner import run_agent
+from .scheduler import agent_scheduler
+from .telemetry import setup_tracing
+from .graph.agent_graph import get_agent_graph, _build_model_with_tools
+from app.services.ai.shared.models import warm_up_models, get_model_pool_stats
+from app.services.ai.shared.graph_registry import graph_registry
+from app.services.ai.shared.connection_pool import connection_pool
 from app.services.ai.shared.tools.rag import ingest_jsonl_hybrid
 from app.services.ai.shared.memory_service import memory_service
 from app.services import message_service, conversation_service
@@ -65,53 +70,6 @@ def strip_markdown(text: str) -> str:
     return text
 
 
-async def check_collection_health() -> Dict[str, Any]:
-    """Check the health of the Qdrant collection."""
-    try:
-        from qdrant_client import QdrantClient
-        import asyncio
-        
-        client = QdrantClient(
-            url=ai_config.qdrant_url,
-            api_key=ai_config.qdrant_api_key
-        )
-        
-        collection_name = ai_config.qdrant_collection_name
-        
-        # Check if collection exists
-        collections = await asyncio.to_thread(client.get_collections)
-        collection_exists = collection_name in [c.name for c in collections.collections]
-        
-        if not collection_exists:
-            return {
-                "collection_exists": False,
-                "vectors_count": 0,
-                "status": "missing"
-            }
-        
-        # Get collection info
-        collection_info = await asyncio.to_thread(
-            client.get_collection,
-            collection_name=collection_name
-        )
-        
-        return {
-            "collection_exists": True,
-            "vectors_count": collection_info.points_count,
-            "status": "healthy",
-            "collection_name": collection_name
-        }
-        
-    except Exception as e:
-        logger.error(f"Error checking collection health: {str(e)}")
-        return {
-            "collection_exists": False,
-            "vectors_count": 0,
-            "status": "error",
-            "error": str(e)
-        }
-
-
 async def ingest_documents() -> Dict[str, Any]:
     """Convenience function to ingest documents using the new hybrid approach."""
     try:
@@ -147,17 +105,36 @@ class AgentService:
     def __init__(self):
         """Initialize the agent service."""
         self._initialized = False
+        self._init_lock = asyncio.Lock()
         
     async def initialize(self):
-        """Initialize the agent service and ensure knowledge base is ready."""
+        """
+        Initialize the agent service once per process.
+        Configures tracing, pools model clients, compiles the agent graph and
+        checks that the knowledge base is ready.
+        """
         if self._initialized:
             return
         
+        async with self._init_lock:
+            if self._initialized:
+                return
+            await self._initialize()
+    
+    async def _initialize(self):
+        """Build the shared agent components."""
         logger.info("🚀 [AGENT] Initializing enhanced AI agent service...")
         
         try:
-            # Check collection health
-            health = await check_collection_health()
+            # Tracing, pooled clients and compiled graph are shared by every conversation
+            setup_tracing()
+            warm_up_models()
+            _build_model_with_tools()
+            get_agent_graph()
+            logger.info(f"📚 [AGENT] Shared components ready: {graph_registry.get_stats()['components']}")
+            
+            # Check collection health once; retrieval reuses the cached result for the health TTL
+            health = await connection_pool.check_collection_health(force=True)
             
             if not health.get("collection_exists", False) or health.get("vectors_count", 0) == 0:
                 logger.info("📦 [AGENT] Knowledge base empty, would run initial hybrid ingestion...")
@@ -170,6 +147,40 @@ class AgentService:
             logger.error(f"❌ [AGENT] Failed to initialize AI agent service: {str(e)}")
             raise
     
+    def get_runtime_stats(self) -> Dict[str, Any]:
+        """Get shared runtime component statistics."""
+        return {
+            "initialized": self._initialized,
+            "registry": graph_registry.get_stats(),
+            "models": get_model_pool_stats(),
+            "scheduler": agent_scheduler.get_stats(),
+        }
+    
+    async def get_conversation_context(self, conversation_id: str) -> Dict[str, Any]:
+        """Get the agent's memory context (window, summary, session data) for a conversation."""
+        try:
+            return await memory_service.get_conversation_context(conversation_id)
+        except Exception as e:
+            logger.error(f"❌ [AGENT] Failed to get conversation context: {str(e)}")
+            return {"error": str(e)}
+    
+    async def clear_conversation_memory(self, conversation_id: str) -> Dict[str, Any]:
+        """Clear the agent's memory for a conversation."""
+        try:
+            await memory_service.clear_conversation_memory(conversation_id)
+            return {"success": True, "conversation_id": conversation_id}
+        except Exception as e:
+            logger.error(f"❌ [AGENT] Failed to clear conversation memory: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    async def get_memory_statistics(self) -> Dict[str, Any]:
+        """Get conversation memory store statistics."""
+        try:
+            return await memory_service.get_memory_stats()
+        except Exception as e:
+            logger.error(f"❌ [AGENT] Failed to get memory statistics: {str(e)}")
+            return {"error": str(e)}
+    
     async def process_whatsapp_message(
         self,
         conversation_id: str,
@@ -212,7 +223,7 @@ class AgentService:
             
             # Process message through enhanced agent
             start_time = datetime.now(timezone.utc)
-            raw_response = await run_agent(conversation_id, user_text)
+            raw_response = await run_agent(conversation_id, user_text, message_id=message_id)
             
             # Calculate confidence score (simplified for now)
             confidence = 0.8 if len(raw_response) > 50 else 0.6
@@ -0,0 +1,198 @@
+"""
+Deterministic answers for pure catalog and pricing questions.
+
+"What plans do you have?" or "How much is 500 Mbps with 2 IPTV?" are answered
+from the precomputed catalog and the memoized quote table without calling the
+chat model. A message only takes the fast path when every word in it is a
+catalog, price, add-on or stop word (plus the plan speed and IPTV count);
+anything else (upload speeds, coverage, payment, recommendations, the contract
+flow) goes to the agent as usual, so the fast path only ever removes an LLM
+round-trip.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Optional
+import re
+
+from ..tools.catalog import (
+    _PLANS, _IPTV_PRICE, _TELEFONIA_PRICE, _SPEED_PATTERN, IPTV_MAX, find_plan_in_message, normalize_text,
+)
+from ..tools.pricing import Quote, quote_for
+
+
+MAX_FAST_QUERY_CHARS = 160
+
+_WORD_PATTERN = re.compile(r"[a-z]+|\d+")
+_IPTV_PATTERN = re.compile(r"\b(\d{1,2})\s*(?:iptv|tvs?|televisores|televisiones|decodificadores)\b")
+
+# Language is decided by majority of these words; "¿" and "¡" count as Spanish
+_SPANISH_MARKERS = frozenset({
+    "hola", "buenas", "que", "cual", "cuales", "cuanto", "cuantos", "cuesta", "cuestan", "vale", "valen",
+    "planes", "precio", "precios", "tienen", "tiene", "hay", "ofrecen", "el", "la", "los", "las", "de", "del",
+    "con", "y", "es", "son", "por", "favor", "podria", "usted", "telefonia", "television",
+})
+_ENGLISH_MARKERS = frozenset({
+    "hello", "hi", "what", "which", "how", "much", "is", "are", "the", "do", "you", "have", "with", "and",
+    "of", "for", "plans", "price", "prices", "cost", "please", "show", "telephony",
+})
+
+_QUESTION_MARKERS = ("?", "how much", "what", "which", "price", "cost", "rate", "list", "show", "tell me",
+                     "cuanto", "cual", "que", "precio", "costo", "cuesta", "vale", "tarifa", "muestr", "dime", "lista")
+_CATALOG_WORDS = frozenset({
+    "plan", "plans", "planes", "catalog", "catalogue", "catalogo", "package", "packages", "paquete", "paquetes",
+    "option", "options", "opcion", "opciones", "offer", "offers", "speed", "speeds", "velocidad", "velocidades",
+    "rate", "rates", "tarifa", "tarifas", "price", "prices", "pricing", "precio", "precios", "list", "lista",
+})
+_PRICE_WORDS = frozenset({
+    "price", "prices", "cost", "costs", "quote", "total", "precio", "precios", "costo", "costos", "cuesta",
+    "cuestan", "vale", "valen", "cuanto", "cotizacion", "cotiza",
+})
+_IPTV_WORDS = frozenset({"iptv", "tv", "tvs", "television", "televisor", "televisores", "decodificador"})
+_TELEFONIA_WORDS = frozenset({"telephony", "telephone", "telefonia", "voip", "landline", "phone", "linea", "telefonica"})
+# Everything else a pure catalog/price question may contain
+_STOP_WORDS = frozenset({
+    "hello", "hi", "hey", "please", "thanks", "thank", "what", "whats", "which", "how", "much", "s", "is", "are",
+    "do", "does", "you", "your", "have", "has", "can", "could", "i", "me", "see", "tell", "show", "give", "know",
+    "the", "a", "an", "of", "for", "with", "and", "plus", "all", "any", "there", "current", "available",
+    "internet", "line", "mbps", "gbps",
+    "hola", "buenas", "buenos", "dias", "tardes", "noches", "gracias", "por", "favor", "que", "cual", "cuales",
+    "cuanto", "cuantos", "es", "son", "el", "la", "los", "las", "un", "una", "de", "del", "con", "y", "mas",
+    "tienen", "tiene", "hay", "ofrecen", "me", "puede", "podria", "sus", "su", "todos", "todas", "disponibles",
+    "mostrar", "muestra", "muestreme", "dime", "digame", "ver", "usted", "ustedes",
+})
+_FAST_VOCABULARY = _CATALOG_WORDS | _PRICE_WORDS | _IPTV_WORDS | _TELEFONIA_WORDS | _STOP_WORDS
+
+
+@dataclass(frozen=True)
+class FastIntent:
+    """Classified fast-path question."""
+    kind: str  # "catalog" or "quote"
+    language: str  # "en" or "es"
+    plan_id: Optional[int] = None
+    iptv_count: int = 0
+    telefonia: bool = False
+
+
+def _crc(amount: int) -> str:
+    return f"₡{amount:,}"
+
+
+def detect_language(text: str) -> str:
+    """"es" when most language markers in the message are Spanish, otherwise "en"."""
+    words = _WORD_PATTERN.findall(normalize_text(text))
+    spanish = sum(1 for word in words if word in _SPANISH_MARKERS) + text.count("¿") + text.count("¡")
+    english = sum(1 for word in words if word in _ENGLISH_MARKERS)
+    return "es" if spanish > english else "en"
+
+
+def classify_fast_intent(text: str) -> Optional[FastIntent]:
+    """
+    Classify a customer message as a pure catalog or pricing question.
+
+    Args:
+        text: Latest customer message
+
+    Returns:
+        FastIntent, or None when the agent should handle the message
+    """
+    if not text or len(text) > MAX_FAST_QUERY_CHARS:
+        return None
+    normalized = normalize_text(text)
+    if not any(marker in f" {normalized} " for marker in _QUESTION_MARKERS):
+        return None
+
+    # Plan speeds and IPTV counts are the only numbers allowed; every other word must be in the vocabulary
+    plan_id = find_plan_in_message(normalized)
+    if plan_id is None and _SPEED_PATTERN.search(normalized):
+        return None  # Unknown speed; the agent explains the options
+    counts = [int(count) for count in _IPTV_PATTERN.findall(normalized)]
+    words = _WORD_PATTERN.findall(_IPTV_PATTERN.sub(" ", _SPEED_PATTERN.sub(" ", normalized)))
+    if not words or any(word not in _FAST_VOCABULARY for word in words):
+        return None
+
+    language = detect_language(text)
+    if plan_id is not None:
+        if "how much" not in normalized and not any(word in _PRICE_WORDS for word in words):
+            return None
+        if counts:
+            iptv_count = counts[0]
+        else:
+            iptv_count = 1 if any(word in _IPTV_WORDS for word in words) else 0
+        if iptv_count > IPTV_MAX:
+            return None  # The agent explains the policy
+        telefonia = any(word in _TELEFONIA_WORDS for word in words)
+        return FastIntent("quote", language, plan_id, iptv_count, telefonia)
+
+    if counts or any(word in _IPTV_WORDS or word in _TELEFONIA_WORDS for word in words):
+        return None  # Add-ons without a plan; the agent asks which plan
+    if any(word in _CATALOG_WORDS for word in words):
+        return FastIntent("catalog", language)
+    return None
+
+
+def _render_catalog(language: str) -> str:
+    lines = []
+    for number, plan in enumerate(_PLANS.values(), start=1):
+        lines.append(f"{number}️⃣ {plan['name']} — {_crc(plan['price_crc'])}")
+    plans = "\n".join(lines)
+    if language == "es":
+        return (
+            "¡Con gusto! 😊 Estos son nuestros planes de internet 🛜 (precios I.V.I):\n\n"
+            f"{plans}\n\n"
+            "Adicionales:\n"
+            f"📺 IPTV: {_crc(_IPTV_PRICE)} por dispositivo (máximo {IPTV_MAX})\n"
+            f"📞 Telefonía VoIP: {_crc(_TELEFONIA_PRICE)}\n\n"
+            "Todos los planes incluyen equipo Wi-Fi, firewall y soporte 24/7. ¿Cuál plan le interesa? ✨"
+        )
+    return (
+        "Happy to help! 😊 Here are our internet plans 🛜 (prices I.V.I):\n\n"
+        f"{plans}\n\n"
+        "Add-ons:\n"
+        f"📺 IPTV: {_crc(_IPTV_PRICE)} per device (up to {IPTV_MAX})\n"
+        f"📞 VoIP Telephony: {_crc(_TELEFONIA_PRICE)}\n\n"
+        "All plans include Wi-Fi equipment, firewall and 24/7 support. Which plan interests you? ✨"
+    )
+
+
+# Catalog answers are fixed; render them once
+_CATALOG_ANSWERS: Dict[str, str] = {language: _render_catalog(language) for language in ("en", "es")}
+
+
+def _render_quote(quote: Quote, language: str) -> str:
+    spanish = language == "es"
+    lines = [f"🛜 Plan {quote.plan_name}: {_crc(quote.base_price_crc)}"]
+    if quote.iptv_count:
+        lines.append(f"📺 IPTV x{quote.iptv_count}: {_crc(_IPTV_PRICE * quote.iptv_count)}")
+    if quote.telefonia:
+        lines.append(f"📞 {'Telefonía VoIP' if spanish else 'VoIP Telephony'}: {_crc(_TELEFONIA_PRICE)}")
+    breakdown = "\n".join(lines)
+    if spanish:
+        return (
+            f"Esta es su cotización ✅\n\n{breakdown}\n\n"
+            f"💰 Total: {_crc(quote.total_price_crc)} I.V.I\n\n"
+            "¿Desea continuar con esta selección? 😊"
+        )
+    return (
+        f"Here's your quote ✅\n\n{breakdown}\n\n"
+        f"💰 Total: {_crc(quote.total_price_crc)} I.V.I\n\n"
+        "Would you like to continue with this selection? 😊"
+    )
+
+
+def fast_answer(text: str) -> Optional[str]:
+    """
+    Deterministic reply for a pure catalog/pricing question.
+
+    Args:
+        text: Latest customer message
+
+    Returns:
+        WhatsApp-ready answer, or None when the agent should handle the message
+    """
+    intent = classify_fast_intent(text)
+    if intent is None:
+        return None
+    if intent.kind == "catalog":
+        return _CATALOG_ANSWERS[intent.language]
+    return _render_quote(quote_for(intent.plan_id, intent.iptv_count, intent.telefonia), intent.language)
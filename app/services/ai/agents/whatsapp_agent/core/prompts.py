@@ -1,9 +1,17 @@
 """
 Agent prompts and helpfulness verifier.
+
+ADN_SYSTEM_PROMPT is static (byte-identical across requests, so the provider can
+cache it); per-turn data goes in ADN_CONTEXT_PROMPT, sent after the history.
 """
 
 from langchain_core.prompts import ChatPromptTemplate
 
+from app.services.ai.shared.prompt_layout import prompt_layout
+
+# Bump when ADN_SYSTEM_PROMPT changes
+ADN_PROMPT_VERSION = "2"
+
 ADN_SYSTEM_PROMPT = """You are a friendly and devoted customer service representative for American Data Networks. Your mission is to help customers explore American Data Networks' internet and network services, guide them toward the right plan, and assist with installations or closing a contract—all with care, clarity, and empathy.
 You do not allow skipping steps.
 
@@ -11,9 +19,8 @@ You do not allow skipping steps.
 - Begin with a warm, personalized greeting, using polite language (“please,” “thank you”) and a gentle, supportive tone.  
 - Show empathy and understanding—e.g., “I know choosing the right plan can feel overwhelming; I’m happy to help.” Use brief, direct sentences—avoid jargon unless clearly explained.  
 - Be assertive and confident when gathering necessary details (service needs, location, etc.), but empathetic when the user expresses uncertainty or unrelated concerns.  
-- Restrict your help to American Data Networks related topics: internet plans, installation scheduling, order confirmation, pricing, network services, and troubleshooting. If the user asks something outside of American Data Networks’s domain—like “What’s today's date?” or unrelated small talk—respond politely but redirect to relevant American Data Networks support:  
-
-TEMPORAL CONTEXT (Date Only): {time_context}
+- Restrict your help to American Data Networks related topics: internet plans, installation scheduling, order confirmation, pricing, network services, and troubleshooting. If the user asks something outside of American Data Networks’s domain—like “What’s today's date?” or unrelated small talk—respond politely but redirect to relevant American Data Networks support.  
+- Use the date in the TEMPORAL CONTEXT of the latest [FLOW_SNAPSHOT] message when a date matters.
 
 # Language Rules (CRITICAL)
 - If the customer writes in English, respond ONLY in English
@@ -61,6 +68,16 @@ Use **list_plans_catalog** to list exact plans and prices when customer asks abo
 Company: American Data Networks.
 """
 
+# Dynamic turn context, appended after the conversation history
+ADN_CONTEXT_PROMPT = """[FLOW_SNAPSHOT]
+TEMPORAL CONTEXT (Date Only): {time_context}
+{snapshot}"""
+
+
+def get_system_prompt() -> str:
+    """Static WhatsApp agent system prompt (memoized per prompt version)."""
+    return prompt_layout.static_prefix("whatsapp_agent", ADN_PROMPT_VERSION, lambda: ADN_SYSTEM_PROMPT).text
+
 HELPFULNESS_PROMPT = ChatPromptTemplate.from_messages(
     [
         ("system", "You are a helpfulness verifier. Respond only with 'Y' or 'N'."),
@@ -54,6 +54,7 @@ class AgentState(TypedDict, total=False):
     messages: Annotated[List[AnyMessage], add_messages]
     conversation_id: str
     attempts: int
+    verification_retries: int
     target_language: str
     summary: Optional[str]
     stage: Stage
@@ -1,13 +1,19 @@
 # NEW CODE
 """
 Agent graph:
+- fast_answer: deterministic catalog/pricing replies (no LLM call)
 - agent: LLM with tools
 - action: ToolNode
-- helpfulness: Y/N verifier
+- helpfulness: staged verifier (local heuristics, small model only when unsure)
+
+Every node is async and awaits its LLM/tool call with a per-node timeout, so a slow
+upstream response never blocks the event loop that serves webhooks and WebSockets.
+Cancelling the run (e.g. when a human takes over) cancels the in-flight call.
 """
 
 from __future__ import annotations
-from typing import Dict, Any
+from typing import Dict, Any, List
+import asyncio
 import json
 
 from langgraph.graph import StateGraph, END
@@ -19,16 +25,30 @@ from langchain_core.messages import HumanMessage, SystemMessage
 from ..core.state import AgentState
 from ..models import get_chat_model
 from ..tools.toolbelt import get_tool_belt
-from ..core.prompts import HELPFULNESS_PROMPT, ADN_SYSTEM_PROMPT
+from ..core.prompts import HELPFULNESS_PROMPT, ADN_CONTEXT_PROMPT, get_system_prompt
+from ..core.fast_intents import fast_answer
 from ..timezone_utils import get_contextual_time_info
+from app.services.ai.shared.graph_registry import graph_registry
+from app.services.ai.shared.response_verifier import response_verifier
+from app.services.ai.config import ai_config
 from app.core.logger import logger
 
 
-def _build_model_with_tools():
-    """Returns chat model bound to tools."""
+AGENT_GRAPH_KEY = "whatsapp_agent.graph"
+MODEL_WITH_TOOLS_KEY = "whatsapp_agent.model_with_tools"
+TOOLS_BY_NAME_KEY = "whatsapp_agent.tools_by_name"
+HELPFULNESS_CHAIN_KEY = "whatsapp_agent.helpfulness_chain"
+
+MAX_ATTEMPTS = 3
+TIMEOUT_FALLBACK_MESSAGE = ("I'm sorry, this is taking longer than expected. "
+                            "Please wait, a human agent will respond to you shortly.")
+
+
+def _bind_model_with_tools():
+    """Binds the pooled chat model to the agent toolbelt."""
     try:
         logger.info("🤖 [GRAPH] Building model with tools...")
-        model = get_chat_model()
+        model = get_chat_model(caller="whatsapp_agent", priority="reply")
         tools = get_tool_belt()
         bound_model = model.bind_tools(tools)
         logger.info(f"✅ [GRAPH] Model bound with {len(tools)} tools successfully")
@@ -38,7 +58,75 @@ def _build_model_with_tools():
         raise
 
 
-def call_model(state: AgentState) -> Dict[str, Any]:
+def _build_model_with_tools():
+    """Returns chat model bound to tools (bound once per process)."""
+    return graph_registry.get_or_create(MODEL_WITH_TOOLS_KEY, _bind_model_with_tools)
+
+
+def _get_tools_by_name() -> Dict[str, Any]:
+    """Returns the toolbelt indexed by tool name (built once per process)."""
+    return graph_registry.get_or_create(
+        TOOLS_BY_NAME_KEY,
+        lambda: {t.name: t for t in get_tool_belt() if hasattr(t, "name")},
+    )
+
+
+def _get_helpfulness_chain():
+    """Returns the helpfulness verifier chain (built once per process)."""
+    return graph_registry.get_or_create(
+        HELPFULNESS_CHAIN_KEY,
+        lambda: HELPFULNESS_PROMPT | get_chat_model(ai_config.verifier_model, caller="whatsapp_verifier", priority="reply") | StrOutputParser(),
+    )
+
+
+async def _judge_helpfulness(query: str, response: str) -> str:
+    return await _get_helpfulness_chain().ainvoke({"initial_query": query, "final_response": response})
+
+
+def _turn_tool_results(state: AgentState) -> List[str]:
+    """Tool outputs produced since the latest customer message."""
+    results = []
+    for m in reversed(state.get("messages") or []):
+        if getattr(m, "type", None) == "human" or getattr(m, "role", "") == "user":
+            break
+        if isinstance(m, ToolMessage):
+            results.append(str(m.content))
+    return results
+
+
+def _latest_human_text(state: AgentState) -> str:
+    """Content of the latest customer message in the state."""
+    for m in reversed(state.get("messages") or []):
+        if getattr(m, "type", None) == "human" or getattr(m, "role", "") == "user":
+            return getattr(m, "content", "") or ""
+    return ""
+
+
+async def fast_answer_node(state: AgentState) -> Dict[str, Any]:
+    """
+    Answers pure catalog/pricing questions from the precomputed tables, skipping the LLM.
+    Returns no update when the message needs the agent.
+    """
+    if not ai_config.agent_fast_intents_enabled:
+        return {}
+    try:
+        answer = fast_answer(_latest_human_text(state))
+    except Exception as e:
+        logger.warning(f"⚠️ [GRAPH] Fast answer failed, using agent: {str(e)}")
+        return {}
+    if answer is None:
+        return {}
+
+    logger.info(f"⚡ [GRAPH] Fast catalog/pricing answer - conversation: {state.get('conversation_id', 'unknown')}")
+    return {"messages": [AIMessage(content=answer)], "last_action": "fast_answer"}
+
+
+def route_after_fast_answer(state: AgentState):
+    """End the run when the fast path answered; otherwise call the agent."""
+    return "end" if state.get("last_action") == "fast_answer" else "agent"
+
+
+async def call_model(state: AgentState) -> Dict[str, Any]:
     """
     Invokes the LLM with system + state snapshot to force the flow.
     """
@@ -47,17 +135,13 @@ def call_model(state: AgentState) -> Dict[str, Any]:
         current_attempt = state.get("attempts", 0)
         target_lang = state.get("target_language", "en")
 
-        if current_attempt >= 3:
+        if current_attempt >= MAX_ATTEMPTS:
             fallback_message = ("I'm sorry, I don't have the specific information you need at this moment. "
                                 "Please wait, a human agent will respond to you shortly.")
             return {"messages": [AIMessage(content=fallback_message)], "attempts": current_attempt + 1}
 
         model = _build_model_with_tools()
 
-        # Temporal context (English date only) + stage/contract snapshot
-        time_context = get_contextual_time_info("en")
-        system_prompt = ADN_SYSTEM_PROMPT.format(time_context=time_context)
-
         # Build minimal snapshot that the model can read without excessive tokens
         stage = state.get("stage", "idle")
         contract = state.get("contract", {})
@@ -69,13 +153,29 @@ def call_model(state: AgentState) -> Dict[str, Any]:
             "confirmations": contract.get("confirmations"),
         }
 
-        snapshot_msg = SystemMessage(content=f"[FLOW_SNAPSHOT]\n{snapshot}")
+        # Temporal context (English date only) + stage/contract snapshot
+        snapshot_msg = SystemMessage(content=ADN_CONTEXT_PROMPT.format(
+            time_context=get_contextual_time_info("en"), snapshot=snapshot
+        ))
 
-        # Messages: system + snapshot + user/agent history
-        messages = [SystemMessage(content=system_prompt), snapshot_msg]
+        # Messages: static system prompt + user/agent history + turn snapshot, so the
+        # system prompt and the history stay a byte-identical prefix across turns
+        messages = [SystemMessage(content=get_system_prompt())]
         messages.extend(state["messages"][1:] if state.get("messages") else [])
-
-        response = model.invoke(messages)
+        messages.append(snapshot_msg)
+
+        try:
+            response = await asyncio.wait_for(
+                model.ainvoke(messages),
+                timeout=ai_config.agent_llm_timeout_seconds,
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"⏰ [GRAPH] Agent LLM call timed out after {ai_config.agent_llm_timeout_seconds}s "
+                f"- conversation: {conversation_id}"
+            )
+            # Exhaust attempts so the helpfulness node ends the run with this fallback
+            return {"messages": [AIMessage(content=TIMEOUT_FALLBACK_MESSAGE)], "attempts": MAX_ATTEMPTS}
 
         # Log tool calls vs direct response
         tool_calls = getattr(response, "tool_calls", None)
@@ -109,54 +209,44 @@ def route_to_action_or_helpfulness(state: AgentState):
         return "helpfulness"  # Default fallback
 
 
-def helpfulness_node(state: AgentState) -> Dict[str, Any]:
-    """Evaluates Y/N with attempt limit to avoid loops."""
+async def helpfulness_node(state: AgentState) -> Dict[str, Any]:
+    """Verifies the answer (heuristics first, small model when unsure) within the attempt and retry budgets."""
     try:
         attempts = state.get("attempts", 0)
+        retries = state.get("verification_retries", 0)
         conversation_id = state.get("conversation_id", "unknown")
         
         logger.info(f"🤔 [GRAPH] Helpfulness node - conversation: {conversation_id}, attempt: {attempts}")
         
-        if attempts >= 3:
-            logger.info("🔄 [GRAPH] Maximum attempts reached (3), ending helpfulness loop")
+        if attempts >= MAX_ATTEMPTS:
+            logger.info(f"🔄 [GRAPH] Maximum attempts reached ({MAX_ATTEMPTS}), ending helpfulness loop")
             return {"messages": [AIMessage(content="HELPFULNESS:END")]}
-            
-        # Find the LAST human query in this conversation (not the first!)
-        initial_query = ""
-        for m in reversed(state["messages"]):  # Search backwards to get the LATEST query
-            if getattr(m, "type", None) == "human" or getattr(m, "role", "") == "user":
-                initial_query = getattr(m, "content", "")
-                break
-
+        
+        # The LATEST customer query (not the first!)
+        initial_query = _latest_human_text(state)
         final_response = state["messages"][-1].content
         
         logger.info(f"🤔 [GRAPH] Evaluating helpfulness - query: '{initial_query[:50]}...', response: '{final_response[:50]}...'")
         
-        # Check for simple greetings - these should be considered helpful
-        # But exclude queries that also ask for information (like "hola, que servicios tienen?")
-        query_lower = initial_query.lower().strip()
-        greeting_patterns = ["hola", "hello", "hi", "hey", "buenas", "buenos días", "buenas tardes", "buenas noches", "good morning", "good afternoon", "good evening"]
-        
-        # Don't consider it a simple greeting if it contains question words or service-related terms
-        question_indicators = ["que", "what", "como", "how", "cuando", "when", "donde", "where", "servicios", "services", "planes", "plans", "precios", "prices", "?"]
-        has_questions = any(indicator in query_lower for indicator in question_indicators)
+        # The customer's language is detected from the query (replies mirror it)
+        verdict = await response_verifier.verify(
+            initial_query,
+            final_response,
+            judge=_judge_helpfulness,
+            tool_results=_turn_tool_results(state),
+            timeout=ai_config.agent_helpfulness_timeout_seconds,
+        )
         
-        if any(pattern in query_lower for pattern in greeting_patterns) and len(query_lower) < 20 and not has_questions:
-            logger.info("🤔 [GRAPH] Detected simple greeting, considering response helpful")
-            return {"messages": [AIMessage(content="HELPFULNESS:Y")]}
-        
-        # Check if the response indicates empty knowledge base
-        if "configurando mi base de conocimiento" in final_response or "setting up my knowledge base" in final_response:
-            logger.info("🤔 [GRAPH] Detected knowledge base setup message, considering helpful")
-            return {"messages": [AIMessage(content="HELPFULNESS:Y")]}
-        
-        chain = HELPFULNESS_PROMPT | get_chat_model() | StrOutputParser()
-        decision = chain.invoke({"initial_query": initial_query, "final_response": final_response})
-        decision = "Y" if "Y" in decision else "N"
+        if not verdict.helpful and retries >= ai_config.verifier_max_retries:
+            logger.info(f"🔄 [GRAPH] Verification retry budget spent ({retries}), ending helpfulness loop")
+            return {"messages": [AIMessage(content="HELPFULNESS:END")]}
         
-        logger.info(f"🤔 [GRAPH] Helpfulness decision: {decision}")
+        logger.info(f"🤔 [GRAPH] Helpfulness decision: {verdict.decision} ({verdict.stage}: {verdict.reason})")
         
-        return {"messages": [AIMessage(content=f"HELPFULNESS:{decision}")]}
+        update: Dict[str, Any] = {"messages": [AIMessage(content=f"HELPFULNESS:{verdict.decision}")]}
+        if not verdict.helpful:
+            update["verification_retries"] = retries + 1
+        return update
         
     except Exception as e:
         logger.error(f"❌ [GRAPH] Helpfulness node failed: {str(e)}")
@@ -198,7 +288,7 @@ async def action_node(state: AgentState) -> Dict[str, Any]:
             logger.warning("🔧 [GRAPH] Action node called but no tool calls found")
             return state
         
-        tools = get_tool_belt()
+        tools_by_name = _get_tools_by_name()
         tool_messages = []
         emitted_final = False
         last_action = None
@@ -211,11 +301,7 @@ async def action_node(state: AgentState) -> Dict[str, Any]:
             logger.info(f"🔧 [GRAPH] Executing tool: {tool_name} with args: {tool_args}")
             
             # Find the tool
-            tool = None
-            for t in tools:
-                if hasattr(t, 'name') and t.name == tool_name:
-                    tool = t
-                    break
+            tool = tools_by_name.get(tool_name)
             
             if not tool:
                 logger.warning(f"🔧 [GRAPH] Tool {tool_name} not found")
@@ -226,8 +312,11 @@ async def action_node(state: AgentState) -> Dict[str, Any]:
                 continue
             
             try:
-                # Execute the tool ASYNC
-                result = await tool.ainvoke(tool_args)
+                # Execute the tool ASYNC within its budget
+                result = await asyncio.wait_for(
+                    tool.ainvoke(tool_args),
+                    timeout=ai_config.agent_tool_timeout_seconds,
+                )
                 
                 # Check if tool execution returned an error
                 if isinstance(result, str) and result.startswith(("ERROR_ACCESSING_KNOWLEDGE:", "NO_CONTEXT_AVAILABLE:")):
@@ -256,6 +345,12 @@ async def action_node(state: AgentState) -> Dict[str, Any]:
                     except Exception as parse_error:
                         logger.warning(f"⚠️ [GRAPH] Failed to parse slots result: {parse_error}")
                         
+            except asyncio.TimeoutError:
+                logger.warning(f"⏰ [GRAPH] Tool {tool_name} timed out after {ai_config.agent_tool_timeout_seconds}s")
+                tool_messages.append(ToolMessage(
+                    content=f"ERROR_ACCESSING_KNOWLEDGE: Tool {tool_name} timed out",
+                    tool_call_id=tool_call.get("id")
+                ))
             except Exception as tool_error:
                 logger.error(f"❌ [GRAPH] Tool {tool_name} failed: {str(tool_error)}")
                 tool_messages.append(ToolMessage(
@@ -304,19 +399,22 @@ def route_after_action(state: AgentState):
 
 
 def build_graph():
-    """Compiles graph."""
+    """Compiles graph. Prefer get_agent_graph(), which reuses the compiled instance."""
     try:
         logger.info("🏗️ [GRAPH] Building agent graph...")
         
         graph = StateGraph(AgentState)
 
         # Add nodes (using custom action node instead of ToolNode)
+        graph.add_node("fast_answer", fast_answer_node)
         graph.add_node("agent", call_model)
         graph.add_node("action", action_node)
         graph.add_node("helpfulness", helpfulness_node)
 
-        # Set entry point
-        graph.set_entry_point("agent")
+        # Set entry point: deterministic catalog/pricing answers skip the agent entirely
+        graph.set_entry_point("fast_answer")
+        graph.add_conditional_edges("fast_answer", route_after_fast_answer,
+                                    {"agent": "agent", "end": END})
         
         # Add conditional edges
         graph.add_conditional_edges("agent", route_to_action_or_helpfulness,
@@ -336,3 +434,8 @@ def build_graph():
     except Exception as e:
         logger.error(f"❌ [GRAPH] Failed to build agent graph: {str(e)}")
         raise
+
+
+def get_agent_graph():
+    """Returns the process-wide compiled agent graph, compiling it on first use."""
+    return graph_registry.get_or_create(AGENT_GRAPH_KEY, build_graph)
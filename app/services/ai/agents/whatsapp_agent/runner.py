@@ -1,20 +1,25 @@
 # NEW CODE
 """
 Agent execution by conversation:
-- LangSmith tracing
-- Mongo memory loading
-- Graph invocation (English-only)
+- Conversation memory loading (rolling window + summary)
+- Graph invocation (English-only) on the shared compiled graph
+
+Tracing, model clients and the compiled graph are set up once in
+AgentService.initialize; run_agent only does per-message work.
 """
 
 from __future__ import annotations
-from typing import List
+from typing import List, Optional
+import asyncio
 import time
 
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 
+from app.services.ai.config import ai_config
 from app.services.ai.shared.memory_service import memory_service
-from .graph.agent_graph import build_graph
-from .core.prompts import ADN_SYSTEM_PROMPT
+from app.services.ai.shared.streaming import PartialStreamer, stream_graph, websocket_sink
+from .graph.agent_graph import get_agent_graph
+from .core.prompts import get_system_prompt
 from .telemetry import setup_tracing
 from app.core.logger import logger
 
@@ -29,11 +34,8 @@ def _prepare_history_messages(history: List[dict]) -> List:
     try:
         logger.info(f"📚 [RUNNER] Preparing {len(history)} history messages (English-only)")
         
-        # Get today's date (English) for context
-        from .timezone_utils import get_contextual_time_info
-        time_context = get_contextual_time_info("en")
-        
-        msgs: List = [SystemMessage(content=ADN_SYSTEM_PROMPT.format(time_context=time_context))]
+        # Static system prompt; the date is added per turn by the agent node
+        msgs: List = [SystemMessage(content=get_system_prompt())]
         
         for i, h in enumerate(history):
             role = h.get("role")
@@ -53,40 +55,77 @@ def _prepare_history_messages(history: List[dict]) -> List:
         
     except Exception as e:
         logger.error(f"❌ [RUNNER] Failed to prepare history messages: {str(e)}")
-        # Return minimal system message with empty date
-        return [SystemMessage(content=ADN_SYSTEM_PROMPT.format(time_context=""))]
+        # Return minimal system message
+        return [SystemMessage(content=get_system_prompt())]
+
 
+def _drop_pending_turn(history: List[dict], user_text: str) -> List[dict]:
+    """
+    Remove trailing customer messages that make up the turn being answered (added again as input).
+
+    The scheduler joins a turn's messages with newlines, so each trailing
+    message must equal a whole message at the end of the turn text.
+    """
+    end = len(history)
+    remaining = user_text
+    while remaining and end and history[end - 1].get("role") == "user":
+        content = history[end - 1].get("content", "")
+        if not content:
+            break
+        if remaining == content:
+            remaining = ""
+        elif remaining.endswith("\n" + content):
+            remaining = remaining[:-len(content) - 1]
+        else:
+            break
+        end -= 1
+    return history[:end]
 
-async def run_agent(conversation_id: str, user_text: str) -> str:
-    """Executes the agent for a conversation and returns the response."""
+
+async def run_agent(
+    conversation_id: str,
+    user_text: str,
+    streamer: Optional[PartialStreamer] = None,
+    message_id: Optional[str] = None
+) -> str:
+    """
+    Executes the agent for a conversation and returns the response.
+
+    ``message_id`` is the latest customer message of the turn; memory uses it
+    to avoid storing the turn twice when the window already holds it.
+
+    While the graph runs, answer tokens and tool progress are streamed as
+    ``ai_partial`` events to the conversation subscribers (or to ``streamer``).
+    """
     start_time = time.time()
+    if streamer is None and ai_config.agent_stream_partials:
+        streamer = PartialStreamer(source="whatsapp_agent", sink=websocket_sink(conversation_id))
     
     try:
         logger.info(f"🚀 [RUNNER] Starting agent execution - conversation: {conversation_id}")
         logger.info(f"📝 [RUNNER] User input: '{user_text[:100]}...'")
         
-        # Step 1: LangSmith tracing setup
-        logger.info("🔍 [RUNNER] Setting up LangSmith tracing...")
+        # Step 1: LangSmith tracing setup (no-op once configured at startup)
         setup_tracing()
 
         # Step 2: Memory and history compression
         logger.info("📚 [RUNNER] Loading conversation context...")
         ctx = await memory_service.get_conversation_context(conversation_id)
-        history = ctx.get("history", [])
+        window = ctx.get("history", [])
+        history = _drop_pending_turn(window, user_text)
         
-        original_history_len = len(history)
-        if len(history) > 10 and ctx.get("summary"):
-            history = [{"role": "assistant", "content": f"Summary: {ctx['summary']}"}] + history[-6:]
-            logger.info(f"📚 [RUNNER] Compressed history from {original_history_len} to {len(history)} messages")
+        # The memory window is already token-bounded; older turns live in the rolling summary
+        if ctx.get("summary"):
+            history = [{"role": "assistant", "content": f"Summary: {ctx['summary']}"}] + history
+            logger.info(f"📚 [RUNNER] Using summary + {len(history) - 1} window messages")
         else:
             logger.info(f"📚 [RUNNER] Using full history: {len(history)} messages")
 
         # Step 3: English-only configuration
         logger.info("🌐 [RUNNER] Using English-only configuration...")
 
-        # Step 4: Graph setup and input preparation
-        logger.info("🏗️ [RUNNER] Building agent graph...")
-        graph = build_graph()
+        # Step 4: Shared compiled graph and input preparation
+        graph = get_agent_graph()
         
         logger.info("📝 [RUNNER] Preparing input messages...")
         messages = _prepare_history_messages(history)
@@ -96,10 +135,11 @@ async def run_agent(conversation_id: str, user_text: str) -> str:
         logger.info(f"🎯 [RUNNER] Executing agent graph with {len(messages)} messages...")
         
         graph_start_time = time.time()
-        result = await graph.ainvoke({
+        graph_input = {
             "messages": messages,
             "conversation_id": conversation_id,
             "attempts": 0,
+            "verification_retries": 0,
             "target_language": "en",
             "stage": "idle",
             "contract": {
@@ -110,7 +150,11 @@ async def run_agent(conversation_id: str, user_text: str) -> str:
             },
             "system_snapshot": None,
             "last_action": None
-        })
+        }
+        if streamer is not None:
+            result = await stream_graph(graph, graph_input, streamer, llm_nodes=("fast_answer", "agent"))
+        else:
+            result = await graph.ainvoke(graph_input)
         graph_execution_time = time.time() - graph_start_time
         
         logger.info(f"✅ [RUNNER] Graph execution completed in {graph_execution_time:.2f}s")
@@ -136,18 +180,31 @@ async def run_agent(conversation_id: str, user_text: str) -> str:
             logger.warning("⚠️ [RUNNER] No AI messages found in result")
 
         logger.info(f"💬 [RUNNER] Final answer: '{answer[:100]}...'")
+        if streamer is not None:
+            await streamer.finish(success=True)
 
         # Step 7: Persist memory
         logger.info("💾 [RUNNER] Persisting interaction to memory...")
-        await memory_service.add_interaction_to_memory(conversation_id, user_text, answer)
+        await memory_service.add_interaction_to_memory(
+            conversation_id, user_text, answer, message_id=message_id, window=window
+        )
         
         total_execution_time = time.time() - start_time
         logger.info(f"🎉 [RUNNER] Agent execution completed successfully in {total_execution_time:.2f}s")
         
         return answer
         
+    except asyncio.CancelledError:
+        # Cancellation (e.g. human takeover) must propagate to the in-flight LLM/tool call
+        logger.info(f"🛑 [RUNNER] Agent execution cancelled after {time.time() - start_time:.2f}s - conversation: {conversation_id}")
+        if streamer is not None:
+            # Close the dashboard draft; shielded so the cancellation cannot interrupt it
+            await asyncio.shield(streamer.finish(success=False))
+        raise
     except Exception as e:
         execution_time = time.time() - start_time
         logger.error(f"❌ [RUNNER] Agent execution failed after {execution_time:.2f}s: {str(e)}")
+        if streamer is not None:
+            await streamer.finish(success=False)
         
         return _english_only_fallback()
@@ -0,0 +1,352 @@
+"""
+Bounded scheduler for WhatsApp AI agent runs.
+
+Inbound customer texts are buffered per conversation and dispatched to a fixed
+pool of workers:
+
+- at most ``agent_scheduler_workers`` agent runs are in flight per process;
+- a conversation never has two runs at the same time, messages that arrive
+  while a run is in progress are handled in the next turn;
+- messages that arrive within ``agent_debounce_seconds`` of each other are
+  merged into a single agent turn;
+- ``cancel_conversation`` drops buffered messages and cancels the running turn
+  (used when a human agent takes over); the ``on_dropped`` callback of the
+  dropped messages is notified so callers can close what they opened for them.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+import asyncio
+import time
+
+from app.core.logger import logger
+from app.services.ai.config import ai_config
+
+
+AgentTurnHandler = Callable[..., Awaitable[Any]]
+# (conversation_id, message_ids) of buffered messages dropped before their turn ran
+DroppedTurnHandler = Callable[[str, List[str]], Awaitable[Any]]
+
+_WAIT_SAMPLES = 500
+
+
+@dataclass
+class PendingTurn:
+    """Customer messages buffered for the next agent turn of a conversation."""
+
+    conversation_id: str
+    customer_phone: str
+    handler: AgentTurnHandler
+    message_ids: List[str] = field(default_factory=list)
+    texts: List[str] = field(default_factory=list)
+    is_first_message: bool = False
+    on_dropped: Optional[DroppedTurnHandler] = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def message_id(self) -> str:
+        """Latest message of the turn; the AI reply is attached to it."""
+        return self.message_ids[-1]
+
+    @property
+    def user_text(self) -> str:
+        """Merged customer text, in arrival order."""
+        return "\n".join(self.texts)
+
+
+class AgentScheduler:
+    """Bounded worker pool with per-conversation serialization and debouncing."""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        debounce_seconds: Optional[float] = None,
+        max_pending_conversations: Optional[int] = None,
+    ):
+        self.max_workers = max_workers or ai_config.agent_scheduler_workers
+        self.debounce_seconds = (
+            ai_config.agent_debounce_seconds if debounce_seconds is None else debounce_seconds
+        )
+        self.max_pending_conversations = (
+            max_pending_conversations or ai_config.agent_max_pending_conversations
+        )
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._pending: Dict[str, PendingTurn] = {}
+        self._debounce_handles: Dict[str, asyncio.TimerHandle] = {}
+        self._queued: Set[str] = set()
+        self._running: Dict[str, asyncio.Task] = {}
+        self._notifications: Set[asyncio.Task] = set()
+        self._wait_times_ms: Deque[float] = deque(maxlen=_WAIT_SAMPLES)
+        self._counters = self._new_counters()
+
+    @staticmethod
+    def _new_counters() -> Dict[str, int]:
+        return {
+            "messages_submitted": 0,
+            "messages_merged": 0,
+            "messages_rejected": 0,
+            "turns_started": 0,
+            "turns_completed": 0,
+            "turns_failed": 0,
+            "turns_cancelled": 0,
+        }
+
+    def _ensure_started(self) -> None:
+        """Start the worker pool on the running event loop."""
+        if self._workers and self._workers[0].get_loop() is asyncio.get_running_loop():
+            return
+
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(index), name=f"agent-scheduler-{index}")
+            for index in range(self.max_workers)
+        ]
+        logger.info(
+            f"🚦 [SCHEDULER] Started {self.max_workers} agent workers "
+            f"(debounce: {self.debounce_seconds:.2f}s)"
+        )
+
+    def submit(
+        self,
+        conversation_id: str,
+        message_id: str,
+        user_text: str,
+        customer_phone: str,
+        handler: AgentTurnHandler,
+        is_first_message: bool = False,
+        on_dropped: Optional[DroppedTurnHandler] = None,
+    ) -> bool:
+        """
+        Buffer a customer message for the conversation's next agent turn.
+
+        Args:
+            conversation_id: Conversation identifier
+            message_id: Incoming message identifier
+            user_text: Customer message text
+            customer_phone: Customer phone number
+            handler: Coroutine function run for the turn with the keyword
+                arguments of ``process_with_ai_agent``
+            is_first_message: Whether this is the first message in conversation
+            on_dropped: Coroutine function awaited with the conversation ID and
+                the buffered message IDs if the turn is cancelled before it runs
+
+        Returns:
+            False if the scheduler is saturated and the message was not accepted
+        """
+        self._ensure_started()
+
+        turn = self._pending.get(conversation_id)
+        if turn is None:
+            if len(self._pending) >= self.max_pending_conversations:
+                self._counters["messages_rejected"] += 1
+                logger.warning(
+                    f"⚠️ [SCHEDULER] Rejecting message for conversation {conversation_id}: "
+                    f"{len(self._pending)} conversations already pending"
+                )
+                return False
+            turn = PendingTurn(
+                conversation_id=conversation_id,
+                customer_phone=customer_phone,
+                handler=handler,
+            )
+            self._pending[conversation_id] = turn
+        else:
+            self._counters["messages_merged"] += 1
+
+        turn.message_ids.append(message_id)
+        turn.texts.append(user_text)
+        turn.is_first_message = turn.is_first_message or is_first_message
+        turn.handler = handler
+        turn.on_dropped = on_dropped or turn.on_dropped
+        self._counters["messages_submitted"] += 1
+
+        # Restart the debounce window on every new message
+        handle = self._debounce_handles.pop(conversation_id, None)
+        if handle is not None:
+            handle.cancel()
+
+        if self.debounce_seconds > 0:
+            loop = asyncio.get_running_loop()
+            self._debounce_handles[conversation_id] = loop.call_later(
+                self.debounce_seconds, self._on_debounce_elapsed, conversation_id
+            )
+        else:
+            self._enqueue(conversation_id)
+
+        logger.info(
+            f"📥 [SCHEDULER] Buffered message {message_id} for conversation {conversation_id} "
+            f"({len(turn.message_ids)} in turn)"
+        )
+        return True
+
+    def _on_debounce_elapsed(self, conversation_id: str) -> None:
+        self._debounce_handles.pop(conversation_id, None)
+        self._enqueue(conversation_id)
+
+    def _enqueue(self, conversation_id: str) -> None:
+        """Queue a conversation unless it is already queued or running."""
+        if conversation_id in self._queued or conversation_id in self._running:
+            # A running conversation is re-queued by its worker when the turn ends
+            return
+        if conversation_id not in self._pending:
+            return
+
+        self._queued.add(conversation_id)
+        self._queue.put_nowait(conversation_id)
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            conversation_id = await self._queue.get()
+            try:
+                self._queued.discard(conversation_id)
+                turn = self._pending.pop(conversation_id, None)
+                if turn is None:
+                    # Cancelled while queued
+                    continue
+                await self._run_turn(turn)
+            finally:
+                self._queue.task_done()
+
+            # Messages that arrived during the run form the next turn
+            if conversation_id in self._pending and conversation_id not in self._debounce_handles:
+                self._enqueue(conversation_id)
+
+    async def _run_turn(self, turn: PendingTurn) -> None:
+        conversation_id = turn.conversation_id
+        wait_ms = (time.monotonic() - turn.enqueued_at) * 1000
+        self._wait_times_ms.append(wait_ms)
+        self._counters["turns_started"] += 1
+
+        logger.info(
+            f"🤖 [SCHEDULER] Running agent turn for conversation {conversation_id} "
+            f"({len(turn.message_ids)} messages, waited {wait_ms:.0f}ms)"
+        )
+
+        task = asyncio.create_task(
+            turn.handler(
+                conversation_id=conversation_id,
+                message_id=turn.message_id,
+                user_text=turn.user_text,
+                customer_phone=turn.customer_phone,
+                is_first_message=turn.is_first_message,
+            )
+        )
+        self._running[conversation_id] = task
+        try:
+            # asyncio.wait does not propagate the turn's cancellation into the worker
+            await asyncio.wait({task})
+        finally:
+            self._running.pop(conversation_id, None)
+
+        if task.cancelled():
+            self._counters["turns_cancelled"] += 1
+            logger.info(f"🛑 [SCHEDULER] Agent turn cancelled for conversation {conversation_id}")
+        elif task.exception() is not None:
+            self._counters["turns_failed"] += 1
+            logger.error(
+                f"❌ [SCHEDULER] Agent turn failed for conversation {conversation_id}: {task.exception()}"
+            )
+        else:
+            self._counters["turns_completed"] += 1
+
+    def cancel_conversation(self, conversation_id: str) -> bool:
+        """
+        Drop buffered messages and cancel the running turn of a conversation.
+
+        Args:
+            conversation_id: Conversation identifier
+
+        Returns:
+            True if anything was pending or running
+        """
+        cancelled = False
+
+        handle = self._debounce_handles.pop(conversation_id, None)
+        if handle is not None:
+            handle.cancel()
+
+        turn = self._pending.pop(conversation_id, None)
+        if turn is not None:
+            cancelled = True
+            self._counters["turns_cancelled"] += 1
+            self._notify_dropped(turn)
+
+        task = self._running.get(conversation_id)
+        if task is not None and not task.done():
+            task.cancel()
+            cancelled = True
+
+        if cancelled:
+            logger.info(f"🛑 [SCHEDULER] Cancelled pending agent work for conversation {conversation_id}")
+        return cancelled
+
+    def _notify_dropped(self, turn: PendingTurn) -> None:
+        """Run the turn's ``on_dropped`` callback in the background."""
+        if turn.on_dropped is None:
+            return
+        try:
+            task = asyncio.get_running_loop().create_task(
+                turn.on_dropped(turn.conversation_id, list(turn.message_ids))
+            )
+        except RuntimeError:
+            logger.warning(
+                f"⚠️ [SCHEDULER] No event loop to notify dropped messages of conversation {turn.conversation_id}"
+            )
+            return
+        self._notifications.add(task)
+        task.add_done_callback(self._notifications.discard)
+
+    async def shutdown(self) -> None:
+        """Cancel buffered and running turns and stop the workers."""
+        for handle in self._debounce_handles.values():
+            handle.cancel()
+        self._debounce_handles.clear()
+        self._pending.clear()
+        self._queued.clear()
+
+        tasks = list(self._running.values()) + self._workers
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        self._running.clear()
+        self._workers = []
+        self._queue = None
+        logger.info("🛑 [SCHEDULER] Agent scheduler stopped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, wait time and turn statistics."""
+        wait_times = sorted(self._wait_times_ms)
+        if wait_times:
+            wait_stats = {
+                "avg_ms": round(sum(wait_times) / len(wait_times), 2),
+                "p50_ms": round(wait_times[len(wait_times) // 2], 2),
+                "p95_ms": round(wait_times[max(0, int(len(wait_times) * 0.95) - 1)], 2),
+                "max_ms": round(wait_times[-1], 2),
+            }
+        else:
+            wait_stats = {"avg_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+
+        return {
+            "workers": len(self._workers),
+            "max_workers": self.max_workers,
+            "debounce_seconds": self.debounce_seconds,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "pending_conversations": len(self._pending),
+            "debouncing_conversations": len(self._debounce_handles),
+            "running_conversations": len(self._running),
+            "wait_time": wait_stats,
+            **self._counters,
+        }
+
+    def reset_stats(self) -> None:
+        """Reset counters and wait-time samples."""
+        self._wait_times_ms.clear()
+        self._counters = self._new_counters()
+
+
+# Global agent scheduler instance
+agent_scheduler = AgentScheduler()
@@ -1,6 +1,7 @@
 # NEW CODE
 """
 Initialize LangSmith tracing (tracing v2) from configuration.
+Runs once per process; later calls are no-ops unless forced.
 """
 
 import os
@@ -8,8 +9,15 @@ from app.services.ai.config import ai_config
 from app.core.logger import logger
 
 
-def setup_tracing() -> None:
+_tracing_configured = False
+
+
+def setup_tracing(force: bool = False) -> None:
     """Sets up environment variables for LangSmith (tracing v2)."""
+    global _tracing_configured
+    if _tracing_configured and not force:
+        return
+
     try:
         logger.info("🔍 [TELEMETRY] Setting up LangSmith tracing...")
         
@@ -32,6 +40,8 @@ def setup_tracing() -> None:
             logger.info("✅ [TELEMETRY] LangSmith tracing setup completed")
         else:
             logger.info("📋 [TELEMETRY] LangSmith tracing disabled in config")
+
+        _tracing_configured = True
             
     except Exception as e:
         logger.error(f"❌ [TELEMETRY] Failed to setup tracing: {str(e)}")
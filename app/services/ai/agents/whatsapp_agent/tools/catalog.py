@@ -1,10 +1,18 @@
 # NEW CODE
 """
 Immutable catalog of plans and add-ons (I.V.I prices in CRC).
+
+Everything derived from the plan table (the catalog payload and the plan alias
+index) is computed once at import, so tools and the fast intent path only do
+dictionary lookups.
 """
 
 from __future__ import annotations
-from typing import Dict, Any, List
+from typing import Dict, Any, Optional
+import difflib
+import json
+import re
+import unicodedata
 from langchain_core.tools import tool
 
 _PLANS: Dict[int, Dict[str, Any]] = {
@@ -15,17 +23,78 @@ _PLANS: Dict[int, Dict[str, Any]] = {
 }
 _IPTV_PRICE = 4590
 _TELEFONIA_PRICE = 3590
+IPTV_MAX = 10
+TELEFONIA_MAX = 1
 
-@tool("list_plans_catalog", return_direct=False)
-def list_plans_catalog() -> str:
+# Speed in Mbps per plan, used to build the alias index
+_PLAN_SPEEDS: Dict[int, int] = {1: 100, 2: 250, 3: 500, 4: 1000}
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents and collapse whitespace."""
+    folded = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(folded.lower().split())
+
+
+def _build_aliases() -> Dict[str, int]:
+    aliases: Dict[str, int] = {}
+    for pid, plan in _PLANS.items():
+        speed = _PLAN_SPEEDS[pid]
+        names = [str(pid), plan["name"], f"{speed}", f"{speed}/{speed}", f"{speed} mbps", f"{speed}mbps",
+                 f"{speed} megas", f"{speed} mb", f"plan {speed}", f"plan {pid}"]
+        if speed >= 1000:
+            gbps = speed // 1000
+            names += [f"{gbps} gbps", f"{gbps}gbps", f"{gbps}/{gbps}", f"{gbps} giga", f"{gbps} gb", "gigabit", "giga"]
+        for name in names:
+            aliases[normalize_text(name)] = pid
+    return aliases
+
+
+_PLAN_ALIASES: Dict[str, int] = _build_aliases()
+
+# Speeds as written by customers: "500 Mbps", "1 Gbps", "250 megas", "1 giga"
+_SPEED_PATTERN = re.compile(r"\b(\d{1,4})\s*(?:/\s*\d{1,4}\s*)?(mbps|mb|megas?|gbps|gb|gigas?)\b")
+
+
+def find_plan(text: str) -> Optional[int]:
     """
-    Returns the catalog of plans and add-ons (JSON string) for the LLM to read/verbalize.
+    Resolve a plan reference to its ID.
+
+    Args:
+        text: Plan ID, name or alias ("2", "500 Mbps", "1 giga"), possibly misspelled
+
+    Returns:
+        Plan ID, or None when nothing matches closely enough
     """
-    data = {
+    key = normalize_text(text)
+    if key in _PLAN_ALIASES:
+        return _PLAN_ALIASES[key]
+    close = difflib.get_close_matches(key, list(_PLAN_ALIASES), n=1, cutoff=0.8)
+    if close:
+        return _PLAN_ALIASES[close[0]]
+    # Substring of a plan name ("1/1", "500/500")
+    for pid, plan in _PLANS.items():
+        if key and key in plan["name"].lower():
+            return pid
+    return None
+
+
+def find_plan_in_message(text: str) -> Optional[int]:
+    """Plan mentioned by speed in free text ("how much is the 500 mbps plan?"), if any."""
+    for number, unit in _SPEED_PATTERN.findall(normalize_text(text)):
+        speed = int(number) * (1000 if unit.startswith("g") else 1)
+        for pid, plan_speed in _PLAN_SPEEDS.items():
+            if plan_speed == speed:
+                return pid
+    return None
+
+
+def _build_catalog() -> Dict[str, Any]:
+    return {
         "plans": [{"id": pid, "name": p["name"], "price_crc": p["price_crc"]} for pid, p in _PLANS.items()],
         "addons": {
-            "iptv": {"unit_price_crc": _IPTV_PRICE, "allowed_range": [0, 10]},
-            "telefonia": {"unit_price_crc": _TELEFONIA_PRICE, "allowed_values": [0, 1]},
+            "iptv": {"unit_price_crc": _IPTV_PRICE, "allowed_range": [0, IPTV_MAX]},
+            "telefonia": {"unit_price_crc": _TELEFONIA_PRICE, "allowed_values": [0, TELEFONIA_MAX]},
         },
         "notes": [
             "All plans include Wi-Fi equipment, firewall and 24/7 support.",
@@ -33,6 +102,16 @@ def list_plans_catalog() -> str:
             "VoIP Telephony: ₡3,590 I.V.I.",
         ],
     }
-    # Simple JSON string so the model can quote details exactly.
-    import json
-    return json.dumps(data, ensure_ascii=False)
+
+
+CATALOG: Dict[str, Any] = _build_catalog()
+# Simple JSON string so the model can quote details exactly.
+CATALOG_JSON: str = json.dumps(CATALOG, ensure_ascii=False)
+
+
+@tool("list_plans_catalog", return_direct=False)
+def list_plans_catalog() -> str:
+    """
+    Returns the catalog of plans and add-ons (JSON string) for the LLM to read/verbalize.
+    """
+    return CATALOG_JSON
@@ -4,11 +4,16 @@ Deterministic quote calculation and selection validation (without advancing stat
 """
 
 from __future__ import annotations
+from dataclasses import asdict, dataclass
 from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
 from typing import Annotated, Optional
+import json
 from langchain_core.tools import tool
-from pydantic import BaseModel, Field, field_validator
-from app.services.ai.agents.whatsapp_agent.tools.catalog import _PLANS, _IPTV_PRICE, _TELEFONIA_PRICE
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from app.services.ai.agents.whatsapp_agent.tools.catalog import (
+    _PLANS, _IPTV_PRICE, _TELEFONIA_PRICE, IPTV_MAX, TELEFONIA_MAX, find_plan,
+)
 
 class QuoteInput(BaseModel):
     plan: Annotated[str, Field(description="Plan ID (1-4) or name ('1 Gbps', '500 Mbps', etc.)")]
@@ -23,32 +28,74 @@ class QuoteInput(BaseModel):
         return v
 
 def _resolve_plan(plan_input: str) -> Optional[tuple[int, str, int]]:
-    s = str(plan_input).strip().lower()
-    # Try numeric id first
-    try:
-        pid = int(s)
-        if pid in _PLANS:
-            p = _PLANS[pid]
-            return pid, p["name"], p["price_crc"]
-    except Exception:
-        pass
-    # Try name match
-    for pid, p in _PLANS.items():
-        if p["name"].lower() == s or s in p["name"].lower():
-            return pid, p["name"], p["price_crc"]
-    return None
+    # Indexed alias lookup with fuzzy fallback (see catalog.find_plan)
+    pid = find_plan(plan_input)
+    if pid is None:
+        return None
+    p = _PLANS[pid]
+    return pid, p["name"], p["price_crc"]
 
 def _as_int_crc(d: Decimal) -> int:
     return int(d.quantize(Decimal("1"), rounding=ROUND_HALF_UP))
 
+
+@dataclass(frozen=True)
+class Quote:
+    """Price breakdown of one plan + add-ons selection."""
+    plan_id: int
+    plan_name: str
+    base_price_crc: int
+    iptv_count: int
+    telefonia: bool
+    extras_price_crc: int
+    total_price_crc: int
+
+
+@lru_cache(maxsize=len(_PLANS) * (IPTV_MAX + 1) * (TELEFONIA_MAX + 1))
+def quote_for(plan_id: int, iptv_count: int, telefonia: bool) -> Quote:
+    """
+    Memoized quote for a valid selection (the whole selection space fits in the cache).
+
+    Args:
+        plan_id: Catalog plan ID
+        iptv_count: IPTV devices (0-10)
+        telefonia: True if includes VoIP Telephony
+
+    Returns:
+        Price breakdown in CRC
+    """
+    plan = _PLANS[plan_id]
+    iptv_total = Decimal(_IPTV_PRICE) * Decimal(iptv_count)
+    tel_total = Decimal(_TELEFONIA_PRICE) if telefonia else Decimal(0)
+    total = Decimal(plan["price_crc"]) + iptv_total + tel_total
+    return Quote(
+        plan_id=plan_id,
+        plan_name=plan["name"],
+        base_price_crc=plan["price_crc"],
+        iptv_count=iptv_count,
+        telefonia=bool(telefonia),
+        extras_price_crc=_as_int_crc(iptv_total + tel_total),
+        total_price_crc=_as_int_crc(total),
+    )
+
+
+@lru_cache(maxsize=len(_PLANS) * (IPTV_MAX + 1) * (TELEFONIA_MAX + 1))
+def _quote_json(plan_id: int, iptv_count: int, telefonia: bool) -> str:
+    data = {
+        "ok": True,
+        "selection": asdict(quote_for(plan_id, iptv_count, telefonia)),
+        "policy": {
+            "iptv_max": IPTV_MAX,
+            "telefonia_max": TELEFONIA_MAX
+        }
+    }
+    return json.dumps(data, ensure_ascii=False)
+
 @tool("quote_selection", return_direct=False)
 def quote_selection(plan: str, iptv_count: int, telefonia: bool) -> str:
     """
     Validates selection and returns price breakdown in CRC (JSON string). Does not persist state.
     """
-    from pydantic import ValidationError
-    import json
-
     try:
         payload = QuoteInput(plan=plan, iptv_count=iptv_count, telefonia=telefonia)
     except ValidationError as ve:
@@ -58,26 +105,4 @@ def quote_selection(plan: str, iptv_count: int, telefonia: bool) -> str:
     if not resolved:
         return json.dumps({"ok": False, "errors": [{"loc": ["plan"], "msg": "Invalid plan", "type": "value_error"}]}, ensure_ascii=False)
 
-    plan_id, plan_name, base_crc = resolved
-
-    iptv_total = Decimal(_IPTV_PRICE) * Decimal(payload.iptv_count)
-    tel_total = Decimal(_TELEFONIA_PRICE) if payload.telefonia else Decimal(0)
-    total = Decimal(base_crc) + iptv_total + tel_total
-
-    data = {
-        "ok": True,
-        "selection": {
-            "plan_id": plan_id,
-            "plan_name": plan_name,
-            "base_price_crc": base_crc,
-            "iptv_count": payload.iptv_count,
-            "telefonia": bool(payload.telefonia),
-            "extras_price_crc": _as_int_crc(iptv_total + tel_total),
-            "total_price_crc": _as_int_crc(total),
-        },
-        "policy": {
-            "iptv_max": 10,
-            "telefonia_max": 1
-        }
-    }
-    return json.dumps(data, ensure_ascii=False)
+    return _quote_json(resolved[0], payload.iptv_count, bool(payload.telefonia))
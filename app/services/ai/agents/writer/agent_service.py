@@ -1,13 +1,25 @@
 """
 Writer Agent service for generating contextual responses with helpfulness validation.
+
+Contextual suggestions are cached per (conversation, last customer message,
+mode), so reopening the suggestion panel does not re-run the graph until the
+customer writes again. Optionally, a suggestion is generated speculatively
+when a customer message arrives in a human-handled conversation.
 """
 
 from typing import Dict, Any, Optional
 from datetime import datetime
+import asyncio
 import re
 
+from bson import ObjectId
+
 from app.core.logger import logger
+from app.db.client import database
 from app.services.ai.agents.writer.graphs.writer_agent import WriterAgent, WriterAgentState
+from app.services.ai.agents.writer.result_cache import WriterResultCache
+from app.services.ai.config import ai_config
+from app.services.ai.shared.streaming import PartialStreamer
 from app.schemas.ai.writer_response import StructuredWriterResponse, WriterAgentResult
 
 
@@ -52,6 +64,15 @@ def clean_markdown_to_plain_text(markdown_text: str) -> str:
     return text
 
 
+_CONTEXTUAL_QUERY = (
+    "Generate the best possible response for the current conversation context. "
+    "CRITICAL: Focus on the customer's LAST message and what they specifically asked for. "
+    "Use appropriate tools (RAG for services/info, reservations for bookings, etc.) "
+    "to provide helpful, specific answers rather than generic responses. "
+    "Address their actual question, not just general conversation flow."
+)
+
+
 class WriterAgentService:
     """
     Service wrapper for the Writer Agent.
@@ -61,6 +82,11 @@ class WriterAgentService:
     def __init__(self):
         """Initialize the Writer Agent service."""
         self.agent = WriterAgent()
+        self.result_cache = WriterResultCache()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._speculative: Dict[str, asyncio.Task] = {}
+        self._speculative_slots = asyncio.Semaphore(ai_config.writer_speculative_max_concurrent)
+        self._stats = {"generated": 0, "shared_inflight": 0, "speculative_started": 0, "speculative_superseded": 0}
         logger.info("Writer Agent service initialized")
     
     def _parse_structured_response(self, raw_response: str) -> Optional[StructuredWriterResponse]:
@@ -112,7 +138,8 @@ class WriterAgentService:
         self,
         user_query: str,
         conversation_id: Optional[str] = None,
-        mode: str = "custom"
+        mode: str = "custom",
+        streamer: Optional[PartialStreamer] = None
     ) -> WriterAgentResult:
         """
         Generate a response using the Writer Agent.
@@ -121,10 +148,29 @@ class WriterAgentService:
             user_query: The human agent's request or query
             conversation_id: Optional conversation ID for context
             mode: "prebuilt" for contextual responses, "custom" for agent requests
+            streamer: Optional destination for draft tokens and tool progress
             
         Returns:
             WriterAgentResult with structured response and metadata
         """
+        result = await self._generate_response(user_query, conversation_id, mode, streamer)
+        
+        if streamer is not None:
+            await streamer.finish(success=result.success)
+            result.metadata["first_token_ms"] = (
+                round(streamer.first_token_ms) if streamer.first_token_ms is not None else None
+            )
+        
+        return result
+    
+    async def _generate_response(
+        self,
+        user_query: str,
+        conversation_id: Optional[str],
+        mode: str,
+        streamer: Optional[PartialStreamer]
+    ) -> WriterAgentResult:
+        """Run the Writer Agent graph and build the result."""
         start_time = datetime.now()
         
         try:
@@ -132,7 +178,8 @@ class WriterAgentService:
             result: WriterAgentState = await self.agent.generate_response(
                 user_query=user_query,
                 conversation_id=conversation_id,
-                mode=mode
+                mode=mode,
+                streamer=streamer
             )
             
             processing_time = (datetime.now() - start_time).total_seconds() * 1000
@@ -168,6 +215,7 @@ class WriterAgentService:
             metadata = {
                 "iterations": result.get("iteration_count", 0),
                 "helpfulness_score": result.get("helpfulness_score", "unknown"),
+                "verification": result.get("verification", []),
                 "processing_time_ms": int(processing_time),
                 "node_history": result.get("node_history", []),
                 "conversation_id": conversation_id,
@@ -202,29 +250,161 @@ class WriterAgentService:
                 }
             )
     
-    async def generate_contextual_response(self, conversation_id: str) -> WriterAgentResult:
+    async def generate_contextual_response(
+        self,
+        conversation_id: str,
+        streamer: Optional[PartialStreamer] = None,
+        mode: str = "custom",
+        use_cache: bool = True
+    ) -> WriterAgentResult:
         """
         Generate the best possible response for current conversation context.
         This is a convenience method for the main use case.
         
+        The result is served from the cache (or from a generation already running,
+        e.g. a speculative one) while no new customer message has arrived.
+        
         Args:
             conversation_id: The conversation ID to analyze
+            streamer: Optional destination for draft tokens and tool progress
+            mode: "prebuilt" or "custom" (see ``generate_response``)
+            use_cache: Whether to read and fill the result cache
             
         Returns:
             WriterAgentResult with structured response and metadata
         """
-        query = (
-            "Generate the best possible response for the current conversation context. "
-            "CRITICAL: Focus on the customer's LAST message and what they specifically asked for. "
-            "Use appropriate tools (RAG for services/info, reservations for bookings, etc.) "
-            "to provide helpful, specific answers rather than generic responses. "
-            "Address their actual question, not just general conversation flow."
-        )
+        last_inbound_id = None
+        if use_cache and ai_config.writer_cache_enabled:
+            last_inbound_id = await self._last_inbound_message_id(conversation_id)
+        if last_inbound_id is None:
+            return await self.generate_response(
+                user_query=_CONTEXTUAL_QUERY,
+                conversation_id=conversation_id,
+                mode=mode,
+                streamer=streamer
+            )
+        
+        key = self.result_cache.key(conversation_id, last_inbound_id, mode)
+        result = await self.result_cache.get(key)
+        source = "cache"
         
-        return await self.generate_response(
-            user_query=query,
-            conversation_id=conversation_id
+        if result is None and key in self._inflight:
+            # Join the running generation instead of starting a second one
+            inflight = self._inflight[key]
+            self._stats["shared_inflight"] += 1
+            await asyncio.wait({inflight})
+            if not inflight.cancelled():
+                result = inflight.result().model_copy(deep=True)
+                source = "inflight"
+        
+        if result is None:
+            result = await self._generate_and_cache(key, conversation_id, mode, streamer)
+            result.metadata["cache"] = "miss"
+            return result
+        
+        logger.info(f"♻️ [WRITER] Served {mode} suggestion for conversation {conversation_id} from {source}")
+        result.metadata["cache"] = source
+        if streamer is not None:
+            await streamer.push_token(result.raw_response)
+            await streamer.finish(success=result.success)
+        return result
+    
+    async def _generate_and_cache(
+        self,
+        key: str,
+        conversation_id: str,
+        mode: str,
+        streamer: Optional[PartialStreamer]
+    ) -> WriterAgentResult:
+        """Run the graph once per key, publishing the result to concurrent callers and the cache."""
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self._stats["generated"] += 1
+        try:
+            result = await self.generate_response(
+                user_query=_CONTEXTUAL_QUERY,
+                conversation_id=conversation_id,
+                mode=mode,
+                streamer=streamer
+            )
+            await self.result_cache.set(key, result)
+            future.set_result(result.model_copy(deep=True))
+            return result
+        finally:
+            if not future.done():
+                # Cancelled: callers waiting on this key generate their own result
+                future.cancel()
+            self._inflight.pop(key, None)
+    
+    async def _last_inbound_message_id(self, conversation_id: str) -> Optional[str]:
+        """ID of the customer's newest message (the cache key of contextual suggestions)."""
+        try:
+            db = await database.get_database()
+            message = await db.messages.find_one(
+                {"conversation_id": ObjectId(conversation_id), "direction": "inbound"},
+                {"_id": 1},
+                sort=[("_id", -1)]
+            )
+            return str(message["_id"]) if message else None
+        except Exception as e:
+            logger.warning(f"⚠️ [WRITER] Could not resolve last customer message of {conversation_id}: {str(e)}")
+            return None
+    
+    def schedule_speculative(self, conversation_id: str, message_id: str) -> bool:
+        """
+        Pre-generate the contextual suggestion for a new customer message.
+        
+        Called for customer messages in human-handled conversations; a newer message
+        of the same conversation supersedes a speculative run that has not finished.
+        
+        Args:
+            conversation_id: Conversation identifier
+            message_id: The customer message that arrived
+            
+        Returns:
+            False if speculative generation is disabled
+        """
+        if not (ai_config.writer_speculative_enabled and ai_config.writer_cache_enabled):
+            return False
+        
+        previous = self._speculative.get(conversation_id)
+        if previous is not None and not previous.done():
+            previous.cancel()
+            self._stats["speculative_superseded"] += 1
+        
+        task = asyncio.create_task(self._speculate(conversation_id, message_id))
+        self._speculative[conversation_id] = task
+        task.add_done_callback(
+            lambda done: self._speculative.pop(conversation_id, None)
+            if self._speculative.get(conversation_id) is done else None
         )
+        return True
+    
+    async def _speculate(self, conversation_id: str, message_id: str) -> None:
+        mode = ai_config.writer_speculative_mode
+        key = self.result_cache.key(conversation_id, message_id, mode)
+        try:
+            await asyncio.sleep(ai_config.writer_speculative_delay_seconds)
+            async with self._speculative_slots:
+                if key in self._inflight or await self.result_cache.get(key) is not None:
+                    return
+                self._stats["speculative_started"] += 1
+                logger.info(f"🔮 [WRITER] Pre-generating {mode} suggestion for conversation {conversation_id}")
+                await self._generate_and_cache(key, conversation_id, mode, None)
+        except asyncio.CancelledError:
+            logger.info(f"🛑 [WRITER] Speculative suggestion for conversation {conversation_id} superseded")
+            raise
+        except Exception as e:
+            logger.error(f"❌ [WRITER] Speculative suggestion failed for conversation {conversation_id}: {str(e)}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Generation, sharing and speculative counters plus result cache statistics."""
+        return {
+            **self._stats,
+            "inflight": len(self._inflight),
+            "speculative_running": len(self._speculative),
+            "cache": self.result_cache.get_stats(),
+        }
     
     def _convert_to_legacy_format(self, result: WriterAgentResult) -> Dict[str, Any]:
         """
@@ -4,7 +4,7 @@ Writer Agent graph with helpfulness validation loop and LangSmith tracing.
 
 from __future__ import annotations
 
-from typing import Dict, Any, TypedDict, Literal, List
+from typing import Dict, Any, TypedDict, Literal, List, Optional
 from pathlib import Path
 from datetime import datetime
 import re
@@ -14,10 +14,12 @@ from langgraph.prebuilt import ToolNode
 from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
 
 from app.core.logger import logger
 from app.services.ai.config import ai_config
+from app.services.ai.shared.models import get_chat_model
+from app.services.ai.shared.response_verifier import response_verifier
+from app.services.ai.shared.streaming import PartialStreamer, stream_graph
 from app.services.ai.agents.writer.tools import get_writer_tool_belt
 from app.services.ai.agents.writer.telemetry import setup_tracing
 from app.services.ai.agents.writer.prompts.prompts import (
@@ -26,6 +28,27 @@ from app.services.ai.agents.writer.prompts.prompts import (
 )
 
 
+_HELPFULNESS_PROMPT = PromptTemplate.from_template("""
+Given a human agent's request and the AI's response, evaluate if the response is extremely helpful and ready to send to a customer.
+
+Consider:
+1. Does it directly address the request?
+2. Is it well-written and professional?
+3. Is it appropriate for WhatsApp Business communication?
+4. Does it provide actionable information?
+5. Is the tone appropriate for customer service?
+
+Respond with 'Y' if the response is excellent and ready to use, or 'N' if it needs improvement.
+
+Human Agent Request:
+{initial_query}
+
+AI Response:
+{final_response}
+
+Evaluation (Y/N):""")
+
+
 class WriterAgentState(TypedDict, total=False):
     """State for the Writer Agent with helpfulness validation."""
     # Input
@@ -45,6 +68,8 @@ class WriterAgentState(TypedDict, total=False):
     response: str
     helpfulness_score: str  # Y/N
     iteration_count: int
+    verification_retries: int  # Rejected answers regenerated so far
+    verification: List[Dict[str, Any]]  # Verdict and per-stage timings of each check
     
     # Metadata
     processing_start_time: str
@@ -64,18 +89,12 @@ class WriterAgent:
         
         self.model_name = model_name or ai_config.openai_model
         
-        # Initialize LLM for main generation
-        self.llm = ChatOpenAI(
-            openai_api_key=ai_config.openai_api_key,
-            model=self.model_name,
-            temperature=0.3  # Slightly more creative for writing
-        )
+        # Pooled LLM for main generation (slightly more creative for writing)
+        self.llm = get_chat_model(self.model_name, temperature=0.3, caller="writer", priority="assist")
         
-        # Initialize LLM for helpfulness evaluation
-        self.evaluator_llm = ChatOpenAI(
-            openai_api_key=ai_config.openai_api_key,
-            model="gpt-4o-mini",  # Use faster model for evaluation
-            temperature=0.1
+        # Pooled LLM for helpfulness evaluation (faster model)
+        self.evaluator_llm = get_chat_model(
+            ai_config.verifier_model, temperature=0.1, caller="writer_verifier", priority="assist"
         )
         
         # Get tools
@@ -147,7 +166,8 @@ class WriterAgent:
         self,
         user_query: str,
         conversation_id: str = None,
-        mode: str = "custom"
+        mode: str = "custom",
+        streamer: Optional[PartialStreamer] = None
     ) -> WriterAgentState:
         """
         Generate a response using the Writer Agent.
@@ -156,6 +176,7 @@ class WriterAgent:
             user_query: The human agent's request or customer query
             conversation_id: Optional conversation ID for context
             mode: "prebuilt" for contextual responses, "custom" for agent requests
+            streamer: Optional destination for draft tokens and tool progress
             
         Returns:
             Final state with generated response
@@ -172,6 +193,8 @@ class WriterAgent:
             "conversation_context": "",
             "customer_name": "",
             "iteration_count": 0,
+            "verification_retries": 0,
+            "verification": [],
             "processing_start_time": datetime.now().isoformat(),
             "node_history": []
         }
@@ -185,12 +208,15 @@ class WriterAgent:
             # Run the graph with timeout protection and recursion limit
             import asyncio
             
+            graph_config = {"recursion_limit": 15}  # Reduced recursion limit
+            if streamer is not None:
+                graph_run = stream_graph(self.graph, initial_state, streamer, config=graph_config)
+            else:
+                graph_run = self.graph.ainvoke(initial_state, config=graph_config)
+            
             # Set a timeout for the entire operation
             final_state = await asyncio.wait_for(
-                self.graph.ainvoke(
-                    initial_state,
-                    config={"recursion_limit": 15}  # Reduced recursion limit
-                ),
+                graph_run,
                 timeout=30.0  # Increased timeout to 30 seconds
             )
             
@@ -636,76 +662,73 @@ class WriterAgent:
         # Force English response
         last_response = self._force_english_response(last_response)
         
-        # Create helpfulness evaluation prompt
-        helpfulness_prompt = """
-Given a human agent's request and the AI's response, evaluate if the response is extremely helpful and ready to send to a customer.
-
-Consider:
-1. Does it directly address the request?
-2. Is it well-written and professional?
-3. Is it appropriate for WhatsApp Business communication?
-4. Does it provide actionable information?
-5. Is the tone appropriate for customer service?
-
-Respond with 'Y' if the response is excellent and ready to use, or 'N' if it needs improvement.
-
-Human Agent Request:
-{initial_query}
-
-AI Response:
-{final_response}
-
-Evaluation (Y/N):"""
+        # Staged verification: local heuristics, the evaluator model only when unsure
+        verdict = await response_verifier.verify(
+            initial_query,
+            last_response,
+            judge=self._judge_helpfulness,
+            expected_language="en",
+            tool_results=self._tool_results(state)
+        )
+        state["verification"] = state.get("verification", []) + [{
+            "decision": verdict.decision,
+            "stage": verdict.stage,
+            "reason": verdict.reason,
+            "timings_ms": {stage: round(ms, 2) for stage, ms in verdict.timings_ms.items()}
+        }]
+        
+        retries = state.get("verification_retries", 0)
+        if not verdict.helpful and retries >= ai_config.verifier_max_retries:
+            # Retry budget spent: keep the best answer we have
+            logger.info(f"Helpfulness retry budget spent ({retries}), accepting response")
+            state["response"] = last_response
+            state["helpfulness_score"] = "N"
+            state["messages"].append({"role": "assistant", "content": "HELPFULNESS:END"})
+            return state
         
-        # Call evaluator model
-        prompt = PromptTemplate.from_template(helpfulness_prompt)
-        evaluation_chain = prompt | self.evaluator_llm | StrOutputParser()
+        logger.info(
+            f"Helpfulness evaluation: {verdict.decision} ({verdict.stage}: {verdict.reason}) "
+            f"for iteration {state.get('iteration_count', 0)}"
+        )
         
-        try:
-            helpfulness_response = await evaluation_chain.ainvoke({
-                "initial_query": initial_query,
-                "final_response": last_response
-            })
-            
-            # Extract decision
-            decision = "Y" if "Y" in helpfulness_response.upper() else "N"
-            
-            logger.info(
-                f"Helpfulness evaluation: {decision} for iteration {state.get('iteration_count', 0)}"
-            )
-            
-            # Add evaluation to messages
-            state["messages"].append({
-                "role": "assistant",
-                "content": f"HELPFULNESS:{decision}"
-            })
-            
-            # Store the actual response for final output
-            if decision == "Y":
-                state["response"] = last_response
-                state["helpfulness_score"] = "Y"
-            else:
-                # Add feedback for improvement
-                state["messages"].append({
-                    "role": "user",
-                    "content": (
-                        "The response needs improvement. Please revise it to be more helpful, "
-                        "professional, and appropriate for customer service. Consider using "
-                        "available tools to get more relevant information if needed. "
-                        "IMPORTANT: Make sure the response is in English only."
-                    )
-                })
-            
-        except Exception as e:
-            logger.error(f"Error in helpfulness evaluation: {str(e)}")
-            # Default to continuing if evaluation fails
+        # Add evaluation to messages
+        state["messages"].append({
+            "role": "assistant",
+            "content": f"HELPFULNESS:{verdict.decision}"
+        })
+        
+        # Store the actual response for final output
+        if verdict.helpful:
+            state["response"] = last_response
+            state["helpfulness_score"] = "Y"
+        else:
+            state["verification_retries"] = retries + 1
+            # Add feedback for improvement
             state["messages"].append({
-                "role": "assistant", 
-                "content": "HELPFULNESS:N"
+                "role": "user",
+                "content": (
+                    "The response needs improvement. Please revise it to be more helpful, "
+                    "professional, and appropriate for customer service. Consider using "
+                    "available tools to get more relevant information if needed. "
+                    "IMPORTANT: Make sure the response is in English only."
+                )
             })
         
         return state
     
+    async def _judge_helpfulness(self, query: str, response: str) -> str:
+        """Ask the evaluator model whether the response is ready to send (Y/N)."""
+        evaluation_chain = _HELPFULNESS_PROMPT | self.evaluator_llm | StrOutputParser()
+        return await evaluation_chain.ainvoke({"initial_query": query, "final_response": response})
+    
+    @staticmethod
+    def _tool_results(state: WriterAgentState) -> List[str]:
+        """Outputs of the tools run for this request (context and knowledge base)."""
+        return [
+            msg["content"] for msg in state.get("messages", [])
+            if msg.get("role") == "user" and msg.get("content", "").startswith("Tool ")
+        ]
+    
     def _force_english_response(self, response: str) -> str:
         """
         Force the response to be in English by replacing Spanish content.
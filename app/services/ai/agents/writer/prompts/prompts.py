@@ -2,9 +2,12 @@
 Writer Agent prompts using LangChain best practices.
 Clean, structured prompts without markdown files.
 Simple language handling - answer in English.
+
+Static text (system prompt + mode instructions) comes first and is rendered
+once per prompt version; the human message only carries context and query.
 """
 
-from langchain_core.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
+from app.services.ai.shared.prompt_layout import prompt_layout
 
 
 # System prompt for Writer Agent (Simplified)
@@ -121,14 +124,14 @@ Help create exceptional responses for customers that are helpful, accurate, enth
 **REMEMBER: ALWAYS RESPOND IN ENGLISH ONLY!**"""
 
 
-# Human prompt templates (Simplified)
-PREBUILT_HUMAN_PROMPT = """Generate the best possible response for the current conversation context.
+# Bump when the static instructions below change (memoized per version)
+WRITER_PROMPT_VERSION = "2"
 
-Query:
-{query}
 
-Context:
-{context}
+# Mode instructions: static, sent with the system prompt
+PREBUILT_INSTRUCTIONS = """## Task: Suggested Reply
+
+Generate the best possible response for the current conversation context.
 
 Instructions:
 - Respond directly to the customer's message
@@ -140,13 +143,9 @@ Instructions:
 - **CRITICAL: ALWAYS RESPOND IN ENGLISH ONLY**"""
 
 
-CUSTOM_HUMAN_PROMPT = """ADVISORY QUERY - The human agent needs help:
+CUSTOM_INSTRUCTIONS = """## Task: Advisory Query
 
-HUMAN AGENT REQUEST:
-{query}
-
-CONVERSATION CONTEXT (for reference only, DO NOT respond to these messages):
-{context}
+ADVISORY QUERY - The human agent needs help with the HUMAN AGENT REQUEST at the end of the message.
 
 IMPORTANT INSTRUCTIONS:
 - Your task is to help the HUMAN AGENT with their specific request
@@ -159,27 +158,44 @@ IMPORTANT INSTRUCTIONS:
 - **CRITICAL: ALWAYS RESPOND IN ENGLISH ONLY**"""
 
 
-# Create ChatPromptTemplate instances
+# Human prompt templates: dynamic data only, the most volatile (the query) last
+PREBUILT_HUMAN_PROMPT = """Context:
+{context}
+
+Query:
+{query}"""
+
+
+CUSTOM_HUMAN_PROMPT = """CONVERSATION CONTEXT (for reference only, DO NOT respond to these messages):
+{context}
+
+HUMAN AGENT REQUEST:
+{query}"""
+
+
+# Create ChatPromptTemplate instances (system prompt + mode instructions form one static prefix)
 def create_prebuilt_chat_prompt():
     """Create chat prompt template for prebuilt mode."""
-    system_prompt = SystemMessagePromptTemplate.from_template(WRITER_SYSTEM_PROMPT)
-    human_prompt = HumanMessagePromptTemplate.from_template(PREBUILT_HUMAN_PROMPT)
-    
-    return ChatPromptTemplate.from_messages([
-        system_prompt,
-        human_prompt
-    ])
+    return prompt_layout.chat_prompt(
+        "writer_prebuilt",
+        WRITER_PROMPT_VERSION,
+        "{system}\n\n{instructions}",
+        PREBUILT_HUMAN_PROMPT,
+        system=WRITER_SYSTEM_PROMPT,
+        instructions=PREBUILT_INSTRUCTIONS
+    )
 
 
 def create_custom_chat_prompt():
     """Create chat prompt template for custom mode."""
-    system_prompt = SystemMessagePromptTemplate.from_template(WRITER_SYSTEM_PROMPT)
-    human_prompt = HumanMessagePromptTemplate.from_template(CUSTOM_HUMAN_PROMPT)
-    
-    return ChatPromptTemplate.from_messages([
-        system_prompt,
-        human_prompt
-    ])
+    return prompt_layout.chat_prompt(
+        "writer_custom",
+        WRITER_PROMPT_VERSION,
+        "{system}\n\n{instructions}",
+        CUSTOM_HUMAN_PROMPT,
+        system=WRITER_SYSTEM_PROMPT,
+        instructions=CUSTOM_INSTRUCTIONS
+    )
 
 
 # Export the templates
@@ -0,0 +1,150 @@
+"""
+Result cache for Writer Agent suggestions.
+
+A contextual suggestion only depends on the conversation up to the customer's
+last message, so results are keyed by (conversation, last inbound message,
+mode):
+
+- an in-process LRU answers repeated panel opens without any I/O
+- Redis shares results across workers and restarts (JSON, with a TTL)
+
+A new customer message changes the key, so entries never need invalidation.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import time
+
+from app.core.logger import logger
+from app.schemas.ai.writer_response import WriterAgentResult
+from app.services.ai.config import ai_config
+
+
+_REDIS_RETRY_SECONDS = 60
+
+
+class WriterResultCache:
+    """Two-level (LRU, then Redis) cache of successful Writer Agent results."""
+
+    def __init__(
+        self,
+        redis_client: Any = None,
+        lru_size: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        use_redis: bool = True,
+    ):
+        """
+        Args:
+            redis_client: ``redis.asyncio`` client created with ``decode_responses=True``;
+                created from settings when omitted
+            lru_size: Results kept in process
+            ttl_seconds: Redis expiry for cached results
+            use_redis: Share results through Redis (off for offline runs)
+        """
+        self.lru_size = ai_config.writer_cache_lru_size if lru_size is None else lru_size
+        self.ttl_seconds = ai_config.writer_cache_ttl_seconds if ttl_seconds is None else ttl_seconds
+
+        self._redis = redis_client
+        self._redis_retry_at = 0.0 if use_redis else float("inf")
+        self._lru: "OrderedDict[str, WriterAgentResult]" = OrderedDict()
+        self._stats = {"memory_hits": 0, "redis_hits": 0, "misses": 0, "stores": 0}
+
+    @staticmethod
+    def key(conversation_id: str, last_inbound_message_id: str, mode: str) -> str:
+        """Cache key of a suggestion for the conversation state after a customer message."""
+        return f"ai:writer:{conversation_id}:{last_inbound_message_id}:{mode}"
+
+    async def _get_redis(self):
+        if self._redis is not None:
+            return self._redis
+        if time.time() < self._redis_retry_at:
+            return None
+
+        try:
+            import redis.asyncio as redis
+            from app.core.config import settings
+
+            client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+            await client.ping()
+            self._redis = client
+            logger.info("✅ [WRITER_CACHE] Redis writer cache connected")
+        except Exception as e:
+            self._redis_retry_at = time.time() + _REDIS_RETRY_SECONDS
+            logger.warning(f"⚠️ [WRITER_CACHE] Redis unavailable, using in-process cache only: {str(e)}")
+        return self._redis
+
+    def _lru_put(self, key: str, result: WriterAgentResult) -> None:
+        self._lru[key] = result
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[WriterAgentResult]:
+        """
+        Look up a cached result.
+
+        Args:
+            key: Key built with ``key``
+
+        Returns:
+            A copy of the cached WriterAgentResult, or None
+        """
+        result = self._lru.get(key)
+        if result is not None:
+            self._lru.move_to_end(key)
+            self._stats["memory_hits"] += 1
+            return result.model_copy(deep=True)
+
+        client = await self._get_redis()
+        if client is not None:
+            try:
+                raw = await client.get(key)
+            except Exception as e:
+                logger.warning(f"⚠️ [WRITER_CACHE] Redis lookup failed: {str(e)}")
+                raw = None
+            if raw:
+                result = WriterAgentResult.model_validate_json(raw)
+                self._lru_put(key, result)
+                self._stats["redis_hits"] += 1
+                return result.model_copy(deep=True)
+
+        self._stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, result: WriterAgentResult) -> None:
+        """
+        Store a successful result in the LRU and Redis.
+
+        Args:
+            key: Key built with ``key``
+            result: Writer Agent result to cache
+        """
+        if not result.success:
+            return
+        stored = result.model_copy(deep=True)
+        self._lru_put(key, stored)
+        self._stats["stores"] += 1
+
+        client = await self._get_redis()
+        if client is None:
+            return
+        try:
+            await client.set(key, stored.model_dump_json(), ex=self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"⚠️ [WRITER_CACHE] Redis store failed: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get writer result cache statistics."""
+        hits = self._stats["memory_hits"] + self._stats["redis_hits"]
+        lookups = hits + self._stats["misses"]
+        return {
+            **self._stats,
+            "lru_entries": len(self._lru),
+            "lru_size": self.lru_size,
+            "redis_connected": self._redis is not None,
+            "hit_rate_percent": round(hits / lookups * 100, 2) if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        """Drop in-process results (Redis entries expire on their own)."""
+        self._lru.clear()
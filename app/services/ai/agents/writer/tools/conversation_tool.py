@@ -1,6 +1,6 @@
 """
 Conversation context tool for the Writer Agent.
-Retrieves full conversation history for context analysis.
+Retrieves the conversation history (newest messages within the token budget) for context analysis.
 """
 
 from typing import Dict, Any, List, Optional
@@ -10,10 +10,58 @@ from langchain.tools import StructuredTool
 from pydantic import BaseModel, Field
 
 from app.core.logger import logger
+from app.services.ai.config import ai_config
+from app.services.ai.shared.transcript_service import message_text, transcript_service
 from app.services.ai.shared.utils import BaseAgentTool, ToolResult
 from app.db.client import database
 
 
+# Message fields used by the formatters and the flow analysis
+_MESSAGE_PROJECTION = {
+    "_id": 1, "timestamp": 1, "type": 1, "direction": 1, "sender_name": 1, "is_ai_generated": 1,
+    "text_content": 1, "text": 1, "content": 1, "media_url": 1
+}
+
+
+def _message_author(msg: Dict[str, Any]) -> str:
+    direction = msg.get('direction', 'unknown')
+    if direction == 'inbound':
+        return "Customer"
+    if direction == 'outbound':
+        author = msg.get('sender_name', 'Agent')
+        if msg.get('is_ai_generated', False):
+            author += " (AI)"
+        return author
+    return "System"
+
+
+def _format_message(msg: Dict[str, Any]) -> str:
+    """Simplified format without metadata."""
+    return f"{_message_author(msg)}: {message_text(msg)}"
+
+
+def _format_message_with_metadata(msg: Dict[str, Any]) -> str:
+    """Timestamped message with media details.
+
+    Delivery status is left out: it changes without a new message arriving, so
+    it would go stale in the cached transcript.
+    """
+    timestamp = msg.get('timestamp', datetime.now())
+    timestamp_str = timestamp if isinstance(timestamp, str) else timestamp.strftime("%Y-%m-%d %H:%M:%S")
+    lines = [f"[{timestamp_str}] {_message_author(msg)}: {message_text(msg)}"]
+    
+    # Add message type if not text
+    msg_type = msg.get('type', 'unknown')
+    if msg_type != 'text' and msg_type != 'unknown':
+        lines.append(f"     Type: {msg_type}")
+        
+        # Add media info if available
+        if msg.get('media_url'):
+            lines.append(f"     Media: {msg['media_url']}")
+    
+    return "\n".join(lines)
+
+
 class ConversationContextInput(BaseModel):
     """Input schema for conversation context tool."""
     conversation_id: str = Field(..., description="The conversation ID to retrieve context for")
@@ -71,15 +119,18 @@ class ConversationContextTool(BaseAgentTool):
             if not conversation:
                 return f"Error: Conversation {conversation_id} not found"
             
-            # Get messages collection
-            messages_collection = db.messages
-            
-            # Fetch all messages for this conversation, ordered by timestamp
-            messages_cursor = messages_collection.find(
-                {"conversation_id": conversation_id_obj}
-            ).sort("timestamp", 1)
-            
-            messages = await messages_cursor.to_list(length=None)
+            # Newest messages within the writer's token budget (cached until a new message arrives)
+            transcript = await transcript_service.get_transcript(
+                str(conversation_id_obj),
+                formatter=_format_message_with_metadata if include_metadata else _format_message,
+                format_key="writer_metadata" if include_metadata else "writer_plain",
+                max_tokens=ai_config.writer_context_max_tokens,
+                projection=_MESSAGE_PROJECTION,
+                db=db
+            )
+            messages = transcript.messages
+            # The stored counter also covers messages left out by the budget
+            total_messages = max(conversation.get('message_count') or 0, len(messages))
             
             # Format the conversation context
             context_lines = []
@@ -93,7 +144,9 @@ class ConversationContextTool(BaseAgentTool):
                 context_lines.append(f"Customer Name: {conversation.get('customer_name', 'unknown')}")
                 context_lines.append(f"Customer Type: {conversation.get('customer_type', 'unknown')}")
                 context_lines.append(f"Department: {conversation.get('department_name', 'unknown')}")
-                context_lines.append(f"Total Messages: {len(messages)}")
+                context_lines.append(f"Total Messages: {total_messages}")
+                if transcript.truncated:
+                    context_lines.append("Older messages omitted (conversation exceeds the context budget)")
                 
                 if conversation.get('created_at'):
                     context_lines.append(f"Started: {conversation['created_at']}")
@@ -113,50 +166,8 @@ class ConversationContextTool(BaseAgentTool):
             # Add message history
             context_lines.append("=== MESSAGE HISTORY ===")
             
-            for i, msg in enumerate(messages, 1):
-                # Format timestamp
-                timestamp = msg.get('timestamp', datetime.now())
-                if isinstance(timestamp, str):
-                    timestamp_str = timestamp
-                else:
-                    timestamp_str = timestamp.strftime("%Y-%m-%d %H:%M:%S")
-                
-                # Determine message type and author
-                msg_type = msg.get('type', 'unknown')
-                direction = msg.get('direction', 'unknown')
-                
-                if direction == 'inbound':
-                    author = "Customer"
-                elif direction == 'outbound':
-                    author = msg.get('sender_name', 'Agent')
-                    if msg.get('is_ai_generated', False):
-                        author += " (AI)"
-                else:
-                    author = "System"
-                
-                # Message content
-                content = msg.get('text_content', msg.get('text', msg.get('content', '')))
-                
-                # Add message with metadata
-                if include_metadata:
-                    context_lines.append(f"[{i:02d}] [{timestamp_str}] {author}: {content}")
-                    
-                    # Add delivery status if available
-                    if msg.get('status'):
-                        context_lines.append(f"     Status: {msg['status']}")
-                    
-                    # Add message type if not text
-                    if msg_type != 'text' and msg_type != 'unknown':
-                        context_lines.append(f"     Type: {msg_type}")
-                        
-                        # Add media info if available
-                        if msg.get('media_url'):
-                            context_lines.append(f"     Media: {msg['media_url']}")
-                
-                else:
-                    # Simplified format without metadata
-                    context_lines.append(f"{author}: {content}")
-                
+            for i, line in enumerate(transcript.lines, 1):
+                context_lines.append(f"[{i:02d}] {line}" if include_metadata else line)
                 context_lines.append("")  # Empty line between messages
             
             # Add summary
@@ -176,10 +187,10 @@ class ConversationContextTool(BaseAgentTool):
             context_lines.append("")
             context_lines.append("=== CONVERSATION FLOW ANALYSIS ===")
             
-            if len(messages) <= 4:
+            if total_messages <= 4:
                 context_lines.append("Conversation Status: NEW CONVERSATION")
                 context_lines.append("Recommendation: Use appropriate greetings and introductions")
-            elif len(messages) <= 10:
+            elif total_messages <= 10:
                 context_lines.append("Conversation Status: EARLY STAGE")
                 context_lines.append("Recommendation: Use friendly tone, avoid repetitive greetings")
             else:
@@ -219,7 +230,7 @@ class ConversationContextTool(BaseAgentTool):
             last_customer_message = None
             for msg in reversed(messages):
                 if msg.get('direction') == 'inbound':
-                    last_customer_message = msg.get('text_content', msg.get('text', msg.get('content', '')))
+                    last_customer_message = message_text(msg)
                     break
             
             if last_customer_message:
@@ -230,7 +241,7 @@ class ConversationContextTool(BaseAgentTool):
                 context_lines.append("IMPORTANT: This is the message you need to respond to!")
                 
                 # Add response style recommendation based on conversation flow
-                if len(messages) > 10:
+                if total_messages > 10:
                     context_lines.append("RESPONSE STYLE: Use enthusiastic conversation continuations like:")
                     context_lines.append("- '¡Claro Steve! 🛜 Ofrecemos...'")
                     context_lines.append("- '¡Perfecto! 🚀 Aquí tienes toda la información sobre...'")
@@ -3,7 +3,7 @@ AI service configuration.
 Reads from core/config.Settings and provides AI-specific configuration.
 """
 
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from pydantic import BaseModel
 from app.core.config import settings
 
@@ -20,6 +20,8 @@ class AIConfig(BaseModel):
     qdrant_url: str = settings.QDRANT_URL
     qdrant_api_key: str = settings.QDRANT_API_KEY
     qdrant_collection_name: str = settings.QDRANT_COLLECTION_NAME
+    qdrant_health_ttl_seconds: int = 300  # How long a collection readiness check is trusted
+    qdrant_health_error_ttl_seconds: int = 5  # How long a failed readiness check is trusted before retrying
 
     # LangSmith / LangChain
     langchain_tracing_v2: bool = settings.LANGCHAIN_TRACING_V2
@@ -34,8 +36,123 @@ class AIConfig(BaseModel):
     timeout_seconds: int = 30
     confidence_threshold: float = 0.5
     rag_retrieval_k: int = 12
+
+    # LLM gateway: every chat model call goes through per-class concurrency and token budgets
+    # Priority classes: "reply" (customer answers) > "assist" (agent tools) > "background" (analytics)
+    llm_gateway_enabled: bool = True
+    llm_gateway_provider: str = "openai"  # "openai" or "fake" (local deterministic model for offline runs)
+    llm_gateway_coalesce: bool = True  # Identical in-flight prompts share one provider call
+    llm_gateway_reply_concurrency: int = 32
+    llm_gateway_assist_concurrency: int = 8
+    llm_gateway_background_concurrency: int = 3
+    llm_gateway_reply_tokens_per_minute: int = 0  # 0 = unlimited
+    llm_gateway_assist_tokens_per_minute: int = 400_000
+    llm_gateway_background_tokens_per_minute: int = 150_000
+    llm_gateway_fake_latency_ms: float = 0.0
+    # USD per million (input, output) tokens, used for cost accounting
+    llm_gateway_prices_per_million: Dict[str, Tuple[float, float]] = {
+        "gpt-4o-mini": (0.15, 0.60),
+        "gpt-4o": (2.50, 10.00),
+        "gpt-4.1-mini": (0.40, 1.60),
+        "gpt-4.1": (2.00, 8.00),
+    }
+
+    # Query embedding cache (normalized text -> float32 vector; in-process LRU + Redis)
+    embedding_cache_enabled: bool = True
+    embedding_cache_lru_size: int = 2048
+    embedding_cache_ttl_seconds: int = 7 * 24 * 3600
+
+    # Semantic retrieval cache: reuse results of near-duplicate recent queries
+    semantic_cache_enabled: bool = True
+    semantic_cache_threshold: float = 0.95  # Cosine similarity between query embeddings
+    semantic_cache_max_entries: int = 512  # Recent queries indexed per strategy
+
+    # Reranking stage per retrieval strategy: "cohere", "cross_encoder", "fusion" or "none"
+    rag_reranker_fast: str = "fusion"
+    rag_reranker_comprehensive: str = "cohere"
+    rerank_workers: int = 2
+    rerank_batch_size: int = 32
+    rerank_cross_encoder_model: str = "jinaai/jina-reranker-v2-base-multilingual"
+    rerank_fusion_dense_weight: float = 0.6
     max_context_tokens: int = 4000
 
+    # Parallel MultiQuery: concurrent variant searches merged with reciprocal-rank fusion
+    multiquery_budget_ms: float = 2000.0  # Stop waiting for variant searches after this
+    multiquery_target_docs: int = 20  # Merged chunks handed to the reranker; early exit once this many are strong
+    multiquery_min_score: float = 0.45  # Dense similarity counted as a strong match
+    multiquery_rrf_k: int = 60
+
+    # Adaptive retrieval strategy: degrade MultiQuery breadth, top-k and reranking under a latency SLO
+    adaptive_strategy_enabled: bool = True
+    rag_latency_slo_ms: float = 3000.0  # p95 target for uncached retrievals
+    adaptive_timeout_slo_multiple: float = 2.0  # MultiQuery deadline as a multiple of the SLO (capped at 15s)
+    adaptive_window_seconds: int = 300
+    adaptive_min_samples: int = 20
+    adaptive_max_error_rate: float = 0.2
+    adaptive_probe_rate: float = 0.05  # Share of queries that try the nominal tier while degraded
+    adaptive_low_score_threshold: float = 0.35  # Best-match similarity considered weak
+    adaptive_max_low_score_rate: float = 0.3  # Simple queries step up a tier above this rate
+
+    # Knowledge base ingestion: content-hashed incremental upserts, concurrent embedding batches
+    ingest_chunk_size: int = 800
+    ingest_chunk_overlap: int = 120
+    ingest_batch_size: int = 64
+    ingest_max_concurrency: int = 4
+    ingest_tokens_per_minute: int = 1_000_000  # Embedding rate budget (estimated tokens)
+
+    # Agent graph node budgets (seconds); a node that exceeds its budget is cancelled
+    agent_llm_timeout_seconds: float = 25.0
+    agent_helpfulness_timeout_seconds: float = 8.0
+    agent_tool_timeout_seconds: float = 20.0
+    agent_fast_intents_enabled: bool = True  # Answer pure catalog/pricing questions without the LLM
+
+    # Answer verification (helpfulness loop): local heuristics first, small model only when unsure
+    verifier_model_policy: str = "uncertain"  # "always", "uncertain" or "never"
+    verifier_model: str = "gpt-4o-mini"
+    verifier_max_retries: int = 1  # Regenerations allowed after a rejected answer, per reply
+
+    # Agent scheduler: bounded concurrent runs, rapid messages merged into one turn
+    agent_scheduler_workers: int = 8
+    agent_debounce_seconds: float = 1.5
+    agent_max_pending_conversations: int = 1000
+
+    # Conversation memory: token-bounded window + rolling summary per conversation
+    memory_store_backend: str = "redis"  # "redis" or "memory"
+    memory_window_max_tokens: int = 1500
+    memory_summary_max_tokens: int = 400
+    memory_ttl_seconds: int = 24 * 3600
+    memory_max_bytes: int = 64 * 1024 * 1024  # In-memory store ceiling per process
+    memory_hydrate_limit: int = 20
+
+    # Conversation summaries: rolling (only messages after the stored watermark), token-budgeted chunks
+    summary_max_messages: int = 1000  # Messages loaded per round, oldest first after the watermark
+    summary_chunk_max_tokens: int = 6000  # Transcript tokens per LLM call; longer deltas are folded chunk by chunk
+    summary_max_transcript_tokens: int = 60000  # New-message tokens loaded per round; larger deltas take more rounds
+
+    # Shared transcripts: newest-first streaming under a token budget, cached per newest message
+    transcript_cache_max_entries: int = 256
+    writer_context_max_tokens: int = 6000  # Message history budget of the writer's conversation tool
+
+    # Summary pre-warming: background summaries on transfer/close/idle so the endpoint reads a stored one
+    summary_prewarm_enabled: bool = True
+    summary_prewarm_workers: int = 2
+    summary_prewarm_max_pending: int = 500
+    summary_prewarm_idle_minutes: int = 30  # Open conversations quiet this long are summarized
+    summary_prewarm_sweep_seconds: int = 300  # Interval of the idle-conversation sweep (0 disables it)
+
+    # Writer suggestions: results cached per (conversation, last customer message, mode)
+    writer_cache_enabled: bool = True
+    writer_cache_lru_size: int = 512
+    writer_cache_ttl_seconds: int = 6 * 3600
+    writer_speculative_enabled: bool = False  # Pre-generate when a customer writes in a human-handled conversation
+    writer_speculative_mode: str = "prebuilt"  # Must match the mode of /ai/writer/contextual, the route the agent panel calls
+    writer_speculative_delay_seconds: float = 2.0  # Lets message bursts settle before generating
+    writer_speculative_max_concurrent: int = 2
+
+    # Partial output streaming (ai_partial WebSocket events)
+    agent_stream_partials: bool = True
+    stream_flush_interval_ms: float = 60.0
+
     # WhatsApp
     max_response_length: int = 1500
     default_language: str = "es"
@@ -0,0 +1,147 @@
+"""
+Native async retrieval components for the RAG pipeline.
+
+``QdrantVectorStore`` only talks to Qdrant through the synchronous client, so its
+async methods fall back to the default thread pool. These components query the
+pooled ``AsyncQdrantClient`` directly and embed queries with ``aembed_query``,
+letting MultiQuery fan-out and reranking run on the event loop.
+"""
+
+from copy import deepcopy
+from typing import Any, List, Optional, Sequence
+
+import cohere
+import numpy as np
+from langchain_cohere.rerank import CohereRerank
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+    Callbacks,
+)
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict, Field, SecretStr, model_validator
+
+
+class AsyncQdrantRetriever(BaseRetriever):
+    """MMR retriever over the dense vectors of a Qdrant collection with a native async path."""
+
+    async_client: Any
+    """``AsyncQdrantClient`` used by ``ainvoke``."""
+    embeddings: Embeddings
+    collection_name: str
+    client: Any = None
+    """Optional ``QdrantClient`` for the synchronous ``invoke`` path."""
+    vector_name: str = "dense"
+    k: int = 12
+    fetch_k: int = 24
+    lambda_mult: float = 0.7
+    content_payload_key: str = "page_content"
+    metadata_payload_key: str = "metadata"
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def _select(self, query_vector: List[float], points: List[Any]) -> List[Document]:
+        """Apply MMR over the fetched points and convert the selection to documents."""
+        if not points:
+            return []
+
+        vectors = [
+            point.vector if isinstance(point.vector, list) else point.vector.get(self.vector_name)
+            for point in points
+        ]
+        selected = maximal_marginal_relevance(
+            np.array(query_vector), vectors, k=self.k, lambda_mult=self.lambda_mult
+        )
+
+        documents = []
+        for index in selected:
+            payload = points[index].payload or {}
+            metadata = dict(payload.get(self.metadata_payload_key) or {})
+            metadata["_id"] = points[index].id
+            metadata["_score"] = points[index].score
+            metadata["_collection_name"] = self.collection_name
+            documents.append(Document(
+                page_content=payload.get(self.content_payload_key, ""),
+                metadata=metadata,
+            ))
+        return documents
+
+    def _query_kwargs(self, query_vector: List[float]) -> dict:
+        return {
+            "collection_name": self.collection_name,
+            "query": query_vector,
+            "using": self.vector_name,
+            "limit": self.fetch_k,
+            "with_payload": True,
+            "with_vectors": True,
+        }
+
+    async def asearch(self, query: str) -> List[Document]:
+        """Embed, search and MMR-select without retriever callbacks (used for MultiQuery fan-out)."""
+        query_vector = await self.embeddings.aembed_query(query)
+        response = await self.async_client.query_points(**self._query_kwargs(query_vector))
+        return self._select(query_vector, response.points)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return await self.asearch(query)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        if self.client is None:
+            raise RuntimeError("AsyncQdrantRetriever has no synchronous client; use ainvoke()")
+        query_vector = self.embeddings.embed_query(query)
+        response = self.client.query_points(**self._query_kwargs(query_vector))
+        return self._select(query_vector, response.points)
+
+
+class AsyncCohereRerank(CohereRerank):
+    """Cohere reranker whose async path uses ``cohere.AsyncClientV2`` instead of a worker thread."""
+
+    async_client: Any = Field(default=None, exclude=True)
+
+    model_config = ConfigDict(extra="forbid", arbitrary_types_allowed=True)
+
+    @model_validator(mode="after")
+    def validate_async_client(self) -> "AsyncCohereRerank":
+        """Create the async client alongside the sync one."""
+        if self.async_client is None:
+            api_key = self.cohere_api_key
+            if isinstance(api_key, SecretStr):
+                api_key = api_key.get_secret_value()
+            self.async_client = cohere.AsyncClientV2(
+                api_key,
+                client_name=self.user_agent,
+                base_url=self.base_url,
+            )
+        return self
+
+    async def acompress_documents(
+        self,
+        documents: Sequence[Document],
+        query: str,
+        callbacks: Optional[Callbacks] = None,
+    ) -> Sequence[Document]:
+        """Rerank ``documents`` against ``query`` and keep the top ``top_n``."""
+        if not documents:
+            return []
+
+        response = await self.async_client.rerank(
+            query=query,
+            documents=[self._document_to_str(doc) for doc in documents],
+            model=self.model,
+            top_n=self.top_n,
+        )
+
+        compressed = []
+        for result in response.results:
+            doc = documents[result.index]
+            doc_copy = Document(doc.page_content, metadata=deepcopy(doc.metadata))
+            doc_copy.metadata["relevance_score"] = result.relevance_score
+            compressed.append(doc_copy)
+        return compressed
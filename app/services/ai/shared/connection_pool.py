@@ -3,18 +3,21 @@ Connection pooling and singleton management for RAG components.
 Prevents recreation of expensive objects on every request.
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from functools import lru_cache
+import asyncio
 import threading
 import time
 
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from langchain_qdrant import QdrantVectorStore, RetrievalMode, FastEmbedSparse
-from langchain.retrievers.multi_query import MultiQueryRetriever
 from langchain.retrievers.contextual_compression import ContextualCompressionRetriever
-from langchain_cohere.rerank import CohereRerank
 from langchain_core.documents import Document
 
+from app.services.ai.shared.async_retrieval import AsyncQdrantRetriever, AsyncCohereRerank
+from app.services.ai.shared.multi_query import ParallelMultiQueryRetriever
+from app.services.ai.shared.embedding_cache import get_cached_embedding_model, get_embedding_cache_stats
+from app.services.ai.shared.rerankers import RERANKERS, LocalReranker, create_local_reranker
 from app.services.ai.shared.models import get_embedding_model, get_chat_model
 from app.services.ai.config import ai_config
 from app.core.logger import logger
@@ -37,10 +40,15 @@ class ConnectionPool:
     def __init__(self):
         if not hasattr(self, '_initialized') or not self._initialized:
             self._qdrant_client: Optional[QdrantClient] = None
+            self._async_qdrant_client: Optional[AsyncQdrantClient] = None
             self._vector_store: Optional[QdrantVectorStore] = None
-            self._multiquery_retriever: Optional[MultiQueryRetriever] = None
+            self._multiquery_retrievers: Dict[Tuple[int, int, int], ParallelMultiQueryRetriever] = {}
             self._compression_retriever: Optional[ContextualCompressionRetriever] = None
-            self._cohere_rerank: Optional[CohereRerank] = None
+            self._cohere_rerank: Optional[AsyncCohereRerank] = None
+            self._local_rerankers: Dict[str, LocalReranker] = {}
+            self._collection_health: Optional[Dict[str, Any]] = None
+            self._collection_checked_at = 0.0
+            self._readiness_lock: Optional[asyncio.Lock] = None
             self._last_health_check = 0
             self._health_check_interval = 60  # 1 minute
             self._connection_errors = 0
@@ -73,10 +81,13 @@ class ConnectionPool:
         """Reset all connections."""
         logger.info("🔄 [POOL] Resetting connections due to health check failure")
         self._qdrant_client = None
+        self._async_qdrant_client = None
         self._vector_store = None
-        self._multiquery_retriever = None
+        self._multiquery_retrievers = {}
         self._compression_retriever = None
         self._cohere_rerank = None
+        self._collection_health = None
+        self._collection_checked_at = 0.0
         self._connection_errors = 0
     
     def get_qdrant_client(self) -> QdrantClient:
@@ -100,6 +111,105 @@ class ConnectionPool:
         
         return self._qdrant_client
     
+    def get_async_qdrant_client(self) -> AsyncQdrantClient:
+        """Get or create the async Qdrant client used on the retrieval path."""
+        if self._async_qdrant_client is None:
+            try:
+                logger.info("🔗 [POOL] Creating new async Qdrant client")
+                self._async_qdrant_client = AsyncQdrantClient(
+                    url=ai_config.qdrant_url,
+                    api_key=ai_config.qdrant_api_key,
+                    prefer_grpc=True,
+                    timeout=ai_config.timeout_seconds,
+                )
+                logger.info("✅ [POOL] Async Qdrant client created successfully")
+            except Exception as e:
+                logger.error(f"❌ [POOL] Failed to create async Qdrant client: {str(e)}")
+                raise
+        
+        return self._async_qdrant_client
+    
+    async def check_collection_health(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Check the knowledge base collection, reusing the last result for the health TTL.
+        
+        Args:
+            force: Skip the cached result and query Qdrant
+            
+        Returns:
+            Dict with collection_exists, vectors_count and status
+        """
+        health = self._collection_health
+        if not force and health is not None:
+            # Failed checks are retried soon so a transient error does not disable RAG for the full TTL
+            ttl = ai_config.qdrant_health_error_ttl_seconds if health["status"] == "error" else ai_config.qdrant_health_ttl_seconds
+            if time.time() - self._collection_checked_at < ttl:
+                return health
+        
+        collection_name = ai_config.qdrant_collection_name
+        try:
+            client = self.get_async_qdrant_client()
+            if not await client.collection_exists(collection_name):
+                health = {"collection_exists": False, "vectors_count": 0, "status": "not_found"}
+            else:
+                info = await client.get_collection(collection_name)
+                vectors_count = info.points_count or 0
+                health = {
+                    "collection_exists": True,
+                    "vectors_count": vectors_count,
+                    "status": "healthy" if vectors_count > 0 else "empty",
+                    "collection_name": collection_name,
+                }
+        except Exception as e:
+            logger.warning(f"⚠️ [POOL] Collection health check failed: {str(e)}")
+            health = {"collection_exists": False, "vectors_count": 0, "status": "error", "error": str(e)}
+            # Drop the clients and retrievers built on them so the next check reconnects
+            self._reset_connections()
+        
+        self._collection_health = health
+        self._collection_checked_at = time.time()
+        return health
+    
+    def invalidate_collection_health(self):
+        """Forget the cached readiness result (e.g. after a failed query)."""
+        self._collection_health = None
+        self._collection_checked_at = 0.0
+    
+    async def ensure_collection_ready(self) -> bool:
+        """
+        Make sure the knowledge base collection exists and has data.
+        
+        The check result is cached for ``qdrant_health_ttl_seconds``, so the
+        retrieval hot path normally costs no Qdrant round trip. A missing or empty
+        collection triggers a single ingestion even under concurrent callers.
+        
+        Returns:
+            True if the collection can serve queries
+        """
+        health = await self.check_collection_health()
+        if health["status"] == "healthy":
+            return True
+        if health["status"] == "error":
+            return False
+        
+        if self._readiness_lock is None:
+            self._readiness_lock = asyncio.Lock()
+        
+        async with self._readiness_lock:
+            health = await self.check_collection_health()
+            if health["status"] != "healthy" and health["status"] != "error":
+                logger.info(f"📦 [POOL] Collection {health['status']}, ingesting knowledge base...")
+                from app.services.ai.shared.tools.rag.ingest import ingest_documents
+                
+                result = await ingest_documents()
+                if result.success:
+                    logger.info(f"✅ [POOL] Ingestion completed: {result.chunks_stored} chunks stored")
+                else:
+                    logger.error(f"❌ [POOL] Ingestion failed: {result.errors}")
+                health = await self.check_collection_health(force=True)
+        
+        return health["status"] == "healthy"
+    
     def get_vector_store(self) -> QdrantVectorStore:
         """Get or create vector store."""
         if not self._is_healthy():
@@ -131,12 +241,12 @@ class ConnectionPool:
         
         return self._vector_store
     
-    def get_cohere_rerank(self) -> CohereRerank:
+    def get_cohere_rerank(self) -> AsyncCohereRerank:
         """Get or create Cohere rerank compressor."""
         if self._cohere_rerank is None:
             try:
                 logger.info("🎯 [POOL] Creating new Cohere rerank compressor")
-                self._cohere_rerank = CohereRerank(
+                self._cohere_rerank = AsyncCohereRerank(
                     cohere_api_key=ai_config.cohere_api_key,
                     model="rerank-multilingual-v3.0",
                     top_n=min(6, ai_config.rag_retrieval_k),  # Reduced from 8 for speed
@@ -148,50 +258,117 @@ class ConnectionPool:
         
         return self._cohere_rerank
     
-    def get_base_retriever(self):
-        """Get optimized base retriever without MultiQuery for faster performance."""
-        vector_store = self.get_vector_store()
-        return vector_store.as_retriever(
-            search_type="mmr",
-            search_kwargs={
-                "k": ai_config.rag_retrieval_k,
-                "fetch_k": max(16, ai_config.rag_retrieval_k * 2),  # Slightly increased for better recall
-                "lambda_mult": 0.7  # Balance between relevance and diversity
-            },
+    def get_reranker(self, name: str = "cohere"):
+        """
+        Get the reranking compressor for a strategy.
+        
+        Args:
+            name: "cohere", "cross_encoder", "fusion" or "none"
+            
+        Returns:
+            Document compressor, or None for "none"
+        """
+        if name not in RERANKERS:
+            raise ValueError(f"Unknown reranker '{name}', expected one of {RERANKERS}")
+        if name == "none":
+            return None
+        if name == "cohere":
+            return self.get_cohere_rerank()
+        
+        # Local rerankers hold no connections, so they survive pool resets
+        reranker = self._local_rerankers.get(name)
+        if reranker is None:
+            logger.info(f"🎯 [POOL] Creating local {name} reranker")
+            reranker = create_local_reranker(name, top_n=min(6, ai_config.rag_retrieval_k))
+            self._local_rerankers[name] = reranker
+        return reranker
+    
+    def get_base_retriever(self, k: Optional[int] = None, fetch_k: Optional[int] = None) -> AsyncQdrantRetriever:
+        """
+        Get optimized base retriever without MultiQuery for faster performance.
+        
+        Args:
+            k: Documents returned (and handed to the reranker); defaults to rag_retrieval_k
+            fetch_k: MMR candidate pool; defaults to twice k (at least 16)
+        """
+        k = k or ai_config.rag_retrieval_k
+        return AsyncQdrantRetriever(
+            async_client=self.get_async_qdrant_client(),
+            embeddings=get_cached_embedding_model(),
+            collection_name=ai_config.qdrant_collection_name,
+            vector_name="dense",
+            k=k,
+            fetch_k=fetch_k or max(16, k * 2),  # Slightly increased for better recall
+            lambda_mult=0.7,  # Balance between relevance and diversity
         )
     
-    def get_multiquery_retriever(self):
-        """Get MultiQuery retriever (expensive, use sparingly)."""
-        if self._multiquery_retriever is None:
+    def get_multiquery_retriever(self, breadth: int = 3, k: Optional[int] = None, fetch_k: Optional[int] = None):
+        """
+        Get MultiQuery retriever (expensive, use sparingly).
+        
+        Variant searches run concurrently with the original query and are merged
+        with reciprocal-rank fusion, stopping early under ``multiquery_budget_ms``.
+        
+        Args:
+            breadth: Query variants the LLM is asked for (the original query is always included)
+            k: Documents per variant
+            fetch_k: MMR candidate pool per variant
+        """
+        k = k or ai_config.rag_retrieval_k
+        fetch_k = fetch_k or max(16, k * 2)
+        key = (breadth, k, fetch_k)
+        if key not in self._multiquery_retrievers:
             try:
-                logger.info("🔍 [POOL] Creating new MultiQuery retriever")
-                base_retriever = self.get_base_retriever()
-                llm = get_chat_model()
-                
-                self._multiquery_retriever = MultiQueryRetriever.from_llm(
-                    retriever=base_retriever, 
-                    llm=llm, 
-                    include_original=True
+                logger.info(f"🔍 [POOL] Creating new MultiQuery retriever (breadth: {breadth}, k: {k})")
+                self._multiquery_retrievers[key] = ParallelMultiQueryRetriever(
+                    retriever=self.get_base_retriever(k=k, fetch_k=fetch_k),
+                    llm=get_chat_model(caller="multi_query", priority="reply"),
+                    breadth=breadth,
+                    k=max(k, ai_config.multiquery_target_docs),
+                    budget_ms=ai_config.multiquery_budget_ms,
+                    min_score=ai_config.multiquery_min_score,
+                    rrf_k=ai_config.multiquery_rrf_k,
                 )
                 logger.info("✅ [POOL] MultiQuery retriever created successfully")
             except Exception as e:
                 logger.error(f"❌ [POOL] Failed to create MultiQuery retriever: {str(e)}")
                 raise
         
-        return self._multiquery_retriever
+        return self._multiquery_retrievers[key]
     
-    def get_compression_retriever(self, use_multiquery: bool = False):
-        """Get compression retriever with optional MultiQuery."""
+    def get_compression_retriever(
+        self,
+        use_multiquery: bool = False,
+        reranker: str = "cohere",
+        k: Optional[int] = None,
+        fetch_k: Optional[int] = None,
+        multiquery_breadth: int = 3,
+    ):
+        """
+        Get compression retriever with optional MultiQuery and the given reranking stage.
+        
+        Args:
+            use_multiquery: Expand the query with LLM-generated variants
+            reranker: "cohere", "cross_encoder", "fusion" or "none"
+            k: Candidates retrieved (the rerank depth)
+            fetch_k: MMR candidate pool
+            multiquery_breadth: LLM-generated variants when MultiQuery is used
+        """
         try:
-            logger.info(f"🎯 [POOL] Creating compression retriever (multiquery: {use_multiquery})")
+            logger.info(
+                f"🎯 [POOL] Creating compression retriever "
+                f"(multiquery: {use_multiquery}, reranker: {reranker}, k: {k or ai_config.rag_retrieval_k})"
+            )
             
             # Choose base retriever based on performance needs
             if use_multiquery:
-                base_retriever = self.get_multiquery_retriever()
+                base_retriever = self.get_multiquery_retriever(breadth=multiquery_breadth, k=k, fetch_k=fetch_k)
             else:
-                base_retriever = self.get_base_retriever()
+                base_retriever = self.get_base_retriever(k=k, fetch_k=fetch_k)
             
-            compressor = self.get_cohere_rerank()
+            compressor = self.get_reranker(reranker)
+            if compressor is None:
+                return base_retriever
             
             compression_retriever = ContextualCompressionRetriever(
                 base_compressor=compressor,
@@ -209,10 +386,15 @@ class ConnectionPool:
         """Get connection pool statistics."""
         return {
             "qdrant_client_active": self._qdrant_client is not None,
+            "async_qdrant_client_active": self._async_qdrant_client is not None,
+            "collection_health": self._collection_health,
+            "collection_checked_at": self._collection_checked_at,
             "vector_store_active": self._vector_store is not None,
-            "multiquery_retriever_active": self._multiquery_retriever is not None,
+            "multiquery_retrievers": len(self._multiquery_retrievers),
             "compression_retriever_active": self._compression_retriever is not None,
             "cohere_rerank_active": self._cohere_rerank is not None,
+            "local_rerankers": list(self._local_rerankers),
+            "embedding_cache": get_embedding_cache_stats(),
             "connection_errors": self._connection_errors,
             "last_health_check": self._last_health_check,
             "healthy": self._is_healthy()
@@ -222,6 +404,16 @@ class ConnectionPool:
         """Force reset the entire connection pool."""
         logger.info("🔄 [POOL] Force resetting connection pool")
         self._reset_connections()
+    
+    async def aclose(self):
+        """Close the async Qdrant client (application shutdown)."""
+        client, self._async_qdrant_client = self._async_qdrant_client, None
+        if client is not None:
+            try:
+                await client.close()
+                logger.info("🔌 [POOL] Async Qdrant client closed")
+            except Exception as e:
+                logger.warning(f"⚠️ [POOL] Failed to close async Qdrant client: {str(e)}")
 
 
 # Global connection pool instance
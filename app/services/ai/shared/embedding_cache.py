@@ -0,0 +1,293 @@
+"""
+Query embedding cache for RAG retrieval.
+
+Customer queries are highly repetitive ("precios", "planes", "cobertura"), so
+query vectors are cached under a key derived from the normalized query text:
+
+- an in-process LRU answers repeated queries without any I/O
+- Redis shares vectors across workers, stored as compact float32 bytes
+- concurrent lookups issued in the same event-loop tick (MultiQuery variants)
+  are coalesced into one Redis MGET and one embeddings API call
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Set
+import asyncio
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.core.logger import logger
+from app.services.ai.config import ai_config
+
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " \t\n¿?¡!.,;:\"'"
+_REDIS_RETRY_SECONDS = 60
+
+
+def normalize_query(text: str) -> str:
+    """Normalize query text for cache keys (unicode form, case, whitespace, edge punctuation)."""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = _WHITESPACE_RE.sub(" ", text)
+    return text.strip(_EDGE_PUNCTUATION)
+
+
+def encode_vector(vector: Sequence[float]) -> bytes:
+    """Pack a vector as float32 bytes (4 bytes per dimension)."""
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def decode_vector(raw: bytes) -> List[float]:
+    """Unpack float32 bytes produced by ``encode_vector``."""
+    return np.frombuffer(raw, dtype=np.float32).tolist()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves query vectors from an LRU and Redis before calling the model."""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        namespace: str,
+        redis_client: Any = None,
+        lru_size: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        use_redis: bool = True,
+    ):
+        """
+        Args:
+            embeddings: Underlying embedding model
+            namespace: Cache key namespace (the embedding model name)
+            redis_client: Binary ``redis.asyncio`` client; created from settings when omitted
+            lru_size: Vectors kept in process
+            ttl_seconds: Redis expiry for cached vectors
+            use_redis: Share vectors through Redis (off for offline runs)
+        """
+        self.embeddings = embeddings
+        self.namespace = namespace
+        self.lru_size = ai_config.embedding_cache_lru_size if lru_size is None else lru_size
+        self.ttl_seconds = ai_config.embedding_cache_ttl_seconds if ttl_seconds is None else ttl_seconds
+
+        self._redis = redis_client
+        self._redis_retry_at = 0.0 if use_redis else float("inf")
+        self._lru: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lru_lock = threading.Lock()
+        self._batch: Dict[str, asyncio.Future] = {}
+        self._flush_tasks: Set[asyncio.Task] = set()  # Referenced so a pending flush is never garbage-collected
+
+        self._stats = {"memory_hits": 0, "redis_hits": 0, "misses": 0, "batches": 0, "api_calls": 0}
+
+    # ==================== KEYS AND LRU ====================
+
+    def _key(self, normalized: str) -> str:
+        digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+        return f"ai:emb:{self.namespace}:{digest}"
+
+    def _lru_get(self, normalized: str) -> Optional[List[float]]:
+        with self._lru_lock:
+            vector = self._lru.get(normalized)
+            if vector is not None:
+                self._lru.move_to_end(normalized)
+            return vector
+
+    def _lru_put(self, normalized: str, vector: List[float]) -> None:
+        with self._lru_lock:
+            self._lru[normalized] = vector
+            self._lru.move_to_end(normalized)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    # ==================== REDIS ====================
+
+    async def _get_redis(self):
+        if self._redis is not None:
+            return self._redis
+        if time.time() < self._redis_retry_at:
+            return None
+
+        try:
+            import redis.asyncio as redis
+            from app.core.config import settings
+
+            client = redis.from_url(settings.REDIS_URL, decode_responses=False)
+            await client.ping()
+            self._redis = client
+            logger.info("✅ [EMBED_CACHE] Redis embedding cache connected")
+        except Exception as e:
+            self._redis_retry_at = time.time() + _REDIS_RETRY_SECONDS
+            logger.warning(f"⚠️ [EMBED_CACHE] Redis unavailable, using in-process cache only: {str(e)}")
+        return self._redis
+
+    async def _redis_lookup(self, normalized: List[str]) -> Dict[str, List[float]]:
+        client = await self._get_redis()
+        if client is None or not normalized:
+            return {}
+        try:
+            raw_values = await client.mget([self._key(text) for text in normalized])
+        except Exception as e:
+            logger.warning(f"⚠️ [EMBED_CACHE] Redis lookup failed: {str(e)}")
+            return {}
+        return {text: decode_vector(raw) for text, raw in zip(normalized, raw_values) if raw}
+
+    async def _redis_fill(self, vectors: Dict[str, List[float]]) -> None:
+        client = await self._get_redis()
+        if client is None or not vectors:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for text, vector in vectors.items():
+                pipe.set(self._key(text), encode_vector(vector), ex=self.ttl_seconds)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ [EMBED_CACHE] Redis fill failed: {str(e)}")
+
+    # ==================== LOOKUP ====================
+
+    async def _resolve(self, normalized: List[str]) -> Dict[str, List[float]]:
+        """Resolve unique normalized texts through LRU, then Redis, then one model call."""
+        self._stats["batches"] += 1
+        vectors: Dict[str, List[float]] = {}
+        memory_hits = 0
+
+        for text in normalized:
+            vector = self._lru_get(text)
+            if vector is not None:
+                vectors[text] = vector
+                memory_hits += 1
+
+        missing = [text for text in normalized if text not in vectors]
+        from_redis = await self._redis_lookup(missing)
+        for text, vector in from_redis.items():
+            self._lru_put(text, vector)
+        vectors.update(from_redis)
+
+        missing = [text for text in missing if text not in from_redis]
+        if missing:
+            self._stats["api_calls"] += 1
+            embedded = await self.embeddings.aembed_documents(missing)
+            fresh = dict(zip(missing, embedded))
+            for text, vector in fresh.items():
+                self._lru_put(text, vector)
+            vectors.update(fresh)
+            await self._redis_fill(fresh)
+
+        self._record(memory_hits, len(from_redis), len(missing))
+        return vectors
+
+    def _record(self, memory_hits: int, redis_hits: int, misses: int) -> None:
+        self._stats["memory_hits"] += memory_hits
+        self._stats["redis_hits"] += redis_hits
+        self._stats["misses"] += misses
+
+        from app.services.ai.shared.performance_monitor import performance_monitor
+        performance_monitor.record_embedding_lookup(memory_hits, redis_hits, misses)
+
+    async def _flush_batch(self) -> None:
+        # Let every coroutine scheduled in this tick register its text first
+        await asyncio.sleep(0)
+        batch, self._batch = self._batch, {}
+        try:
+            vectors = await self._resolve(list(batch))
+            for text, future in batch.items():
+                if not future.done():
+                    future.set_result(vectors[text])
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+
+    # ==================== EMBEDDINGS INTERFACE ====================
+
+    async def aembed_query(self, text: str) -> List[float]:
+        normalized = normalize_query(text)
+        vector = self._lru_get(normalized)
+        if vector is not None:
+            self._record(1, 0, 0)
+            return vector
+
+        future = self._batch.get(normalized)
+        if future is None:
+            if not self._batch:
+                task = asyncio.get_running_loop().create_task(self._flush_batch())
+                self._flush_tasks.add(task)
+                task.add_done_callback(self._flush_tasks.discard)
+            future = asyncio.get_running_loop().create_future()
+            self._batch[normalized] = future
+        return await asyncio.shield(future)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        normalized = [normalize_query(text) for text in texts]
+        vectors = await self._resolve(list(dict.fromkeys(normalized)))
+        return [vectors[text] for text in normalized]
+
+    def embed_query(self, text: str) -> List[float]:
+        normalized = normalize_query(text)
+        vector = self._lru_get(normalized)
+        if vector is None:
+            vector = self.embeddings.embed_query(normalized)
+            self._lru_put(normalized, vector)
+            self._record(0, 0, 1)
+        else:
+            self._record(1, 0, 0)
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    # ==================== STATS ====================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get embedding cache statistics."""
+        hits = self._stats["memory_hits"] + self._stats["redis_hits"]
+        lookups = hits + self._stats["misses"]
+        return {
+            **self._stats,
+            "namespace": self.namespace,
+            "lru_entries": len(self._lru),
+            "lru_size": self.lru_size,
+            "redis_connected": self._redis is not None,
+            "hit_rate_percent": round(hits / lookups * 100, 2) if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        """Drop in-process vectors (Redis entries expire on their own)."""
+        with self._lru_lock:
+            self._lru.clear()
+
+
+_cached_models: Dict[str, CachedEmbeddings] = {}
+_cached_models_lock = threading.Lock()
+
+
+def get_cached_embedding_model() -> Embeddings:
+    """
+    Get the query embedding model wrapped in the shared embedding cache.
+
+    Returns the raw pooled model when ``embedding_cache_enabled`` is off.
+    """
+    from app.services.ai.shared.models import get_embedding_model
+
+    if not ai_config.embedding_cache_enabled:
+        return get_embedding_model()
+
+    model = ai_config.openai_embedding_model
+    cached = _cached_models.get(model)
+    if cached is None:
+        with _cached_models_lock:
+            cached = _cached_models.get(model)
+            if cached is None:
+                logger.info(f"🔤 [EMBED_CACHE] Creating cached embedding model: {model}")
+                cached = CachedEmbeddings(get_embedding_model(), namespace=model)
+                _cached_models[model] = cached
+    return cached
+
+
+def get_embedding_cache_stats() -> Dict[str, Any]:
+    """Get statistics for every cached embedding model."""
+    return {model: cached.get_stats() for model, cached in _cached_models.items()}
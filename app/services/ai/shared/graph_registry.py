@@ -0,0 +1,98 @@
+"""
+Process-wide registry for compiled LangGraph graphs and other expensive agent components.
+Compiled graphs hold no per-conversation state, so a single instance is shared by every
+concurrent conversation instead of being rebuilt on each customer message.
+"""
+
+from typing import Any, Callable, Dict, Optional, TypeVar
+import threading
+import time
+
+from app.core.logger import logger
+
+
+T = TypeVar("T")
+
+
+class GraphRegistry:
+    """Singleton registry of compiled graphs and bound models."""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, '_initialized') or not self._initialized:
+            self._components: Dict[str, Any] = {}
+            self._build_times_ms: Dict[str, float] = {}
+            self._hits: Dict[str, int] = {}
+            self._build_lock = threading.Lock()
+            self._initialized = True
+            logger.info("📚 [REGISTRY] Graph registry initialized")
+
+    def get_or_create(self, name: str, factory: Callable[[], T]) -> T:
+        """
+        Return the component registered under ``name``, building it once if needed.
+
+        Args:
+            name: Registry key (e.g. "whatsapp_agent.graph")
+            factory: Zero-argument callable that builds the component
+
+        Returns:
+            The shared component instance
+        """
+        component = self._components.get(name)
+        if component is not None:
+            self._hits[name] = self._hits.get(name, 0) + 1
+            return component
+
+        with self._build_lock:
+            component = self._components.get(name)
+            if component is not None:
+                return component
+
+            start_time = time.perf_counter()
+            component = factory()
+            self._build_times_ms[name] = (time.perf_counter() - start_time) * 1000
+            self._components[name] = component
+            self._hits.setdefault(name, 0)
+
+            logger.info(f"✅ [REGISTRY] Registered '{name}' (built in {self._build_times_ms[name]:.1f}ms)")
+            return component
+
+    def get(self, name: str) -> Optional[Any]:
+        """Return a registered component or None."""
+        return self._components.get(name)
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Drop one component (or all of them) so it is rebuilt on next use."""
+        with self._build_lock:
+            if name is None:
+                self._components.clear()
+                self._build_times_ms.clear()
+                self._hits.clear()
+                logger.info("🔄 [REGISTRY] Invalidated all registered components")
+            else:
+                self._components.pop(name, None)
+                self._build_times_ms.pop(name, None)
+                self._hits.pop(name, None)
+                logger.info(f"🔄 [REGISTRY] Invalidated '{name}'")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get registry statistics."""
+        return {
+            "components": sorted(self._components),
+            "build_times_ms": {name: round(ms, 2) for name, ms in self._build_times_ms.items()},
+            "reuse_counts": dict(self._hits),
+        }
+
+
+# Global graph registry instance
+graph_registry = GraphRegistry()
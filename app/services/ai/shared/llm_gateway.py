@@ -0,0 +1,535 @@
+"""
+Central gateway for chat model calls.
+
+Every agent gets its chat model from ``get_chat_model``, which wraps the pooled
+provider client in a ``GatewayChatModel`` tagged with a caller name and a
+priority class:
+
+- ``reply``: answers to customers (WhatsApp agent, its retrieval and verifier)
+- ``assist``: tools for human agents (writer suggestions)
+- ``background``: analytics (sentiment, summaries)
+
+Each class has its own concurrency limit and a sliding one-minute token budget,
+so a runaway summarization batch queues behind its own limits instead of
+exhausting the provider rate limit that customer replies depend on. Identical
+prompts in flight at the same time share one provider call. Latency, queue
+time, tokens, cost and errors are recorded per caller, and every provider
+request is reported to ``prompt_layout`` for prefix-cache statistics.
+
+``LocalFakeChatModel`` is a deterministic offline provider
+(``llm_gateway_provider="fake"``) for tests and local runs.
+"""
+
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Sequence
+import asyncio
+import hashlib
+import json
+import time
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from app.core.logger import logger
+from app.services.ai.config import ai_config
+from app.services.ai.shared.prompt_layout import prompt_layout
+from app.services.ai.shared.utils import estimate_tokens
+
+
+PRIORITY_CLASSES = ("reply", "assist", "background")
+
+_WINDOW_SECONDS = 60.0
+
+
+def _message_tokens(messages: Sequence[BaseMessage]) -> int:
+    return sum(estimate_tokens(message.content if isinstance(message.content, str) else str(message.content))
+               for message in messages)
+
+
+def _usage_from_metadata(usage: Dict[str, Any]) -> Dict[str, int]:
+    return {
+        "input": usage.get("input_tokens", 0),
+        "output": usage.get("output_tokens", 0),
+        "cached": (usage.get("input_token_details") or {}).get("cache_read", 0),
+    }
+
+
+def _usage(result: ChatResult) -> Optional[Dict[str, int]]:
+    """Provider-reported input, output and cached input tokens of a result, when available."""
+    for generation in result.generations:
+        usage = getattr(generation.message, "usage_metadata", None)
+        if usage:
+            return _usage_from_metadata(usage)
+    token_usage = (result.llm_output or {}).get("token_usage")
+    if token_usage:
+        return {
+            "input": token_usage.get("prompt_tokens", 0),
+            "output": token_usage.get("completion_tokens", 0),
+            "cached": (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0),
+        }
+    return None
+
+
+def _model_name(model: BaseChatModel) -> str:
+    return getattr(model, "model_name", None) or getattr(model, "model", None) or model._llm_type
+
+
+class _Lane:
+    """Concurrency slots and sliding token window of one priority class."""
+
+    def __init__(self, name: str, max_concurrent: int, tokens_per_minute: int):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.tokens_per_minute = tokens_per_minute
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.in_flight = 0
+        self.waiting = 0
+        self.budget_waits = 0
+        self._spent: Deque[List[float]] = deque()  # [timestamp, tokens], reconciled after each call
+
+    def used(self, now: float) -> int:
+        while self._spent and now - self._spent[0][0] >= _WINDOW_SECONDS:
+            self._spent.popleft()
+        return int(sum(tokens for _, tokens in self._spent))
+
+    async def reserve(self, tokens: int) -> List[float]:
+        """Wait until ``tokens`` fit in the window and reserve them (no-op when unlimited)."""
+        entry = [time.monotonic(), 0]
+        if not self.tokens_per_minute:
+            return entry
+        tokens = min(tokens, self.tokens_per_minute)
+        while True:
+            now = time.monotonic()
+            if self.used(now) + tokens <= self.tokens_per_minute:
+                entry[0], entry[1] = now, tokens
+                self._spent.append(entry)
+                return entry
+            self.budget_waits += 1
+            await asyncio.sleep(_WINDOW_SECONDS - (now - self._spent[0][0]))
+
+
+class LLMGateway:
+    """Admission control, request coalescing and accounting for chat model calls."""
+
+    def __init__(
+        self,
+        concurrency: Optional[Dict[str, int]] = None,
+        tokens_per_minute: Optional[Dict[str, int]] = None,
+        coalesce: Optional[bool] = None,
+    ):
+        """
+        Args:
+            concurrency: Concurrent provider calls per priority class
+            tokens_per_minute: Token budget per priority class (0 = unlimited)
+            coalesce: Share one provider call between identical in-flight prompts
+        """
+        concurrency = concurrency or {
+            "reply": ai_config.llm_gateway_reply_concurrency,
+            "assist": ai_config.llm_gateway_assist_concurrency,
+            "background": ai_config.llm_gateway_background_concurrency,
+        }
+        tokens_per_minute = tokens_per_minute or {
+            "reply": ai_config.llm_gateway_reply_tokens_per_minute,
+            "assist": ai_config.llm_gateway_assist_tokens_per_minute,
+            "background": ai_config.llm_gateway_background_tokens_per_minute,
+        }
+        self.coalesce = ai_config.llm_gateway_coalesce if coalesce is None else coalesce
+        self._lanes = {
+            name: _Lane(name, concurrency[name], tokens_per_minute.get(name, 0)) for name in PRIORITY_CLASSES
+        }
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._callers: Dict[str, Dict[str, Any]] = {}
+
+    def _lane(self, priority: str) -> _Lane:
+        lane = self._lanes.get(priority)
+        if lane is None:
+            raise ValueError(f"Unknown LLM priority class: {priority}")
+        return lane
+
+    @staticmethod
+    def _request_key(model: BaseChatModel, messages: Sequence[BaseMessage], stop: Optional[List[str]], kwargs: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            {
+                "model": id(model),
+                "messages": [message.model_dump(exclude={"id"}) for message in messages],
+                "stop": stop,
+                "kwargs": kwargs,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _caller_stats(self, caller: str, priority: str) -> Dict[str, Any]:
+        stats = self._callers.get(caller)
+        if stats is None:
+            stats = self._callers[caller] = {
+                "priority": priority,
+                "calls": 0,
+                "provider_calls": 0,
+                "coalesced": 0,
+                "errors": 0,
+                "input_tokens": 0,
+                "cached_input_tokens": 0,
+                "output_tokens": 0,
+                "cost_usd": 0.0,
+                "latency_ms_total": 0.0,
+                "latency_ms_max": 0.0,
+                "queue_ms_total": 0.0,
+            }
+        return stats
+
+    def _record_call(
+        self,
+        model: BaseChatModel,
+        messages: List[BaseMessage],
+        caller: str,
+        priority: str,
+        usage: Dict[str, int],
+        queue_ms: float,
+        latency_ms: float,
+    ) -> None:
+        input_tokens, output_tokens = usage["input"], usage["output"]
+        stats = self._caller_stats(caller, priority)
+        stats["provider_calls"] += 1
+        stats["input_tokens"] += input_tokens
+        stats["cached_input_tokens"] += usage.get("cached", 0)
+        stats["output_tokens"] += output_tokens
+        stats["queue_ms_total"] += queue_ms
+        stats["latency_ms_total"] += latency_ms
+        stats["latency_ms_max"] = max(stats["latency_ms_max"], latency_ms)
+        input_price, output_price = ai_config.llm_gateway_prices_per_million.get(_model_name(model), (0.0, 0.0))
+        stats["cost_usd"] += (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+        prompt_layout.observe(caller, messages, usage.get("cached", 0))
+
+    async def _admit(self, lane: _Lane, estimated_tokens: int) -> List[float]:
+        lane.waiting += 1
+        try:
+            await lane.semaphore.acquire()
+        finally:
+            lane.waiting -= 1
+        try:
+            reservation = await lane.reserve(estimated_tokens)
+        except BaseException:
+            lane.semaphore.release()
+            raise
+        lane.in_flight += 1
+        return reservation
+
+    def _release(self, lane: _Lane) -> None:
+        lane.in_flight -= 1
+        lane.semaphore.release()
+
+    async def _call(
+        self,
+        model: BaseChatModel,
+        messages: List[BaseMessage],
+        caller: str,
+        priority: str,
+        stop: Optional[List[str]],
+        run_manager: Optional[AsyncCallbackManagerForLLMRun],
+        kwargs: Dict[str, Any],
+    ) -> ChatResult:
+        lane = self._lane(priority)
+        estimated_input = _message_tokens(messages)
+        queued = time.perf_counter()
+        reservation = await self._admit(lane, estimated_input)
+        started = time.perf_counter()
+        try:
+            result = await model._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        except Exception as e:
+            self._caller_stats(caller, priority)["errors"] += 1
+            logger.error(f"❌ [LLM_GATEWAY] {caller} ({priority}) call failed: {str(e)}")
+            raise
+        finally:
+            self._release(lane)
+
+        usage = _usage(result) or {
+            "input": estimated_input,
+            "output": sum(estimate_tokens(generation.text) for generation in result.generations),
+        }
+        if lane.tokens_per_minute:
+            reservation[1] = usage["input"] + usage["output"]
+        self._record_call(
+            model, messages, caller, priority, usage,
+            (started - queued) * 1000, (time.perf_counter() - started) * 1000,
+        )
+        return result
+
+    async def agenerate(
+        self,
+        model: BaseChatModel,
+        messages: List[BaseMessage],
+        caller: str,
+        priority: str = "reply",
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """
+        Run one chat completion through the gateway.
+
+        Args:
+            model: Provider chat model
+            messages: Prompt messages
+            caller: Name the call is accounted under
+            priority: "reply", "assist" or "background"
+            stop: Stop sequences
+            run_manager: Callback manager of the calling run
+            **kwargs: Provider arguments (bound tools, response format, ...)
+
+        Returns:
+            The provider's ChatResult (a copy when the call was shared)
+        """
+        self._caller_stats(caller, priority)["calls"] += 1
+        if not self.coalesce:
+            return await self._call(model, messages, caller, priority, stop, run_manager, kwargs)
+
+        key = self._request_key(model, messages, stop, kwargs)
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            self._caller_stats(caller, priority)["coalesced"] += 1
+            logger.info(f"🔗 [LLM_GATEWAY] {caller} joined an identical in-flight prompt")
+        else:
+            task = asyncio.ensure_future(self._call(model, messages, caller, priority, stop, run_manager, kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._inflight.pop(key, None) if self._inflight.get(key) is done else None)
+
+        # Shielded so a cancelled caller does not cancel the call for the others
+        result = await asyncio.shield(task)
+        return result.model_copy(deep=True) if shared else result
+
+    async def astream(
+        self,
+        model: BaseChatModel,
+        messages: List[BaseMessage],
+        caller: str,
+        priority: str = "reply",
+        stop: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """
+        Stream one chat completion through the gateway (never coalesced).
+
+        Args:
+            model: Provider chat model
+            messages: Prompt messages
+            caller: Name the call is accounted under
+            priority: "reply", "assist" or "background"
+            stop: Stop sequences
+            **kwargs: Provider arguments
+
+        Yields:
+            Provider chunks as they arrive
+        """
+        lane = self._lane(priority)
+        stats = self._caller_stats(caller, priority)
+        stats["calls"] += 1
+        estimated_input = _message_tokens(messages)
+        queued = time.perf_counter()
+        reservation = await self._admit(lane, estimated_input)
+        started = time.perf_counter()
+        usage: Optional[Dict[str, int]] = None
+        output_tokens = 0
+        try:
+            async for chunk in model._astream(messages, stop=stop, **kwargs):
+                chunk_usage = getattr(chunk.message, "usage_metadata", None)
+                if chunk_usage:
+                    usage = _usage_from_metadata(chunk_usage)
+                output_tokens += estimate_tokens(chunk.text) if chunk.text else 0
+                yield chunk
+        except Exception as e:
+            stats["errors"] += 1
+            logger.error(f"❌ [LLM_GATEWAY] {caller} ({priority}) stream failed: {str(e)}")
+            raise
+        finally:
+            self._release(lane)
+
+        usage = usage or {"input": estimated_input, "output": output_tokens}
+        if lane.tokens_per_minute:
+            reservation[1] = usage["input"] + usage["output"]
+        self._record_call(
+            model, messages, caller, priority, usage,
+            (started - queued) * 1000, (time.perf_counter() - started) * 1000,
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-class load and per-caller latency, tokens, cost and errors."""
+        now = time.monotonic()
+        callers = {}
+        for caller, stats in self._callers.items():
+            provider_calls = stats["provider_calls"]
+            callers[caller] = {
+                **stats,
+                "cost_usd": round(stats["cost_usd"], 6),
+                "avg_latency_ms": round(stats["latency_ms_total"] / provider_calls, 2) if provider_calls else 0.0,
+                "avg_queue_ms": round(stats["queue_ms_total"] / provider_calls, 2) if provider_calls else 0.0,
+            }
+        return {
+            "coalesce": self.coalesce,
+            "in_flight_prompts": len(self._inflight),
+            "classes": {
+                name: {
+                    "max_concurrent": lane.max_concurrent,
+                    "in_flight": lane.in_flight,
+                    "waiting": lane.waiting,
+                    "tokens_per_minute": lane.tokens_per_minute,
+                    "tokens_last_minute": lane.used(now),
+                    "budget_waits": lane.budget_waits,
+                }
+                for name, lane in self._lanes.items()
+            },
+            "callers": callers,
+            "total_cost_usd": round(sum(stats["cost_usd"] for stats in self._callers.values()), 6),
+        }
+
+    def reset_stats(self) -> None:
+        """Reset per-caller accounting."""
+        self._callers.clear()
+
+
+# Global LLM gateway instance
+llm_gateway = LLMGateway()
+
+
+class GatewayChatModel(BaseChatModel):
+    """Chat model that sends every call of a provider model through the LLM gateway."""
+
+    provider: BaseChatModel
+    caller: str = "default"
+    priority: str = "reply"
+
+    @property
+    def _llm_type(self) -> str:
+        return f"gateway:{self.provider._llm_type}"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {**self.provider._identifying_params, "caller": self.caller, "priority": self.priority}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        """Bind tools in the provider's format, keeping calls on the gateway."""
+        binding = self.provider.bind_tools(tools, **kwargs)
+        return self.bind(**binding.kwargs)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # Synchronous calls are not admission-controlled (the agents run async)
+        return self.provider._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return await llm_gateway.agenerate(
+            self.provider, messages, caller=self.caller, priority=self.priority,
+            stop=stop, run_manager=run_manager, **kwargs
+        )
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async for chunk in llm_gateway.astream(
+            self.provider, messages, caller=self.caller, priority=self.priority, stop=stop, **kwargs
+        ):
+            yield chunk
+
+
+class LocalFakeChatModel(BaseChatModel):
+    """
+    Deterministic offline chat model.
+
+    Replies with the configured responses in turn, or echoes the last human
+    message when none are configured, after ``latency_ms``. Reports estimated
+    token usage so gateway accounting works offline.
+    """
+
+    model_name: str = "fake"
+    responses: List[str] = []
+    latency_ms: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _reply(self, messages: List[BaseMessage]) -> AIMessage:
+        self.calls += 1
+        if self.responses:
+            text = self.responses[(self.calls - 1) % len(self.responses)]
+        else:
+            last_human = next((m for m in reversed(messages) if isinstance(m, HumanMessage)), None)
+            text = f"echo: {last_human.content if last_human else ''}"
+        input_tokens = _message_tokens(messages)
+        output_tokens = estimate_tokens(text)
+        return AIMessage(
+            content=text,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        message = self._generate(messages, stop=stop, **kwargs).generations[0].message
+        for index, word in enumerate(message.content.split(" ")):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if index == 0 else f" {word}"))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=message.usage_metadata))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        message = (await self._agenerate(messages, stop=stop, **kwargs)).generations[0].message
+        for index, word in enumerate(message.content.split(" ")):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if index == 0 else f" {word}"))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=message.usage_metadata))
@@ -1,18 +1,23 @@
 """
 Conversation memory service for AI agent.
 Handles conversation history, session management, and context persistence.
+
+Memory lives in a shared store (Redis, or an in-memory stand-in) holding a
+token-bounded rolling window and an incrementally updated summary per
+conversation. Mongo is only read once per conversation to hydrate a cold store.
 """
 
 import asyncio
 from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
-from collections import defaultdict
-
-from langchain.memory import ConversationBufferMemory
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from datetime import datetime, timezone
 
 from app.core.logger import logger
 from app.services.ai.config import ai_config
+from app.services.ai.shared.memory_store import MemoryEntry, create_memory_store
+from app.services.ai.shared.transcript_service import transcript_service
+
+
+_HISTORY_PROJECTION = {"_id": 1, "direction": 1, "sender_role": 1, "text_content": 1, "timestamp": 1}
 
 
 class ConversationMemoryService:
@@ -20,49 +25,31 @@ class ConversationMemoryService:
     Service for managing conversation memory and context across sessions.
     """
     
-    def __init__(self):
-        """Initialize the memory service."""
-        self.conversation_memories: Dict[str, ConversationBufferMemory] = {}
-        self.session_data: Dict[str, Dict[str, Any]] = defaultdict(dict)
-        self.last_activity: Dict[str, datetime] = {}
-        self._cleanup_task: Optional[asyncio.Task] = None
-        
-    def _start_cleanup_task(self):
-        """Start the cleanup task if not already running."""
-        if self._cleanup_task is None or self._cleanup_task.done():
-            try:
-                self._cleanup_task = asyncio.create_task(self._cleanup_expired_sessions())
-            except RuntimeError:
-                # No running event loop, will start when service is used
-                pass
-    
-    async def get_conversation_memory(self, conversation_id: str) -> ConversationBufferMemory:
+    def __init__(self, store=None):
         """
-        Get or create conversation memory for a specific conversation.
+        Initialize the memory service.
         
         Args:
-            conversation_id: Conversation identifier
-            
-        Returns:
-            Conversation memory instance
+            store: Optional memory store (defaults to the configured backend, created lazily)
         """
-        # Start cleanup task if not running
-        self._start_cleanup_task()
-        
-        if conversation_id not in self.conversation_memories:
-            self.conversation_memories[conversation_id] = ConversationBufferMemory(
-                memory_key="conversation_history",
-                return_messages=True,
-                max_token_limit=ai_config.max_context_tokens
-            )
-            logger.info(f"Created new conversation memory for {conversation_id}")
-        
-        # Update last activity
-        self.last_activity[conversation_id] = datetime.now()
-        
-        return self.conversation_memories[conversation_id]
+        self._store = store
+        self._store_lock = asyncio.Lock()
     
-    def get_session_data(self, conversation_id: str) -> Dict[str, Any]:
+    async def _get_store(self):
+        """Create the configured memory store on first use."""
+        if self._store is None:
+            async with self._store_lock:
+                if self._store is None:
+                    self._store = await create_memory_store(
+                        ai_config.memory_store_backend,
+                        window_max_tokens=ai_config.memory_window_max_tokens,
+                        summary_max_tokens=ai_config.memory_summary_max_tokens,
+                        ttl_seconds=ai_config.memory_ttl_seconds,
+                        max_bytes=ai_config.memory_max_bytes,
+                    )
+        return self._store
+    
+    async def get_session_data(self, conversation_id: str) -> Dict[str, Any]:
         """
         Get session data for a conversation.
         
@@ -72,9 +59,11 @@ class ConversationMemoryService:
         Returns:
             Session data dictionary
         """
-        return self.session_data[conversation_id]
+        store = await self._get_store()
+        memory = await store.get(conversation_id)
+        return memory.session_data if memory else {}
     
-    def update_session_data(self, conversation_id: str, data: Dict[str, Any]):
+    async def update_session_data(self, conversation_id: str, data: Dict[str, Any]):
         """
         Update session data for a conversation.
         
@@ -82,63 +71,45 @@ class ConversationMemoryService:
             conversation_id: Conversation identifier
             data: Data to update
         """
-        self.session_data[conversation_id].update(data)
-        self.last_activity[conversation_id] = datetime.now()
+        store = await self._get_store()
+        await store.update_session(conversation_id, data)
     
-    async def load_conversation_history(self, conversation_id: str) -> List[Dict[str, Any]]:
+    async def load_conversation_history(self, conversation_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Load conversation history from database.
         
+        Only customer and AI assistant messages are loaded, newest first, until the
+        memory window budget (``memory_window_max_tokens``) or ``limit`` is reached.
+        
         Args:
             conversation_id: Conversation identifier
+            limit: Maximum number of recent messages (defaults to memory_hydrate_limit)
             
         Returns:
-            List of previous messages
+            List of previous messages, oldest first
         """
         try:
-            # Import here to avoid circular imports
-            from app.services import message_service
-            
-            # Get recent messages for this conversation
-            result = await message_service.get_conversation_messages(
-                conversation_id=conversation_id,
-                limit=10,  # Last 10 messages for context
-                offset=0,
-                sort_by="timestamp",
-                sort_order="desc"  # Get most recent first
+            transcript = await transcript_service.load(
+                conversation_id,
+                formatter=lambda msg: msg.get("text_content") or "",
+                max_tokens=ai_config.memory_window_max_tokens,
+                max_messages=limit or ai_config.memory_hydrate_limit,
+                query={"$or": [
+                    {"direction": "inbound"},
+                    {"direction": "outbound", "sender_role": "ai_assistant"}
+                ]},
+                projection=_HISTORY_PROJECTION
             )
             
-            # Get messages from result
-            messages = result.get("messages", [])
-            
-            logger.info(f"Loaded {len(messages)} raw messages for conversation {conversation_id}")
-            
-            # Format messages for memory
-            history = []
-            for msg in messages:
-                direction = msg.get("direction")
-                sender_role = msg.get("sender_role")
-                text_content = msg.get("text_content", "")
-                
-                logger.debug(f"Processing message: direction={direction}, sender_role={sender_role}, content_length={len(text_content)}")
-                
-                if direction == "inbound":
-                    history.append({
-                        "role": "user",
-                        "content": text_content,
-                        "timestamp": msg.get("timestamp"),
-                        "message_id": str(msg.get("_id"))
-                    })
-                elif direction == "outbound" and sender_role == "ai_assistant":
-                    history.append({
-                        "role": "assistant", 
-                        "content": text_content,
-                        "timestamp": msg.get("timestamp"),
-                        "message_id": str(msg.get("_id"))
-                    })
-            
-            # Reverse to get chronological order
-            history.reverse()
+            history = [
+                {
+                    "role": "user" if msg.get("direction") == "inbound" else "assistant",
+                    "content": msg.get("text_content", ""),
+                    "timestamp": msg.get("timestamp"),
+                    "message_id": str(msg.get("_id"))
+                }
+                for msg in transcript.messages
+            ]
             
             logger.info(f"Formatted {len(history)} messages for conversation history (conversation: {conversation_id})")
             
@@ -198,32 +169,89 @@ class ConversationMemoryService:
             logger.error(f"Error creating conversation summary: {str(e)}")
             return ""
     
+    async def append_message(
+        self,
+        conversation_id: str,
+        role: str,
+        content: str,
+        message_id: Optional[str] = None
+    ):
+        """
+        Append a single message to conversation memory (O(1)).
+        
+        Args:
+            conversation_id: Conversation identifier
+            role: "user" or "assistant"
+            content: Message text
+            message_id: Optional message identifier
+        """
+        if not content:
+            return
+        try:
+            store = await self._get_store()
+            await store.append(conversation_id, [MemoryEntry(role=role, content=content, message_id=message_id)])
+        except Exception as e:
+            logger.error(f"Error appending to conversation memory: {str(e)}")
+    
     async def add_interaction_to_memory(
         self, 
         conversation_id: str, 
         user_message: str, 
-        ai_response: str
+        ai_response: str,
+        message_id: Optional[str] = None,
+        window: Optional[List[Dict[str, Any]]] = None
     ):
         """
         Add an interaction to conversation memory.
+
+        The user message is skipped when the window already ends with it, e.g.
+        when hydration loaded the inbound message from the database.
         
         Args:
             conversation_id: Conversation identifier
             user_message: User's message
             ai_response: AI's response
+            message_id: Latest customer message of the turn
+            window: Memory window the turn was answered from (read from the store when omitted)
         """
         try:
-            memory = await self.get_conversation_memory(conversation_id)
-            
-            # Add the interaction to memory
-            memory.chat_memory.add_user_message(user_message)
-            memory.chat_memory.add_ai_message(ai_response)
+            store = await self._get_store()
+            if window is None:
+                memory = await store.get(conversation_id)
+                window = memory.history if memory else []
+
+            entries = [MemoryEntry(role="assistant", content=ai_response)]
+            last = window[-1] if window else None
+            already_stored = last is not None and last.get("role") == "user" and (
+                (message_id is not None and last.get("message_id") == message_id)
+                or last.get("content") == user_message
+            )
+            if not already_stored:
+                entries.insert(0, MemoryEntry(role="user", content=user_message, message_id=message_id))
+            await store.append(conversation_id, entries)
             
             logger.debug(f"Updated conversation memory for {conversation_id}")
             
         except Exception as e:
             logger.error(f"Error updating conversation memory: {str(e)}")
     
+    async def _hydrate(self, store, conversation_id: str):
+        """Seed a cold conversation from Mongo (once per conversation and TTL)."""
+        history = await self.load_conversation_history(conversation_id)
+        entries = [
+            MemoryEntry(
+                role=item["role"],
+                content=item["content"],
+                message_id=item.get("message_id"),
+                timestamp=item["timestamp"].isoformat() if hasattr(item.get("timestamp"), "isoformat") else item.get("timestamp"),
+            )
+            for item in history
+            if item.get("content")
+        ]
+        await store.replace(conversation_id, entries)
+        logger.info(f"🧠 [MEMORY] Hydrated conversation {conversation_id} from database ({len(entries)} messages)")
+        return await store.get(conversation_id)
+    
     async def get_conversation_context(self, conversation_id: str) -> Dict[str, Any]:
         """
         Get comprehensive conversation context.
@@ -235,40 +263,42 @@ class ConversationMemoryService:
             Context dictionary with history, summary, and session data
         """
         try:
-            # Load conversation history from database first
-            history = await self.load_conversation_history(conversation_id)
-            
-            # Get session data
-            session_data = self.get_session_data(conversation_id)
+            store = await self._get_store()
+            memory = await store.get(conversation_id)
+            if memory is None or not memory.hydrated:
+                memory = await self._hydrate(store, conversation_id)
             
-            # Create summary from loaded history
-            summary = self.create_conversation_summary(history)
+            last_activity = None
+            if memory.last_activity:
+                last_activity = datetime.fromtimestamp(memory.last_activity, tz=timezone.utc).isoformat()
             
-            # Format last_activity for JSON serialization
-            last_activity = self.last_activity.get(conversation_id)
-            if last_activity:
-                last_activity = last_activity.isoformat()
-            
-            logger.info(f"Loaded conversation context for {conversation_id}: {len(history)} messages")
+            history = memory.history
+            logger.info(
+                f"Loaded conversation context for {conversation_id}: {len(history)} messages "
+                f"({memory.window_tokens} tokens, summary: {bool(memory.summary)})"
+            )
             
             return {
                 "conversation_id": conversation_id,
                 "history": history,
-                "summary": summary,
-                "session_data": session_data,
+                "summary": memory.summary,
+                "session_data": memory.session_data,
                 "last_activity": last_activity,
-                "memory_size": len(history)
+                "memory_size": len(history),
+                "window_tokens": memory.window_tokens
             }
         except Exception as e:
             logger.error(f"Error getting conversation context for {conversation_id}: {str(e)}")
-            # Return a default context structure
+            # Store unavailable: fall back to the database window
+            history = await self.load_conversation_history(conversation_id)
             return {
                 "conversation_id": conversation_id,
-                "history": [],
-                "summary": "",
+                "history": history,
+                "summary": self.create_conversation_summary(history),
                 "session_data": {},
                 "last_activity": None,
-                "memory_size": 0
+                "memory_size": len(history),
+                "window_tokens": 0
             }
     
     async def clear_conversation_memory(self, conversation_id: str):
@@ -278,40 +308,11 @@ class ConversationMemoryService:
         Args:
             conversation_id: Conversation identifier
         """
-        if conversation_id in self.conversation_memories:
-            del self.conversation_memories[conversation_id]
-        
-        if conversation_id in self.session_data:
-            del self.session_data[conversation_id]
-        
-        if conversation_id in self.last_activity:
-            del self.last_activity[conversation_id]
+        store = await self._get_store()
+        await store.delete(conversation_id)
         
         logger.info(f"Cleared conversation memory for {conversation_id}")
     
-    async def _cleanup_expired_sessions(self):
-        """Clean up expired conversation sessions."""
-        while True:
-            try:
-                current_time = datetime.now()
-                expired_conversations = []
-                
-                for conversation_id, last_activity in self.last_activity.items():
-                    # Expire sessions after 24 hours of inactivity
-                    if current_time - last_activity > timedelta(hours=24):
-                        expired_conversations.append(conversation_id)
-                
-                for conversation_id in expired_conversations:
-                    self.clear_conversation_memory(conversation_id)
-                    logger.info(f"Cleaned up expired session for {conversation_id}")
-                
-                # Run cleanup every hour
-                await asyncio.sleep(3600)
-                
-            except Exception as e:
-                logger.error(f"Error in session cleanup: {str(e)}")
-                await asyncio.sleep(3600)  # Continue despite errors
-    
     async def get_memory_stats(self) -> Dict[str, Any]:
         """
         Get memory service statistics.
@@ -319,17 +320,12 @@ class ConversationMemoryService:
         Returns:
             Statistics dictionary
         """
+        store = await self._get_store()
         return {
-            "active_conversations": len(self.conversation_memories),
-            "total_sessions": len(self.session_data),
-            "memory_usage": {
-                conversation_id: len(memory.chat_memory.messages) if memory.chat_memory.messages else 0
-                for conversation_id, memory in self.conversation_memories.items()
-            },
-            "last_activity": {
-                conversation_id: last_activity.isoformat()
-                for conversation_id, last_activity in self.last_activity.items()
-            }
+            **store.get_stats(),
+            "window_max_tokens": ai_config.memory_window_max_tokens,
+            "summary_max_tokens": ai_config.memory_summary_max_tokens,
+            "ttl_seconds": ai_config.memory_ttl_seconds
         }
 
 
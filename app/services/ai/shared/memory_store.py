@@ -0,0 +1,401 @@
+"""
+Conversation memory stores for the AI agents.
+
+Each conversation keeps a token-bounded rolling window of recent messages plus a
+summary that absorbs messages as they fall out of the window. Appends are O(1):
+the window only grows at the tail and trimming pops from the head.
+
+Two interchangeable backends:
+- RedisMemoryStore: shared by every worker and survives restarts (list + hash per conversation, TTL)
+- InMemoryMemoryStore: process-local stand-in with LRU/TTL eviction and a hard byte ceiling
+"""
+
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+import json
+import time
+
+from redis.exceptions import WatchError
+
+from app.core.logger import logger
+from app.services.ai.shared.utils import estimate_tokens
+
+
+_SUMMARY_LINE_CHARS = 160
+_ENTRY_OVERHEAD_BYTES = 128
+_TRIM_ATTEMPTS = 5
+
+
+@dataclass
+class MemoryEntry:
+    """A single message in a conversation window."""
+
+    role: str  # "user" or "assistant"
+    content: str
+    message_id: Optional[str] = None
+    timestamp: Optional[str] = None
+    tokens: int = 0
+
+    def __post_init__(self):
+        if not self.tokens:
+            self.tokens = estimate_tokens(self.content)
+        if self.timestamp is None:
+            self.timestamp = datetime.now(timezone.utc).isoformat()
+
+    def to_history(self) -> Dict[str, Any]:
+        """History dict in the format consumed by the agents."""
+        return {
+            "role": self.role,
+            "content": self.content,
+            "timestamp": self.timestamp,
+            "message_id": self.message_id,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "MemoryEntry":
+        return cls(**json.loads(raw))
+
+
+@dataclass
+class ConversationMemory:
+    """Snapshot of a conversation's memory."""
+
+    entries: List[MemoryEntry] = field(default_factory=list)
+    summary: str = ""
+    session_data: Dict[str, Any] = field(default_factory=dict)
+    window_tokens: int = 0
+    hydrated: bool = False
+    last_activity: Optional[float] = None
+
+    @property
+    def history(self) -> List[Dict[str, Any]]:
+        return [entry.to_history() for entry in self.entries]
+
+
+def fold_into_summary(summary: str, evicted: List[MemoryEntry], max_tokens: int) -> str:
+    """
+    Merge messages leaving the window into the rolling summary.
+
+    Each evicted message becomes one clipped line; the oldest lines are dropped
+    once the summary exceeds its token budget, so the cost per fold is bounded.
+    """
+    lines = summary.splitlines() if summary else []
+    for entry in evicted:
+        speaker = "Customer" if entry.role == "user" else "Assistant"
+        content = " ".join(entry.content.split())
+        if len(content) > _SUMMARY_LINE_CHARS:
+            content = content[:_SUMMARY_LINE_CHARS] + "..."
+        lines.append(f"{speaker}: {content}")
+
+    total = sum(estimate_tokens(line) for line in lines)
+    while lines and total > max_tokens:
+        total -= estimate_tokens(lines.pop(0))
+    return "\n".join(lines)
+
+
+@dataclass
+class _LocalConversation:
+    entries: Deque[MemoryEntry] = field(default_factory=deque)
+    tokens: int = 0
+    summary: str = ""
+    session_data: Dict[str, Any] = field(default_factory=dict)
+    hydrated: bool = False
+    last_activity: float = field(default_factory=time.time)
+    size_bytes: int = 0
+
+
+class InMemoryMemoryStore:
+    """Process-local memory store with LRU/TTL eviction and a byte ceiling."""
+
+    backend = "memory"
+
+    def __init__(self, window_max_tokens: int, summary_max_tokens: int, ttl_seconds: int, max_bytes: int):
+        self.window_max_tokens = window_max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        # Least recently used first
+        self._conversations: "OrderedDict[str, _LocalConversation]" = OrderedDict()
+        self._total_bytes = 0
+        self._stats = {"appends": 0, "trimmed_messages": 0, "lru_evictions": 0, "ttl_evictions": 0}
+
+    @staticmethod
+    def _entry_bytes(entry: MemoryEntry) -> int:
+        return len(entry.content) + _ENTRY_OVERHEAD_BYTES
+
+    def _touch(self, conversation_id: str) -> Optional[_LocalConversation]:
+        self._expire()
+        state = self._conversations.get(conversation_id)
+        if state is not None:
+            state.last_activity = time.time()
+            self._conversations.move_to_end(conversation_id)
+        return state
+
+    def _expire(self) -> None:
+        """Drop idle conversations; the LRU head is always the oldest."""
+        cutoff = time.time() - self.ttl_seconds
+        while self._conversations:
+            conversation_id, state = next(iter(self._conversations.items()))
+            if state.last_activity >= cutoff:
+                break
+            self._remove(conversation_id)
+            self._stats["ttl_evictions"] += 1
+
+    def _remove(self, conversation_id: str) -> None:
+        state = self._conversations.pop(conversation_id, None)
+        if state is not None:
+            self._total_bytes -= state.size_bytes
+
+    def _enforce_ceiling(self, keep: str) -> None:
+        while self._total_bytes > self.max_bytes and len(self._conversations) > 1:
+            conversation_id = next(iter(self._conversations))
+            if conversation_id == keep:
+                self._conversations.move_to_end(keep)
+                continue
+            self._remove(conversation_id)
+            self._stats["lru_evictions"] += 1
+
+    def _resize(self, state: _LocalConversation, size_bytes: int) -> None:
+        self._total_bytes += size_bytes - state.size_bytes
+        state.size_bytes = size_bytes
+
+    def _trim(self, state: _LocalConversation) -> None:
+        evicted: List[MemoryEntry] = []
+        size_delta = 0
+        while state.tokens > self.window_max_tokens and len(state.entries) > 1:
+            entry = state.entries.popleft()
+            state.tokens -= entry.tokens
+            size_delta -= self._entry_bytes(entry)
+            evicted.append(entry)
+
+        if evicted:
+            old_summary_bytes = len(state.summary)
+            state.summary = fold_into_summary(state.summary, evicted, self.summary_max_tokens)
+            size_delta += len(state.summary) - old_summary_bytes
+            self._resize(state, state.size_bytes + size_delta)
+            self._stats["trimmed_messages"] += len(evicted)
+
+    async def append(self, conversation_id: str, entries: List[MemoryEntry]) -> None:
+        state = self._touch(conversation_id)
+        if state is None:
+            state = _LocalConversation()
+            self._conversations[conversation_id] = state
+
+        added_bytes = 0
+        for entry in entries:
+            state.entries.append(entry)
+            state.tokens += entry.tokens
+            added_bytes += self._entry_bytes(entry)
+        self._resize(state, state.size_bytes + added_bytes)
+        self._stats["appends"] += len(entries)
+
+        self._trim(state)
+        self._enforce_ceiling(keep=conversation_id)
+
+    async def replace(self, conversation_id: str, entries: List[MemoryEntry]) -> None:
+        previous = self._touch(conversation_id)
+        self._remove(conversation_id)
+
+        state = _LocalConversation(session_data=previous.session_data if previous else {}, hydrated=True)
+        self._conversations[conversation_id] = state
+        await self.append(conversation_id, entries)
+
+    async def get(self, conversation_id: str) -> Optional[ConversationMemory]:
+        state = self._touch(conversation_id)
+        if state is None:
+            return None
+        return ConversationMemory(
+            entries=list(state.entries),
+            summary=state.summary,
+            session_data=dict(state.session_data),
+            window_tokens=state.tokens,
+            hydrated=state.hydrated,
+            last_activity=state.last_activity,
+        )
+
+    async def update_session(self, conversation_id: str, data: Dict[str, Any]) -> None:
+        state = self._touch(conversation_id)
+        if state is None:
+            state = _LocalConversation()
+            self._conversations[conversation_id] = state
+        state.session_data.update(data)
+
+    async def delete(self, conversation_id: str) -> None:
+        self._remove(conversation_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "conversations": len(self._conversations),
+            "total_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            **self._stats,
+        }
+
+
+class RedisMemoryStore:
+    """Redis-backed memory store shared by all workers."""
+
+    backend = "redis"
+    KEY_PREFIX = "ai:mem"
+
+    def __init__(self, redis_client, window_max_tokens: int, summary_max_tokens: int, ttl_seconds: int):
+        """
+        Args:
+            redis_client: redis.asyncio client created with ``decode_responses=True``
+        """
+        self.redis = redis_client
+        self.window_max_tokens = window_max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.ttl_seconds = ttl_seconds
+        self._stats = {"appends": 0, "trimmed_messages": 0, "trim_retries": 0}
+
+    def _window_key(self, conversation_id: str) -> str:
+        return f"{self.KEY_PREFIX}:{conversation_id}:win"
+
+    def _meta_key(self, conversation_id: str) -> str:
+        return f"{self.KEY_PREFIX}:{conversation_id}:meta"
+
+    async def append(self, conversation_id: str, entries: List[MemoryEntry]) -> None:
+        if not entries:
+            return
+        window_key = self._window_key(conversation_id)
+        meta_key = self._meta_key(conversation_id)
+
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.rpush(window_key, *[entry.to_json() for entry in entries])
+        pipe.hincrby(meta_key, "tokens", sum(entry.tokens for entry in entries))
+        pipe.hset(meta_key, "last_activity", time.time())
+        pipe.expire(window_key, self.ttl_seconds)
+        pipe.expire(meta_key, self.ttl_seconds)
+        _, tokens, *_ = await pipe.execute()
+        self._stats["appends"] += len(entries)
+
+        if int(tokens) > self.window_max_tokens:
+            await self._trim(conversation_id)
+
+    async def _trim(self, conversation_id: str) -> None:
+        """
+        Move the oldest messages into the summary until the window fits its budget.
+
+        The read-evict-write runs under WATCH on the window and meta keys, so a
+        concurrent append or trim of the same conversation makes this attempt
+        retry on fresh data instead of evicting the same head twice.
+        """
+        window_key = self._window_key(conversation_id)
+        meta_key = self._meta_key(conversation_id)
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for _ in range(_TRIM_ATTEMPTS):
+                try:
+                    await pipe.watch(window_key, meta_key)
+                    tokens = int(await pipe.hget(meta_key, "tokens") or 0)
+                    head = await pipe.lrange(window_key, 0, 63) if tokens > self.window_max_tokens else []
+
+                    evicted: List[MemoryEntry] = []
+                    # Always keep at least the newest message
+                    for raw in head[:-1] if len(head) > 1 else []:
+                        if tokens <= self.window_max_tokens:
+                            break
+                        entry = MemoryEntry.from_json(raw)
+                        evicted.append(entry)
+                        tokens -= entry.tokens
+
+                    if not evicted:
+                        await pipe.reset()
+                        return
+
+                    summary = await pipe.hget(meta_key, "summary") or ""
+                    summary = fold_into_summary(summary, evicted, self.summary_max_tokens)
+
+                    pipe.multi()
+                    pipe.ltrim(window_key, len(evicted), -1)
+                    pipe.hincrby(meta_key, "tokens", -sum(entry.tokens for entry in evicted))
+                    pipe.hset(meta_key, "summary", summary)
+                    await pipe.execute()
+                    self._stats["trimmed_messages"] += len(evicted)
+                    return
+                except WatchError:
+                    self._stats["trim_retries"] += 1
+
+        logger.warning(f"⚠️ [MEMORY] Window trim of conversation {conversation_id} kept conflicting; retrying on next append")
+
+    async def replace(self, conversation_id: str, entries: List[MemoryEntry]) -> None:
+        window_key = self._window_key(conversation_id)
+        meta_key = self._meta_key(conversation_id)
+
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(window_key)
+        pipe.hset(meta_key, mapping={"tokens": 0, "summary": "", "hydrated": 1, "last_activity": time.time()})
+        pipe.expire(meta_key, self.ttl_seconds)
+        await pipe.execute()
+        await self.append(conversation_id, entries)
+
+    async def get(self, conversation_id: str) -> Optional[ConversationMemory]:
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.lrange(self._window_key(conversation_id), 0, -1)
+        pipe.hgetall(self._meta_key(conversation_id))
+        raw_entries, meta = await pipe.execute()
+        if not meta and not raw_entries:
+            return None
+
+        return ConversationMemory(
+            entries=[MemoryEntry.from_json(raw) for raw in raw_entries],
+            summary=meta.get("summary", ""),
+            session_data=json.loads(meta["session"]) if meta.get("session") else {},
+            window_tokens=int(meta.get("tokens", 0)),
+            hydrated=meta.get("hydrated") == "1",
+            last_activity=float(meta["last_activity"]) if meta.get("last_activity") else None,
+        )
+
+    async def update_session(self, conversation_id: str, data: Dict[str, Any]) -> None:
+        meta_key = self._meta_key(conversation_id)
+        raw = await self.redis.hget(meta_key, "session")
+        session = json.loads(raw) if raw else {}
+        session.update(data)
+
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(meta_key, "session", json.dumps(session, default=str))
+        pipe.expire(meta_key, self.ttl_seconds)
+        await pipe.execute()
+
+    async def delete(self, conversation_id: str) -> None:
+        await self.redis.delete(self._window_key(conversation_id), self._meta_key(conversation_id))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend, **self._stats}
+
+
+async def create_memory_store(backend: str, **limits: Any):
+    """
+    Build the configured memory store, falling back to the in-memory stand-in
+    when Redis is unavailable.
+
+    Args:
+        backend: "redis" or "memory"
+        limits: window_max_tokens, summary_max_tokens, ttl_seconds, max_bytes
+    """
+    local_store = InMemoryMemoryStore(**limits)
+    if backend != "redis":
+        return local_store
+
+    try:
+        from app.services.cache.redis_service import redis_service
+
+        await redis_service.connect()
+        logger.info("🧠 [MEMORY] Using Redis conversation memory store")
+        return RedisMemoryStore(
+            redis_service.redis,
+            window_max_tokens=limits["window_max_tokens"],
+            summary_max_tokens=limits["summary_max_tokens"],
+            ttl_seconds=limits["ttl_seconds"],
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ [MEMORY] Redis unavailable, using in-memory conversation store: {str(e)}")
+        return local_store
@@ -1,50 +1,160 @@
 """
 Shared AI models for all services and agents.
 Centralized model creation to avoid circular imports.
+
+Chat and embedding clients are pooled per process: the first call for a given
+configuration builds the client (and its HTTP connection pool) and every later
+call reuses it. LangChain OpenAI clients are safe to share across concurrent
+conversations, so agents should always go through these getters instead of
+instantiating ``ChatOpenAI`` directly.
+
+Chat models are handed out wrapped for the LLM gateway (``llm_gateway``): the
+caller name and priority class given here decide which concurrency and token
+budget the calls count against and how they are accounted.
 """
 
 from __future__ import annotations
-from typing import Optional
+import threading
+from typing import Optional, Dict, Tuple, Any
+from langchain_core.language_models import BaseChatModel
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from app.services.ai.config import ai_config
+from app.services.ai.shared.llm_gateway import GatewayChatModel, LocalFakeChatModel
 from app.core.logger import logger
 
 
-def get_chat_model(model_name: Optional[str] = None) -> ChatOpenAI:
-    """Devuelve modelo de chat configurado con timeouts y reintentos seguros."""
-    try:
-        model = model_name or ai_config.openai_model
-        logger.info(f"🤖 [MODELS] Creating chat model: {model}")
-        
-        chat_model = ChatOpenAI(
-            model=model,
-            api_key=ai_config.openai_api_key,
-            temperature=0.2,
-            timeout=ai_config.timeout_seconds,
-            max_retries=ai_config.max_retries,
-        )
-        
-        logger.info(f"✅ [MODELS] Chat model created successfully: {model}")
+_DEFAULT_TEMPERATURE = 0.2
+
+_models_lock = threading.Lock()
+_chat_models: Dict[Tuple[str, float, Optional[int]], BaseChatModel] = {}
+_gateway_models: Dict[Tuple[str, float, Optional[int], str, str], GatewayChatModel] = {}
+_embedding_models: Dict[str, OpenAIEmbeddings] = {}
+
+
+def _create_provider_model(model: str, temperature: float, max_tokens: Optional[int]) -> BaseChatModel:
+    if ai_config.llm_gateway_provider == "fake":
+        return LocalFakeChatModel(model_name=model, latency_ms=ai_config.llm_gateway_fake_latency_ms)
+    return ChatOpenAI(
+        model=model,
+        api_key=ai_config.openai_api_key,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        timeout=ai_config.timeout_seconds,
+        max_retries=ai_config.max_retries,
+    )
+
+
+def _get_provider_model(model: str, temperature: float, max_tokens: Optional[int]) -> BaseChatModel:
+    key = (model, float(temperature), max_tokens)
+
+    chat_model = _chat_models.get(key)
+    if chat_model is not None:
         return chat_model
-        
-    except Exception as e:
-        logger.error(f"❌ [MODELS] Failed to create chat model: {str(e)}")
-        raise
+
+    with _models_lock:
+        chat_model = _chat_models.get(key)
+        if chat_model is not None:
+            return chat_model
+
+        try:
+            logger.info(f"🤖 [MODELS] Creating pooled chat model: {model} (temperature: {temperature})")
+
+            chat_model = _create_provider_model(model, temperature, max_tokens)
+            _chat_models[key] = chat_model
+
+            logger.info(f"✅ [MODELS] Chat model created successfully: {model}")
+            return chat_model
+
+        except Exception as e:
+            logger.error(f"❌ [MODELS] Failed to create chat model: {str(e)}")
+            raise
+
+
+def get_chat_model(
+    model_name: Optional[str] = None,
+    temperature: float = _DEFAULT_TEMPERATURE,
+    caller: str = "default",
+    priority: str = "reply",
+    max_tokens: Optional[int] = None
+) -> BaseChatModel:
+    """
+    Devuelve modelo de chat configurado con timeouts y reintentos seguros (compartido por proceso).
+
+    Args:
+        model_name: Provider model (defaults to ``openai_model``)
+        temperature: Sampling temperature
+        caller: Name the calls are accounted under in the LLM gateway
+        priority: Gateway priority class: "reply", "assist" or "background"
+        max_tokens: Completion token cap
+
+    Returns:
+        The pooled provider model, wrapped for the LLM gateway when it is enabled
+    """
+    model = model_name or ai_config.openai_model
+    provider = _get_provider_model(model, temperature, max_tokens)
+    if not ai_config.llm_gateway_enabled:
+        return provider
+
+    key = (model, float(temperature), max_tokens, caller, priority)
+    chat_model = _gateway_models.get(key)
+    if chat_model is None:
+        with _models_lock:
+            chat_model = _gateway_models.get(key)
+            if chat_model is None:
+                chat_model = GatewayChatModel(provider=provider, caller=caller, priority=priority)
+                _gateway_models[key] = chat_model
+    return chat_model
 
 
 def get_embedding_model() -> OpenAIEmbeddings:
-    """Devuelve el modelo de embeddings denso conforme a configuración."""
-    try:
-        logger.info(f"🔤 [MODELS] Creating embedding model: {ai_config.openai_embedding_model}")
-        
-        embedding_model = OpenAIEmbeddings(
-            model=ai_config.openai_embedding_model,
-            api_key=ai_config.openai_api_key
-        )
-        
-        logger.info(f"✅ [MODELS] Embedding model created successfully: {ai_config.openai_embedding_model}")
+    """Devuelve el modelo de embeddings denso conforme a configuración (compartido por proceso)."""
+    model = ai_config.openai_embedding_model
+
+    embedding_model = _embedding_models.get(model)
+    if embedding_model is not None:
         return embedding_model
-        
-    except Exception as e:
-        logger.error(f"❌ [MODELS] Failed to create embedding model: {str(e)}")
-        raise
+
+    with _models_lock:
+        embedding_model = _embedding_models.get(model)
+        if embedding_model is not None:
+            return embedding_model
+
+        try:
+            logger.info(f"🔤 [MODELS] Creating pooled embedding model: {model}")
+
+            embedding_model = OpenAIEmbeddings(
+                model=model,
+                api_key=ai_config.openai_api_key
+            )
+            _embedding_models[model] = embedding_model
+
+            logger.info(f"✅ [MODELS] Embedding model created successfully: {model}")
+            return embedding_model
+
+        except Exception as e:
+            logger.error(f"❌ [MODELS] Failed to create embedding model: {str(e)}")
+            raise
+
+
+def warm_up_models() -> None:
+    """Create the default chat and embedding clients ahead of the first request."""
+    get_chat_model()
+    get_embedding_model()
+
+
+def reset_model_pool() -> None:
+    """Drop every pooled client (used by tests and after credential rotation)."""
+    with _models_lock:
+        _chat_models.clear()
+        _gateway_models.clear()
+        _embedding_models.clear()
+    logger.info("🔄 [MODELS] Model pool reset")
+
+
+def get_model_pool_stats() -> Dict[str, Any]:
+    """Get pooled model statistics."""
+    return {
+        "chat_models": [f"{name}@{temperature}" for name, temperature, _ in _chat_models],
+        "gateway_callers": sorted({f"{caller}:{priority}" for *_, caller, priority in _gateway_models}),
+        "embedding_models": list(_embedding_models),
+    }
@@ -0,0 +1,160 @@
+"""
+Parallel MultiQuery retrieval with reciprocal-rank fusion and early exit.
+
+LangChain's ``MultiQueryRetriever`` waits for the LLM, then for every variant
+search, before returning anything. This retriever instead:
+
+- searches the original query immediately, while the LLM writes the variants
+- launches each variant search as soon as the variants arrive
+- folds every result list into a reciprocal-rank-fusion ranking as it lands
+- stops once ``k`` unique chunks above ``min_score`` are collected, or when the
+  latency budget is spent, cancelling whatever is still in flight
+
+Used through the connection pool by ``adn_retrieve``, which both the WhatsApp
+agent and the writer agent call.
+"""
+
+from copy import deepcopy
+from typing import Any, Dict, List, Set
+import asyncio
+import hashlib
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from app.core.logger import logger
+
+
+MULTI_QUERY_PROMPT = PromptTemplate.from_template(
+    "You are an AI language model assistant. Your task is to generate {breadth} "
+    "different versions of the given user question to retrieve relevant documents "
+    "from a vector database. By generating multiple perspectives on the user question, "
+    "your goal is to help the user overcome some of the limitations of distance-based "
+    "similarity search. Provide these alternative questions separated by newlines. "
+    "Original question: {question}"
+)
+
+
+def _doc_key(doc: Document) -> Any:
+    point_id = doc.metadata.get("_id")
+    if point_id is not None:
+        return point_id
+    return hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+
+
+class ParallelMultiQueryRetriever(BaseRetriever):
+    """Concurrent MultiQuery fan-out merged with reciprocal-rank fusion."""
+
+    retriever: Any
+    """Base retriever exposing ``asearch(query)`` (``AsyncQdrantRetriever``)."""
+    llm: Any
+    breadth: int = 3
+    k: int = 12
+    budget_ms: float = 2000.0
+    min_score: float = 0.45
+    rrf_k: int = 60
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    async def agenerate_queries(self, query: str) -> List[str]:
+        """Ask the LLM for up to ``breadth`` distinct rewrites of the query."""
+        chain = MULTI_QUERY_PROMPT.partial(breadth=str(self.breadth)) | self.llm | StrOutputParser()
+        text = await chain.ainvoke({"question": query})
+
+        seen = {query.strip().lower()}
+        variants = []
+        for line in text.splitlines():
+            variant = line.strip().lstrip("-*•0123456789.) ").strip()
+            if variant and variant.lower() not in seen:
+                seen.add(variant.lower())
+                variants.append(variant)
+        return variants[:self.breadth]
+
+    def _fuse(self, results: List[Document], fused: Dict[Any, float], docs: Dict[Any, Document]) -> None:
+        for rank, doc in enumerate(results):
+            key = _doc_key(doc)
+            fused[key] = fused.get(key, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+            current = docs.get(key)
+            if current is None or (doc.metadata.get("_score") or 0.0) > (current.metadata.get("_score") or 0.0):
+                docs[key] = doc
+
+    def _enough(self, docs: Dict[Any, Document]) -> bool:
+        strong = sum(1 for doc in docs.values() if (doc.metadata.get("_score") or 0.0) >= self.min_score)
+        return strong >= self.k
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.budget_ms / 1000
+        fused: Dict[Any, float] = {}
+        docs: Dict[Any, Document] = {}
+
+        original = asyncio.create_task(self.retriever.asearch(query))
+        expansion = asyncio.create_task(self.agenerate_queries(query))
+        pending: Set[asyncio.Task] = {original, expansion}
+        searches, exit_reason = 1, "complete"
+
+        try:
+            while pending:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    exit_reason = "budget"
+                    break
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    if task is expansion:
+                        try:
+                            variants = task.result()
+                        except Exception as e:
+                            logger.warning(f"⚠️ [MULTIQUERY] Query expansion failed, using the original query: {str(e)}")
+                            continue
+                        pending.update(asyncio.create_task(self.retriever.asearch(variant)) for variant in variants)
+                        searches += len(variants)
+                        continue
+
+                    if task is original:
+                        results = task.result()  # The original query's failure is the retrieval's failure
+                    else:
+                        try:
+                            results = task.result()
+                        except Exception as e:
+                            logger.warning(f"⚠️ [MULTIQUERY] Variant search failed: {str(e)}")
+                            continue
+                    self._fuse(results, fused, docs)
+
+                if pending and self._enough(docs):
+                    exit_reason = "enough"
+                    break
+
+            if not docs and not original.done():
+                # Budget spent before any search returned: the original query is still the answer
+                pending.discard(original)
+                self._fuse(await original, fused, docs)
+        finally:
+            for task in pending:
+                task.cancel()
+
+        ranked = sorted(fused, key=fused.get, reverse=True)[:self.k]
+        logger.info(
+            f"🔀 [MULTIQUERY] {len(docs)} unique chunks from {searches} searches "
+            f"({exit_reason}, {len(pending)} cancelled)"
+        )
+
+        selected = []
+        for key in ranked:
+            doc = docs[key]
+            metadata = deepcopy(doc.metadata)
+            metadata["rrf_score"] = round(fused[key], 6)
+            selected.append(Document(page_content=doc.page_content, metadata=metadata))
+        return selected
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        raise RuntimeError("ParallelMultiQueryRetriever is async only; use ainvoke()")
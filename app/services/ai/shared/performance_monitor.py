@@ -8,7 +8,7 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from collections import defaultdict, deque
-from threading import Lock
+from threading import RLock
 
 from app.core.logger import logger
 
@@ -22,6 +22,8 @@ class RetrievalMetrics:
     cache_hit: bool
     documents_found: int
     error: Optional[str] = None
+    top_score: Optional[float] = None  # Best dense similarity among returned documents
+    timed_out: bool = False
     timestamp: datetime = field(default_factory=datetime.now)
     
     def to_dict(self) -> Dict[str, Any]:
@@ -33,6 +35,8 @@ class RetrievalMetrics:
             "cache_hit": self.cache_hit,
             "documents_found": self.documents_found,
             "error": self.error,
+            "top_score": self.top_score,
+            "timed_out": self.timed_out,
             "timestamp": self.timestamp.isoformat(),
             "success": self.error is None
         }
@@ -48,7 +52,8 @@ class PerformanceMonitor:
         self.strategy_stats: Dict[str, List[float]] = defaultdict(list)
         self.error_counts: Dict[str, int] = defaultdict(int)
         self.cache_stats = {"hits": 0, "misses": 0}
-        self._lock = Lock()
+        self.embedding_cache_stats = {"memory_hits": 0, "redis_hits": 0, "misses": 0}
+        self._lock = RLock()
         
         logger.info(f"🔍 [MONITOR] Performance monitor initialized (max_history: {max_history})")
     
@@ -84,6 +89,24 @@ class PerformanceMonitor:
         else:
             logger.debug(f"✅ [MONITOR] Retrieval: {metrics.total_time_ms:.0f}ms (strategy: {metrics.strategy}, docs: {metrics.documents_found})")
     
+    def record_embedding_lookup(self, memory_hits: int, redis_hits: int, misses: int) -> None:
+        """Record query embedding cache lookups (in-process hits, Redis hits, model calls)."""
+        with self._lock:
+            self.embedding_cache_stats["memory_hits"] += memory_hits
+            self.embedding_cache_stats["redis_hits"] += redis_hits
+            self.embedding_cache_stats["misses"] += misses
+    
+    def get_embedding_cache_stats(self) -> Dict[str, Any]:
+        """Get query embedding cache hit rates."""
+        with self._lock:
+            stats = dict(self.embedding_cache_stats)
+        
+        hits = stats["memory_hits"] + stats["redis_hits"]
+        lookups = hits + stats["misses"]
+        stats["lookups"] = lookups
+        stats["hit_rate_percent"] = round(hits / lookups * 100, 2) if lookups else 0.0
+        return stats
+    
     def get_performance_stats(self, last_minutes: int = 30) -> Dict[str, Any]:
         """Get performance statistics for the last N minutes."""
         with self._lock:
@@ -94,7 +117,11 @@ class PerformanceMonitor:
             ]
             
             if not recent_metrics:
-                return {"period_minutes": last_minutes, "total_queries": 0}
+                return {
+                    "period_minutes": last_minutes,
+                    "total_queries": 0,
+                    "embedding_cache": self.get_embedding_cache_stats(),
+                }
             
             # Calculate basic stats
             total_queries = len(recent_metrics)
@@ -120,6 +147,13 @@ class PerformanceMonitor:
             cache_hits = sum(1 for m in recent_metrics if m.cache_hit)
             cache_hit_rate = (cache_hits / total_queries * 100) if total_queries > 0 else 0
             
+            strategy_cache = defaultdict(lambda: {"hits": 0, "queries": 0})
+            for m in recent_metrics:
+                strategy_cache[m.strategy]["queries"] += 1
+                strategy_cache[m.strategy]["hits"] += int(m.cache_hit)
+            for counts in strategy_cache.values():
+                counts["hit_rate_percent"] = round(counts["hits"] / counts["queries"] * 100, 2)
+            
             # Error breakdown
             error_breakdown = defaultdict(int)
             for m in failed_queries:
@@ -140,12 +174,51 @@ class PerformanceMonitor:
                 "cache_performance": {
                     "hit_rate_percent": round(cache_hit_rate, 2),
                     "hits": cache_hits,
-                    "misses": total_queries - cache_hits
+                    "misses": total_queries - cache_hits,
+                    "by_strategy": dict(strategy_cache)
                 },
+                "embedding_cache": self.get_embedding_cache_stats(),
                 "strategy_breakdown": dict(strategy_breakdown),
                 "error_breakdown": dict(error_breakdown)
             }
     
+    def get_strategy_window(
+        self,
+        strategy: str,
+        window_seconds: float = 300,
+        low_score_threshold: float = 0.35,
+    ) -> Dict[str, Any]:
+        """
+        Rolling statistics of uncached retrievals for one strategy.
+        
+        Args:
+            strategy: Strategy (retrieval tier) name
+            window_seconds: How far back to look
+            low_score_threshold: Best-match similarity under which a retrieval counts as weak
+            
+        Returns:
+            Dict with sample count, latency percentiles, error, timeout and weak-match rates
+        """
+        with self._lock:
+            cutoff_time = datetime.now() - timedelta(seconds=window_seconds)
+            samples = [
+                m for m in self.metrics_history
+                if m.strategy == strategy and not m.cache_hit and m.timestamp >= cutoff_time
+            ]
+        
+        successful = [m for m in samples if m.error is None]
+        times = sorted(m.total_time_ms for m in successful)
+        scored = [m.top_score for m in successful if m.top_score is not None]
+        count = len(samples)
+        return {
+            "samples": count,
+            "p50_ms": round(times[len(times) // 2], 2) if times else 0.0,
+            "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))], 2) if times else 0.0,
+            "error_rate": round((count - len(successful)) / count, 4) if count else 0.0,
+            "timeout_rate": round(sum(m.timed_out for m in samples) / count, 4) if count else 0.0,
+            "low_score_rate": round(sum(score < low_score_threshold for score in scored) / len(scored), 4) if scored else 0.0,
+        }
+    
     def get_strategy_comparison(self) -> Dict[str, Dict[str, float]]:
         """Compare performance across strategies."""
         with self._lock:
@@ -169,6 +242,7 @@ class PerformanceMonitor:
             self.strategy_stats.clear()
             self.error_counts.clear()
             self.cache_stats = {"hits": 0, "misses": 0}
+            self.embedding_cache_stats = {"memory_hits": 0, "redis_hits": 0, "misses": 0}
         
         logger.info("🔄 [MONITOR] Performance statistics reset")
     
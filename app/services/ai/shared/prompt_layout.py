@@ -0,0 +1,224 @@
+"""
+Prompt layout shared by the AI agents: static prefix first, dynamic data last.
+
+Providers cache prompt prefixes (OpenAI: prompts of 1024+ tokens, reused in
+128-token increments), but only when the first tokens of a request are
+byte-identical to an earlier one. Agent prompts are therefore assembled as
+
+1. a static prefix: the long instructions, rendered once per agent and prompt
+   version and memoized (static variables such as the emoji list are filled in
+   at render time)
+2. a dynamic suffix: per-request data (date, flow state, transcript, query),
+   ordered from least to most volatile
+
+Prompt files mark the split with ``DYNAMIC_MARKER``. Bump an agent's prompt
+version whenever its static text changes.
+
+The LLM gateway calls ``observe`` for every provider call, which reports per
+caller the prompt tokens per request, how many leading tokens matched the
+caller's previous request (cache-eligible once past the provider minimum) and
+the cached tokens the provider reports.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+import hashlib
+import json
+import threading
+
+from langchain_core.messages import BaseMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+from app.core.logger import logger
+from app.services.ai.shared.utils import estimate_tokens
+
+
+DYNAMIC_MARKER = "<!-- dynamic -->"
+PREFIX_CACHE_MIN_TOKENS = 1024
+PREFIX_CACHE_INCREMENT = 128
+
+
+def cache_eligible_tokens(prefix_tokens: int) -> int:
+    """Tokens of a stable prefix the provider can serve from its cache."""
+    if prefix_tokens < PREFIX_CACHE_MIN_TOKENS:
+        return 0
+    return prefix_tokens - (prefix_tokens - PREFIX_CACHE_MIN_TOKENS) % PREFIX_CACHE_INCREMENT
+
+
+def escape_template(text: str) -> str:
+    """Escape rendered text for use as a literal in a ChatPromptTemplate."""
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def split_template(template: str) -> Tuple[str, str]:
+    """
+    Split a prompt template at ``DYNAMIC_MARKER``.
+
+    Args:
+        template: Prompt text with the static part first
+
+    Returns:
+        (static, dynamic) parts; everything is dynamic when the marker is missing
+    """
+    static, marker, dynamic = template.partition(DYNAMIC_MARKER)
+    if not marker:
+        return "", template.strip()
+    return static.strip(), dynamic.strip()
+
+
+def _prompt_text(messages: Sequence[BaseMessage]) -> str:
+    parts = []
+    for message in messages:
+        content = message.content if isinstance(message.content, str) else json.dumps(message.content, sort_keys=True)
+        parts.append(f"{message.type}:{content}")
+    return "\n".join(parts)
+
+
+def _common_prefix_length(first: str, second: str) -> int:
+    """Length of the common prefix (binary search over C-level slice comparisons)."""
+    low, high = 0, min(len(first), len(second))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if first[:middle] == second[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+@dataclass(frozen=True)
+class StaticPrefix:
+    """Rendered static part of an agent prompt."""
+
+    agent: str
+    version: str
+    text: str
+    tokens: int
+    digest: str
+
+
+class PromptLayout:
+    """Memoized static prompt prefixes and per-caller prefix stability statistics."""
+
+    def __init__(self):
+        self._prefixes: Dict[Tuple[str, str], StaticPrefix] = {}
+        self._lock = threading.Lock()
+        self._last_prompts: Dict[str, str] = {}
+        self._callers: Dict[str, Dict[str, int]] = {}
+
+    def static_prefix(self, agent: str, version: str, render: Callable[[], str]) -> StaticPrefix:
+        """
+        Get the static prefix of an agent prompt, rendering it on first use.
+
+        Args:
+            agent: Agent (or agent mode) the prompt belongs to
+            version: Prompt version; bump it when the static text changes
+            render: Builds the static text
+
+        Returns:
+            The memoized StaticPrefix
+        """
+        key = (agent, version)
+        prefix = self._prefixes.get(key)
+        if prefix is not None:
+            return prefix
+
+        with self._lock:
+            prefix = self._prefixes.get(key)
+            if prefix is None:
+                text = render()
+                prefix = StaticPrefix(
+                    agent=agent,
+                    version=version,
+                    text=text,
+                    tokens=estimate_tokens(text),
+                    digest=hashlib.sha256(text.encode("utf-8")).hexdigest()[:12],
+                )
+                self._prefixes[key] = prefix
+                logger.info(f"🧱 [PROMPTS] Rendered static prefix {agent}@{version}: ~{prefix.tokens} tokens ({prefix.digest})")
+        return prefix
+
+    def chat_prompt(
+        self,
+        agent: str,
+        version: str,
+        static_template: str,
+        dynamic_template: str,
+        **static_vars: Any
+    ) -> ChatPromptTemplate:
+        """
+        Build a chat prompt whose system message is the memoized static prefix.
+
+        Args:
+            agent: Agent (or agent mode) the prompt belongs to
+            version: Prompt version; bump it when the static text changes
+            static_template: Instructions, formatted once with ``static_vars``
+            dynamic_template: Per-request template (human message)
+            **static_vars: Variables of the static part
+
+        Returns:
+            ChatPromptTemplate of [system: static prefix, human: dynamic suffix]
+        """
+        prefix = self.static_prefix(agent, version, lambda: static_template.format(**static_vars))
+        messages: List[Tuple[str, str]] = []
+        if prefix.text:
+            messages.append(("system", escape_template(prefix.text)))
+        messages.append(("human", dynamic_template))
+        return ChatPromptTemplate.from_messages(messages)
+
+    def observe(self, caller: str, messages: Sequence[BaseMessage], cached_tokens: int = 0) -> None:
+        """
+        Record one provider request for prefix stability statistics.
+
+        Args:
+            caller: Gateway caller name
+            messages: Prompt messages sent to the provider
+            cached_tokens: Input tokens the provider served from its prompt cache
+        """
+        text = _prompt_text(messages)
+        previous = self._last_prompts.get(caller)
+        self._last_prompts[caller] = text
+        stable_tokens = estimate_tokens(text[:_common_prefix_length(previous, text)]) if previous else 0
+
+        stats = self._callers.setdefault(caller, {
+            "requests": 0,
+            "prompt_tokens": 0,
+            "stable_prefix_tokens": 0,
+            "cache_eligible_tokens": 0,
+            "provider_cached_tokens": 0,
+        })
+        stats["requests"] += 1
+        stats["prompt_tokens"] += estimate_tokens(text)
+        stats["stable_prefix_tokens"] += stable_tokens
+        stats["cache_eligible_tokens"] += cache_eligible_tokens(stable_tokens)
+        stats["provider_cached_tokens"] += cached_tokens or 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Static prefixes and, per caller, tokens per request and cache-eligible ratios."""
+        callers = {}
+        for caller, stats in self._callers.items():
+            prompt_tokens = stats["prompt_tokens"]
+            callers[caller] = {
+                **stats,
+                "avg_prompt_tokens": round(prompt_tokens / stats["requests"], 1) if stats["requests"] else 0.0,
+                "stable_prefix_ratio": round(stats["stable_prefix_tokens"] / prompt_tokens, 3) if prompt_tokens else 0.0,
+                "cache_eligible_ratio": round(stats["cache_eligible_tokens"] / prompt_tokens, 3) if prompt_tokens else 0.0,
+                "provider_cached_ratio": round(stats["provider_cached_tokens"] / prompt_tokens, 3) if prompt_tokens else 0.0,
+            }
+        return {
+            "static_prefixes": [
+                {"agent": prefix.agent, "version": prefix.version, "tokens": prefix.tokens, "digest": prefix.digest}
+                for prefix in self._prefixes.values()
+            ],
+            "min_cacheable_tokens": PREFIX_CACHE_MIN_TOKENS,
+            "callers": callers,
+        }
+
+    def reset_stats(self) -> None:
+        """Reset per-caller statistics (memoized prefixes are kept)."""
+        self._last_prompts.clear()
+        self._callers.clear()
+
+
+# Global prompt layout instance
+prompt_layout = PromptLayout()
@@ -0,0 +1,213 @@
+"""
+Offline quality/latency benchmark for the RAG reranking stage.
+
+Replays the labelled queries in ``rag_data/benchmark_queries.jsonl`` against the
+knowledge base chunks and scores every reranker on the same candidate sets:
+hit@1, hit@3, recall@top_n and MRR against the labelled slugs, plus per-query
+latency. Runs without Qdrant; rerankers that need a remote API or a model
+download are reported as skipped when unavailable.
+
+Usage:
+    python -m app.services.ai.shared.rerank_benchmark --rerankers fusion,cross_encoder --output rerank.json
+    python -m app.services.ai.shared.rerank_benchmark --dense  # dense candidates via the embedding model
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.services.ai.config import ai_config
+from app.services.ai.shared.rerankers import RERANKERS, create_local_reranker
+from app.services.ai.shared.tools.rag.jsonl_loader import load_jsonl_documents
+from app.core.logger import logger
+
+
+RAG_DATA_DIR = Path(__file__).parent / "tools" / "rag" / "rag_data"
+DEFAULT_QUERIES = RAG_DATA_DIR / "benchmark_queries.jsonl"
+
+
+def load_benchmark_queries(path: Path = DEFAULT_QUERIES) -> List[Dict[str, Any]]:
+    """Load labelled queries ({"query", "language", "relevant": [slugs]})."""
+    with Path(path).open("r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_knowledge_base() -> List[Document]:
+    """Load the knowledge base chunks shipped in ``rag_data``."""
+    paths = sorted(str(path) for path in RAG_DATA_DIR.glob("adn_*.jsonl"))
+    return load_jsonl_documents(paths)
+
+
+def build_candidates(
+    queries: List[Dict[str, Any]],
+    documents: List[Document],
+    dense: bool = False,
+    pool_size: int = 24,
+) -> List[List[Document]]:
+    """
+    Candidate set per query, as handed to the reranker by the vector search.
+
+    Args:
+        queries: Labelled queries
+        documents: Knowledge base chunks
+        dense: Embed queries and chunks and keep the ``pool_size`` nearest chunks
+            (with ``_score`` like the live retriever); otherwise every chunk is a candidate
+        pool_size: Candidates per query in dense mode
+    """
+    if not dense:
+        return [list(documents) for _ in queries]
+
+    from app.services.ai.shared.models import get_embedding_model
+
+    embeddings = get_embedding_model()
+    doc_matrix = np.asarray(embeddings.embed_documents([doc.page_content for doc in documents]))
+    query_matrix = np.asarray(embeddings.embed_documents([item["query"] for item in queries]))
+    doc_matrix /= np.linalg.norm(doc_matrix, axis=1, keepdims=True)
+    query_matrix /= np.linalg.norm(query_matrix, axis=1, keepdims=True)
+
+    candidates = []
+    for scores in query_matrix @ doc_matrix.T:
+        nearest = np.argsort(scores)[::-1][:pool_size]
+        candidates.append([
+            Document(documents[i].page_content, metadata={**documents[i].metadata, "_score": float(scores[i])})
+            for i in nearest
+        ])
+    return candidates
+
+
+def _quality(ranked: Sequence[Document], relevant: Sequence[str]) -> Dict[str, float]:
+    slugs = [doc.metadata.get("slug") for doc in ranked]
+    relevant = set(relevant)
+    first_hit = next((rank for rank, slug in enumerate(slugs, 1) if slug in relevant), None)
+    return {
+        "hit_at_1": float(bool(slugs[:1]) and slugs[0] in relevant),
+        "hit_at_3": float(any(slug in relevant for slug in slugs[:3])),
+        "recall_at_n": len(relevant.intersection(slugs)) / len(relevant),
+        "mrr": 1.0 / first_hit if first_hit else 0.0,
+    }
+
+
+def _build_reranker(name: str, top_n: int):
+    if name == "cohere":
+        from app.services.ai.shared.async_retrieval import AsyncCohereRerank
+
+        if not ai_config.cohere_api_key:
+            raise RuntimeError("COHERE_API_KEY not configured")
+        return AsyncCohereRerank(cohere_api_key=ai_config.cohere_api_key,
+                                 model="rerank-multilingual-v3.0", top_n=top_n)
+    if name == "none":
+        return None
+    return create_local_reranker(name, top_n=top_n)
+
+
+async def benchmark_reranker(
+    name: str,
+    queries: List[Dict[str, Any]],
+    candidates: List[List[Document]],
+    top_n: int = 6,
+) -> Dict[str, Any]:
+    """
+    Rerank every query's candidates with one reranker and aggregate quality and latency.
+
+    Returns:
+        Dict with averaged quality metrics, latency percentiles and per-query rows
+    """
+    try:
+        reranker = _build_reranker(name, top_n)
+        if reranker is not None:
+            # Warm-up (model load, connection setup) is excluded from latency
+            await reranker.acompress_documents(candidates[0], queries[0]["query"])
+    except Exception as e:
+        logger.warning(f"⚠️ [BENCH] Skipping {name} reranker: {str(e)}")
+        return {"reranker": name, "skipped": str(e)}
+
+    rows = []
+    for item, docs in zip(queries, candidates):
+        start = time.perf_counter()
+        ranked = docs[:top_n] if reranker is None else await reranker.acompress_documents(docs, item["query"])
+        latency_ms = (time.perf_counter() - start) * 1000
+        rows.append({"query": item["query"], "latency_ms": round(latency_ms, 3),
+                     **_quality(list(ranked), item["relevant"])})
+
+    latencies = sorted(row["latency_ms"] for row in rows)
+    return {
+        "reranker": name,
+        "queries": len(rows),
+        "quality": {
+            metric: round(statistics.mean(row[metric] for row in rows), 4)
+            for metric in ("hit_at_1", "hit_at_3", "recall_at_n", "mrr")
+        },
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies), 3),
+            "p50": round(latencies[len(latencies) // 2], 3),
+            "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+            "max": round(latencies[-1], 3),
+        },
+        "per_query": rows,
+    }
+
+
+async def run_benchmark(
+    rerankers: Sequence[str] = ("none", "fusion", "cross_encoder", "cohere"),
+    dense: bool = False,
+    top_n: int = 6,
+    queries_path: Path = DEFAULT_QUERIES,
+) -> Dict[str, Any]:
+    """Run the benchmark for each reranker on identical candidate sets."""
+    queries = load_benchmark_queries(queries_path)
+    candidates = build_candidates(queries, load_knowledge_base(), dense=dense)
+
+    results = [await benchmark_reranker(name, queries, candidates, top_n=top_n) for name in rerankers]
+    return {
+        "candidates": "dense" if dense else "full_knowledge_base",
+        "top_n": top_n,
+        "queries": len(queries),
+        "results": results,
+    }
+
+
+async def main(argv: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Offline reranker quality/latency benchmark")
+    parser.add_argument("--rerankers", default=",".join(RERANKERS))
+    parser.add_argument("--dense", action="store_true", help="Build candidates with the embedding model")
+    parser.add_argument("--top-n", type=int, default=6)
+    parser.add_argument("--queries", default=str(DEFAULT_QUERIES))
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args(argv)
+
+    report = await run_benchmark(
+        rerankers=[name.strip() for name in args.rerankers.split(",") if name.strip()],
+        dense=args.dense,
+        top_n=args.top_n,
+        queries_path=Path(args.queries),
+    )
+
+    logger.info("=" * 80)
+    logger.info(f"🎯 [BENCH] Reranker benchmark ({report['queries']} queries, candidates: {report['candidates']})")
+    for result in report["results"]:
+        if "skipped" in result:
+            logger.info(f"  - {result['reranker']}: skipped ({result['skipped']})")
+            continue
+        quality, latency = result["quality"], result["latency_ms"]
+        logger.info(
+            f"  - {result['reranker']}: hit@1 {quality['hit_at_1']:.2f} | hit@3 {quality['hit_at_3']:.2f} | "
+            f"MRR {quality['mrr']:.2f} | p50 {latency['p50']:.1f}ms | p95 {latency['p95']:.1f}ms"
+        )
+    logger.info("=" * 80)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        logger.info(f"💾 [BENCH] Report written to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
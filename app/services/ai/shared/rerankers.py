@@ -0,0 +1,197 @@
+"""
+Pluggable reranking stage for RAG retrieval.
+
+Rerankers are LangChain document compressors, so any of them can sit behind
+``ContextualCompressionRetriever``:
+
+- "cohere": remote Cohere Rerank API (one network round trip per query)
+- "cross_encoder": local CPU cross-encoder (fastembed ONNX), batched scoring
+- "fusion": BM25 over the candidates fused with the dense retrieval score
+- "none": no reranking, the retriever order is kept
+
+Local rerankers score in a dedicated thread pool so CPU work never blocks the
+event loop and never competes with the default executor.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from typing import Any, Dict, List, Optional, Sequence
+import asyncio
+import math
+import re
+import threading
+import unicodedata
+
+from langchain_core.callbacks import Callbacks
+from langchain_core.documents import BaseDocumentCompressor, Document
+from pydantic import ConfigDict, PrivateAttr
+
+from app.core.logger import logger
+from app.services.ai.config import ai_config
+
+
+RERANKERS = ("cohere", "cross_encoder", "fusion", "none")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_rerank_executor() -> ThreadPoolExecutor:
+    """Get the thread pool shared by the local rerankers."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=ai_config.rerank_workers, thread_name_prefix="rerank"
+                )
+    return _executor
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, accent-folded word tokens."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _TOKEN_RE.findall(text)
+
+
+def _min_max(scores: Sequence[float]) -> List[float]:
+    low, high = min(scores), max(scores)
+    if high - low < 1e-12:
+        return [1.0 if high > 0 else 0.0 for _ in scores]
+    return [(score - low) / (high - low) for score in scores]
+
+
+class LocalReranker(BaseDocumentCompressor):
+    """Base class for in-process rerankers; subclasses implement batched ``score``."""
+
+    top_n: int = 6
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def score(self, query: str, documents: Sequence[Document]) -> List[float]:
+        """Relevance score for every document (higher is better)."""
+        raise NotImplementedError
+
+    def _select(self, documents: Sequence[Document], scores: List[float]) -> List[Document]:
+        ranked = sorted(range(len(documents)), key=lambda i: scores[i], reverse=True)[:self.top_n]
+        selected = []
+        for index in ranked:
+            doc = documents[index]
+            doc_copy = Document(doc.page_content, metadata=deepcopy(doc.metadata))
+            doc_copy.metadata["relevance_score"] = float(scores[index])
+            selected.append(doc_copy)
+        return selected
+
+    def compress_documents(
+        self,
+        documents: Sequence[Document],
+        query: str,
+        callbacks: Optional[Callbacks] = None,
+    ) -> Sequence[Document]:
+        if not documents:
+            return []
+        return self._select(documents, self.score(query, documents))
+
+    async def acompress_documents(
+        self,
+        documents: Sequence[Document],
+        query: str,
+        callbacks: Optional[Callbacks] = None,
+    ) -> Sequence[Document]:
+        if not documents:
+            return []
+        loop = asyncio.get_running_loop()
+        scores = await loop.run_in_executor(get_rerank_executor(), self.score, query, list(documents))
+        return self._select(documents, scores)
+
+
+class ScoreFusionReranker(LocalReranker):
+    """Fuses BM25 over the candidate set with the dense similarity from the vector search."""
+
+    dense_weight: float = 0.6
+    k1: float = 1.5
+    b: float = 0.75
+
+    def bm25(self, query: str, documents: Sequence[Document]) -> List[float]:
+        """BM25 of ``query`` against each document, with statistics from the candidates."""
+        query_terms = set(tokenize(query))
+        doc_terms = [tokenize(doc.page_content) for doc in documents]
+        avg_len = sum(len(terms) for terms in doc_terms) / len(doc_terms) or 1.0
+
+        document_frequency: Dict[str, int] = {}
+        for terms in doc_terms:
+            for term in query_terms.intersection(terms):
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+
+        scores = []
+        n_docs = len(documents)
+        for terms in doc_terms:
+            counts: Dict[str, int] = {}
+            for term in terms:
+                if term in query_terms:
+                    counts[term] = counts.get(term, 0) + 1
+            score = 0.0
+            for term, frequency in counts.items():
+                idf = math.log(1 + (n_docs - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+                norm = frequency + self.k1 * (1 - self.b + self.b * len(terms) / avg_len)
+                score += idf * frequency * (self.k1 + 1) / norm
+            scores.append(score)
+        return scores
+
+    def score(self, query: str, documents: Sequence[Document]) -> List[float]:
+        lexical = _min_max(self.bm25(query, documents))
+        dense = [doc.metadata.get("_score") for doc in documents]
+        if any(value is None for value in dense):
+            # Candidates without a vector-search score are ranked lexically
+            return lexical
+        dense = _min_max(dense)
+        return [
+            self.dense_weight * dense_score + (1 - self.dense_weight) * lexical_score
+            for dense_score, lexical_score in zip(dense, lexical)
+        ]
+
+
+class CrossEncoderReranker(LocalReranker):
+    """Local CPU cross-encoder (fastembed ONNX) scoring query/document pairs in batches."""
+
+    model_name: str = "jinaai/jina-reranker-v2-base-multilingual"
+    batch_size: int = 32
+
+    _encoder: Any = PrivateAttr(default=None)
+    _load_lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def _get_encoder(self):
+        if self._encoder is None:
+            with self._load_lock:
+                if self._encoder is None:
+                    from fastembed.rerank.cross_encoder import TextCrossEncoder
+
+                    logger.info(f"🎯 [RERANK] Loading cross-encoder: {self.model_name}")
+                    self._encoder = TextCrossEncoder(model_name=self.model_name)
+                    logger.info("✅ [RERANK] Cross-encoder loaded")
+        return self._encoder
+
+    def score(self, query: str, documents: Sequence[Document]) -> List[float]:
+        encoder = self._get_encoder()
+        return list(encoder.rerank(query, [doc.page_content for doc in documents], batch_size=self.batch_size))
+
+
+def create_local_reranker(name: str, top_n: int) -> LocalReranker:
+    """
+    Build an in-process reranker.
+
+    Args:
+        name: "cross_encoder" or "fusion"
+        top_n: Documents kept after reranking
+    """
+    if name == "cross_encoder":
+        return CrossEncoderReranker(
+            top_n=top_n,
+            model_name=ai_config.rerank_cross_encoder_model,
+            batch_size=ai_config.rerank_batch_size,
+        )
+    if name == "fusion":
+        return ScoreFusionReranker(top_n=top_n, dense_weight=ai_config.rerank_fusion_dense_weight)
+    raise ValueError(f"Unknown local reranker: {name}")
@@ -0,0 +1,295 @@
+"""
+Staged verification of agent answers (the helpfulness loop).
+
+Judging every answer with an extra LLM call doubled the latency of a reply, so
+answers now go through the cheapest stage that can decide:
+
+1. heuristics: empty answers, error texts and bare refusals ("I'm sorry, I
+   can't help with that") are rejected, longer answers containing a refusal go
+   to the model; answers in the wrong language are rejected; replies to plain
+   greetings are accepted; figures
+   (prices, times, amounts) must appear in the tool results of the turn;
+   answers without figures are accepted.
+2. model: a small, fast verifier model (``verifier_model``), only for answers
+   the heuristics could not decide, or always/never per ``verifier_model_policy``.
+
+Each agent also caps how often a rejected answer is regenerated
+(``verifier_max_retries``). Stage timings are recorded per verdict and
+aggregated for the performance endpoint.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import re
+import time
+
+from app.core.logger import logger
+from app.services.ai.config import ai_config
+
+
+# Judge callable: (query, response) -> raw "Y"/"N" model output
+Judge = Callable[[str, str], Awaitable[str]]
+
+_ERROR_PREFIXES = ("agent error:", "error executing tools", "error generating response")
+_SETUP_MESSAGES = ("configurando mi base de conocimiento", "setting up my knowledge base")
+_GREETINGS = (
+    "hola", "hello", "hi", "hey", "buenas", "buenos días", "buenas tardes", "buenas noches",
+    "good morning", "good afternoon", "good evening",
+)
+_QUESTION_INDICATORS = (
+    "que", "what", "como", "how", "cuando", "when", "donde", "where",
+    "servicios", "services", "planes", "plans", "precios", "prices", "?",
+)
+
+# Refusals and deflections, English and Spanish (accents stripped by the pattern)
+_REFUSAL_RE = re.compile(
+    r"\b(?:"
+    r"i(?:'m| am) sorry,? (?:but )?i (?:can(?:'t|not)|am unable|'m unable)"
+    r"|i(?:'m| am) (?:unable|not able) to (?:help|assist|answer|provide)"
+    r"|i can(?:'t|not) (?:help|assist) (?:you )?with"
+    r"|i (?:don't|do not) have (?:access|information) (?:to|about|on)"
+    r"|as an ai\b"
+    r"|lo siento,? (?:pero )?no (?:puedo|me es posible|tengo)"
+    r"|no (?:puedo|podemos) (?:ayudar|asistir)"
+    r"|no me es posible (?:ayudar|responder|brindar)"
+    r"|no tengo (?:acceso|informaci[oó]n) (?:a|sobre|de)"
+    r"|como (?:una )?(?:ia|inteligencia artificial|modelo de lenguaje)\b"
+    r")"
+)
+# A refusal in an answer longer than this may be a partial answer; the model decides
+_REFUSAL_MAX_CHARS = 200
+
+_WORD_RE = re.compile(r"[a-záéíóúñü]+")
+_FIGURE_RE = re.compile(r"\d[\d.,:]*\d|\d")
+_SPANISH_MARKERS = frozenset({
+    "el", "la", "los", "las", "de", "del", "que", "y", "en", "para", "con", "por", "es", "una", "un",
+    "su", "sus", "usted", "hola", "gracias", "puede", "tiene", "tenemos", "nuestro", "nuestros", "esta",
+    "este", "muy", "cuál", "cual", "qué", "quiero", "necesito", "si", "sí", "pero", "como", "cómo",
+})
+_ENGLISH_MARKERS = frozenset({
+    "the", "and", "to", "of", "is", "for", "with", "you", "your", "we", "our", "can", "are", "this",
+    "that", "have", "hello", "thanks", "thank", "please", "what", "how", "would", "will", "it", "i",
+})
+
+
+def detect_language(text: str) -> Optional[str]:
+    """
+    Cheap English/Spanish detection from function words.
+
+    Args:
+        text: Text to classify
+
+    Returns:
+        "es", "en", or None when the text is too short or mixed to tell
+    """
+    lowered = (text or "").lower()
+    words = _WORD_RE.findall(lowered)
+    spanish = sum(1 for word in words if word in _SPANISH_MARKERS) + lowered.count("¿") + lowered.count("¡")
+    english = sum(1 for word in words if word in _ENGLISH_MARKERS)
+    if spanish + english < 3:
+        return None
+    if spanish >= 2 * max(english, 1):
+        return "es"
+    if english >= 2 * max(spanish, 1):
+        return "en"
+    return None
+
+
+def _figures(text: str) -> List[str]:
+    """Numbers in the text with separators removed (₡25.000 -> 25000, 8:00 -> 800)."""
+    return [re.sub(r"[.,:]", "", match) for match in _FIGURE_RE.findall(text or "")]
+
+
+def _is_simple_greeting(query: str) -> bool:
+    lowered = query.lower().strip()
+    return (
+        len(lowered) < 20
+        and any(greeting in lowered for greeting in _GREETINGS)
+        and not any(indicator in lowered for indicator in _QUESTION_INDICATORS)
+    )
+
+
+@dataclass
+class Verdict:
+    """Outcome of verifying one answer."""
+
+    decision: str  # "Y" or "N"
+    stage: str  # "heuristic", "model", "timeout" or "error"
+    reason: str
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def helpful(self) -> bool:
+        return self.decision == "Y"
+
+
+class ResponseVerifier:
+    """Decides whether an agent answer is good enough to send, cheapest stage first."""
+
+    def __init__(self):
+        self._stats: Dict[str, Any] = self._new_stats()
+
+    @staticmethod
+    def _new_stats() -> Dict[str, Any]:
+        return {
+            "verifications": 0,
+            "model_calls": 0,
+            "rejected": 0,
+            "by_reason": {},
+            "stage_ms": {"heuristic": 0.0, "model": 0.0},
+        }
+
+    def heuristic_verdict(
+        self,
+        query: str,
+        response: str,
+        expected_language: Optional[str] = None,
+        tool_results: Optional[Sequence[str]] = None
+    ) -> Tuple[Optional[str], str]:
+        """
+        Local checks, no I/O.
+
+        Args:
+            query: The request the answer responds to
+            response: The answer to verify
+            expected_language: "en"/"es" to enforce; detected from the query when None
+            tool_results: Tool outputs of the turn, used to ground figures
+
+        Returns:
+            ("Y" or "N", reason) when decided, or (None, reason) when the model should decide
+        """
+        text = (response or "").strip()
+        lowered = text.lower()
+        if not text:
+            return "N", "empty"
+        if lowered.startswith(_ERROR_PREFIXES):
+            return "N", "error_text"
+        if any(message in lowered for message in _SETUP_MESSAGES):
+            return "Y", "knowledge_base_setup"
+        if _REFUSAL_RE.search(lowered.replace("’", "'")):
+            return ("N", "refusal") if len(text) <= _REFUSAL_MAX_CHARS else (None, "possible_refusal")
+        if _is_simple_greeting(query):
+            return "Y", "greeting"
+
+        expected = expected_language or detect_language(query)
+        answered = detect_language(text)
+        if expected and answered and expected != answered:
+            return "N", "wrong_language"
+
+        figures = _figures(text)
+        if figures:
+            if not tool_results:
+                return None, "unverified_figures"
+            grounded = set(_figures(" ".join(tool_results)))
+            if all(figure in grounded for figure in figures):
+                return "Y", "grounded"
+            return None, "ungrounded_figures"
+
+        if "?" in query and len(text) < 20:
+            return None, "short_answer"
+        return "Y", "checks_passed"
+
+    async def verify(
+        self,
+        query: str,
+        response: str,
+        judge: Judge,
+        expected_language: Optional[str] = None,
+        tool_results: Optional[Sequence[str]] = None,
+        timeout: Optional[float] = None
+    ) -> Verdict:
+        """
+        Verify an answer with heuristics, then the verifier model when needed.
+
+        Args:
+            query: The request the answer responds to
+            response: The answer to verify
+            judge: Coroutine function asking the verifier model for Y/N
+            expected_language: "en"/"es" to enforce; detected from the query when None
+            tool_results: Tool outputs of the turn, used to ground figures
+            timeout: Verifier model budget (defaults to agent_helpfulness_timeout_seconds)
+
+        Returns:
+            Verdict with the decision, the deciding stage and per-stage timings
+        """
+        timings: Dict[str, float] = {}
+        policy = ai_config.verifier_model_policy
+
+        started = time.perf_counter()
+        decision, reason = self.heuristic_verdict(query, response, expected_language, tool_results)
+        timings["heuristic"] = (time.perf_counter() - started) * 1000
+
+        if policy == "never" and decision is None:
+            decision, reason = "Y", f"{reason}:model_disabled"
+        needs_model = decision is None or (policy == "always" and decision == "Y")
+
+        if not needs_model:
+            verdict = Verdict(decision=decision, stage="heuristic", reason=reason, timings_ms=timings)
+        else:
+            verdict = await self._model_verdict(query, response, judge, reason, timings, timeout)
+
+        self._record(verdict)
+        logger.info(
+            f"🔎 [VERIFIER] {verdict.decision} by {verdict.stage} ({verdict.reason}) in "
+            f"{sum(verdict.timings_ms.values()):.0f}ms"
+        )
+        return verdict
+
+    async def _model_verdict(
+        self,
+        query: str,
+        response: str,
+        judge: Judge,
+        reason: str,
+        timings: Dict[str, float],
+        timeout: Optional[float]
+    ) -> Verdict:
+        timeout = ai_config.agent_helpfulness_timeout_seconds if timeout is None else timeout
+        started = time.perf_counter()
+        try:
+            raw = await asyncio.wait_for(judge(query, response), timeout=timeout)
+            decision = "Y" if raw.strip().upper().startswith("Y") else "N"
+            stage = "model"
+        except asyncio.TimeoutError:
+            # Do not hold the reply hostage to the verifier
+            logger.warning(f"⏰ [VERIFIER] Verifier model timed out after {timeout}s, accepting response")
+            decision, stage = "Y", "timeout"
+        except Exception as e:
+            logger.error(f"❌ [VERIFIER] Verifier model failed, accepting response: {str(e)}")
+            decision, stage = "Y", "error"
+        timings["model"] = (time.perf_counter() - started) * 1000
+        self._stats["model_calls"] += 1
+        return Verdict(decision=decision, stage=stage, reason=reason, timings_ms=timings)
+
+    def _record(self, verdict: Verdict) -> None:
+        self._stats["verifications"] += 1
+        if not verdict.helpful:
+            self._stats["rejected"] += 1
+        key = f"{verdict.stage}:{verdict.reason}:{verdict.decision}"
+        self._stats["by_reason"][key] = self._stats["by_reason"].get(key, 0) + 1
+        for stage, elapsed in verdict.timings_ms.items():
+            self._stats["stage_ms"][stage] += elapsed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Verdict counts, model call rate and average time per stage."""
+        total = self._stats["verifications"]
+        model_calls = self._stats["model_calls"]
+        return {
+            "policy": ai_config.verifier_model_policy,
+            "verifications": total,
+            "model_calls": model_calls,
+            "model_call_rate": round(model_calls / total, 3) if total else 0.0,
+            "rejected": self._stats["rejected"],
+            "by_reason": dict(self._stats["by_reason"]),
+            "avg_heuristic_ms": round(self._stats["stage_ms"]["heuristic"] / total, 3) if total else 0.0,
+            "avg_model_ms": round(self._stats["stage_ms"]["model"] / model_calls, 2) if model_calls else 0.0,
+        }
+
+    def reset_stats(self) -> None:
+        """Reset counters and timings."""
+        self._stats = self._new_stats()
+
+
+# Global response verifier instance
+response_verifier = ResponseVerifier()
@@ -1,18 +1,96 @@
 """
 Caching layer for RAG retrieval to improve performance.
 Uses Redis for caching query results and connection pooling.
+
+Two lookup layers:
+- exact: Redis key over the normalized query text and retrieval parameters
+- semantic: nearest-neighbour search over the embeddings of recent queries
+  (one compact float32 matrix per strategy), so paraphrases such as
+  "¿Qué planes tienen?" / "que planes tienen" share results
+
+Every entry carries the knowledge base version; re-ingesting the collection
+bumps the version and invalidates both layers across workers.
 """
 
+import base64
 import json
 import hashlib
-from typing import List, Optional, Dict, Any
+import threading
+import time
+from collections import defaultdict
+from typing import List, Optional, Dict, Any, Sequence, Tuple
 from datetime import timedelta
 
+import numpy as np
 import redis
 from langchain_core.documents import Document
 
 from app.core.config import settings
 from app.core.logger import logger
+from app.services.ai.config import ai_config
+from app.services.ai.shared.embedding_cache import normalize_query
+
+
+_VERSION_KEY = "rag:kb_version"
+_VERSION_CHECK_SECONDS = 30
+_DUPLICATE_SIMILARITY = 0.999
+
+
+class SemanticIndex:
+    """Ring buffer of recent query embeddings with cosine nearest-neighbour lookup."""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._matrix: Optional[np.ndarray] = None
+        self._entries: List[Optional[Dict[str, Any]]] = [None] * max_entries
+        self._next = 0
+        self._size = 0
+    
+    def add(self, vector: Sequence[float], entry: Dict[str, Any]) -> None:
+        """Store a unit-normalized query vector with its cached entry, replacing the oldest when full."""
+        row = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(row)
+        if norm == 0:
+            return
+        if self._matrix is None or self._matrix.shape[1] != row.shape[0]:
+            self._matrix = np.zeros((self.max_entries, row.shape[0]), dtype=np.float32)
+            self._entries = [None] * self.max_entries
+            self._next = self._size = 0
+        
+        self._matrix[self._next] = row / norm
+        self._entries[self._next] = entry
+        self._next = (self._next + 1) % self.max_entries
+        self._size = min(self._size + 1, self.max_entries)
+    
+    def search(self, vector: Sequence[float], threshold: float, version: int) -> Optional[Tuple[float, Dict[str, Any]]]:
+        """Return the most similar live entry at or above ``threshold``."""
+        if self._matrix is None or self._size == 0:
+            return None
+        query = np.asarray(vector, dtype=np.float32)
+        if query.shape[0] != self._matrix.shape[1]:
+            return None
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+        
+        scores = self._matrix[:self._size] @ (query / norm)
+        now = time.time()
+        for index in np.argsort(scores)[::-1]:
+            score = float(scores[index])
+            if score < threshold:
+                return None
+            entry = self._entries[index]
+            if entry and entry["expires_at"] > now and entry["version"] == version:
+                return score, entry
+        return None
+    
+    def clear(self) -> None:
+        self._matrix = None
+        self._entries = [None] * self.max_entries
+        self._next = self._size = 0
+    
+    def __len__(self) -> int:
+        return self._size
 
 
 class RetrievalCache:
@@ -20,6 +98,14 @@ class RetrievalCache:
     
     def __init__(self):
         """Initialize Redis connection with error handling."""
+        self._semantic: Dict[str, SemanticIndex] = {}
+        self._semantic_lock = threading.RLock()
+        self._version = 0
+        self._version_checked_at = 0.0
+        self._strategy_stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+        )
+        
         try:
             self.redis_client = redis.from_url(
                 settings.REDIS_URL,
@@ -40,13 +126,107 @@ class RetrievalCache:
             self.enabled = False
             self.redis_client = None
     
+    def _get_kb_version(self) -> int:
+        """Current knowledge base version (shared through Redis, re-read every few seconds)."""
+        if not self.enabled or time.time() - self._version_checked_at < _VERSION_CHECK_SECONDS:
+            return self._version
+        
+        try:
+            version = int(self.redis_client.get(_VERSION_KEY) or 0)
+            if version != self._version:
+                logger.info(f"🔄 [CACHE] Knowledge base version changed ({self._version} -> {version})")
+                self._clear_semantic()
+                self._version = version
+        except Exception as e:
+            logger.warning(f"⚠️ [CACHE] Failed to read knowledge base version: {str(e)}")
+        self._version_checked_at = time.time()
+        return self._version
+    
     def _get_query_key(self, query: str, retrieval_params: Dict[str, Any] = None) -> str:
         """Generate cache key for a query."""
-        # Include retrieval parameters in key for cache precision
+        # Include retrieval parameters and knowledge base version in key for cache precision
         params_str = json.dumps(retrieval_params or {}, sort_keys=True)
-        combined = f"{query}:{params_str}"
+        combined = f"{normalize_query(query)}:{params_str}:v{self._get_kb_version()}"
         return f"rag:query:{hashlib.md5(combined.encode()).hexdigest()}"
     
+    @staticmethod
+    def _strategy_name(retrieval_params: Optional[Dict[str, Any]]) -> str:
+        return (retrieval_params or {}).get("strategy", "default")
+    
+    def _get_semantic_index(self, strategy: str) -> SemanticIndex:
+        with self._semantic_lock:
+            index = self._semantic.get(strategy)
+            if index is None:
+                index = SemanticIndex(ai_config.semantic_cache_max_entries)
+                self._semantic[strategy] = index
+            return index
+    
+    def _clear_semantic(self) -> None:
+        with self._semantic_lock:
+            for index in self._semantic.values():
+                index.clear()
+    
+    def record_miss(self, retrieval_params: Dict[str, Any] = None) -> None:
+        """Count a lookup that missed both layers."""
+        self._strategy_stats[self._strategy_name(retrieval_params)]["misses"] += 1
+    
+    def get_semantic_results(
+        self,
+        query_vector: Sequence[float],
+        retrieval_params: Dict[str, Any] = None,
+    ) -> Optional[List[Document]]:
+        """
+        Get results cached for a near-duplicate query.
+        
+        Args:
+            query_vector: Embedding of the incoming query
+            retrieval_params: Retrieval strategy (results are only shared within a strategy)
+            
+        Returns:
+            Cached documents, or None when no recent query is similar enough
+        """
+        if not ai_config.semantic_cache_enabled or query_vector is None:
+            return None
+        
+        strategy = self._strategy_name(retrieval_params)
+        version = self._get_kb_version()
+        with self._semantic_lock:
+            match = self._get_semantic_index(strategy).search(
+                query_vector, ai_config.semantic_cache_threshold, version
+            )
+        if match is None:
+            return None
+        
+        score, entry = match
+        self._strategy_stats[strategy]["semantic_hits"] += 1
+        logger.info(
+            f"🎯 [CACHE] Semantic HIT ({score:.3f}) for '{entry['query'][:50]}' "
+            f"({len(entry['documents'])} docs, strategy: {strategy})"
+        )
+        return [Document(page_content=doc.page_content, metadata=dict(doc.metadata)) for doc in entry["documents"]]
+    
+    def _remember(
+        self,
+        query: str,
+        documents: List[Document],
+        query_vector: Optional[Sequence[float]],
+        retrieval_params: Optional[Dict[str, Any]],
+        ttl_seconds: int,
+    ) -> None:
+        if not ai_config.semantic_cache_enabled or query_vector is None or not documents:
+            return
+        entry = {
+            "query": query,
+            "documents": documents,
+            "expires_at": time.time() + ttl_seconds,
+            "version": self._get_kb_version(),
+        }
+        with self._semantic_lock:
+            index = self._get_semantic_index(self._strategy_name(retrieval_params))
+            # Skip re-indexing the same query (e.g. repeated exact hits)
+            if index.search(query_vector, _DUPLICATE_SIMILARITY, entry["version"]) is None:
+                index.add(query_vector, entry)
+    
     def get_cached_results(self, query: str, retrieval_params: Dict[str, Any] = None) -> Optional[List[Document]]:
         """Get cached retrieval results."""
         if not self.enabled:
@@ -62,7 +242,15 @@ class RetrievalCache:
                     Document(page_content=doc['content'], metadata=doc['metadata'])
                     for doc in data['documents']
                 ]
+                self._strategy_stats[self._strategy_name(retrieval_params)]["exact_hits"] += 1
                 logger.info(f"🎯 [CACHE] Cache HIT for query: '{query[:50]}...' ({len(documents)} docs)")
+                
+                # Results cached by another worker also become available for semantic lookups here
+                if data.get('embedding'):
+                    vector = np.frombuffer(base64.b64decode(data['embedding']), dtype=np.float32)
+                    ttl = self.redis_client.ttl(cache_key)
+                    if ttl and ttl > 0:
+                        self._remember(query, documents, vector, retrieval_params, ttl)
                 return documents
             
             logger.debug(f"🎯 [CACHE] Cache MISS for query: '{query[:50]}...'")
@@ -77,10 +265,20 @@ class RetrievalCache:
         query: str, 
         documents: List[Document], 
         retrieval_params: Dict[str, Any] = None,
-        ttl_seconds: int = 300  # 5 minutes default
+        ttl_seconds: int = 300,  # 5 minutes default
+        query_vector: Optional[Sequence[float]] = None,
     ) -> None:
-        """Cache retrieval results."""
-        if not self.enabled or not documents:
+        """
+        Cache retrieval results.
+        
+        When ``query_vector`` is given, the results are also indexed for semantic
+        lookups and the vector is stored alongside them in Redis.
+        """
+        if not documents:
+            return
+        
+        self._remember(query, documents, query_vector, retrieval_params, ttl_seconds)
+        if not self.enabled:
             return
         
         try:
@@ -100,6 +298,10 @@ class RetrievalCache:
                 'documents': serialized_docs,
                 'params': retrieval_params or {}
             }
+            if query_vector is not None:
+                cache_data['embedding'] = base64.b64encode(
+                    np.asarray(query_vector, dtype=np.float32).tobytes()
+                ).decode('ascii')
             
             self.redis_client.setex(
                 cache_key, 
@@ -112,8 +314,48 @@ class RetrievalCache:
         except Exception as e:
             logger.warning(f"⚠️ [CACHE] Failed to cache results: {str(e)}")
     
+    def invalidate_knowledge_base(self) -> int:
+        """
+        Invalidate every cached result after the knowledge collection was re-ingested.
+        
+        Bumps the shared knowledge base version so other workers drop their
+        semantic entries on their next version check.
+        
+        Returns:
+            New knowledge base version
+        """
+        self._clear_semantic()
+        if self.enabled:
+            try:
+                self._version = int(self.redis_client.incr(_VERSION_KEY))
+                self._version_checked_at = time.time()
+                self.clear_cache("rag:query:*")
+            except Exception as e:
+                logger.warning(f"⚠️ [CACHE] Failed to bump knowledge base version: {str(e)}")
+                self._version += 1
+        else:
+            self._version += 1
+        
+        logger.info(f"🗑️ [CACHE] Retrieval cache invalidated (knowledge base version {self._version})")
+        return self._version
+    
+    def get_strategy_hit_ratios(self) -> Dict[str, Dict[str, Any]]:
+        """Hit ratio per retrieval strategy, split by exact and semantic layers."""
+        ratios = {}
+        for strategy, counts in self._strategy_stats.items():
+            lookups = counts["exact_hits"] + counts["semantic_hits"] + counts["misses"]
+            hits = counts["exact_hits"] + counts["semantic_hits"]
+            ratios[strategy] = {
+                **counts,
+                "lookups": lookups,
+                "hit_rate_percent": round(hits / lookups * 100, 2) if lookups else 0.0,
+            }
+        return ratios
+    
     def clear_cache(self, pattern: str = "rag:*") -> int:
         """Clear cached results matching pattern."""
+        if pattern in ("rag:*", "rag:query:*"):
+            self._clear_semantic()
         if not self.enabled:
             return 0
             
@@ -131,8 +373,14 @@ class RetrievalCache:
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
+        semantic_stats = {
+            "enabled": ai_config.semantic_cache_enabled,
+            "threshold": ai_config.semantic_cache_threshold,
+            "entries": {strategy: len(index) for strategy, index in self._semantic.items()},
+            "knowledge_base_version": self._version,
+        }
         if not self.enabled:
-            return {"enabled": False}
+            return {"enabled": False, "semantic": semantic_stats, "by_strategy": self.get_strategy_hit_ratios()}
             
         try:
             info = self.redis_client.info()
@@ -144,7 +392,9 @@ class RetrievalCache:
                 "used_memory_human": info.get("used_memory_human", "0B"),
                 "keyspace_hits": info.get("keyspace_hits", 0),
                 "keyspace_misses": info.get("keyspace_misses", 0),
-                "rag_cached_queries": rag_keys
+                "rag_cached_queries": rag_keys,
+                "semantic": semantic_stats,
+                "by_strategy": self.get_strategy_hit_ratios()
             }
             
         except Exception as e:
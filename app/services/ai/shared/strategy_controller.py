@@ -0,0 +1,205 @@
+"""
+Adaptive retrieval strategy selection for RAG.
+
+Queries are classified as simple or complex (word count and common intents) and
+each class has a nominal tier on a ladder of retrieval plans, from cheapest to
+most thorough:
+
+- "minimal": dense search, few candidates, local reranker
+- "fast": dense search, full candidate set, local reranker
+- "balanced": two MultiQuery variants, local reranker
+- "comprehensive": three MultiQuery variants, remote (Cohere) reranker
+
+The controller reads rolling per-tier statistics of uncached retrievals from the
+performance monitor. A tier whose p95 latency or error rate breaks the latency
+SLO is skipped in favour of the next cheaper one, so upstream latency spikes
+(LLM, reranker, Qdrant) degrade quality instead of response time. A small share
+of queries probes the nominal tier so recovery is noticed, and simple queries
+step up one tier when the fast tier's best match is too often weak.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import random
+import threading
+
+from app.core.logger import logger
+from app.services.ai.config import ai_config
+from app.services.ai.shared.performance_monitor import performance_monitor
+
+
+SIMPLE_QUERY_TERMS = ("hola", "hello", "hi", "precio", "price", "plan", "servicio", "service")
+
+
+@dataclass(frozen=True)
+class RetrievalTier:
+    """One rung of the retrieval ladder."""
+    name: str
+    use_multiquery: bool
+    multiquery_breadth: int
+    reranker_setting: str  # AIConfig field holding the reranker name
+    candidates: Optional[int] = None  # Reranked candidates (k); None uses rag_retrieval_k
+    cache_ttl: int = 600
+
+
+TIERS: List[RetrievalTier] = [
+    RetrievalTier("minimal", False, 0, "rag_reranker_fast", candidates=6),
+    RetrievalTier("fast", False, 0, "rag_reranker_fast"),
+    RetrievalTier("balanced", True, 2, "rag_reranker_fast", cache_ttl=300),
+    RetrievalTier("comprehensive", True, 3, "rag_reranker_comprehensive", cache_ttl=300),
+]
+TIER_INDEX = {tier.name: index for index, tier in enumerate(TIERS)}
+NOMINAL_TIER = {"simple": "fast", "complex": "comprehensive"}
+
+
+def classify_query(query: str) -> str:
+    """Classify a query as "simple" or "complex"."""
+    query_lower = query.lower().strip()
+    if len(query.split()) <= 3 or any(term in query_lower for term in SIMPLE_QUERY_TERMS):
+        return "simple"
+    return "complex"
+
+
+class AdaptiveStrategyController:
+    """Chooses the retrieval tier per query under the configured latency SLO."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._degraded: Dict[str, str] = {}  # query class -> tier currently used instead of nominal
+        self._choices: Dict[str, int] = {tier.name: 0 for tier in TIERS}
+        self._probes = 0
+
+    def build_plan(self, tier_name: str, query_class: str) -> Dict[str, Any]:
+        """
+        Retrieval parameters for a tier.
+
+        Args:
+            tier_name: Tier on the ladder
+            query_class: "simple" or "complex"
+
+        Returns:
+            Strategy dict consumed by the RAG tool and the retrieval cache
+        """
+        tier = TIERS[TIER_INDEX[tier_name]]
+        reranker = getattr(ai_config, tier.reranker_setting)
+        k = tier.candidates or ai_config.rag_retrieval_k
+        return {
+            "strategy": tier.name,
+            "query_class": query_class,
+            "use_multiquery": tier.use_multiquery,
+            "multiquery_breadth": tier.multiquery_breadth,
+            "k": k,
+            "fetch_k": max(16, k * 2),
+            "use_rerank": reranker != "none",
+            "reranker": reranker,
+            "cache_ttl": tier.cache_ttl,
+            "timeout_seconds": self.timeout_seconds(),
+        }
+
+    @staticmethod
+    def timeout_seconds() -> float:
+        """Deadline for a MultiQuery retrieval before falling back to the fast tier."""
+        seconds = ai_config.rag_latency_slo_ms * ai_config.adaptive_timeout_slo_multiple / 1000
+        return round(min(15.0, max(1.0, seconds)), 2)
+
+    def fallback_plan(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Plan used when a MultiQuery tier times out."""
+        return self.build_plan("fast", plan.get("query_class", "complex"))
+
+    def _tier_window(self, tier_name: str) -> Dict[str, Any]:
+        return performance_monitor.get_strategy_window(
+            tier_name,
+            window_seconds=ai_config.adaptive_window_seconds,
+            low_score_threshold=ai_config.adaptive_low_score_threshold,
+        )
+
+    def _over_budget(self, window: Dict[str, Any]) -> bool:
+        if window["samples"] < ai_config.adaptive_min_samples:
+            return False  # Not enough evidence; assume the tier is fine
+        return (
+            window["p95_ms"] > ai_config.rag_latency_slo_ms
+            or window["error_rate"] > ai_config.adaptive_max_error_rate
+        )
+
+    def select(self, query: str) -> Dict[str, Any]:
+        """
+        Choose the retrieval plan for a query.
+
+        Args:
+            query: Customer query
+
+        Returns:
+            Strategy dict (see ``build_plan``)
+        """
+        query_class = classify_query(query)
+        nominal = NOMINAL_TIER[query_class]
+        if not ai_config.adaptive_strategy_enabled:
+            return self.build_plan(nominal, query_class)
+
+        index = TIER_INDEX[nominal]
+
+        # Recall signal: escalate simple queries when the fast tier's best match is often weak
+        if query_class == "simple":
+            window = self._tier_window(nominal)
+            if (
+                window["samples"] >= ai_config.adaptive_min_samples
+                and window["low_score_rate"] > ai_config.adaptive_max_low_score_rate
+            ):
+                index += 1
+
+        if random.random() < ai_config.adaptive_probe_rate:
+            with self._lock:
+                self._probes += 1
+        else:
+            # Latency signal: step down while the tier breaks the SLO
+            while index > 0 and self._over_budget(self._tier_window(TIERS[index].name)):
+                index -= 1
+
+        tier_name = TIERS[index].name
+        self._note_choice(query_class, nominal, tier_name)
+        return self.build_plan(tier_name, query_class)
+
+    def _note_choice(self, query_class: str, nominal: str, tier_name: str) -> None:
+        with self._lock:
+            self._choices[tier_name] += 1
+            previous = self._degraded.get(query_class, nominal)
+            if tier_name == previous:
+                return
+            self._degraded[query_class] = tier_name
+
+        if TIER_INDEX[tier_name] < TIER_INDEX[nominal]:
+            logger.warning(
+                f"🐌 [ADAPTIVE] {query_class} queries degraded to '{tier_name}' "
+                f"(nominal '{nominal}', SLO {ai_config.rag_latency_slo_ms:.0f}ms)"
+            )
+        elif TIER_INDEX[tier_name] > TIER_INDEX[nominal]:
+            logger.info(f"🎯 [ADAPTIVE] {query_class} queries escalated to '{tier_name}' (weak matches on '{nominal}')")
+        else:
+            logger.info(f"✅ [ADAPTIVE] {query_class} queries back on '{tier_name}'")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Current tier per query class, choice counts and the rolling windows behind them."""
+        with self._lock:
+            current = {query_class: self._degraded.get(query_class, nominal) for query_class, nominal in NOMINAL_TIER.items()}
+            choices = dict(self._choices)
+            probes = self._probes
+        return {
+            "enabled": ai_config.adaptive_strategy_enabled,
+            "latency_slo_ms": ai_config.rag_latency_slo_ms,
+            "timeout_seconds": self.timeout_seconds(),
+            "current_tier": current,
+            "choices": choices,
+            "probes": probes,
+            "windows": {tier.name: self._tier_window(tier.name) for tier in TIERS},
+        }
+
+    def reset(self) -> None:
+        """Forget degradation state and counters."""
+        with self._lock:
+            self._degraded.clear()
+            self._choices = {tier.name: 0 for tier in TIERS}
+            self._probes = 0
+
+
+# Global strategy controller instance
+strategy_controller = AdaptiveStrategyController()
@@ -0,0 +1,206 @@
+"""
+Partial output streaming for AI agents.
+
+Agents run their compiled graph through ``stream_graph`` instead of ``ainvoke``;
+tokens generated by the answering LLM node and tool-call progress are forwarded
+to a ``PartialStreamer``, which coalesces them into ``ai_partial`` events. The
+first token is sent immediately so the UI shows output at first-token latency
+rather than after the whole graph completes.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+import time
+import uuid
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from app.core.logger import logger
+from app.services.ai.config import ai_config
+
+
+PartialSink = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+def websocket_sink(conversation_id: Optional[str], user_id: Optional[str] = None) -> PartialSink:
+    """
+    Build a sink that sends ``ai_partial`` events over the WebSocket connection manager.
+
+    Args:
+        conversation_id: Conversation whose subscribers receive the events
+        user_id: Send only to this user (e.g. the agent who asked the writer)
+    """
+    from app.services.websocket.websocket_service import WebSocketService
+
+    async def _send(partial: Dict[str, Any]) -> None:
+        await WebSocketService.notify_ai_partial(conversation_id, partial, user_id=user_id)
+
+    return _send
+
+
+class PartialStreamer:
+    """Coalesces streamed tokens and tool progress into ``ai_partial`` events."""
+
+    def __init__(
+        self,
+        source: str,
+        sink: PartialSink,
+        stream_id: Optional[str] = None,
+        flush_interval_ms: Optional[float] = None,
+    ):
+        """
+        Args:
+            source: Producing agent ("whatsapp_agent" or "writer")
+            sink: Coroutine function receiving each event dict
+            stream_id: Identifier shared by every event of this response
+            flush_interval_ms: Minimum spacing between token events after the first one
+        """
+        self.source = source
+        self.sink = sink
+        self.stream_id = stream_id or uuid.uuid4().hex
+        self.flush_interval_ms = (
+            ai_config.stream_flush_interval_ms if flush_interval_ms is None else flush_interval_ms
+        )
+
+        self._buffer: List[str] = []
+        self._sequence = 0
+        self._last_flush = 0.0
+        self._started_at = time.perf_counter()
+        self._active_tools: List[str] = []
+        self._has_text = False
+        self._closed = False
+        self.first_token_ms: Optional[float] = None
+        self.events_sent = 0
+
+    async def _emit(self, event: str, **fields: Any) -> None:
+        self._sequence += 1
+        partial = {
+            "stream_id": self.stream_id,
+            "source": self.source,
+            "event": event,
+            "sequence": self._sequence,
+            **fields,
+        }
+        try:
+            await self.sink(partial)
+            self.events_sent += 1
+        except Exception as e:
+            # Streaming is best effort; the final response is still delivered
+            logger.warning(f"⚠️ [STREAM] Failed to send {event} partial: {str(e)}")
+
+    async def _flush(self) -> None:
+        if not self._buffer:
+            return
+        delta = "".join(self._buffer)
+        self._buffer = []
+        self._last_flush = time.perf_counter()
+        await self._emit("token", delta=delta)
+
+    async def push_token(self, text: str) -> None:
+        """Buffer a token, sending it right away for the first one or once the interval elapsed."""
+        if not text or self._closed:
+            return
+
+        self._buffer.append(text)
+        self._has_text = True
+        if self.first_token_ms is None:
+            self.first_token_ms = (time.perf_counter() - self._started_at) * 1000
+            await self._flush()
+        elif (time.perf_counter() - self._last_flush) * 1000 >= self.flush_interval_ms:
+            await self._flush()
+
+    async def reset(self) -> None:
+        """Discard the draft shown so far (the agent is regenerating its answer)."""
+        self._buffer = []
+        if self._has_text:
+            self._has_text = False
+            await self._emit("reset")
+
+    async def tool_started(self, tool_name: str) -> None:
+        """Report that the agent requested a tool call."""
+        await self._flush()
+        self._active_tools.append(tool_name)
+        await self._emit("tool_start", tool=tool_name)
+
+    async def tools_finished(self) -> None:
+        """Report completion of every tool started since the last call."""
+        tools, self._active_tools = self._active_tools, []
+        for tool_name in tools:
+            await self._emit("tool_end", tool=tool_name)
+
+    async def finish(self, success: bool = True) -> None:
+        """Flush buffered tokens and send the terminating ``done`` event."""
+        if self._closed:
+            return
+        await self._flush()
+        await self._emit("done", success=success)
+        self._closed = True
+
+        if self.first_token_ms is not None:
+            total_ms = (time.perf_counter() - self._started_at) * 1000
+            logger.info(
+                f"⚡ [STREAM] {self.source} stream {self.stream_id[:8]}: first token after "
+                f"{self.first_token_ms:.0f}ms, completed in {total_ms:.0f}ms ({self.events_sent} events)"
+            )
+
+
+async def stream_graph(
+    graph: Any,
+    graph_input: Dict[str, Any],
+    streamer: PartialStreamer,
+    config: Optional[Dict[str, Any]] = None,
+    llm_nodes: Iterable[str] = ("agent",),
+    tool_nodes: Iterable[str] = ("action",),
+) -> Dict[str, Any]:
+    """
+    Run a compiled graph, forwarding answer tokens and tool progress to ``streamer``.
+
+    Args:
+        graph: Compiled LangGraph graph
+        graph_input: Initial state
+        streamer: Destination for partial output
+        config: Optional runnable config (recursion limit, ...)
+        llm_nodes: Nodes whose LLM tokens are user-visible answer text
+        tool_nodes: Nodes that execute tool calls
+
+    Returns:
+        Final graph state, same as ``graph.ainvoke``
+    """
+    llm_nodes = set(llm_nodes)
+    tool_nodes = set(tool_nodes)
+    final_state: Dict[str, Any] = {}
+    current_message_id: Optional[str] = None
+
+    async for mode, payload in graph.astream(
+        graph_input, config=config, stream_mode=["messages", "updates", "values"]
+    ):
+        if mode == "values":
+            final_state = payload
+            continue
+
+        if mode == "updates":
+            if tool_nodes.intersection(payload or {}):
+                await streamer.tools_finished()
+            continue
+
+        message, metadata = payload
+        if metadata.get("langgraph_node") not in llm_nodes or not isinstance(message, AIMessage):
+            continue
+
+        # A new LLM call in the answering node replaces any earlier draft
+        if message.id != current_message_id:
+            await streamer.reset()
+            current_message_id = message.id
+
+        if isinstance(message, AIMessageChunk):
+            for tool_chunk in message.tool_call_chunks or []:
+                if tool_chunk.get("name"):
+                    await streamer.tool_started(tool_chunk["name"])
+        else:
+            # Non-streaming model output (or a node-level fallback message)
+            for tool_call in message.tool_calls or []:
+                await streamer.tool_started(tool_call["name"])
+
+        if isinstance(message.content, str):
+            await streamer.push_token(message.content)
+
+    return final_state
@@ -1,209 +1,360 @@
 """
-New hybrid document ingestion for JSONL files.
+Incremental hybrid document ingestion for JSONL files.
 Implements dense + BM25 sparse vectors using Qdrant hybrid retrieval.
+
+Every chunk is identified by a hash of its text and metadata, and its point ID
+is derived from that hash, so re-running ingestion only embeds chunks that are
+new or changed and deletes points whose chunk no longer exists. Each point
+records the file it came from (``source``), and only points of the files being
+ingested are candidates for deletion, so ingesting one file leaves the others
+alone; a full sync of the knowledge base considers every point. Embedding
+batches run concurrently within a token-per-minute budget and each batch is
+upserted as soon as it is embedded: an interrupted run resumes from what
+already reached Qdrant.
 """
 
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
 import asyncio
+import hashlib
 import json
-from datetime import datetime, timezone
-from pathlib import Path
-from typing import List, Dict, Any, Optional
+import time
+import uuid
 
-from qdrant_client import QdrantClient, models
+from qdrant_client import AsyncQdrantClient, models
 from qdrant_client.http.models import Distance, VectorParams, SparseVectorParams
-from langchain_qdrant import QdrantVectorStore, RetrievalMode, FastEmbedSparse
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
-from langchain_openai import OpenAIEmbeddings
+from langchain_core.embeddings import Embeddings
 
 from app.core.logger import logger
 from app.services.ai.config import ai_config
+from .jsonl_loader import load_jsonl_documents
 from .schemas import IngestionResult
 
 
-def load_jsonl_documents(paths: list[str]) -> List[Document]:
-    """Load JSONL files to Document(page_content=text, metadata=metadata)."""
-    try:
-        logger.info(f"📂 [JSONL] Loading documents from {len(paths)} JSONL files")
-        
-        docs: List[Document] = []
-        
-        for file_idx, p in enumerate(paths, 1):
-            path = Path(p)
-            
-            if not path.exists():
-                logger.warning(f"⚠️ [JSONL] File {file_idx} not found: {p}")
-                continue
-                
-            logger.info(f"📂 [JSONL] Processing file {file_idx}/{len(paths)}: {path.name}")
-            
-            file_docs = 0
-            with path.open("r", encoding="utf-8") as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    if not line:
-                        continue
-                        
-                    try:
-                        obj: Dict[str, Any] = json.loads(line)
-                        text = obj.get("text", "")
-                        meta = obj.get("metadata", {})
-                        
-                        if text:  # Only add documents with content
-                            docs.append(Document(page_content=text, metadata=meta))
-                            file_docs += 1
-                        else:
-                            logger.debug(f"📂 [JSONL] Skipping empty text at line {line_num} in {path.name}")
-                            
-                    except json.JSONDecodeError as e:
-                        logger.warning(f"⚠️ [JSONL] Invalid JSON at line {line_num} in {path.name}: {str(e)}")
-                        continue
-                        
-            logger.info(f"✅ [JSONL] Loaded {file_docs} documents from {path.name}")
-            
-        total_docs = len(docs)
-        logger.info(f"🎉 [JSONL] Total documents loaded: {total_docs}")
-        
-        return docs
-        
-    except Exception as e:
-        logger.error(f"❌ [JSONL] Failed to load JSONL documents: {str(e)}")
-        return []
+RAG_DATA_DIR = Path(__file__).parent / "rag_data"
+KNOWLEDGE_BASE_PATTERN = "adn_master_company_en_*.jsonl"
 
+# Fixed namespace so the same chunk always maps to the same point ID
+CHUNK_ID_NAMESPACE = uuid.UUID("6f1c2d8e-5b7a-4c3e-9a0d-2e4f6b8c1a35")
+
+
+def knowledge_base_paths() -> List[str]:
+    """JSONL knowledge base files shipped in ``rag_data``."""
+    return sorted(str(path) for path in RAG_DATA_DIR.glob(KNOWLEDGE_BASE_PATTERN))
+
+
+def split_documents(docs: List[Document]) -> List[Document]:
+    """Split documents into retrieval chunks."""
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=ai_config.ingest_chunk_size,
+        chunk_overlap=ai_config.ingest_chunk_overlap,
+    )
+    return splitter.split_documents(docs)
 
-def get_embedding_model() -> OpenAIEmbeddings:
-    """Get the dense embedding model according to configuration."""
-    try:
-        logger.info(f"🔤 [MODELS] Creating embedding model: {ai_config.openai_embedding_model}")
-        
-        embedding_model = OpenAIEmbeddings(
-            model=ai_config.openai_embedding_model,
-            api_key=ai_config.openai_api_key
-        )
-        
-        logger.info(f"✅ [MODELS] Embedding model created successfully: {ai_config.openai_embedding_model}")
-        return embedding_model
-        
-    except Exception as e:
-        logger.error(f"❌ [MODELS] Failed to create embedding model: {str(e)}")
-        raise
 
+def content_hash(chunk: Document) -> str:
+    """Stable hash of a chunk's text and metadata."""
+    payload = json.dumps(
+        {"text": chunk.page_content, "metadata": chunk.metadata},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-def ensure_collection(client: QdrantClient, collection: str, dim: int) -> None:
+
+def chunk_point_id(chunk_hash: str) -> str:
+    """Deterministic Qdrant point ID for a chunk hash."""
+    return str(uuid.uuid5(CHUNK_ID_NAMESPACE, chunk_hash))
+
+
+def estimate_tokens(texts: Sequence[str]) -> int:
+    """Rough token count (~4 characters per token) used for the rate budget."""
+    return sum(max(1, len(text) // 4) for text in texts)
+
+
+class EmbeddingRateBudget:
+    """Sliding one-minute window of embedding tokens shared by concurrent batches."""
+
+    def __init__(self, tokens_per_minute: int, window_seconds: float = 60.0):
+        self.tokens_per_minute = tokens_per_minute
+        self.window_seconds = window_seconds
+        self._spent: Deque[Tuple[float, int]] = deque()
+        self._lock = asyncio.Lock()
+
+    def _used(self, now: float) -> int:
+        while self._spent and now - self._spent[0][0] >= self.window_seconds:
+            self._spent.popleft()
+        return sum(tokens for _, tokens in self._spent)
+
+    async def acquire(self, tokens: int) -> float:
+        """
+        Wait until ``tokens`` fit in the current window and reserve them.
+
+        Returns:
+            Seconds spent waiting for budget
+        """
+        tokens = min(tokens, self.tokens_per_minute)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if self._used(now) + tokens <= self.tokens_per_minute:
+                    self._spent.append((now, tokens))
+                    return waited
+                delay = self.window_seconds - (now - self._spent[0][0])
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+async def ensure_collection(client: AsyncQdrantClient, collection: str, dim: int) -> None:
     """Create collection with dense and sparse vectors if it doesn't exist."""
     try:
-        if client.collection_exists(collection_name=collection):
+        if await client.collection_exists(collection_name=collection):
             logger.info(f"✅ [INGEST] Collection '{collection}' already exists")
             return
-            
+
         logger.info(f"🏗️ [INGEST] Creating new collection '{collection}' with dimension {dim}")
-        
-        client.create_collection(
+
+        await client.create_collection(
             collection_name=collection,
             vectors_config={"dense": VectorParams(size=dim, distance=Distance.COSINE)},
             sparse_vectors_config={"sparse": SparseVectorParams(index=models.SparseIndexParams(on_disk=False))},
             optimizers_config=models.OptimizersConfigDiff(indexing_threshold=20000),
         )
-        
+
         logger.info(f"✅ [INGEST] Collection '{collection}' created successfully")
-        
+
     except Exception as e:
         logger.error(f"❌ [INGEST] Failed to ensure collection '{collection}': {str(e)}")
         raise
 
 
-def ingest_jsonl(paths: List[str], batch_size: int = 200) -> QdrantVectorStore:
-    """Ingest JSONL files to Qdrant (HYBRID)."""
-    try:
-        logger.info(f"🚀 [INGEST] Starting hybrid JSONL ingestion with {len(paths)} files")
-        logger.info(f"📁 [INGEST] Input files: {paths}")
-        
-        # Step 1: Setup Qdrant client
-        logger.info("🔗 [INGEST] Connecting to Qdrant...")
-        client = QdrantClient(
-            url=ai_config.qdrant_url,
-            api_key=ai_config.qdrant_api_key,
-            prefer_grpc=True,
-            timeout=ai_config.timeout_seconds,
+def source_name(path: str) -> str:
+    """Source recorded on the points of a JSONL file (its file name)."""
+    return Path(path).name
+
+
+async def list_point_ids(
+    client: AsyncQdrantClient,
+    collection: str,
+    sources: Optional[Sequence[str]] = None,
+    page_size: int = 1000,
+) -> set[str]:
+    """IDs of the points stored in the collection (only those of ``sources`` when given)."""
+    scroll_filter = None
+    if sources is not None:
+        scroll_filter = models.Filter(
+            must=[models.FieldCondition(key="source", match=models.MatchAny(any=list(sources)))]
+        )
+    ids: set[str] = set()
+    offset = None
+    while True:
+        points, offset = await client.scroll(
+            collection_name=collection,
+            scroll_filter=scroll_filter,
+            limit=page_size,
+            offset=offset,
+            with_payload=False,
+            with_vectors=False,
         )
-        
-        # Step 2: Setup embeddings
-        logger.info("🔤 [INGEST] Setting up embeddings...")
+        ids.update(str(point.id) for point in points)
+        if offset is None:
+            return ids
+
+
+async def ingest_jsonl_incremental(
+    paths: List[str],
+    batch_size: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+    tokens_per_minute: Optional[int] = None,
+    client: Optional[AsyncQdrantClient] = None,
+    embeddings: Optional[Embeddings] = None,
+    sparse_embeddings: Optional[Any] = None,
+    full_sync: bool = False,
+) -> IngestionResult:
+    """
+    Synchronize the collection with the given JSONL files.
+
+    Args:
+        paths: JSONL files to ingest
+        batch_size: Chunks per embedding/upsert batch
+        max_concurrency: Embedding batches in flight at once
+        tokens_per_minute: Embedding rate budget (estimated tokens)
+        client: Async Qdrant client (defaults to the connection pool's)
+        embeddings: Dense embedding model (defaults to the configured OpenAI model)
+        sparse_embeddings: Sparse embedding model (defaults to FastEmbed BM25)
+        full_sync: ``paths`` are the whole knowledge base; delete every point they
+            do not produce, including points of other files
+
+    Returns:
+        IngestionResult: Diff counts, batch progress and throughput
+    """
+    start_time = time.perf_counter()
+    collection = ai_config.qdrant_collection_name
+    batch_size = batch_size or ai_config.ingest_batch_size
+    semaphore = asyncio.Semaphore(max_concurrency or ai_config.ingest_max_concurrency)
+    budget = EmbeddingRateBudget(tokens_per_minute or ai_config.ingest_tokens_per_minute)
+
+    logger.info(f"🚀 [INGEST] Starting incremental JSONL ingestion with {len(paths)} files")
+
+    if client is None:
+        from app.services.ai.shared.connection_pool import connection_pool
+        client = connection_pool.get_async_qdrant_client()
+    if embeddings is None:
+        from app.services.ai.shared.models import get_embedding_model
         embeddings = get_embedding_model()
-        sparse = FastEmbedSparse(model_name="Qdrant/bm25")  # BM25-like
-
-        # Step 3: Ensure collection exists
-        logger.info(f"🏗️ [INGEST] Ensuring collection '{ai_config.qdrant_collection_name}' exists...")
-        ensure_collection(client, ai_config.qdrant_collection_name, ai_config.openai_embedding_dimension)
-
-        # Step 4: Load and split documents
-        logger.info("📄 [INGEST] Loading JSONL documents...")
-        docs = load_jsonl_documents(paths)
-        logger.info(f"📄 [INGEST] Loaded {len(docs)} documents")
-        
-        logger.info("✂️ [INGEST] Splitting documents into chunks...")
-        splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=120)
-        chunks = splitter.split_documents(docs)
-        logger.info(f"✂️ [INGEST] Created {len(chunks)} chunks")
-
-        # Step 5: Setup vector store
-        logger.info("🏪 [INGEST] Setting up hybrid vector store...")
-        store = QdrantVectorStore(
-            client=client,
-            collection_name=ai_config.qdrant_collection_name,
-            embedding=embeddings,
-            sparse_embedding=sparse,
-            retrieval_mode=RetrievalMode.HYBRID,  # requires Qdrant >=1.10.0
-            vector_name="dense",
-            sparse_vector_name="sparse",
+    if sparse_embeddings is None:
+        from langchain_qdrant import FastEmbedSparse
+        sparse_embeddings = FastEmbedSparse(model_name="Qdrant/bm25")  # BM25-like
+
+    await ensure_collection(client, collection, ai_config.openai_embedding_dimension)
+
+    # Identical chunks collapse onto one point, owned by the last file that has them
+    desired: Dict[str, Tuple[str, Document, str]] = {}
+    documents_processed = chunks_created = 0
+    for path in paths:
+        source = source_name(path)
+        docs = load_jsonl_documents([path])
+        chunks = split_documents(docs)
+        documents_processed += len(docs)
+        chunks_created += len(chunks)
+        for chunk in chunks:
+            chunk_hash = content_hash(chunk)
+            desired[chunk_point_id(chunk_hash)] = (chunk_hash, chunk, source)
+    logger.info(f"✂️ [INGEST] {documents_processed} documents split into {chunks_created} chunks")
+
+    sources = sorted({source_name(path) for path in paths})
+    existing = await list_point_ids(client, collection)
+    owned = await list_point_ids(client, collection, sources=sources)
+    pending = [point_id for point_id in desired if point_id not in existing]
+    stale = sorted((existing if full_sync else owned) - desired.keys())
+    unchanged = len(desired) - len(pending)
+
+    # Unchanged points stored before sources were recorded (or under another file) take this run's source
+    unsourced: Dict[str, List[str]] = {}
+    for point_id, (_, _, source) in desired.items():
+        if point_id in existing and point_id not in owned:
+            unsourced.setdefault(source, []).append(point_id)
+    for source, point_ids in unsourced.items():
+        await client.set_payload(collection_name=collection, payload={"source": source}, points=point_ids, wait=True)
+    logger.info(
+        f"🔍 [INGEST] Diff: {len(pending)} new/changed, {unchanged} unchanged, {len(stale)} removed"
+    )
+
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    progress = {"batches": 0, "chunks": 0, "tokens": 0, "embedding_ms": 0.0, "budget_wait_ms": 0.0}
+
+    async def run_batch(batch_ids: List[str]) -> None:
+        texts = [desired[point_id][1].page_content for point_id in batch_ids]
+        tokens = estimate_tokens(texts)
+        async with semaphore:
+            waited = await budget.acquire(tokens)
+            embed_start = time.perf_counter()
+            dense = await embeddings.aembed_documents(texts)
+            sparse = await asyncio.to_thread(sparse_embeddings.embed_documents, texts)
+            progress["embedding_ms"] += (time.perf_counter() - embed_start) * 1000
+            progress["budget_wait_ms"] += waited * 1000
+
+            points = []
+            for point_id, dense_vector, sparse_vector in zip(batch_ids, dense, sparse):
+                chunk_hash, chunk, source = desired[point_id]
+                points.append(models.PointStruct(
+                    id=point_id,
+                    vector={
+                        "dense": dense_vector,
+                        "sparse": models.SparseVector(indices=sparse_vector.indices, values=sparse_vector.values),
+                    },
+                    payload={
+                        "page_content": chunk.page_content,
+                        "metadata": chunk.metadata,
+                        "content_hash": chunk_hash,
+                        "source": source,
+                    },
+                ))
+            await client.upsert(collection_name=collection, points=points, wait=True)
+
+        progress["batches"] += 1
+        progress["chunks"] += len(points)
+        progress["tokens"] += tokens
+        logger.info(
+            f"✅ [INGEST] Batch {progress['batches']}/{len(batches)} upserted "
+            f"({progress['chunks']}/{len(pending)} chunks)"
         )
 
-        # Step 6: Ingest documents in batches
-        logger.info(f"📥 [INGEST] Ingesting {len(chunks)} chunks in batches of {batch_size}...")
-        
-        total_batches = (len(chunks) + batch_size - 1) // batch_size
-        for i in range(0, len(chunks), batch_size):
-            batch_num = (i // batch_size) + 1
-            batch_chunks = chunks[i : i + batch_size]
-            
-            logger.info(f"📥 [INGEST] Processing batch {batch_num}/{total_batches} ({len(batch_chunks)} chunks)")
-            store.add_documents(documents=batch_chunks)
-            logger.info(f"✅ [INGEST] Batch {batch_num}/{total_batches} completed")
-
-        logger.info("🎉 [INGEST] Hybrid JSONL ingestion completed successfully")
-        return store
-        
-    except Exception as e:
-        logger.error(f"❌ [INGEST] Hybrid JSONL ingestion failed: {str(e)}")
-        raise
+    errors: List[str] = []
+    outcomes = await asyncio.gather(*(run_batch(batch) for batch in batches), return_exceptions=True)
+    for outcome in outcomes:
+        if isinstance(outcome, Exception):
+            logger.error(f"❌ [INGEST] Batch failed: {str(outcome)}")
+            errors.append(str(outcome))
 
+    # Removed chunks are only deleted once every replacement is stored, so a failed
+    # run never leaves the collection with less content than before
+    deleted = 0
+    if stale and not errors:
+        await client.delete(
+            collection_name=collection,
+            points_selector=models.PointIdsList(points=stale),
+            wait=True,
+        )
+        deleted = len(stale)
+        logger.info(f"🗑️ [INGEST] Deleted {deleted} removed chunks")
 
-async def ingest_documents() -> IngestionResult:
+    if progress["chunks"] or deleted:
+        # Cached retrieval results refer to the previous collection contents
+        from app.services.ai.shared.retrieval_cache import retrieval_cache
+        from app.services.ai.shared.connection_pool import connection_pool
+        retrieval_cache.invalidate_knowledge_base()
+        connection_pool.invalidate_collection_health()
+
+    elapsed = time.perf_counter() - start_time
+    embedding_seconds = progress["embedding_ms"] / 1000
+    result = IngestionResult(
+        success=not errors,
+        documents_processed=documents_processed,
+        chunks_created=chunks_created,
+        chunks_stored=unchanged + progress["chunks"],
+        chunks_unchanged=unchanged,
+        chunks_upserted=progress["chunks"],
+        chunks_deleted=deleted,
+        batches_completed=progress["batches"],
+        batches_total=len(batches),
+        embedding_tokens=progress["tokens"],
+        embedding_time_ms=int(progress["embedding_ms"]),
+        rate_limit_wait_ms=int(progress["budget_wait_ms"]),
+        chunks_per_second=round(progress["chunks"] / elapsed, 2) if elapsed > 0 else 0.0,
+        tokens_per_second=round(progress["tokens"] / elapsed, 2) if elapsed > 0 else 0.0,
+        processing_time_ms=int(elapsed * 1000),
+        errors=errors,
+        collection_name=collection,
+    )
+
+    logger.info(
+        f"🎉 [INGEST] Ingestion finished in {result.processing_time_ms}ms: "
+        f"{result.chunks_upserted} upserted, {result.chunks_unchanged} unchanged, {result.chunks_deleted} deleted | "
+        f"{result.chunks_per_second} chunks/s, {result.tokens_per_second} tokens/s "
+        f"(embedding {embedding_seconds:.2f}s, rate-limit wait {result.rate_limit_wait_ms}ms)"
+    )
+    return result
+
+
+async def ingest_documents(paths: Optional[List[str]] = None) -> IngestionResult:
     """
-    Ingest JSONL documents using the new hybrid approach.
-    
+    Ingest the knowledge base using the incremental hybrid approach.
+
+    Args:
+        paths: JSONL files to ingest; only points of these files are deleted when
+            their chunks disappear. Defaults to a full sync of the files in ``rag_data``.
+
     Returns:
         IngestionResult: Result of the ingestion process
     """
     try:
         logger.info("🔄 Starting hybrid document ingestion...")
-        
-        # Define JSONL paths
-        jsonl_paths = [
-            "/home/sa/dev/cu-su-backend/app/services/ai/shared/tools/rag/rag_data/adn_master_company_en_2025-08-24.jsonl",
-            # "/home/sa/dev/cu-su-backend/RAG_data/adn_master_company.jsonl",
-            # "/home/sa/dev/cu-su-backend/RAG_data/adn_iptv_channels.jsonl"
-        ]
-        
-        # Check that files exist
-        existing_paths = []
-        for path in jsonl_paths:
-            if Path(path).exists():
-                existing_paths.append(path)
-                logger.info(f"✅ Found JSONL file: {path}")
-            else:
-                logger.warning(f"❌ JSONL file not found: {path}")
-        
+
+        existing_paths = [path for path in (paths or knowledge_base_paths()) if Path(path).exists()]
         if not existing_paths:
             logger.error("No JSONL files found for ingestion")
             return IngestionResult(
@@ -215,42 +366,12 @@ async def ingest_documents() -> IngestionResult:
                 errors=["No JSONL files found"],
                 collection_name=ai_config.qdrant_collection_name
             )
-        
-        start_time = datetime.now(timezone.utc)
-        
-        # Use the new hybrid ingestion system
-        store = ingest_jsonl_hybrid(existing_paths)
-        
-        # Get collection info for result metrics
-        from qdrant_client import QdrantClient
-        client = QdrantClient(
-            url=ai_config.qdrant_url,
-            api_key=ai_config.qdrant_api_key,
-            prefer_grpc=True
-        )
-        
-        try:
-            collection_info = client.get_collection(ai_config.qdrant_collection_name)
-            vectors_count = collection_info.vectors_count or 0
-        except Exception as e:
-            logger.warning(f"⚠️ Could not get collection info: {str(e)}")
-            vectors_count = 0
-        
-        end_time = datetime.now(timezone.utc)
-        processing_time = (end_time - start_time).total_seconds()
-        
-        logger.info(f"✅ Hybrid ingestion completed: {vectors_count} vectors stored")
-        
-        return IngestionResult(
-            success=True,
-            documents_processed=len(existing_paths),
-            chunks_created=vectors_count,  # Assume chunks created equals vectors stored
-            chunks_stored=vectors_count,
-            processing_time_ms=int(processing_time * 1000),
-            errors=[],
-            collection_name=ai_config.qdrant_collection_name
-        )
-        
+
+        for path in existing_paths:
+            logger.info(f"✅ Found JSONL file: {path}")
+
+        return await ingest_jsonl_incremental(existing_paths, full_sync=paths is None)
+
     except Exception as e:
         logger.error(f"❌ Hybrid ingestion failed: {str(e)}")
         return IngestionResult(
@@ -267,130 +388,33 @@ async def ingest_documents() -> IngestionResult:
 async def check_collection_health() -> Dict[str, Any]:
     """
     Check the health of the Qdrant collection.
-    
+
     Returns:
         Dict containing collection health information
     """
-    try:
-        from qdrant_client import QdrantClient
-        client = QdrantClient(
-            url=ai_config.qdrant_url,
-            api_key=ai_config.qdrant_api_key,
-            prefer_grpc=True
-        )
-        
-        collection_exists = client.collection_exists(ai_config.qdrant_collection_name)
-        
-        if not collection_exists:
-            return {
-                "collection_exists": False,
-                "vectors_count": 0,
-                "status": "not_found"
-            }
-        
-        collection_info = client.get_collection(ai_config.qdrant_collection_name)
-        
-        return {
-            "collection_exists": True,
-            "vectors_count": collection_info.vectors_count,
-            "status": "healthy" if collection_info.vectors_count > 0 else "empty"
-        }
-        
-    except Exception as e:
-        logger.error(f"❌ Failed to check collection health: {str(e)}")
-        return {
-            "collection_exists": False,
-            "vectors_count": 0,
-            "status": "error",
-            "error": str(e)
-        }
+    from app.services.ai.shared.connection_pool import connection_pool
 
+    return await connection_pool.check_collection_health(force=True)
 
-def ensure_collection(client: QdrantClient, collection: str, dim: int) -> None:
-    """Crea colección con vector denso y esparso si no existe."""
-    try:
-        if client.collection_exists(collection_name=collection):
-            logger.info(f"✅ [INGEST] Collection '{collection}' already exists")
-            return
-            
-        logger.info(f"🏗️ [INGEST] Creating new collection '{collection}' with dimension {dim}")
-        
-        client.create_collection(
-            collection_name=collection,
-            vectors_config={"dense": VectorParams(size=dim, distance=Distance.COSINE)},
-            sparse_vectors_config={"sparse": SparseVectorParams(index=models.SparseIndexParams(on_disk=False))},
-            optimizers_config=models.OptimizersConfigDiff(indexing_threshold=20000),
-        )
-        
-        logger.info(f"✅ [INGEST] Collection '{collection}' created successfully")
-        
-    except Exception as e:
-        logger.error(f"❌ [INGEST] Failed to ensure collection '{collection}': {str(e)}")
-        raise
 
+def ingest_jsonl_hybrid(paths: List[str], batch_size: int = 200) -> IngestionResult:
+    """
+    Synchronous entry point for scripts; runs the incremental ingestion on its own event loop.
 
-def ingest_jsonl_hybrid(paths: List[str], batch_size: int = 200) -> QdrantVectorStore:
-    """Ingesta JSONL en Qdrant (HYBRID) - nueva implementación mejorada."""
-    try:
-        logger.info(f"🚀 [INGEST] Starting hybrid JSONL ingestion with {len(paths)} files")
-        logger.info(f"📁 [INGEST] Input files: {paths}")
-        
-        # Step 1: Setup Qdrant client
-        logger.info("🔗 [INGEST] Connecting to Qdrant...")
-        client = QdrantClient(
+    Args:
+        paths: JSONL files to ingest (points of other files are left untouched)
+        batch_size: Chunks per embedding/upsert batch
+    """
+    async def _run() -> IngestionResult:
+        client = AsyncQdrantClient(
             url=ai_config.qdrant_url,
             api_key=ai_config.qdrant_api_key,
             prefer_grpc=True,
             timeout=ai_config.timeout_seconds,
         )
-        
-        # Step 2: Setup embeddings
-        logger.info("🔤 [INGEST] Setting up embeddings...")
-        from app.services.ai.shared.models import get_embedding_model
-        embeddings = get_embedding_model()
-        sparse = FastEmbedSparse(model_name="Qdrant/bm25")  # BM25-like
-
-        # Step 3: Ensure collection exists
-        logger.info(f"🏗️ [INGEST] Ensuring collection '{ai_config.qdrant_collection_name}' exists...")
-        ensure_collection(client, ai_config.qdrant_collection_name, ai_config.openai_embedding_dimension)
-
-        # Step 4: Load and split documents
-        logger.info("📄 [INGEST] Loading JSONL documents...")
-        docs = load_jsonl_documents(paths)
-        logger.info(f"📄 [INGEST] Loaded {len(docs)} documents")
-        
-        logger.info("✂️ [INGEST] Splitting documents into chunks...")
-        splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=120)
-        chunks = splitter.split_documents(docs)
-        logger.info(f"✂️ [INGEST] Created {len(chunks)} chunks")
-
-        # Step 5: Setup vector store
-        logger.info("🏪 [INGEST] Setting up hybrid vector store...")
-        store = QdrantVectorStore(
-            client=client,
-            collection_name=ai_config.qdrant_collection_name,
-            embedding=embeddings,
-            sparse_embedding=sparse,
-            retrieval_mode=RetrievalMode.HYBRID,  # requiere Qdrant >=1.10.0
-            vector_name="dense",
-            sparse_vector_name="sparse",
-        )
+        try:
+            return await ingest_jsonl_incremental(paths, batch_size=batch_size, client=client)
+        finally:
+            await client.close()
 
-        # Step 6: Ingest documents in batches
-        logger.info(f"📥 [INGEST] Ingesting {len(chunks)} chunks in batches of {batch_size}...")
-        
-        total_batches = (len(chunks) + batch_size - 1) // batch_size
-        for i in range(0, len(chunks), batch_size):
-            batch_num = (i // batch_size) + 1
-            batch_chunks = chunks[i : i + batch_size]
-            
-            logger.info(f"📥 [INGEST] Processing batch {batch_num}/{total_batches} ({len(batch_chunks)} chunks)")
-            store.add_documents(documents=batch_chunks)
-            logger.info(f"✅ [INGEST] Batch {batch_num}/{total_batches} completed")
-
-        logger.info("🎉 [INGEST] Hybrid JSONL ingestion completed successfully")
-        return store
-        
-    except Exception as e:
-        logger.error(f"❌ [INGEST] Hybrid JSONL ingestion failed: {str(e)}")
-        raise
+    return asyncio.run(_run())
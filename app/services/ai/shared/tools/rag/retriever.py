@@ -2,6 +2,8 @@
 """
 High-performance RAG retriever with caching, connection pooling, and async support.
 Optimized for speed while maintaining quality through intelligent query strategies.
+Retrieval runs natively on the event loop (async Qdrant client, async embeddings
+and reranking); collection readiness is checked once and cached by the pool.
 """
 
 from __future__ import annotations
@@ -14,101 +16,43 @@ from langchain_core.documents import Document
 
 from app.services.ai.shared.connection_pool import connection_pool
 from app.services.ai.shared.retrieval_cache import retrieval_cache
+from app.services.ai.shared.embedding_cache import get_cached_embedding_model
 from app.services.ai.shared.performance_monitor import performance_monitor, RetrievalMetrics
+from app.services.ai.shared.strategy_controller import strategy_controller
 from app.services.ai.config import ai_config
 from app.core.logger import logger
 
 
-async def _check_and_ensure_collection() -> bool:
-    """Check if collection exists and has data, create if needed."""
-    try:
-        from qdrant_client import QdrantClient
-        
-        client = QdrantClient(
-            url=ai_config.qdrant_url,
-            api_key=ai_config.qdrant_api_key,
-            prefer_grpc=True
-        )
-        
-        # Check if collection exists
-        collection_exists = client.collection_exists(ai_config.qdrant_collection_name)
-        
-        if not collection_exists:
-            logger.info("🏗️ [RAG] Collection doesn't exist, creating and ingesting data...")
-            await _ingest_documents()
-            return True
-        
-        # Check if collection has data
-        collection_info = client.get_collection(ai_config.qdrant_collection_name)
-        if collection_info.vectors_count == 0:
-            logger.info("📦 [RAG] Collection is empty, ingesting data...")
-            await _ingest_documents()
-            return True
-        
-        logger.info(f"✅ [RAG] Collection healthy with {collection_info.vectors_count} vectors")
-        return True
-        
-    except Exception as e:
-        logger.error(f"❌ [RAG] Failed to check/ensure collection: {str(e)}")
-        return False
-
-
-async def _ingest_documents():
-    """Ingest documents using the hybrid approach."""
-    try:
-        from .ingest import ingest_documents
-        
-        logger.info("🚀 [RAG] Starting document ingestion...")
-        result = await ingest_documents()
-        
-        if result.success:
-            logger.info(f"✅ [RAG] Ingestion completed: {result.chunks_stored} chunks stored")
-        else:
-            logger.error(f"❌ [RAG] Ingestion failed: {result.errors}")
-            
-    except Exception as e:
-        logger.error(f"❌ [RAG] Failed to ingest documents: {str(e)}")
-
-
 def _determine_retrieval_strategy(query: str) -> Dict[str, Any]:
-    """Determine optimal retrieval strategy based on query characteristics."""
-    query_lower = query.lower().strip()
-    query_len = len(query.split())
+    """
+    Determine the retrieval strategy for a query.
     
-    # Fast strategy for simple/common queries
-    use_fast_mode = (
-        query_len <= 3 or  # Very short queries
-        any(term in query_lower for term in [
-            "hola", "hello", "hi", "precio", "price", "plan", "servicio", "service"
-        ])
+    The adaptive controller picks the tier (MultiQuery breadth, top-k, reranker)
+    from the query class and the measured latency of each tier.
+    """
+    return strategy_controller.select(query)
+
+
+def _retriever_for(strategy: Dict[str, Any], use_multiquery: bool):
+    return connection_pool.get_compression_retriever(
+        use_multiquery=use_multiquery,
+        reranker=strategy.get("reranker", "cohere"),
+        k=strategy.get("k"),
+        fetch_k=strategy.get("fetch_k"),
+        multiquery_breadth=strategy.get("multiquery_breadth", 3),
     )
-    
-    return {
-        "use_multiquery": not use_fast_mode,  # Skip MultiQuery for simple queries
-        "use_rerank": True,  # Always use rerank for quality
-        "cache_ttl": 600 if use_fast_mode else 300,  # Longer cache for simple queries
-        "strategy": "fast" if use_fast_mode else "comprehensive"
-    }
 
 
 async def _fast_retrieve(query: str, strategy: Dict[str, Any]) -> List[Document]:
     """Fast retrieval path without MultiQuery for better performance."""
     try:
-        # Try cache first
-        cached_results = retrieval_cache.get_cached_results(query, strategy)
-        if cached_results:
-            return cached_results
-        
         logger.info(f"🚀 [RAG] Fast retrieval for query: '{query[:50]}...'")
         
         # Use pooled retriever with compression
-        retriever = connection_pool.get_compression_retriever(use_multiquery=False)
+        retriever = _retriever_for(strategy, use_multiquery=False)
         
         # Execute retrieval
-        docs = await asyncio.to_thread(retriever.get_relevant_documents, query)
-        
-        # Cache results
-        retrieval_cache.cache_results(query, docs, strategy, strategy["cache_ttl"])
+        docs = await retriever.ainvoke(query)
         
         logger.info(f"✅ [RAG] Fast retrieval completed: {len(docs)} documents")
         return docs
@@ -121,38 +65,41 @@ async def _fast_retrieve(query: str, strategy: Dict[str, Any]) -> List[Document]
 async def _comprehensive_retrieve(query: str, strategy: Dict[str, Any]) -> List[Document]:
     """Comprehensive retrieval with MultiQuery for complex queries."""
     try:
-        # Try cache first
-        cached_results = retrieval_cache.get_cached_results(query, strategy)
-        if cached_results:
-            return cached_results
-        
         logger.info(f"🎯 [RAG] Comprehensive retrieval for query: '{query[:50]}...'")
         
         # Use pooled retriever with MultiQuery
-        retriever = connection_pool.get_compression_retriever(use_multiquery=True)
+        retriever = _retriever_for(strategy, use_multiquery=True)
         
-        # Execute retrieval with timeout
+        # Execute retrieval with a deadline derived from the latency SLO
         docs = await asyncio.wait_for(
-            asyncio.to_thread(retriever.get_relevant_documents, query),
-            timeout=15.0  # 15 second timeout for comprehensive retrieval
+            retriever.ainvoke(query),
+            timeout=strategy.get("timeout_seconds", 15.0)
         )
         
-        # Cache results
-        retrieval_cache.cache_results(query, docs, strategy, strategy["cache_ttl"])
-        
         logger.info(f"✅ [RAG] Comprehensive retrieval completed: {len(docs)} documents")
         return docs
         
     except asyncio.TimeoutError:
         logger.warning("⏰ [RAG] Comprehensive retrieval timed out, falling back to fast mode")
+        strategy["timed_out"] = True
         # Fallback to fast retrieval on timeout
-        strategy["use_multiquery"] = False
-        return await _fast_retrieve(query, strategy)
+        return await _fast_retrieve(query, strategy_controller.fallback_plan(strategy))
     except Exception as e:
         logger.error(f"❌ [RAG] Comprehensive retrieval failed: {str(e)}")
         raise
 
 
+async def _embed_query(query: str) -> Optional[List[float]]:
+    """Embed the query for semantic cache lookups (served from the embedding cache when repeated)."""
+    if not ai_config.semantic_cache_enabled:
+        return None
+    try:
+        return await get_cached_embedding_model().aembed_query(query)
+    except Exception as e:
+        logger.warning(f"⚠️ [RAG] Query embedding failed, skipping semantic cache: {str(e)}")
+        return None
+
+
 def _format_docs(docs: List[Document]) -> str:
     """Format context into compact text with source tags."""
     try:
@@ -189,27 +136,46 @@ async def retrieve_information(query: Annotated[str, "customer query"]) -> str:
     try:
         logger.info(f"🔍 [RAG] Starting optimized retrieval for query: '{query[:100]}...'")
         
-        # Step 1: Ensure collection exists and has data
-        collection_ready = await _check_and_ensure_collection()
+        # Step 1: Ensure collection exists and has data (cached for the health TTL)
+        collection_ready = await connection_pool.ensure_collection_ready()
         if not collection_ready:
             return "NO_CONTEXT_AVAILABLE: The knowledge base is not available at this time."
         
         # Step 2: Determine optimal retrieval strategy
         strategy = _determine_retrieval_strategy(query)
-        logger.info(f"📋 [RAG] Using {strategy['strategy']} strategy (multiquery: {strategy['use_multiquery']})")
+        logger.info(
+            f"📋 [RAG] Using {strategy['strategy']} strategy "
+            f"(multiquery: {strategy['use_multiquery']}, k: {strategy.get('k')}, reranker: {strategy['reranker']})"
+        )
         
-        # Step 3: Check cache first
+        # Step 3: Check the exact cache, then near-duplicate recent queries
         cached_results = retrieval_cache.get_cached_results(query, strategy)
         if cached_results:
             docs = cached_results
             cache_hit = True
             logger.info(f"🎯 [RAG] Cache hit! Retrieved {len(docs)} documents from cache")
         else:
-            # Step 4: Execute retrieval based on strategy
-            if strategy["use_multiquery"]:
-                docs = await _comprehensive_retrieve(query, strategy)
+            query_vector = await _embed_query(query)
+            cached_results = (
+                retrieval_cache.get_semantic_results(query_vector, strategy) if query_vector else None
+            )
+            if cached_results:
+                docs = cached_results
+                cache_hit = True
             else:
-                docs = await _fast_retrieve(query, strategy)
+                retrieval_cache.record_miss(strategy)
+                
+                # Step 4: Execute retrieval based on strategy
+                if strategy["use_multiquery"]:
+                    docs = await _comprehensive_retrieve(query, strategy)
+                else:
+                    docs = await _fast_retrieve(query, strategy)
+                
+                # Fallback results after a timeout are not cached as this strategy's answer
+                if not strategy.get("timed_out"):
+                    retrieval_cache.cache_results(
+                        query, docs, strategy, strategy["cache_ttl"], query_vector=query_vector
+                    )
         
         logger.info(f"📊 [RAG] Retrieved {len(docs)} documents for query")
         
@@ -227,6 +193,9 @@ async def retrieve_information(query: Annotated[str, "customer query"]) -> str:
         error = str(e)
         logger.error(f"❌ [RAG] Optimized retrieval failed: {error}")
         
+        # Re-check the collection on the next call instead of trusting the cached result
+        connection_pool.invalidate_collection_health()
+        
         # If it's a collection not found error, return no context signal
         if "doesn't exist" in error or "not found" in error.lower():
             logger.info("🏗️ [RAG] Collection doesn't exist yet, will be created on first use")
@@ -240,13 +209,16 @@ async def retrieve_information(query: Annotated[str, "customer query"]) -> str:
         end_time = time.time()
         total_time_ms = (end_time - start_time) * 1000
         
+        scores = [d.metadata["_score"] for d in docs if d.metadata.get("_score") is not None]
         metrics = RetrievalMetrics(
             query=query,
             strategy=strategy["strategy"] if strategy else "unknown",
             total_time_ms=total_time_ms,
             cache_hit=cache_hit,
             documents_found=len(docs),
-            error=error
+            error=error,
+            top_score=max(scores) if scores else None,
+            timed_out=bool(strategy and strategy.get("timed_out")),
         )
         
         performance_monitor.record_retrieval(metrics)
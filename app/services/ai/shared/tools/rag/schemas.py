@@ -66,6 +66,16 @@ class IngestionResult(BaseModel):
     documents_processed: int = Field(..., description="Number of documents processed")
     chunks_created: int = Field(..., description="Number of chunks created")
     chunks_stored: int = Field(..., description="Number of chunks stored in vector DB")
+    chunks_unchanged: int = Field(default=0, description="Chunks already stored with identical content")
+    chunks_upserted: int = Field(default=0, description="New or changed chunks embedded and upserted")
+    chunks_deleted: int = Field(default=0, description="Stored chunks removed from the source files")
+    batches_completed: int = Field(default=0, description="Embedding batches upserted")
+    batches_total: int = Field(default=0, description="Embedding batches scheduled")
+    embedding_tokens: int = Field(default=0, description="Estimated tokens sent to the embedding model")
+    embedding_time_ms: int = Field(default=0, description="Cumulative time spent embedding batches")
+    rate_limit_wait_ms: int = Field(default=0, description="Time batches waited for the embedding rate budget")
+    chunks_per_second: float = Field(default=0.0, description="Upserted chunks per second of wall time")
+    tokens_per_second: float = Field(default=0.0, description="Embedded tokens per second of wall time")
     processing_time_ms: int = Field(..., description="Total processing time in milliseconds")
     errors: List[str] = Field(default_factory=list, description="Any errors encountered")
     collection_name: str = Field(..., description="Target collection name")
@@ -0,0 +1,221 @@
+"""
+Token-budgeted conversation transcripts shared by the AI agents.
+
+Messages are streamed newest-first from the (conversation_id, _id) index with
+a projection, formatted one by one and counted with ``estimate_tokens``; the
+cursor stops as soon as the token budget (or message cap) is reached, so
+memory and prompt size stay bounded however long the conversation is. The
+kept messages are returned oldest first. Consumers that must see every message
+after a watermark (rolling summaries) stream oldest-first instead and resume
+from the last kept message.
+
+Full transcripts (no watermark or extra filter) are cached per conversation,
+formatter and budget, keyed by the conversation's newest message ID: a new
+message changes the key. Fields that change on existing messages (delivery
+status, reactions) do not, so cached formatters must leave them out.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from bson import ObjectId
+
+from app.core.logger import logger
+from app.db.client import database
+from app.services.ai.config import ai_config
+from app.services.ai.shared.utils import estimate_tokens
+
+
+# Formats one message document; None leaves the message out of the transcript
+MessageFormatter = Callable[[Dict[str, Any]], Optional[str]]
+
+_CURSOR_BATCH_SIZE = 100
+
+
+@dataclass
+class Transcript:
+    """Messages of a conversation that fit the budget, oldest first."""
+
+    conversation_id: str
+    messages: List[Dict[str, Any]] = field(default_factory=list)
+    lines: List[str] = field(default_factory=list)
+    token_count: int = 0
+    truncated: bool = False  # Messages were left out by the budget (newer ones when loaded oldest first)
+    last_message_id: Optional[str] = None  # Newest kept message
+
+    @property
+    def text(self) -> str:
+        """Formatted transcript, one message per line."""
+        return "\n".join(self.lines)
+
+
+def message_text(message: Dict[str, Any]) -> str:
+    """Text of a message document (text_content, then text/content)."""
+    return message.get("text_content") or message.get("text") or message.get("content") or ""
+
+
+class TranscriptService:
+    """Streams, budgets and caches conversation transcripts."""
+
+    def __init__(self, cache_size: Optional[int] = None):
+        """
+        Args:
+            cache_size: Cached transcripts kept (LRU)
+        """
+        self.cache_size = cache_size or ai_config.transcript_cache_max_entries
+        self._cache: "OrderedDict[Tuple[Hashable, ...], Transcript]" = OrderedDict()
+        self._stats = {"loads": 0, "cache_hits": 0, "cache_misses": 0, "truncated": 0, "messages_read": 0}
+
+    async def load(
+        self,
+        conversation_id: str,
+        formatter: MessageFormatter = message_text,
+        max_tokens: Optional[int] = None,
+        max_messages: Optional[int] = None,
+        after_message_id: Optional[str] = None,
+        query: Optional[Dict[str, Any]] = None,
+        projection: Optional[Dict[str, Any]] = None,
+        oldest_first: bool = False,
+        db=None
+    ) -> Transcript:
+        """
+        Stream the newest messages of a conversation until the budget is reached.
+
+        Args:
+            conversation_id: Conversation ID
+            formatter: Formats each message; its output is what the budget counts
+            max_tokens: Token budget of the formatted lines (None for no budget)
+            max_messages: Maximum messages kept (None for no cap)
+            after_message_id: Only messages newer than this one (rolling watermarks)
+            query: Extra message filters (e.g. direction)
+            projection: Message fields to load
+            oldest_first: Keep the oldest messages instead, so a caller can resume
+                after ``last_message_id`` without skipping any
+            db: Database handle (defaults to the shared client)
+
+        Returns:
+            Transcript with the kept messages and lines, oldest first
+        """
+        db = db if db is not None else await database.get_database()
+        self._stats["loads"] += 1
+
+        filters: Dict[str, Any] = {"conversation_id": ObjectId(conversation_id), **(query or {})}
+        if after_message_id and ObjectId.is_valid(after_message_id):
+            filters["_id"] = {"$gt": ObjectId(after_message_id)}
+
+        cursor = db.messages.find(filters, projection).sort("_id", 1 if oldest_first else -1)
+        if max_messages:
+            # One extra message tells whether anything was left out
+            cursor = cursor.limit(max_messages + 1)
+        cursor = cursor.batch_size(_CURSOR_BATCH_SIZE)
+
+        transcript = Transcript(conversation_id=conversation_id)
+        async for message in cursor:
+            self._stats["messages_read"] += 1
+            if max_messages and len(transcript.messages) >= max_messages:
+                transcript.truncated = True
+                break
+
+            line = formatter(message)
+            if line is None:
+                continue
+            tokens = estimate_tokens(line)
+            if max_tokens and transcript.messages and transcript.token_count + tokens > max_tokens:
+                transcript.truncated = True
+                break
+
+            transcript.messages.append(message)
+            transcript.lines.append(line)
+            transcript.token_count += tokens
+
+        if not oldest_first:
+            transcript.messages.reverse()
+            transcript.lines.reverse()
+        if transcript.messages:
+            transcript.last_message_id = str(transcript.messages[-1]["_id"])
+        if transcript.truncated:
+            self._stats["truncated"] += 1
+            logger.info(
+                f"✂️ [TRANSCRIPT] Kept {'oldest' if oldest_first else 'newest'} {len(transcript.messages)} messages "
+                f"({transcript.token_count} tokens) of conversation {conversation_id}"
+            )
+        return transcript
+
+    async def get_transcript(
+        self,
+        conversation_id: str,
+        formatter: MessageFormatter,
+        format_key: str,
+        max_tokens: Optional[int] = None,
+        max_messages: Optional[int] = None,
+        projection: Optional[Dict[str, Any]] = None,
+        db=None
+    ) -> Transcript:
+        """
+        Full-conversation transcript, cached until a new message arrives.
+
+        Args:
+            conversation_id: Conversation ID
+            formatter: Formats each message; must only use fields that never change once stored
+            format_key: Names the formatter (and projection) in the cache key
+            max_tokens: Token budget of the formatted lines
+            max_messages: Maximum messages kept
+            projection: Message fields to load
+            db: Database handle (defaults to the shared client)
+
+        Returns:
+            Cached or freshly loaded Transcript
+        """
+        db = db if db is not None else await database.get_database()
+
+        newest = await db.messages.find_one(
+            {"conversation_id": ObjectId(conversation_id)}, {"_id": 1}, sort=[("_id", -1)]
+        )
+        newest_id = str(newest["_id"]) if newest else None
+        cache_key = (conversation_id, newest_id, format_key, max_tokens, max_messages)
+
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            self._stats["cache_hits"] += 1
+            return cached
+
+        self._stats["cache_misses"] += 1
+        transcript = await self.load(
+            conversation_id,
+            formatter=formatter,
+            max_tokens=max_tokens,
+            max_messages=max_messages,
+            projection=projection,
+            db=db
+        )
+
+        # Older transcripts of the conversation are unreachable once a new message arrives
+        for key in [key for key in self._cache if key[0] == conversation_id and key[1] != newest_id]:
+            del self._cache[key]
+        self._cache[cache_key] = transcript
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return transcript
+
+    def clear_cache(self, conversation_id: Optional[str] = None) -> None:
+        """Drop cached transcripts (of one conversation, or all)."""
+        if conversation_id is None:
+            self._cache.clear()
+            return
+        for key in [key for key in self._cache if key[0] == conversation_id]:
+            del self._cache[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Load, cache and truncation counters."""
+        lookups = self._stats["cache_hits"] + self._stats["cache_misses"]
+        return {
+            **self._stats,
+            "cached_transcripts": len(self._cache),
+            "cache_hit_rate": round(self._stats["cache_hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+# Global transcript service instance
+transcript_service = TranscriptService()
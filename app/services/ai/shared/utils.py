@@ -55,6 +55,21 @@ def sanitize_text(text: str, max_length: int = 1000) -> str:
     return text.strip()
 
 
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate for budgeting (about 4 characters per token).
+    
+    Args:
+        text: Text to measure
+        
+    Returns:
+        Estimated token count
+    """
+    if not text:
+        return 0
+    return len(text) // 4 + 1
+
+
 def format_timestamp(timestamp: datetime) -> str:
     """
     Format timestamp for consistent display.
@@ -1,5 +1,6 @@
 """Business services package."""
 
 from .department_service import department_service
+from .reservation_slot_index import reservation_slot_index
 
-__all__ = ["department_service"] 
\ No newline at end of file
+__all__ = ["department_service", "reservation_slot_index"] 
\ No newline at end of file
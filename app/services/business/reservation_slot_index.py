@@ -0,0 +1,282 @@
+"""
+Installation slot availability index and atomic booking.
+
+MongoDB stays the source of truth: a unique ``(date, time_slot)`` index plus an
+upsert with ``$setOnInsert`` means two concurrent bookings of the same slot can
+never both succeed. Redis keeps a compact bitmap of booked slots (two bits per
+day, ``08:00`` then ``13:00``, offset by days since a fixed epoch) so that
+availability reads are a single ``BITFIELD_RO`` over the requested days instead
+of a collection scan, and a booking first claims its bit with ``SETBIT`` to
+reject taken slots without touching MongoDB.
+
+The bitmap is rebuilt from MongoDB when it is missing or older than
+``REBUILD_INTERVAL_SECONDS``; without Redis every call falls back to MongoDB.
+Rebuilds and bookings share a Redis lock (``LOCK_KEY``), so a booking that
+claims its bit while a rebuild is reading MongoDB cannot be wiped out by the
+rebuild's snapshot. Bookings are serialized by the lock, which is fine at
+installation-booking volumes.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+import asyncio
+
+from pymongo.errors import DuplicateKeyError
+
+from app.core.logger import logger
+
+
+TIME_SLOTS = ("08:00", "13:00")
+SLOTS_PER_DAY = len(TIME_SLOTS)
+BITMAP_KEY = "reservations:slot_bitmap"
+READY_KEY = "reservations:slot_bitmap:ready"
+LOCK_KEY = "reservations:slot_bitmap:lock"
+REBUILD_INTERVAL_SECONDS = 3600
+LOCK_TIMEOUT_SECONDS = 30  # Expires the lock if its holder dies mid-booking
+LOCK_WAIT_SECONDS = 10
+_EPOCH = date(2024, 1, 1)
+
+
+def _day_offset(day: date) -> int:
+    return (day - _EPOCH).days * SLOTS_PER_DAY
+
+
+def slot_offset(date_str: str, time_slot: str) -> int:
+    """Bit offset of a slot in the bitmap."""
+    day = datetime.strptime(date_str, "%Y-%m-%d").date()
+    return _day_offset(day) + TIME_SLOTS.index(time_slot)
+
+
+class ReservationSlotIndex:
+    """Redis bitmap of booked installation slots backed by MongoDB."""
+
+    def __init__(self, redis_client: Any = None):
+        """
+        Args:
+            redis_client: redis.asyncio client; defaults to the shared redis_service connection
+        """
+        self._redis = redis_client
+        self._rebuild_lock = asyncio.Lock()
+        self._stats = {"index_reads": 0, "scan_reads": 0, "bookings": 0, "conflicts": 0, "rebuilds": 0}
+
+    async def _client(self) -> Optional[Any]:
+        if self._redis is not None:
+            return self._redis
+        try:
+            from app.services.cache.redis_service import redis_service
+
+            await redis_service.connect()
+            return redis_service.redis
+        except Exception as e:
+            logger.warning(f"⚠️ [SLOTS] Redis unavailable, using MongoDB for slot availability: {str(e)}")
+            return None
+
+    @staticmethod
+    def _lock(redis_client: Any) -> Any:
+        """Redis lock held by rebuilds and bookings while they touch the bitmap."""
+        return redis_client.lock(LOCK_KEY, timeout=LOCK_TIMEOUT_SECONDS, blocking_timeout=LOCK_WAIT_SECONDS)
+
+    async def rebuild(self, db, redis_client: Any = None) -> int:
+        """
+        Rebuild the bitmap from upcoming reservations in MongoDB.
+
+        Holds the booking lock from the MongoDB read until the new bitmap is
+        written, so no booking lands between the snapshot and the swap.
+
+        Args:
+            db: Motor database
+            redis_client: Redis client (resolved when omitted)
+
+        Returns:
+            Number of booked slots indexed
+        """
+        redis_client = redis_client or await self._client()
+        if redis_client is None:
+            return 0
+
+        async with self._lock(redis_client):
+            today = date.today().strftime("%Y-%m-%d")
+            booked = await db.installation_reservations.find(
+                {"date": {"$gte": today}}, {"date": 1, "time_slot": 1}
+            ).to_list(length=None)
+
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.delete(BITMAP_KEY)
+            for reservation in booked:
+                if reservation.get("time_slot") in TIME_SLOTS:
+                    pipe.setbit(BITMAP_KEY, slot_offset(reservation["date"], reservation["time_slot"]), 1)
+            pipe.set(READY_KEY, datetime.now().isoformat(), ex=REBUILD_INTERVAL_SECONDS)
+            await pipe.execute()
+
+        self._stats["rebuilds"] += 1
+        logger.info(f"📅 [SLOTS] Slot index rebuilt with {len(booked)} upcoming reservations")
+        return len(booked)
+
+    async def _ready_client(self, db) -> Optional[Any]:
+        """Redis client with a current bitmap, or None to fall back to MongoDB."""
+        redis_client = await self._client()
+        if redis_client is None:
+            return None
+        try:
+            if not await redis_client.exists(READY_KEY):
+                async with self._rebuild_lock:
+                    if not await redis_client.exists(READY_KEY):
+                        await self.rebuild(db, redis_client)
+            return redis_client
+        except Exception as e:
+            logger.warning(f"⚠️ [SLOTS] Slot index unavailable, using MongoDB: {str(e)}")
+            return None
+
+    async def _booked_masks(self, db, start: date, days: int) -> Optional[List[int]]:
+        """Two-bit booked mask per day (08:00 is the high bit), read in one command."""
+        redis_client = await self._ready_client(db)
+        if redis_client is None:
+            return None
+        fmt = f"u{SLOTS_PER_DAY}"
+        offsets = [_day_offset(start + timedelta(days=i)) for i in range(days)]
+        try:
+            return await redis_client.bitfield_ro(
+                BITMAP_KEY, fmt, offsets[0], items=[(fmt, offset) for offset in offsets[1:]]
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ [SLOTS] Slot index read failed, using MongoDB: {str(e)}")
+            return None
+
+    async def _scan_booked(self, db, start: date, days: int) -> List[int]:
+        """Booked masks from a MongoDB range query (fallback path)."""
+        end = start + timedelta(days=days - 1)
+        booked = await db.installation_reservations.find(
+            {"date": {"$gte": start.strftime("%Y-%m-%d"), "$lte": end.strftime("%Y-%m-%d")}},
+            {"date": 1, "time_slot": 1}
+        ).to_list(length=None)
+
+        masks = [0] * days
+        for reservation in booked:
+            if reservation.get("time_slot") not in TIME_SLOTS:
+                continue
+            index = (datetime.strptime(reservation["date"], "%Y-%m-%d").date() - start).days
+            if 0 <= index < days:
+                masks[index] |= 1 << (SLOTS_PER_DAY - 1 - TIME_SLOTS.index(reservation["time_slot"]))
+        return masks
+
+    async def available_slots(self, db, start: date, days: int) -> Dict[str, List[str]]:
+        """
+        Free slots per day.
+
+        Args:
+            db: Motor database
+            start: First day
+            days: Number of days
+
+        Returns:
+            {YYYY-MM-DD: [HH:MM, ...]} for days with at least one free slot
+        """
+        masks = await self._booked_masks(db, start, days)
+        if masks is None:
+            masks = await self._scan_booked(db, start, days)
+            self._stats["scan_reads"] += 1
+        else:
+            self._stats["index_reads"] += 1
+
+        available: Dict[str, List[str]] = {}
+        for index, mask in enumerate(masks):
+            free = [
+                slot for position, slot in enumerate(TIME_SLOTS)
+                if not mask & (1 << (SLOTS_PER_DAY - 1 - position))
+            ]
+            if free:
+                available[(start + timedelta(days=index)).strftime("%Y-%m-%d")] = free
+        return available
+
+    async def book(self, db, reservation_doc: Dict[str, Any]) -> Optional[str]:
+        """
+        Atomically book a slot.
+
+        Args:
+            db: Motor database
+            reservation_doc: Reservation document including ``date`` and ``time_slot``
+
+        Returns:
+            Inserted reservation ID, or None when the slot is already booked
+        """
+        redis_client = await self._ready_client(db)
+        if redis_client is None:
+            return await self._book(db, reservation_doc, None)
+
+        try:
+            lock = self._lock(redis_client)
+            acquired = await lock.acquire()
+        except Exception as e:
+            logger.warning(f"⚠️ [SLOTS] Slot lock failed: {str(e)}")
+            acquired = False
+        if not acquired:
+            # MongoDB still decides; the bitmap misses this booking, so force a rebuild on the next read
+            logger.warning("⚠️ [SLOTS] Slot lock unavailable, booking through MongoDB only")
+            try:
+                await redis_client.delete(READY_KEY)
+            except Exception:
+                pass
+            return await self._book(db, reservation_doc, None)
+
+        try:
+            return await self._book(db, reservation_doc, redis_client)
+        finally:
+            try:
+                await lock.release()
+            except Exception as e:
+                logger.warning(f"⚠️ [SLOTS] Failed to release slot lock: {str(e)}")
+
+    async def _book(self, db, reservation_doc: Dict[str, Any], redis_client: Optional[Any]) -> Optional[str]:
+        """Claim the slot bit (when Redis is given) and upsert the reservation."""
+        slot = {"date": reservation_doc["date"], "time_slot": reservation_doc["time_slot"]}
+        offset = slot_offset(slot["date"], slot["time_slot"])
+
+        claimed = False
+        if redis_client is not None:
+            try:
+                previous = await redis_client.setbit(BITMAP_KEY, offset, 1)
+                claimed = previous == 0
+                if not claimed and await db.installation_reservations.find_one(slot, {"_id": 1}):
+                    self._stats["conflicts"] += 1
+                    return None
+                # Bit was set but MongoDB has no reservation (stale index): MongoDB decides below
+            except Exception as e:
+                logger.warning(f"⚠️ [SLOTS] Slot claim failed, booking through MongoDB only: {str(e)}")
+                redis_client = None
+
+        try:
+            # The filter fields seed the inserted document; the unique index makes this atomic
+            result = await db.installation_reservations.update_one(
+                slot,
+                {"$setOnInsert": {k: v for k, v in reservation_doc.items() if k not in slot}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            result = None  # Concurrent upsert of the same slot lost the race on the unique index
+        except Exception:
+            if claimed:
+                await self._release(redis_client, offset)
+            raise
+
+        if result is None or result.upserted_id is None:
+            self._stats["conflicts"] += 1
+            return None
+
+        self._stats["bookings"] += 1
+        return str(result.upserted_id)
+
+    @staticmethod
+    async def _release(redis_client: Any, offset: int) -> None:
+        try:
+            await redis_client.setbit(BITMAP_KEY, offset, 0)
+        except Exception as e:
+            # The slot shows as booked until the next rebuild
+            logger.warning(f"⚠️ [SLOTS] Failed to release slot bit {offset}: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Read/booking counters."""
+        return dict(self._stats)
+
+
+# Global slot index instance
+reservation_slot_index = ReservationSlotIndex()
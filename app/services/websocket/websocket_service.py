@@ -143,6 +143,41 @@ class ConnectionManager:
             logger.warning(f"❌ [WEBSOCKET] No subscribers found for conversation {conversation_id}")
             logger.info(f"📋 [WEBSOCKET] Current conversation subscribers: {dict(self.conversation_subscribers)}")
     
+    async def send_stream_event(self, message: dict, conversation_id: str = None, user_id: str = None):
+        """
+        Send a high-frequency streaming event (e.g. ``ai_partial`` tokens).
+        
+        Targets a single user when ``user_id`` is given, otherwise every subscriber
+        of the conversation. The payload is serialized once and per-event logging is
+        kept at debug level so token streams don't flood the logs.
+        """
+        if user_id is not None:
+            user_ids = [user_id]
+        else:
+            user_ids = list(self.conversation_subscribers.get(conversation_id, ()))
+        
+        if not user_ids:
+            return
+        
+        payload = json.dumps(message)
+        for target_user_id in user_ids:
+            connections = self.active_connections.get(target_user_id)
+            if not connections:
+                continue
+            
+            disconnected = set()
+            for connection in connections:
+                try:
+                    await connection.send_text(payload)
+                except Exception as e:
+                    logger.debug(f"Error streaming to user {target_user_id}: {str(e)}")
+                    disconnected.add(connection)
+            
+            for connection in disconnected:
+                connections.discard(connection)
+        
+        logger.debug(f"🔔 [WEBSOCKET] Streamed {message.get('type', 'unknown')} to {len(user_ids)} users")
+    
     async def broadcast_to_all(self, message: dict):
         """Broadcast a message to all connected users."""
         for user_id in list(self.active_connections.keys()):
@@ -528,6 +563,29 @@ class WebSocketService:
         await manager.broadcast_to_conversation(notification, str(conversation_id))
         logger.info(f"🤖 [WS] Broadcasted AI response notification for conversation {conversation_id}")
     
+    @staticmethod
+    async def notify_ai_partial(conversation_id: Optional[str], partial: dict, user_id: str = None):
+        """
+        Stream a partial AI output event (token delta or tool progress).
+        
+        Args:
+            conversation_id: Conversation the output belongs to (may be None for writer drafts)
+            partial: Event fields (stream_id, source, event, delta, tool, sequence)
+            user_id: Send only to this user instead of the conversation subscribers
+        """
+        notification = {
+            "type": "ai_partial",
+            "conversation_id": str(conversation_id) if conversation_id else None,
+            **partial,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+        
+        await manager.send_stream_event(
+            notification,
+            conversation_id=str(conversation_id) if conversation_id else None,
+            user_id=user_id
+        )
+
     @staticmethod
     async def notify_autoreply_toggled(conversation_id: str, enabled: bool, changed_by: str = None):
         """Notify about auto-reply toggle changes."""
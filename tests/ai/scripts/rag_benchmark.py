@@ -0,0 +1,596 @@
+"""
+Offline benchmark and regression harness for RAG retrieval.
+
+Replays the labelled queries in ``rag_data/benchmark_queries.jsonl`` through the
+real ``adn_retrieve`` tool, with every external provider replaced by a local
+stand-in:
+
+- Qdrant: in-memory ``AsyncQdrantClient`` loaded by the incremental ingestion
+- Embeddings: deterministic feature-hashing vectors (bag of words + bigrams)
+- MultiQuery LLM: rule-based query expansion
+- Cohere rerank: score fusion reranker (local rerankers run as configured)
+
+Each stand-in can add a simulated provider latency. The report records per-stage
+latency (embed, search, multiquery, rerank, format), recall@k/MRR against the
+labelled slugs and cache hit rates per pass, as sorted JSON that can be diffed
+between commits (``--baseline`` prints the deltas).
+
+Stand-in embeddings only match lexically, so absolute recall is not comparable
+with production; use it to catch regressions between runs of this harness.
+
+The stand-ins are patched over process-wide singletons, so this harness lives
+with the tests and never runs inside a process serving traffic.
+
+Usage:
+    python tests/ai/scripts/rag_benchmark.py --output rag.json
+    python tests/ai/scripts/rag_benchmark.py --embed-latency-ms 80 --llm-latency-ms 600 --baseline rag.json
+    python tests/ai/scripts/rag_benchmark.py --set rag_reranker_comprehensive=fusion
+"""
+
+from contextlib import ExitStack, asynccontextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+from unittest.mock import patch
+import argparse
+import asyncio
+import hashlib
+import json
+import re
+import statistics
+import sys
+import time
+
+import numpy as np
+from langchain_core.callbacks import Callbacks
+from langchain_core.documents import BaseDocumentCompressor, Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.llms import LLM
+from langchain_qdrant.sparse_embeddings import SparseVector
+from qdrant_client import AsyncQdrantClient
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(project_root))
+
+from app.services.ai.config import ai_config
+from app.services.ai.shared.embedding_cache import CachedEmbeddings
+from app.services.ai.shared.rerank_benchmark import DEFAULT_QUERIES, load_benchmark_queries
+from app.services.ai.shared.rerankers import ScoreFusionReranker, create_local_reranker, tokenize
+from app.services.ai.shared.retrieval_cache import RetrievalCache
+from app.core.logger import logger
+
+
+STAGES = ("embed", "search", "multiquery", "rerank", "format")
+RECALL_AT = (1, 3, 6)
+
+_TAG_RE = re.compile(r"^\[([^\]]+)\] ")
+_query_trace: ContextVar[Optional[SimpleNamespace]] = ContextVar("rag_benchmark_trace", default=None)
+
+
+def _record_stage(stage: str, started: float) -> None:
+    """Add the time since ``started`` to the current query's stage (parallel calls are summed)."""
+    trace = _query_trace.get()
+    if trace is not None:
+        trace.stages[stage] = trace.stages.get(stage, 0.0) + (time.perf_counter() - started) * 1000
+
+
+def _hashed(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _features(text: str) -> List[str]:
+    tokens = tokenize(text) or ["<empty>"]
+    return tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+
+
+# ==================== STUB PROVIDERS ====================
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic signed feature-hashing embeddings with a simulated API latency."""
+
+    def __init__(self, dimension: int, latency_ms: float = 0.0):
+        self.dimension = dimension
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    def _vector(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for feature in _features(text):
+            value = _hashed(feature)
+            vector[value % self.dimension] += 1.0 if value >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        time.sleep(self.latency_ms / 1000)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        await asyncio.sleep(self.latency_ms / 1000)
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+class HashingSparseEmbeddings:
+    """Term-frequency sparse vectors over hashed tokens (stands in for FastEmbed BM25)."""
+
+    def embed_documents(self, texts: List[str]) -> List[SparseVector]:
+        vectors = []
+        for text in texts:
+            counts: Dict[int, float] = {}
+            for token in tokenize(text):
+                index = _hashed(token) % (1 << 20)
+                counts[index] = counts.get(index, 0.0) + 1.0
+            vectors.append(SparseVector(indices=list(counts), values=list(counts.values())))
+        return vectors
+
+
+class StubQueryExpander(LLM):
+    """MultiQuery LLM stand-in: accent-folded and keyword-only variants of the question."""
+
+    latency_ms: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-query-expander"
+
+    @staticmethod
+    def _expand(prompt: str) -> str:
+        question = prompt.rsplit("Original question:", 1)[-1].strip()
+        words = tokenize(question)
+        keywords = [word for word in words if len(word) > 3]
+        return "\n".join([" ".join(words), " ".join(keywords) or question])
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        started = time.perf_counter()
+        time.sleep(self.latency_ms / 1000)
+        expanded = self._expand(prompt)
+        _record_stage("multiquery", started)
+        return expanded
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        started = time.perf_counter()
+        await asyncio.sleep(self.latency_ms / 1000)
+        expanded = self._expand(prompt)
+        _record_stage("multiquery", started)
+        return expanded
+
+
+class TimedCompressor(BaseDocumentCompressor):
+    """Times a reranker, optionally adding a simulated remote round trip."""
+
+    inner: Any
+    latency_ms: float = 0.0
+
+    def compress_documents(
+        self,
+        documents: Sequence[Document],
+        query: str,
+        callbacks: Optional[Callbacks] = None,
+    ) -> Sequence[Document]:
+        started = time.perf_counter()
+        time.sleep(self.latency_ms / 1000)
+        ranked = self.inner.compress_documents(documents, query)
+        _record_stage("rerank", started)
+        return ranked
+
+    async def acompress_documents(
+        self,
+        documents: Sequence[Document],
+        query: str,
+        callbacks: Optional[Callbacks] = None,
+    ) -> Sequence[Document]:
+        started = time.perf_counter()
+        await asyncio.sleep(self.latency_ms / 1000)
+        ranked = await self.inner.acompress_documents(documents, query)
+        _record_stage("rerank", started)
+        return ranked
+
+
+class TimedEmbeddings(Embeddings):
+    """Times query embedding as seen by the pipeline (cache hits included)."""
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        started = time.perf_counter()
+        vectors = await self.embeddings.aembed_documents(texts)
+        _record_stage("embed", started)
+        return vectors
+
+    async def aembed_query(self, text: str) -> List[float]:
+        started = time.perf_counter()
+        vector = await self.embeddings.aembed_query(text)
+        _record_stage("embed", started)
+        return vector
+
+
+class TimedQdrantClient:
+    """Async Qdrant client proxy that times vector searches."""
+
+    def __init__(self, client: AsyncQdrantClient):
+        self._client = client
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+    async def query_points(self, *args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return await self._client.query_points(*args, **kwargs)
+        finally:
+            _record_stage("search", started)
+
+
+# ==================== OFFLINE PIPELINE ====================
+
+@asynccontextmanager
+async def offline_rag(
+    embed_latency_ms: float = 0.0,
+    llm_latency_ms: float = 0.0,
+    rerank_latency_ms: float = 0.0,
+    overrides: Optional[Dict[str, Any]] = None,
+    paths: Optional[List[str]] = None,
+) -> AsyncIterator[SimpleNamespace]:
+    """
+    Point the RAG tool at local stand-ins for the duration of the block.
+
+    The connection pool, retrieval cache and model factories are process-wide, so
+    the harness must not run inside a process that is serving traffic.
+
+    Args:
+        embed_latency_ms: Simulated embedding API latency per call
+        llm_latency_ms: Simulated MultiQuery LLM latency per call
+        rerank_latency_ms: Simulated Cohere rerank latency per call
+        overrides: ``AIConfig`` fields to override (e.g. rerankers per strategy)
+        paths: Knowledge base files (defaults to ``rag_data``)
+
+    Yields:
+        Namespace with the retrieval cache, cached embeddings and Qdrant client in use
+    """
+    from app.services.ai.shared import connection_pool as pool_module
+    from app.services.ai.shared import retrieval_cache as cache_module
+    from app.services.ai.shared import strategy_controller as controller_module
+    from app.services.ai.shared.performance_monitor import PerformanceMonitor
+    from app.services.ai.shared.tools.rag import retriever as rag_retriever
+    from app.services.ai.shared.tools.rag.ingest import ingest_jsonl_incremental, knowledge_base_paths
+
+    config = ai_config.model_copy(update=overrides or {})
+    pool = pool_module.connection_pool
+    client = AsyncQdrantClient(":memory:")
+
+    cache = RetrievalCache()
+    cache.enabled = False  # Exact layer needs Redis; the semantic layer is in-process
+    cache.redis_client = None
+    embeddings = CachedEmbeddings(
+        HashingEmbeddings(config.openai_embedding_dimension, latency_ms=embed_latency_ms),
+        namespace="offline-benchmark",
+        use_redis=False,
+    )
+    timed_embeddings = TimedEmbeddings(embeddings)
+    top_n = min(6, config.rag_retrieval_k)
+
+    def timed_local_reranker(name: str, top_n: int) -> TimedCompressor:
+        return TimedCompressor(inner=create_local_reranker(name, top_n))
+
+    def traced_strategy(query: str) -> Dict[str, Any]:
+        plan = controller.select(query)
+        trace = _query_trace.get()
+        if trace is not None:
+            trace.tier = plan["strategy"]
+        return plan
+
+    def timed_format(docs: List[Document]) -> str:
+        started = time.perf_counter()
+        formatted = format_docs(docs)
+        _record_stage("format", started)
+        return formatted
+
+    format_docs = rag_retriever._format_docs
+    # Fresh monitor and controller so earlier traffic does not steer tier selection
+    monitor = PerformanceMonitor()
+    controller = controller_module.AdaptiveStrategyController()
+    pool_state = {
+        name: getattr(pool, name)
+        for name in ("_async_qdrant_client", "_multiquery_retrievers", "_cohere_rerank",
+                     "_local_rerankers", "_collection_health", "_collection_checked_at")
+    }
+
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(cache_module, "retrieval_cache", cache))
+        for module in (pool_module, rag_retriever, controller_module):
+            stack.enter_context(patch.object(module, "ai_config", config))
+        for module in (rag_retriever, controller_module):
+            stack.enter_context(patch.object(module, "performance_monitor", monitor))
+        stack.enter_context(patch.object(rag_retriever, "strategy_controller", controller))
+        stack.enter_context(patch.object(rag_retriever, "_determine_retrieval_strategy", traced_strategy))
+        for module in (pool_module, rag_retriever):
+            stack.enter_context(patch.object(module, "get_cached_embedding_model", return_value=timed_embeddings))
+        stack.enter_context(patch.object(pool_module, "get_chat_model", return_value=StubQueryExpander(latency_ms=llm_latency_ms)))
+        stack.enter_context(patch.object(pool_module, "create_local_reranker", timed_local_reranker))
+        stack.enter_context(patch.object(rag_retriever, "retrieval_cache", cache))
+        stack.enter_context(patch.object(rag_retriever, "_format_docs", timed_format))
+
+        try:
+            result = await ingest_jsonl_incremental(
+                paths or knowledge_base_paths(),
+                client=client,
+                embeddings=HashingEmbeddings(config.openai_embedding_dimension),
+                sparse_embeddings=HashingSparseEmbeddings(),
+            )
+            if not result.success:
+                raise RuntimeError(f"Offline ingestion failed: {result.errors}")
+
+            pool._async_qdrant_client = TimedQdrantClient(client)
+            pool._multiquery_retrievers = {}
+            pool._cohere_rerank = TimedCompressor(
+                inner=ScoreFusionReranker(top_n=top_n, dense_weight=config.rerank_fusion_dense_weight),
+                latency_ms=rerank_latency_ms,
+            )
+            pool._local_rerankers = {}
+            pool._collection_health = None
+            pool._collection_checked_at = 0.0
+
+            yield SimpleNamespace(
+                cache=cache, embeddings=embeddings, client=client, config=config, controller=controller
+            )
+        finally:
+            for name, value in pool_state.items():
+                setattr(pool, name, value)
+            await client.close()
+
+
+# ==================== METRICS ====================
+
+def ranked_slugs(output: str) -> List[str]:
+    """Source slugs in the order the tool returned them."""
+    if output.startswith(("NO_CONTEXT_AVAILABLE", "ERROR_ACCESSING_KNOWLEDGE")):
+        return []
+    return [match.group(1) for part in output.split("\n\n---\n\n") if (match := _TAG_RE.match(part))]
+
+
+def retrieval_quality(slugs: Sequence[str], relevant: Sequence[str]) -> Dict[str, float]:
+    """recall@k for ``RECALL_AT`` and MRR against the labelled slugs."""
+    relevant = set(relevant)
+    first_hit = next((rank for rank, slug in enumerate(slugs, 1) if slug in relevant), None)
+    quality = {
+        f"recall_at_{k}": len(relevant.intersection(slugs[:k])) / len(relevant)
+        for k in RECALL_AT
+    }
+    quality["mrr"] = 1.0 / first_hit if first_hit else 0.0
+    return quality
+
+
+def _latency_summary(values: Sequence[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "mean": round(statistics.mean(ordered), 3),
+        "p50": round(ordered[len(ordered) // 2], 3),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+async def _run_query(item: Dict[str, Any]) -> Dict[str, Any]:
+    from app.services.ai.shared.tools.rag import retriever as rag_retriever
+
+    trace = SimpleNamespace(stages={}, tier=None)
+    token = _query_trace.set(trace)
+    started = time.perf_counter()
+    try:
+        output = await rag_retriever.retrieve_information.ainvoke({"query": item["query"]})
+    finally:
+        _query_trace.reset(token)
+    stages = trace.stages
+    total_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        "query": item["query"],
+        "strategy": trace.tier,
+        # Every retrieval searches Qdrant; a query that never did was served from cache
+        "cache_hit": "search" not in stages and not output.startswith("ERROR_ACCESSING_KNOWLEDGE"),
+        "slugs": ranked_slugs(output),
+        "latency_ms": {"total": round(total_ms, 3), **{stage: round(stages.get(stage, 0.0), 3) for stage in STAGES}},
+        **retrieval_quality(ranked_slugs(output), item["relevant"]),
+    }
+
+
+async def run_pass(
+    name: str,
+    queries: List[Dict[str, Any]],
+    embeddings: CachedEmbeddings,
+    concurrency: int = 1,
+) -> Dict[str, Any]:
+    """
+    Replay every query once and aggregate latency, quality and cache behaviour.
+
+    Args:
+        name: Pass label in the report
+        queries: Labelled queries
+        embeddings: Cached query embeddings (for hit-rate deltas)
+        concurrency: Queries in flight at once
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    before = embeddings.get_stats()
+
+    async def bounded(item: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            return await _run_query(item)
+
+    started = time.perf_counter()
+    rows = await asyncio.gather(*(bounded(item) for item in queries))
+    wall_seconds = time.perf_counter() - started
+
+    after = embeddings.get_stats()
+    embed_hits = (after["memory_hits"] + after["redis_hits"]) - (before["memory_hits"] + before["redis_hits"])
+    embed_lookups = embed_hits + after["misses"] - before["misses"]
+
+    by_strategy: Dict[str, Dict[str, Any]] = {}
+    for strategy in sorted({row["strategy"] for row in rows}):
+        strategy_rows = [row for row in rows if row["strategy"] == strategy]
+        by_strategy[strategy] = {
+            "queries": len(strategy_rows),
+            "cache_hit_rate": round(sum(row["cache_hit"] for row in strategy_rows) / len(strategy_rows), 4),
+            "latency_ms": _latency_summary([row["latency_ms"]["total"] for row in strategy_rows]),
+        }
+
+    return {
+        "name": name,
+        "queries": len(rows),
+        "queries_per_second": round(len(rows) / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        "latency_ms": {
+            stage: _latency_summary([row["latency_ms"][stage] for row in rows])
+            for stage in ("total",) + STAGES
+        },
+        "quality": {
+            metric: round(statistics.mean(row[metric] for row in rows), 4)
+            for metric in [f"recall_at_{k}" for k in RECALL_AT] + ["mrr"]
+        },
+        "cache": {
+            "retrieval_hit_rate": round(sum(row["cache_hit"] for row in rows) / len(rows), 4),
+            "embedding_hit_rate": round(embed_hits / embed_lookups, 4) if embed_lookups else 0.0,
+        },
+        "by_strategy": by_strategy,
+        "per_query": rows,
+    }
+
+
+async def run_benchmark(
+    queries_path: Path = DEFAULT_QUERIES,
+    passes: int = 2,
+    concurrency: int = 1,
+    embed_latency_ms: float = 0.0,
+    llm_latency_ms: float = 0.0,
+    rerank_latency_ms: float = 0.0,
+    overrides: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Run the offline benchmark: a cold pass, then warm passes over the same queries.
+
+    Returns:
+        Report with the run configuration, per-pass results and a flat ``summary``
+    """
+    queries = load_benchmark_queries(queries_path)
+
+    async with offline_rag(embed_latency_ms, llm_latency_ms, rerank_latency_ms, overrides) as rag:
+        results = []
+        for index in range(passes):
+            name = "cold" if index == 0 else ("warm" if passes == 2 else f"warm_{index}")
+            results.append(await run_pass(name, queries, rag.embeddings, concurrency=concurrency))
+
+        config = {
+            "queries_file": Path(queries_path).name,
+            "concurrency": concurrency,
+            "stub_latency_ms": {"embed": embed_latency_ms, "llm": llm_latency_ms, "rerank": rerank_latency_ms},
+            "rerankers": {"fast": rag.config.rag_reranker_fast, "comprehensive": rag.config.rag_reranker_comprehensive},
+            "retrieval_k": rag.config.rag_retrieval_k,
+            "semantic_cache": rag.config.semantic_cache_enabled,
+            "overrides": overrides or {},
+        }
+
+    report = {"config": config, "queries": len(queries), "passes": results}
+    report["summary"] = summarize(report)
+    return report
+
+
+def summarize(report: Dict[str, Any]) -> Dict[str, float]:
+    """Flat ``{pass.metric: value}`` view of a report, the unit compared between runs."""
+    summary = {}
+    for result in report["passes"]:
+        prefix = result["name"]
+        for stage, latency in result["latency_ms"].items():
+            summary[f"{prefix}.latency_ms.{stage}.p50"] = latency["p50"]
+            summary[f"{prefix}.latency_ms.{stage}.p95"] = latency["p95"]
+        for metric, value in {**result["quality"], **result["cache"]}.items():
+            summary[f"{prefix}.{metric}"] = value
+        summary[f"{prefix}.queries_per_second"] = result["queries_per_second"]
+    return summary
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """Per-metric baseline/current/delta for every summary metric present in both reports."""
+    before, after = baseline.get("summary") or summarize(baseline), current["summary"]
+    return {
+        metric: {"baseline": before[metric], "current": after[metric], "delta": round(after[metric] - before[metric], 4)}
+        for metric in sorted(before.keys() & after.keys())
+    }
+
+
+def _parse_override(item: str) -> tuple:
+    key, _, raw = item.partition("=")
+    try:
+        return key.strip(), json.loads(raw)
+    except json.JSONDecodeError:
+        return key.strip(), raw
+
+
+async def main(argv: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Offline RAG retrieval benchmark")
+    parser.add_argument("--queries", default=str(DEFAULT_QUERIES))
+    parser.add_argument("--passes", type=int, default=2, help="Cold pass plus warm (cached) passes")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--rerank-latency-ms", type=float, default=0.0)
+    parser.add_argument("--set", action="append", default=[], metavar="FIELD=VALUE",
+                        help="Override an AIConfig field, e.g. rag_reranker_comprehensive=fusion")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    report = await run_benchmark(
+        queries_path=Path(args.queries),
+        passes=args.passes,
+        concurrency=args.concurrency,
+        embed_latency_ms=args.embed_latency_ms,
+        llm_latency_ms=args.llm_latency_ms,
+        rerank_latency_ms=args.rerank_latency_ms,
+        overrides=dict(_parse_override(item) for item in args.set),
+    )
+
+    logger.info("=" * 80)
+    logger.info(f"🎯 [BENCH] Offline RAG benchmark ({report['queries']} queries)")
+    for result in report["passes"]:
+        latency, quality, cache = result["latency_ms"], result["quality"], result["cache"]
+        stages = " | ".join(f"{stage} {latency[stage]['mean']:.1f}" for stage in STAGES)
+        logger.info(
+            f"  - {result['name']}: p50 {latency['total']['p50']:.1f}ms | p95 {latency['total']['p95']:.1f}ms | "
+            f"recall@3 {quality['recall_at_3']:.2f} | MRR {quality['mrr']:.2f} | "
+            f"cache hit {cache['retrieval_hit_rate']:.0%} | embed cache hit {cache['embedding_hit_rate']:.0%}"
+        )
+        logger.info(f"    mean ms per stage: {stages}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        report["comparison"] = compare_reports(baseline, report)
+        logger.info(f"📊 [BENCH] Changes against {args.baseline}:")
+        for metric, change in report["comparison"].items():
+            if change["delta"]:
+                logger.info(f"  - {metric}: {change['baseline']} -> {change['current']} ({change['delta']:+})")
+    logger.info("=" * 80)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+        logger.info(f"💾 [BENCH] Report written to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
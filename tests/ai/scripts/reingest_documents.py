@@ -6,14 +6,13 @@ This script will ingest documents using the correct embedding model and dimensio
 
 import asyncio
 import sys
-import os
 from pathlib import Path
 
 # Add the project root to the Python path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from app.services.ai.shared.tools.rag.ingest import ingest_jsonl_hybrid
+from app.services.ai.shared.tools.rag.ingest import ingest_documents, knowledge_base_paths
 from app.core.logger import logger
 
 
@@ -22,35 +21,28 @@ async def reingest_documents():
     try:
         logger.info("🚀 Starting document re-ingestion...")
         
-        # Define the paths to your JSONL files
-        # Update these paths to match your actual data files
-        jsonl_paths = [
-            "app/services/ai/shared/tools/rag/rag_data/adn_master_company_en_2025-08-24.jsonl",
-            # Add more paths as needed
-        ]
+        # Knowledge base files shipped with the RAG tool
+        jsonl_paths = knowledge_base_paths()
         
-        # Filter out non-existent files
-        existing_paths = [path for path in jsonl_paths if os.path.exists(path)]
-        
-        if not existing_paths:
-            logger.error("❌ No JSONL files found. Please update the paths in this script.")
-            logger.info("💡 Expected files:")
-            for path in jsonl_paths:
-                logger.info(f"   - {path}")
+        if not jsonl_paths:
+            logger.error("❌ No JSONL files found in app/services/ai/shared/tools/rag/rag_data")
             return
         
-        logger.info(f"📁 Found {len(existing_paths)} JSONL files to ingest:")
-        for path in existing_paths:
+        logger.info(f"📁 Found {len(jsonl_paths)} JSONL files to ingest:")
+        for path in jsonl_paths:
             logger.info(f"   - {path}")
         
-        # Ingest documents
+        # Full sync: only new or changed chunks are embedded; removed chunks are deleted
         logger.info("📥 Starting ingestion process...")
-        vector_store = await asyncio.to_thread(
-            ingest_jsonl_hybrid,
-            paths=existing_paths,
-            batch_size=200
-        )
+        result = await ingest_documents()
+        if not result.success:
+            raise RuntimeError(f"Ingestion failed: {result.errors}")
         
+        logger.info(
+            f"📊 {result.chunks_upserted} upserted, {result.chunks_unchanged} unchanged, "
+            f"{result.chunks_deleted} deleted in {result.processing_time_ms}ms "
+            f"({result.chunks_per_second} chunks/s)"
+        )
         logger.info("✅ Document re-ingestion completed successfully!")
         logger.info("🎉 Your RAG system should now work with the correct dimensions.")
         
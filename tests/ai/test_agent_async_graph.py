@@ -0,0 +1,155 @@
+"""Tests for the fully async WhatsApp agent graph (non-blocking LLM calls, timeouts, cancellation).
+
+Also includes a benchmark of event-loop lateness while agent runs are in flight:
+
+    python tests/ai/test_agent_async_graph.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, List, Optional
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai.config import ai_config
+from app.services.ai.shared.graph_registry import graph_registry
+from app.services.ai.agents.whatsapp_agent import runner
+from app.services.ai.agents.whatsapp_agent.graph import agent_graph
+
+
+class SlowFakeChatModel(BaseChatModel):
+    """Fake chat model with a fixed network delay (blocking in sync mode, awaitable in async mode)."""
+
+    delay: float = 0.2
+    cancelled: int = 0
+    sync_calls: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _result(self) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="Hello! How can I help you today?"))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        self.sync_calls += 1
+        time.sleep(self.delay)
+        return self._result()
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        return self._result()
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+@contextmanager
+def _offline_agent(model: SlowFakeChatModel):
+    """Agent wired to ``model`` with no memory I/O."""
+    graph_registry.invalidate()
+    context = {"history": [], "summary": ""}
+    with patch.object(agent_graph, "get_chat_model", return_value=model), \
+         patch.object(runner.memory_service, "get_conversation_context", AsyncMock(return_value=context)), \
+         patch.object(runner.memory_service, "add_interaction_to_memory", AsyncMock()):
+        yield model
+    graph_registry.invalidate()
+
+
+@pytest.fixture
+def slow_agent_env():
+    """Offline agent with a slow fake LLM and no memory I/O."""
+    with _offline_agent(SlowFakeChatModel(delay=0.2)) as model:
+        yield model
+
+
+async def _probe_loop_latency(stop: asyncio.Event, interval: float = 0.01) -> List[float]:
+    """Measure how late the event loop wakes a sleeping task (a stand-in for webhook handling)."""
+    lateness = []
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        scheduled = loop.time()
+        await asyncio.sleep(interval)
+        lateness.append((loop.time() - scheduled - interval) * 1000)
+    return lateness
+
+
+class TestAsyncAgentGraph:
+    """Test cases for async graph execution."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_runs_do_not_serialize(self, slow_agent_env):
+        """Concurrent runs overlap their LLM calls instead of waiting for each other."""
+        answers = await asyncio.gather(*[runner.run_agent(f"conv-{i}", "hola") for i in range(20)])
+
+        assert all(answer.startswith("Hello!") for answer in answers)
+        assert slow_agent_env.peak_in_flight >= 2
+
+    @pytest.mark.asyncio
+    async def test_llm_calls_never_block_the_event_loop(self, slow_agent_env):
+        """Every LLM call goes through the async path; none blocks the loop in sync mode."""
+        await asyncio.gather(*[runner.run_agent(f"conv-{i}", "hola") for i in range(5)])
+
+        assert slow_agent_env.sync_calls == 0
+
+    @pytest.mark.asyncio
+    async def test_llm_timeout_returns_fallback(self, slow_agent_env):
+        """A node exceeding its budget is cancelled and the run ends with a fallback."""
+        slow_agent_env.delay = 1.0
+        fast_config = ai_config.model_copy(update={"agent_llm_timeout_seconds": 0.05})
+
+        with patch.object(agent_graph, "ai_config", fast_config):
+            answer = await runner.run_agent("conv-timeout", "hola")
+
+        assert answer == agent_graph.TIMEOUT_FALLBACK_MESSAGE
+        assert slow_agent_env.cancelled == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelling_run_cancels_llm_call(self, slow_agent_env):
+        """Cancelling run_agent propagates into the in-flight LLM request."""
+        slow_agent_env.delay = 1.0
+        task = asyncio.create_task(runner.run_agent("conv-cancel", "hola"))
+        while not slow_agent_env.in_flight:
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert slow_agent_env.cancelled == 1
+
+
+async def benchmark_loop_lateness(runs: int = 20) -> List[float]:
+    """Event-loop lateness (ms, sorted) while ``runs`` agent runs are in flight."""
+    with _offline_agent(SlowFakeChatModel(delay=0.2)):
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe_loop_latency(stop))
+        await asyncio.gather(*[runner.run_agent(f"bench-{i}", "hola") for i in range(runs)])
+        stop.set()
+        return sorted(await probe)
+
+
+if __name__ == "__main__":
+    lateness = asyncio.run(benchmark_loop_lateness())
+    p99 = lateness[max(0, int(len(lateness) * 0.99) - 1)]
+    print(f"event loop lateness: p50 {lateness[len(lateness) // 2]:.1f}ms  p99 {p99:.1f}ms")
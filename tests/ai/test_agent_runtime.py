@@ -0,0 +1,157 @@
+"""Tests for shared WhatsApp agent runtime components (graph registry, pooled models).
+
+Also includes a micro-benchmark of per-message agent overhead with the LLM replaced
+by an in-process fake, so only graph/runner overhead is measured:
+
+    python tests/ai/test_agent_runtime.py
+"""
+
+import asyncio
+import itertools
+import os
+import statistics
+import sys
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai.shared import models as shared_models
+from app.services.ai.shared.graph_registry import graph_registry
+from app.services.ai.agents.whatsapp_agent import runner
+from app.services.ai.agents.whatsapp_agent.graph import agent_graph
+
+
+class FakeToolChatModel(GenericFakeChatModel):
+    """Fake chat model that accepts bind_tools and always answers a greeting."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def _fake_model() -> FakeToolChatModel:
+    return FakeToolChatModel(messages=itertools.cycle([AIMessage(content="Hello! How can I help you today?")]))
+
+
+@pytest.fixture
+def fake_agent_env():
+    """Run the agent fully offline: fake LLM, no memory I/O."""
+    graph_registry.invalidate()
+    fake_model = _fake_model()
+    context = {"history": [], "summary": ""}
+    with patch.object(agent_graph, "get_chat_model", return_value=fake_model), \
+         patch.object(runner.memory_service, "get_conversation_context", AsyncMock(return_value=context)), \
+         patch.object(runner.memory_service, "add_interaction_to_memory", AsyncMock()):
+        yield fake_model
+    graph_registry.invalidate()
+
+
+class TestGraphRegistry:
+    """Test cases for the process-wide graph registry."""
+
+    def test_get_or_create_builds_once(self):
+        """Factory runs only on first access."""
+        graph_registry.invalidate("test.component")
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return object()
+
+        first = graph_registry.get_or_create("test.component", factory)
+        second = graph_registry.get_or_create("test.component", factory)
+
+        assert first is second
+        assert len(calls) == 1
+        assert "test.component" in graph_registry.get_stats()["components"]
+        graph_registry.invalidate("test.component")
+
+    def test_agent_graph_is_shared(self, fake_agent_env):
+        """get_agent_graph returns the same compiled graph on every call."""
+        assert agent_graph.get_agent_graph() is agent_graph.get_agent_graph()
+
+
+class TestModelPool:
+    """Test cases for pooled chat/embedding clients."""
+
+    def test_chat_model_is_pooled_per_configuration(self):
+        shared_models.reset_model_pool()
+        default_model = shared_models.get_chat_model()
+        assert shared_models.get_chat_model() is default_model
+        assert shared_models.get_chat_model(temperature=0.7) is not default_model
+        shared_models.reset_model_pool()
+
+    def test_embedding_model_is_pooled(self):
+        shared_models.reset_model_pool()
+        assert shared_models.get_embedding_model() is shared_models.get_embedding_model()
+        shared_models.reset_model_pool()
+
+
+class TestRunAgent:
+    """Test cases for run_agent on the shared graph."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_runs_share_graph(self, fake_agent_env):
+        """Concurrent conversations reuse one compiled graph and all get answers."""
+        answers = await asyncio.gather(*[
+            runner.run_agent(f"conv-{i}", "hola") for i in range(10)
+        ])
+
+        assert all(answer.startswith("Hello!") for answer in answers)
+        assert graph_registry.get_stats()["reuse_counts"][agent_graph.AGENT_GRAPH_KEY] >= 9
+
+    @pytest.mark.asyncio
+    async def test_graph_is_built_once_across_messages(self, fake_agent_env):
+        """Sequential messages compile the graph and bind the model once, then reuse them."""
+        with patch.object(agent_graph, "build_graph", wraps=agent_graph.build_graph) as build, \
+             patch.object(agent_graph, "_bind_model_with_tools", wraps=agent_graph._bind_model_with_tools) as bind:
+            for i in range(20):
+                await runner.run_agent(f"conv-{i}", "hola")
+
+        assert build.call_count == 1 and bind.call_count == 1
+        assert graph_registry.get_stats()["reuse_counts"][agent_graph.AGENT_GRAPH_KEY] >= 19
+
+
+async def benchmark_agent_overhead(iterations: int = 50) -> dict:
+    """
+    Measure per-message agent overhead excluding LLM time.
+
+    Compares the shared compiled graph against rebuilding the graph and
+    model binding for every message (the previous behaviour).
+    """
+    graph_registry.invalidate()
+    context = {"history": [], "summary": ""}
+    results = {}
+
+    with patch.object(agent_graph, "get_chat_model", return_value=_fake_model()), \
+         patch.object(runner.memory_service, "get_conversation_context", AsyncMock(return_value=context)), \
+         patch.object(runner.memory_service, "add_interaction_to_memory", AsyncMock()):
+        for label, rebuild in (("rebuild_per_message", True), ("shared_graph", False)):
+            timings = []
+            await runner.run_agent("bench-warmup", "hola")
+            for i in range(iterations):
+                if rebuild:
+                    graph_registry.invalidate()
+                start = time.perf_counter()
+                await runner.run_agent(f"bench-{i}", "hola")
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            results[label] = {
+                "mean_ms": round(statistics.mean(timings), 3),
+                "p50_ms": round(timings[len(timings) // 2], 3),
+                "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+            }
+
+    graph_registry.invalidate()
+    return results
+
+
+if __name__ == "__main__":
+    for label, stats in asyncio.run(benchmark_agent_overhead()).items():
+        print(f"{label:>22}: mean {stats['mean_ms']:.2f}ms  p50 {stats['p50_ms']:.2f}ms  p95 {stats['p95_ms']:.2f}ms")
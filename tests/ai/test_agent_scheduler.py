@@ -0,0 +1,182 @@
+"""Tests for the bounded WhatsApp agent scheduler (debouncing, serialization, cancellation)."""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai.agents.whatsapp_agent.scheduler import AgentScheduler
+
+
+class RecordingHandler:
+    """Agent turn handler that records calls and tracks concurrency."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self.active_per_conversation = {}
+        self.overlapping_conversation = False
+        self.cancelled = 0
+
+    async def __call__(self, conversation_id, message_id, user_text, customer_phone, is_first_message=False):
+        self.calls.append({
+            "conversation_id": conversation_id,
+            "message_id": message_id,
+            "user_text": user_text,
+            "is_first_message": is_first_message,
+        })
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        if self.active_per_conversation.get(conversation_id):
+            self.overlapping_conversation = True
+        self.active_per_conversation[conversation_id] = True
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.active -= 1
+            self.active_per_conversation[conversation_id] = False
+
+
+async def _drain(scheduler: AgentScheduler, timeout: float = 2.0) -> None:
+    """Wait until nothing is pending, queued or running."""
+    async def _idle():
+        while scheduler._pending or scheduler._running or scheduler._queued:
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(_idle(), timeout=timeout)
+
+
+def _submit(scheduler, handler, conversation_id, message_id, text, is_first_message=False):
+    return scheduler.submit(
+        conversation_id=conversation_id,
+        message_id=message_id,
+        user_text=text,
+        customer_phone="+50600000000",
+        handler=handler,
+        is_first_message=is_first_message,
+    )
+
+
+class TestAgentScheduler:
+    """Test cases for AgentScheduler."""
+
+    @pytest.mark.asyncio
+    async def test_rapid_messages_are_merged_into_one_turn(self):
+        scheduler = AgentScheduler(max_workers=2, debounce_seconds=0.05)
+        handler = RecordingHandler()
+
+        _submit(scheduler, handler, "conv-1", "m1", "hola", is_first_message=True)
+        _submit(scheduler, handler, "conv-1", "m2", "quiero reservar")
+        _submit(scheduler, handler, "conv-1", "m3", "para el sábado")
+        await asyncio.sleep(0.1)
+        await _drain(scheduler)
+
+        assert len(handler.calls) == 1
+        call = handler.calls[0]
+        assert call["message_id"] == "m3"
+        assert call["user_text"] == "hola\nquiero reservar\npara el sábado"
+        assert call["is_first_message"] is True
+
+        stats = scheduler.get_stats()
+        assert stats["messages_merged"] == 2
+        assert stats["turns_completed"] == 1
+        await scheduler.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_worker_pool_bounds_concurrency(self):
+        scheduler = AgentScheduler(max_workers=3, debounce_seconds=0)
+        handler = RecordingHandler(delay=0.05)
+
+        for i in range(12):
+            _submit(scheduler, handler, f"conv-{i}", f"m{i}", "hola")
+        await _drain(scheduler)
+
+        assert len(handler.calls) == 12
+        assert handler.max_active == 3
+        assert scheduler.get_stats()["wait_time"]["max_ms"] > 0
+        await scheduler.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_conversation_turns_are_serialized(self):
+        """Messages arriving during a run form the next turn instead of racing it."""
+        scheduler = AgentScheduler(max_workers=4, debounce_seconds=0)
+        handler = RecordingHandler(delay=0.05)
+
+        _submit(scheduler, handler, "conv-1", "m1", "hola")
+        await asyncio.sleep(0.01)
+        _submit(scheduler, handler, "conv-1", "m2", "¿tienen habitaciones?")
+        _submit(scheduler, handler, "conv-1", "m3", "para dos personas")
+        await _drain(scheduler)
+
+        assert not handler.overlapping_conversation
+        assert [call["message_id"] for call in handler.calls] == ["m1", "m3"]
+        assert handler.calls[1]["user_text"] == "¿tienen habitaciones?\npara dos personas"
+        await scheduler.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_cancel_conversation_drops_pending_and_running_turns(self):
+        scheduler = AgentScheduler(max_workers=2, debounce_seconds=0)
+        handler = RecordingHandler(delay=1.0)
+
+        _submit(scheduler, handler, "conv-1", "m1", "hola")
+        await asyncio.sleep(0.02)
+        _submit(scheduler, handler, "conv-1", "m2", "sigo esperando")
+
+        assert scheduler.cancel_conversation("conv-1") is True
+        await _drain(scheduler)
+
+        assert handler.cancelled == 1
+        assert [call["message_id"] for call in handler.calls] == ["m1"]
+        assert scheduler.get_stats()["turns_cancelled"] == 2
+        await scheduler.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_cancel_notifies_dropped_pending_messages(self):
+        scheduler = AgentScheduler(max_workers=2, debounce_seconds=10)
+        handler = RecordingHandler()
+        dropped = []
+
+        async def on_dropped(conversation_id, message_ids):
+            dropped.append((conversation_id, message_ids))
+
+        for message_id in ("m1", "m2"):
+            scheduler.submit(
+                conversation_id="conv-1",
+                message_id=message_id,
+                user_text="hola",
+                customer_phone="+50600000000",
+                handler=handler,
+                on_dropped=on_dropped,
+            )
+
+        assert scheduler.cancel_conversation("conv-1") is True
+        await asyncio.sleep(0)
+
+        assert dropped == [("conv-1", ["m1", "m2"])]
+        assert handler.calls == []
+        await scheduler.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_saturated(self):
+        scheduler = AgentScheduler(max_workers=1, debounce_seconds=10, max_pending_conversations=2)
+        handler = RecordingHandler()
+
+        assert _submit(scheduler, handler, "conv-1", "m1", "hola")
+        assert _submit(scheduler, handler, "conv-2", "m2", "hola")
+        assert _submit(scheduler, handler, "conv-1", "m3", "otra vez")
+        assert not _submit(scheduler, handler, "conv-3", "m4", "hola")
+
+        stats = scheduler.get_stats()
+        assert stats["messages_rejected"] == 1
+        assert stats["pending_conversations"] == 2
+        await scheduler.shutdown()
+        assert scheduler.get_stats()["pending_conversations"] == 0
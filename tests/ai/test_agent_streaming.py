@@ -0,0 +1,285 @@
+"""Tests for ai_partial streaming of agent output (tokens, tool progress, SSE writer route)."""
+
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+from typing import List
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langgraph.graph import StateGraph, MessagesState, END
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai.shared.graph_registry import graph_registry
+from app.services.ai.shared.streaming import PartialStreamer, stream_graph
+from app.services.ai.agents.whatsapp_agent import runner
+from app.services.ai.agents.whatsapp_agent.graph import agent_graph
+from app.schemas.ai.writer_response import WriterAgentResult
+
+
+ANSWER = "Hello! We have rooms available for this weekend."
+
+
+class FakeToolChatModel(GenericFakeChatModel):
+    """Fake chat model that accepts bind_tools and streams word by word."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+class SlowStreamingChatModel(BaseChatModel):
+    """Chat model that streams one word every ``token_delay`` seconds."""
+
+    text: str = ANSWER
+    token_delay: float = 0.03
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-streaming-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.text))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        words = self.text.split(" ")
+        for index, word in enumerate(words):
+            await asyncio.sleep(self.token_delay)
+            token = word if index == len(words) - 1 else word + " "
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Non-streaming chat model returning scripted messages in order."""
+
+    responses: List[AIMessage]
+    index: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = self.responses[self.index]
+        self.index += 1
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class RecordingSink:
+    """Collects ai_partial events with their arrival time."""
+
+    def __init__(self):
+        self.events: List[dict] = []
+        self.arrivals: List[float] = []
+
+    async def __call__(self, partial: dict) -> None:
+        self.events.append(partial)
+        self.arrivals.append(time.perf_counter())
+
+    def text(self) -> str:
+        return "".join(event.get("delta", "") for event in self.events if event["event"] == "token")
+
+    def kinds(self) -> List[str]:
+        return [event["event"] for event in self.events]
+
+
+@pytest.fixture
+def offline_runner():
+    """Patch memory I/O and yield a helper that installs a chat model into the agent graph."""
+    graph_registry.invalidate()
+    context = {"history": [], "summary": ""}
+    with patch.object(runner.memory_service, "get_conversation_context", AsyncMock(return_value=context)), \
+         patch.object(runner.memory_service, "add_interaction_to_memory", AsyncMock()):
+        def install(model):
+            graph_registry.invalidate()
+            return patch.object(agent_graph, "get_chat_model", return_value=model)
+        yield install
+    graph_registry.invalidate()
+
+
+class TestPartialStreamer:
+    """Test cases for token coalescing."""
+
+    @pytest.mark.asyncio
+    async def test_first_token_is_sent_immediately_and_rest_coalesced(self):
+        sink = RecordingSink()
+        streamer = PartialStreamer(source="test", sink=sink, flush_interval_ms=10_000)
+
+        for token in ["Hel", "lo", " wor", "ld"]:
+            await streamer.push_token(token)
+        assert sink.kinds() == ["token"]
+        assert sink.events[0]["delta"] == "Hel"
+
+        await streamer.finish()
+        assert sink.kinds() == ["token", "token", "done"]
+        assert sink.text() == "Hello world"
+        assert [event["sequence"] for event in sink.events] == [1, 2, 3]
+        assert len({event["stream_id"] for event in sink.events}) == 1
+
+    @pytest.mark.asyncio
+    async def test_reset_discards_draft(self):
+        sink = RecordingSink()
+        streamer = PartialStreamer(source="test", sink=sink, flush_interval_ms=0)
+
+        await streamer.push_token("draft")
+        await streamer.reset()
+        await streamer.push_token("final")
+        await streamer.finish()
+
+        assert sink.kinds() == ["token", "reset", "token", "done"]
+
+    @pytest.mark.asyncio
+    async def test_sink_errors_do_not_break_generation(self):
+        streamer = PartialStreamer(source="test", sink=AsyncMock(side_effect=RuntimeError("socket closed")))
+        await streamer.push_token("hola")
+        await streamer.finish()
+        assert streamer.events_sent == 0
+
+
+class TestStreamGraph:
+    """Test cases for graph streaming."""
+
+    @pytest.mark.asyncio
+    async def test_tool_progress_is_reported(self):
+        tool_call = {"name": "get_rates", "args": {}, "id": "call-1", "type": "tool_call"}
+        model = ScriptedChatModel(responses=[
+            AIMessage(content="", tool_calls=[tool_call]),
+            AIMessage(content="Rates start at $100"),
+        ])
+
+        async def agent(state):
+            return {"messages": [await model.ainvoke(state["messages"])]}
+
+        async def action(state):
+            return {"messages": [ToolMessage(content="$100", tool_call_id="call-1", name="get_rates")]}
+
+        def route(state):
+            return "action" if state["messages"][-1].tool_calls else END
+
+        workflow = StateGraph(MessagesState)
+        workflow.add_node("agent", agent)
+        workflow.add_node("action", action)
+        workflow.set_entry_point("agent")
+        workflow.add_conditional_edges("agent", route, {"action": "action", END: END})
+        workflow.add_edge("action", "agent")
+
+        sink = RecordingSink()
+        streamer = PartialStreamer(source="test", sink=sink, flush_interval_ms=0)
+        final_state = await stream_graph(workflow.compile(), {"messages": [("user", "rates?")]}, streamer)
+        await streamer.finish()
+
+        assert final_state["messages"][-1].content == "Rates start at $100"
+        kinds = sink.kinds()
+        assert kinds.index("tool_start") < kinds.index("tool_end") < kinds.index("token")
+        assert sink.events[kinds.index("tool_start")]["tool"] == "get_rates"
+        assert sink.text() == "Rates start at $100"
+
+
+class TestRunnerStreaming:
+    """Test cases for streaming WhatsApp agent runs."""
+
+    @pytest.mark.asyncio
+    async def test_streamed_text_matches_final_answer(self, offline_runner):
+        model = FakeToolChatModel(messages=itertools.cycle([AIMessage(content=ANSWER)]))
+        sink = RecordingSink()
+
+        with offline_runner(model):
+            answer = await runner.run_agent(
+                "conv-stream", "hola",
+                streamer=PartialStreamer(source="whatsapp_agent", sink=sink, flush_interval_ms=0),
+            )
+
+        assert answer == ANSWER
+        assert sink.text() == ANSWER
+        assert sink.kinds()[-1] == "done"
+        assert sink.events[-1]["success"] is True
+
+    @pytest.mark.asyncio
+    async def test_first_partial_arrives_at_first_token_latency(self, offline_runner):
+        model = SlowStreamingChatModel(token_delay=0.03)
+        sink = RecordingSink()
+
+        with offline_runner(model):
+            start = time.perf_counter()
+            answer = await runner.run_agent(
+                "conv-ttft", "hola",
+                streamer=PartialStreamer(source="whatsapp_agent", sink=sink, flush_interval_ms=0),
+            )
+            total = time.perf_counter() - start
+
+        first_token = sink.arrivals[0] - start
+        assert answer == ANSWER
+        # 8 words at 30ms each: the first token shows up long before the run completes
+        assert first_token < total / 3
+        assert sink.text() == ANSWER
+
+    @pytest.mark.asyncio
+    async def test_default_streams_to_conversation_subscribers(self, offline_runner):
+        model = FakeToolChatModel(messages=itertools.cycle([AIMessage(content=ANSWER)]))
+
+        with offline_runner(model), \
+             patch("app.services.websocket.websocket_service.manager.send_stream_event", AsyncMock()) as send:
+            await runner.run_agent("conv-ws", "hola")
+
+        messages = [call.args[0] for call in send.await_args_list]
+        assert messages and all(message["type"] == "ai_partial" for message in messages)
+        assert {call.kwargs["conversation_id"] for call in send.await_args_list} == {"conv-ws"}
+        assert messages[-1]["event"] == "done"
+
+    @pytest.mark.asyncio
+    async def test_cancelled_run_closes_the_draft(self, offline_runner):
+        model = SlowStreamingChatModel(token_delay=0.05)
+        sink = RecordingSink()
+
+        with offline_runner(model):
+            task = asyncio.create_task(runner.run_agent(
+                "conv-cancel", "hola",
+                streamer=PartialStreamer(source="whatsapp_agent", sink=sink, flush_interval_ms=0),
+            ))
+            while not sink.events:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        assert sink.kinds()[-1] == "done"
+        assert sink.events[-1]["success"] is False
+
+
+class TestWriterStreamingRoute:
+    """Test cases for the Server-Sent Events writer route."""
+
+    @pytest.mark.asyncio
+    async def test_sse_emits_partials_then_result(self):
+        from app.api.routes.ai.writer import _sse_response
+
+        async def run(streamer: PartialStreamer) -> WriterAgentResult:
+            await streamer.push_token("Hi ")
+            await streamer.push_token("there")
+            await streamer.finish()
+            return WriterAgentResult(success=True, raw_response="Hi there", metadata={})
+
+        response = _sse_response(run)
+        body = "".join([chunk async for chunk in response.body_iterator])
+
+        frames = [frame for frame in body.split("\n\n") if frame]
+        events = [frame.split("\n")[0].removeprefix("event: ") for frame in frames]
+        assert events[-1] == "result"
+        assert set(events[:-1]) == {"ai_partial"}
+        result = json.loads(frames[-1].split("\n")[1].removeprefix("data: "))
+        assert result["raw_response"] == "Hi there"
@@ -0,0 +1,180 @@
+"""Tests for native async RAG retrieval and cached collection readiness."""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai.shared.async_retrieval import AsyncQdrantRetriever
+from app.services.ai.shared.connection_pool import ConnectionPool
+
+
+class KeywordEmbeddings(Embeddings):
+    """Deterministic 3-d embeddings; only the async path is allowed."""
+
+    def _vector(self, text):
+        text = text.lower()
+        return [float("price" in text), float("plan" in text), 1.0]
+
+    def embed_documents(self, texts):
+        raise AssertionError("sync embeddings must not be used")
+
+    def embed_query(self, text):
+        raise AssertionError("sync embeddings must not be used")
+
+    async def aembed_query(self, text):
+        return self._vector(text)
+
+
+class FakeAsyncQdrant:
+    """AsyncQdrantClient stand-in returning fixed points after a small network delay."""
+
+    def __init__(self, points_count=10, exists=True, delay=0.05):
+        self.points_count = points_count
+        self.exists = exists
+        self.delay = delay
+        self.calls = {"collection_exists": 0, "get_collection": 0, "query_points": 0}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def collection_exists(self, name):
+        self.calls["collection_exists"] += 1
+        return self.exists
+
+    async def get_collection(self, name):
+        self.calls["get_collection"] += 1
+        return SimpleNamespace(points_count=self.points_count)
+
+    async def query_points(self, **kwargs):
+        self.calls["query_points"] += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        points = [
+            SimpleNamespace(id=1, score=0.9, vector={"dense": [1.0, 0.0, 1.0]},
+                            payload={"page_content": "Prices start at $10", "metadata": {"slug": "pricing"}}),
+            SimpleNamespace(id=2, score=0.8, vector={"dense": [0.0, 1.0, 1.0]},
+                            payload={"page_content": "Plans: basic and pro", "metadata": {"slug": "plans"}}),
+        ]
+        return SimpleNamespace(points=points[:kwargs["limit"]])
+
+
+def _fresh_pool(client):
+    pool = ConnectionPool()
+    pool._reset_connections()
+    pool._async_qdrant_client = client
+    return pool
+
+
+class TestAsyncQdrantRetriever:
+    """Test cases for the async MMR retriever."""
+
+    @pytest.mark.asyncio
+    async def test_returns_documents_from_payload(self):
+        client = FakeAsyncQdrant(delay=0)
+        retriever = AsyncQdrantRetriever(
+            async_client=client, embeddings=KeywordEmbeddings(), collection_name="kb", k=1, fetch_k=2,
+        )
+
+        docs = await retriever.ainvoke("what is the price?")
+
+        assert [doc.page_content for doc in docs] == ["Prices start at $10"]
+        assert docs[0].metadata["slug"] == "pricing"
+        assert docs[0].metadata["_collection_name"] == "kb"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_are_not_bounded_by_thread_pool(self):
+        client = FakeAsyncQdrant(delay=0.05)
+        retriever = AsyncQdrantRetriever(async_client=client, embeddings=KeywordEmbeddings(), collection_name="kb")
+
+        with patch("asyncio.to_thread", side_effect=AssertionError("thread pool used")):
+            results = await asyncio.gather(*(retriever.ainvoke(f"plan {i}") for i in range(64)))
+
+        assert len(results) == 64
+        # Every query is in flight at once on the event loop
+        assert client.max_in_flight == 64
+
+
+class TestCollectionReadiness:
+    """Test cases for cached collection readiness."""
+
+    @pytest.mark.asyncio
+    async def test_health_is_checked_once_per_ttl(self):
+        client = FakeAsyncQdrant()
+        pool = _fresh_pool(client)
+
+        for _ in range(20):
+            assert await pool.ensure_collection_ready() is True
+
+        assert client.calls["collection_exists"] == 1
+        assert client.calls["get_collection"] == 1
+
+        pool._collection_checked_at -= 10_000  # TTL elapsed
+        assert await pool.ensure_collection_ready() is True
+        assert client.calls["collection_exists"] == 2
+        pool._reset_connections()
+
+    @pytest.mark.asyncio
+    async def test_failed_check_is_retried_after_short_ttl(self):
+        client = FakeAsyncQdrant()
+        client.collection_exists = AsyncMock(side_effect=[ConnectionError("qdrant unavailable"), True])
+        pool = _fresh_pool(client)
+
+        with patch.object(pool, "get_async_qdrant_client", return_value=client):
+            assert await pool.ensure_collection_ready() is False
+            assert await pool.ensure_collection_ready() is False  # Within the error TTL
+            assert client.collection_exists.await_count == 1
+
+            pool._collection_checked_at -= 10  # Error TTL elapsed, well within the healthy TTL
+            assert await pool.ensure_collection_ready() is True
+
+        assert client.collection_exists.await_count == 2
+        pool._reset_connections()
+
+    @pytest.mark.asyncio
+    async def test_empty_collection_is_ingested_once_under_concurrency(self):
+        client = FakeAsyncQdrant(points_count=0)
+        pool = _fresh_pool(client)
+
+        async def ingest():
+            await asyncio.sleep(0.01)
+            client.points_count = 5
+            return SimpleNamespace(success=True, chunks_stored=5, errors=[])
+
+        with patch("app.services.ai.shared.tools.rag.ingest.ingest_documents", AsyncMock(side_effect=ingest)) as ingest_mock:
+            ready = await asyncio.gather(*(pool.ensure_collection_ready() for _ in range(10)))
+
+        assert all(ready)
+        assert ingest_mock.await_count == 1
+        pool._reset_connections()
+
+    @pytest.mark.asyncio
+    async def test_retrieve_information_skips_qdrant_checks_when_cached(self):
+        from app.services.ai.shared.tools.rag import retriever as rag_retriever
+
+        client = FakeAsyncQdrant(delay=0)
+        pool = _fresh_pool(client)
+        await pool.check_collection_health(force=True)
+
+        base = AsyncQdrantRetriever(async_client=client, embeddings=KeywordEmbeddings(), collection_name="kb")
+        with patch.object(rag_retriever.retrieval_cache, "get_cached_results", return_value=None), \
+             patch.object(rag_retriever.retrieval_cache, "cache_results"), \
+             patch.object(rag_retriever, "_embed_query", AsyncMock(return_value=None)), \
+             patch.object(pool, "get_compression_retriever", return_value=base):
+            result = await rag_retriever.retrieve_information.ainvoke({"query": "price"})
+
+        assert "[pricing] Prices start at $10" in result
+        assert client.calls["collection_exists"] == 1
+        assert client.calls["query_points"] == 1
+        pool._reset_connections()
@@ -0,0 +1,152 @@
+"""Tests for the query embedding cache (normalization, LRU/Redis tiers, batching)."""
+
+import asyncio
+import os
+import sys
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai.shared.embedding_cache import (
+    CachedEmbeddings,
+    decode_vector,
+    encode_vector,
+    normalize_query,
+)
+from app.services.ai.shared.performance_monitor import performance_monitor
+
+
+class CountingEmbeddings(Embeddings):
+    """Embeddings double that records every batch sent to the model."""
+
+    def __init__(self):
+        self.batches = []
+
+    def _vector(self, text):
+        return [float(len(text)), float(sum(map(ord, text)) % 97), 0.5]
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts):
+        return self.embed_documents(texts)
+
+
+class FakeBinaryRedis:
+    """redis.asyncio stand-in (decode_responses=False) for MGET and pipelined SET."""
+
+    def __init__(self):
+        self.data = {}
+        self.mget_calls = 0
+
+    async def mget(self, keys):
+        self.mget_calls += 1
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.ops = []
+
+            def set(self, key, value, ex=None):
+                assert isinstance(value, bytes)
+                self.ops.append((key, value))
+                return self
+
+            async def execute(self):
+                redis.data.update(self.ops)
+                return [True] * len(self.ops)
+
+        return Pipeline()
+
+
+def _cache(redis=None, lru_size=100):
+    return CachedEmbeddings(CountingEmbeddings(), namespace="test-model",
+                            redis_client=redis or FakeBinaryRedis(), lru_size=lru_size, ttl_seconds=60)
+
+
+class TestNormalization:
+    """Test cases for cache key normalization and vector packing."""
+
+    def test_equivalent_queries_share_a_key(self):
+        assert normalize_query("  ¿Precios? ") == normalize_query("precios") == "precios"
+        assert normalize_query("Planes   de\tInternet!") == "planes de internet"
+
+    def test_vectors_round_trip_as_float32(self):
+        raw = encode_vector([0.25, -1.5, 3.0])
+        assert len(raw) == 12
+        assert decode_vector(raw) == [0.25, -1.5, 3.0]
+
+
+class TestCachedEmbeddings:
+    """Test cases for the tiered embedding cache."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_query_is_served_from_memory(self):
+        cache = _cache()
+
+        first = await cache.aembed_query("Precios")
+        second = await cache.aembed_query("¿precios?")
+
+        assert first == second
+        assert cache.embeddings.batches == [["precios"]]
+        stats = cache.get_stats()
+        assert stats["memory_hits"] == 1 and stats["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_redis_shares_vectors_between_processes(self):
+        redis = FakeBinaryRedis()
+        worker_a, worker_b = _cache(redis), _cache(redis)
+
+        vector = await worker_a.aembed_query("cobertura")
+        assert await worker_b.aembed_query("Cobertura") == pytest.approx(vector)
+
+        assert worker_b.embeddings.batches == []
+        assert worker_b.get_stats()["redis_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_variants_are_batched(self):
+        redis = FakeBinaryRedis()
+        cache = _cache(redis)
+        await cache.aembed_query("planes")  # cached variant
+
+        variants = ["planes", "precio de planes", "planes hogar", "PRECIO DE PLANES"]
+        pending = [asyncio.create_task(cache.aembed_query(text)) for text in variants]
+        await asyncio.sleep(0)
+        assert len(cache._flush_tasks) == 1  # The pending flush is referenced, so it cannot be collected
+        vectors = await asyncio.gather(*pending)
+
+        assert not cache._flush_tasks
+        assert vectors[1] == vectors[3]
+        # One MGET and one model call for the two distinct uncached variants
+        assert cache.embeddings.batches[-1] == ["precio de planes", "planes hogar"]
+        assert len(cache.embeddings.batches) == 2
+        assert redis.mget_calls == 2
+
+    @pytest.mark.asyncio
+    async def test_lru_is_bounded(self):
+        cache = _cache(lru_size=2)
+        await cache.aembed_documents(["a1", "b2", "c3"])
+        assert cache.get_stats()["lru_entries"] == 2
+
+    @pytest.mark.asyncio
+    async def test_hit_rate_is_reported_to_performance_monitor(self):
+        performance_monitor.reset_stats()
+        cache = _cache()
+
+        await cache.aembed_query("precios")
+        await cache.aembed_query("precios")
+
+        stats = performance_monitor.get_performance_stats()["embedding_cache"]
+        assert stats["lookups"] == 2
+        assert stats["hit_rate_percent"] == 50.0
@@ -0,0 +1,137 @@
+"""Tests for the precomputed catalog, memoized quotes and the fast catalog/pricing path."""
+
+import json
+import os
+import sys
+from typing import Any, List, Optional
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai.config import ai_config
+from app.services.ai.shared.graph_registry import graph_registry
+from app.services.ai.agents.whatsapp_agent import runner
+from app.services.ai.agents.whatsapp_agent.core.fast_intents import classify_fast_intent, fast_answer
+from app.services.ai.agents.whatsapp_agent.graph import agent_graph
+from app.services.ai.agents.whatsapp_agent.tools.catalog import find_plan, list_plans_catalog
+from app.services.ai.agents.whatsapp_agent.tools.pricing import quote_for, quote_selection
+
+
+class CountingChatModel(BaseChatModel):
+    """Fake chat model that counts calls."""
+
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "counting-fake"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        self.calls += 1
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="Y"))])
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+@pytest.fixture
+def agent_env():
+    """Offline agent with a counting fake LLM and no memory I/O."""
+    graph_registry.invalidate()
+    model = CountingChatModel()
+    context = {"history": [], "summary": ""}
+    with patch.object(agent_graph, "get_chat_model", return_value=model), \
+         patch.object(runner.memory_service, "get_conversation_context", AsyncMock(return_value=context)), \
+         patch.object(runner.memory_service, "add_interaction_to_memory", AsyncMock()):
+        yield model
+    graph_registry.invalidate()
+
+
+class TestCatalogAndPricing:
+    """Test cases for plan lookup and memoized quotes."""
+
+    def test_plan_lookup_by_alias_and_fuzzy_name(self):
+        assert find_plan("2") == 2
+        assert find_plan("500 Mbps") == 3
+        assert find_plan("1 Giga") == 4
+        assert find_plan("500/500 mbsp") == 3  # Misspelled
+        assert find_plan("fiber deluxe") is None
+
+    def test_quotes_are_memoized_and_match_the_tool(self):
+        quote_for.cache_clear()
+        first = quote_for(3, 2, True)
+        assert quote_for(3, 2, True) is first
+        assert quote_for.cache_info().hits == 1
+        assert first.total_price_crc == 44500 + 2 * 4590 + 3590
+
+        result = json.loads(quote_selection.invoke({"plan": "500 Mbps", "iptv_count": 2, "telefonia": True}))
+        assert result["ok"] is True
+        assert result["selection"]["total_price_crc"] == first.total_price_crc
+
+        invalid = json.loads(quote_selection.invoke({"plan": "fiber deluxe", "iptv_count": 0, "telefonia": False}))
+        assert invalid["ok"] is False
+
+    def test_catalog_payload_is_precomputed(self):
+        assert list_plans_catalog.invoke({}) is list_plans_catalog.invoke({})
+        assert len(json.loads(list_plans_catalog.invoke({}))["plans"]) == 4
+
+
+class TestFastIntents:
+    """Test cases for classifying and answering pure catalog/pricing questions."""
+
+    def test_catalog_and_quote_questions(self):
+        assert classify_fast_intent("What plans do you have?").kind == "catalog"
+        assert classify_fast_intent("¿Qué planes tienen?").language == "es"
+
+        intent = classify_fast_intent("How much is 500 Mbps with 2 IPTV and telephony?")
+        assert (intent.kind, intent.plan_id, intent.iptv_count, intent.telefonia) == ("quote", 3, 2, True)
+        assert "₡57,270" in fast_answer("How much is 500 Mbps with 2 IPTV and telephony?")
+
+    def test_contract_flow_and_other_topics_go_to_the_agent(self):
+        for text in (
+            "I want the 500 Mbps plan",
+            "quiero contratar el plan de 1 giga",
+            "can I schedule an install?",
+            "my internet is slow, what plan should I get?",
+            "How much is 500 Mbps with 12 IPTV?",
+            "hola",
+        ):
+            assert classify_fast_intent(text) is None, text
+
+    def test_questions_the_catalog_does_not_answer_go_to_the_agent(self):
+        for text in (
+            "What is the upload speed of the 500 plan?",
+            "Do you have fiber in Heredia? what plans",
+            "Which plan is best for gaming?",
+            "can I pay the plan with card? what price",
+            "How much is the 300 Mbps plan?",
+        ):
+            assert classify_fast_intent(text) is None, text
+
+    def test_language_follows_the_majority_of_markers(self):
+        intent = classify_fast_intent("how much is the 1 Gbps plan with 2 tv and telefonia")
+        assert (intent.kind, intent.language, intent.plan_id, intent.iptv_count, intent.telefonia) == ("quote", "en", 4, 2, True)
+
+        intent = classify_fast_intent("¿Cuánto cuesta el plan de 500 Mbps con 2 televisores y telefonía?")
+        assert (intent.language, intent.plan_id, intent.iptv_count) == ("es", 3, 2)
+
+    @pytest.mark.asyncio
+    async def test_fast_path_skips_the_llm(self, agent_env):
+        answer = await runner.run_agent("conv-fast", "What plans do you have?")
+
+        assert "1/1 Gbps" in answer and "₡49,500" in answer
+        assert agent_env.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_disabled_fast_path_uses_the_agent(self, agent_env):
+        with patch.object(agent_graph, "ai_config", ai_config.model_copy(update={"agent_fast_intents_enabled": False})):
+            await runner.run_agent("conv-slow", "What plans do you have?")
+
+        assert agent_env.calls >= 1
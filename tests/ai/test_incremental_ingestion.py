@@ -0,0 +1,188 @@
+"""Tests for incremental, content-hashed knowledge base ingestion."""
+
+import asyncio
+import json
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from langchain_core.embeddings import Embeddings
+from qdrant_client import AsyncQdrantClient
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai.config import ai_config
+from app.services.ai.shared.tools.rag import ingest
+from app.services.ai.shared.tools.rag.ingest import EmbeddingRateBudget, ingest_jsonl_incremental
+
+
+class CountingEmbeddings(Embeddings):
+    """Async-only dense embeddings that record every batch they receive."""
+
+    def __init__(self, fail_on=None):
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_on = fail_on
+
+    def embed_documents(self, texts):
+        raise AssertionError("sync embeddings must not be used")
+
+    def embed_query(self, text):
+        raise AssertionError("not expected")
+
+    async def aembed_documents(self, texts):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if self.fail_on and any(self.fail_on in text for text in texts):
+                raise RuntimeError("embedding API unavailable")
+            self.batches.append(list(texts))
+            return [[float(len(text)), 1.0, 0.0] for text in texts]
+        finally:
+            self.in_flight -= 1
+
+
+class FakeSparse:
+    """Stand-in for FastEmbed BM25."""
+
+    def embed_documents(self, texts):
+        return [SimpleNamespace(indices=[1, 2], values=[0.5, 0.5]) for _ in texts]
+
+
+def _write_kb(path, entries):
+    with path.open("w", encoding="utf-8") as f:
+        for slug, text in entries.items():
+            f.write(json.dumps({"text": text, "metadata": {"slug": slug}}) + "\n")
+    return [str(path)]
+
+
+@pytest.fixture
+def client():
+    return AsyncQdrantClient(":memory:")
+
+
+@pytest.fixture(autouse=True)
+def small_collection():
+    test_config = ai_config.model_copy(update={"openai_embedding_dimension": 3, "qdrant_collection_name": "kb_test"})
+    with patch.object(ingest, "ai_config", test_config), \
+         patch("app.services.ai.shared.retrieval_cache.retrieval_cache.invalidate_knowledge_base") as invalidate:
+        yield invalidate
+
+
+async def _ingest(paths, client, embeddings, **kwargs):
+    return await ingest_jsonl_incremental(
+        paths, client=client, embeddings=embeddings, sparse_embeddings=FakeSparse(), **kwargs
+    )
+
+
+class TestIncrementalIngestion:
+    """Test cases for hash-based diffing against the collection."""
+
+    @pytest.mark.asyncio
+    async def test_rerun_only_embeds_changed_chunks_and_deletes_removed(self, tmp_path, client, small_collection):
+        kb = tmp_path / "kb.jsonl"
+        paths = _write_kb(kb, {"plans": "Plan Hogar 100 Mbps", "phone": "Call +506 4050-5050", "tv": "IPTV 100 channels"})
+
+        first = await _ingest(paths, client, CountingEmbeddings(), batch_size=2)
+        assert first.success and first.chunks_upserted == 3 and first.batches_total == 2
+        assert (await client.count("kb_test")).count == 3
+
+        embeddings = CountingEmbeddings()
+        _write_kb(kb, {"plans": "Plan Hogar 200 Mbps", "phone": "Call +506 4050-5050"})
+        second = await _ingest(paths, client, embeddings)
+
+        assert embeddings.batches == [["Plan Hogar 200 Mbps"]]
+        assert (second.chunks_upserted, second.chunks_unchanged, second.chunks_deleted) == (1, 1, 2)
+        points, _ = await client.scroll("kb_test", with_payload=True)
+        assert sorted(point.payload["page_content"] for point in points) == ["Call +506 4050-5050", "Plan Hogar 200 Mbps"]
+        assert small_collection.call_count == 2
+
+        third = await _ingest(paths, client, CountingEmbeddings())
+        assert third.chunks_upserted == 0 and third.chunks_unchanged == 2
+        assert small_collection.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_resumed_and_deletes_are_deferred(self, tmp_path, client):
+        kb = tmp_path / "kb.jsonl"
+        paths = _write_kb(kb, {"a": "alpha", "b": "bravo"})
+        await _ingest(paths, client, CountingEmbeddings())
+
+        _write_kb(kb, {"c": "charlie", "d": "delta"})
+        failed = await _ingest(paths, client, CountingEmbeddings(fail_on="delta"), batch_size=1)
+        assert not failed.success and failed.batches_completed == 1 and failed.chunks_deleted == 0
+        assert (await client.count("kb_test")).count == 3
+
+        embeddings = CountingEmbeddings()
+        resumed = await _ingest(paths, client, embeddings, batch_size=1)
+        assert resumed.success and embeddings.batches == [["delta"]]
+        assert resumed.chunks_deleted == 2
+        assert (await client.count("kb_test")).count == 2
+
+
+    @pytest.mark.asyncio
+    async def test_ingesting_one_file_keeps_points_of_other_files(self, tmp_path, client):
+        plans = _write_kb(tmp_path / "plans.jsonl", {"plans": "Plan Hogar 100 Mbps"})
+        support = _write_kb(tmp_path / "support.jsonl", {"phone": "Call +506 4050-5050", "hours": "Open 24/7"})
+        await _ingest(plans + support, client, CountingEmbeddings())
+
+        _write_kb(tmp_path / "plans.jsonl", {"plans": "Plan Hogar 200 Mbps"})
+        partial = await _ingest(plans, client, CountingEmbeddings())
+
+        assert partial.success and (partial.chunks_upserted, partial.chunks_deleted) == (1, 1)
+        points, _ = await client.scroll("kb_test", with_payload=True)
+        assert sorted((point.payload["source"], point.payload["page_content"]) for point in points) == [
+            ("plans.jsonl", "Plan Hogar 200 Mbps"),
+            ("support.jsonl", "Call +506 4050-5050"),
+            ("support.jsonl", "Open 24/7"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_full_sync_removes_points_without_a_source(self, tmp_path, client):
+        paths = _write_kb(tmp_path / "kb.jsonl", {"plans": "Plan Hogar 100 Mbps", "tv": "IPTV 100 channels"})
+        await _ingest(paths, client, CountingEmbeddings())
+        points, _ = await client.scroll("kb_test")
+        await client.delete_payload("kb_test", keys=["source"], points=[point.id for point in points])  # Stored before sources
+        await _ingest(paths, client, CountingEmbeddings())  # Stamps the unchanged points
+        points, _ = await client.scroll("kb_test", with_payload=True)
+        assert all(point.payload["source"] == "kb.jsonl" for point in points)
+
+        _write_kb(tmp_path / "kb.jsonl", {"plans": "Plan Hogar 100 Mbps"})
+        await client.delete_payload("kb_test", keys=["source"], points=[point.id for point in points])
+        scoped = await _ingest(paths, client, CountingEmbeddings())
+        full = await _ingest(paths, client, CountingEmbeddings(), full_sync=True)
+
+        assert scoped.chunks_deleted == 0 and full.chunks_deleted == 1
+        assert (await client.count("kb_test")).count == 1
+
+
+class TestEmbeddingConcurrency:
+    """Test cases for concurrent embedding batches within the rate budget."""
+
+    @pytest.mark.asyncio
+    async def test_batches_run_concurrently_up_to_limit(self, tmp_path, client):
+        paths = _write_kb(tmp_path / "kb.jsonl", {f"doc{i}": f"document number {i}" for i in range(12)})
+        embeddings = CountingEmbeddings()
+
+        result = await _ingest(paths, client, embeddings, batch_size=2, max_concurrency=3)
+
+        assert result.batches_completed == 6
+        assert embeddings.max_in_flight == 3
+        assert result.chunks_per_second > 0 and result.embedding_tokens > 0
+
+    @pytest.mark.asyncio
+    async def test_rate_budget_delays_batches_over_the_window(self):
+        budget = EmbeddingRateBudget(tokens_per_minute=100, window_seconds=0.05)
+
+        assert await budget.acquire(60) == 0.0
+        assert await budget.acquire(60) > 0
+
+    def test_default_paths_come_from_rag_data(self):
+        paths = ingest.knowledge_base_paths()
+        assert paths and all("rag_data" in path and path.endswith(".jsonl") for path in paths)
+        assert not any(path.startswith("/home/sa") for path in paths)
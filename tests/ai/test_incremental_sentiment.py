@@ -0,0 +1,317 @@
+"""Tests for incremental sentiment analysis (rolling state + _id watermark), the local pre-classifier and micro-batching."""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from bson import ObjectId
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai.agents.sentiment_analyzer import sentiment_service as service_module
+from app.services.ai.agents.sentiment_analyzer.batcher import SentimentBatcher
+from app.services.ai.agents.sentiment_analyzer.chains.sentiment_chains import SentimentChains
+from app.services.ai.agents.sentiment_analyzer.config import sentiment_config
+from app.services.ai.agents.sentiment_analyzer.local_classifier import LocalSentimentClassifier
+from app.services.ai.agents.sentiment_analyzer.schemas import SentimentAnalysisRequest, SentimentAnalysisResult
+from app.services.ai.agents.sentiment_analyzer.sentiment_service import SentimentAnalyzerService
+
+
+CONVERSATION_ID = str(ObjectId())
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.docs = sorted(self.docs, key=lambda doc: doc[field], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length=None):
+        return list(self.docs)
+
+    def batch_size(self, size):
+        return self
+
+    async def __aiter__(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeMessages:
+    def __init__(self):
+        self.docs = []
+        self.queries = []
+
+    def add(self, text, direction="inbound", conversation_id=CONVERSATION_ID):
+        self.docs.append({"_id": ObjectId(), "conversation_id": ObjectId(conversation_id),
+                          "direction": direction, "text_content": text, "timestamp": "2026-01-01 10:00:00"})
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+
+        def matches(doc):
+            if doc["conversation_id"] != query["conversation_id"] or doc["direction"] != query["direction"]:
+                return False
+            if doc["text_content"] in query["text_content"]["$nin"]:
+                return False
+            return "_id" not in query or doc["_id"] > query["_id"]["$gt"]
+
+        return FakeCursor([{key: doc[key] for key in projection} for doc in self.docs if matches(doc)])
+
+
+class FakeSentiments:
+    def __init__(self):
+        self.docs = {}
+        self.bulk_writes = 0
+
+    async def find_one(self, query):
+        return self.docs.get(query["conversation_id"])
+
+    async def update_one(self, query, update, upsert=False):
+        doc = self.docs.setdefault(query["conversation_id"], {"conversation_id": query["conversation_id"]})
+        doc.update(update["$set"])
+
+    async def bulk_write(self, requests, ordered=True):
+        self.bulk_writes += 1
+        for request in requests:
+            await self.update_one(request._filter, request._doc, upsert=request._upsert)
+
+
+def _sentiment_env(local_classifier_enabled):
+    """Service with a recording fake LLM, fake collections and mocked notifications."""
+    prompts = []
+    omitted_lines = set()
+
+    def respond(prompt_value):
+        prompt = prompt_value.to_string()
+        prompts.append(prompt)
+        count = prompt.count("### Conversation ")
+        if count:
+            return AIMessage(content="\n".join(
+                f"{number} | 😤 | 0.9 | Installation delayed" for number in range(1, count + 1)
+                if number not in omitted_lines
+            ))
+        return AIMessage(content="😤 | 0.9 | Installation delayed, customer impatient")
+
+    db = SimpleNamespace(messages=FakeMessages(), conversation_sentiments=FakeSentiments())
+    service = SentimentAnalyzerService()
+    service.chains = SentimentChains(llm=RunnableLambda(respond))
+
+    classifier = LocalSentimentClassifier()
+    notify = AsyncMock()
+    config = sentiment_config.model_copy(update={"local_classifier_enabled": local_classifier_enabled})
+
+    with patch.object(service, "_get_db", AsyncMock(return_value=db)), \
+         patch.object(service, "_notify_sentiment_update", notify), \
+         patch.object(service_module, "sentiment_config", config), \
+         patch.object(service_module, "local_sentiment_classifier", classifier), \
+         patch.object(service_module.conversation_service, "update_conversation_sentiment", AsyncMock(return_value={})):
+        yield SimpleNamespace(service=service, db=db, prompts=prompts, notify=notify, classifier=classifier,
+                              omitted_lines=omitted_lines)
+
+
+@pytest.fixture
+def sentiment_env():
+    """LLM-only sentiment service."""
+    yield from _sentiment_env(local_classifier_enabled=False)
+
+
+@pytest.fixture
+def local_env():
+    """Sentiment service with the local pre-classifier in front of the LLM."""
+    yield from _sentiment_env(local_classifier_enabled=True)
+
+
+def _request(count, text="Still waiting for the technician", conversation_id=CONVERSATION_ID):
+    return SentimentAnalysisRequest(
+        conversation_id=conversation_id, message_id=str(ObjectId()), message_text=text,
+        customer_phone="+50688887777", message_count=count,
+    )
+
+
+class TestIncrementalSentiment:
+    """Test cases for analyzing only new customer messages."""
+
+    @pytest.mark.asyncio
+    async def test_second_analysis_sends_only_new_messages_and_previous_state(self, sentiment_env):
+        env = sentiment_env
+        for text in ("Hi, my install was scheduled today", "Nobody came", "Still waiting"):
+            env.db.messages.add(text)
+        env.db.messages.add("We are checking", direction="outbound")
+
+        first = await env.service.analyze_message_sentiment(_request(3))
+        assert first.success and first.response.confidence == 0.9
+        assert "Nobody came" in env.prompts[0] and "first analysis" in env.prompts[0]
+        assert "We are checking" not in env.prompts[0]
+
+        env.db.messages.add("This is unacceptable")
+        second = await env.service.analyze_message_sentiment(_request(4))
+
+        assert second.success
+        assert "This is unacceptable" in env.prompts[1]
+        assert "Nobody came" not in env.prompts[1]
+        assert "😤 (confidence 0.90) after 3 customer messages: Installation delayed" in env.prompts[1]
+        assert "_id" in env.db.messages.queries[-1]
+
+        stored = await env.service.get_conversation_sentiment(CONVERSATION_ID)
+        assert stored.inbound_messages_analyzed == 4
+        assert stored.last_inbound_message_id == str(env.db.messages.docs[-1]["_id"])
+
+    @pytest.mark.asyncio
+    async def test_prompt_is_bounded_for_long_conversations(self, sentiment_env):
+        env = sentiment_env
+        for i in range(30):
+            env.db.messages.add(f"message {i} " + "x" * 1000)
+
+        await env.service.analyze_message_sentiment(_request(30))
+
+        prompt = env.prompts[0]
+        assert "message 29" in prompt and "message 21" not in prompt
+        assert "x" * 400 not in prompt
+
+    @pytest.mark.asyncio
+    async def test_no_new_messages_skips_the_llm(self, sentiment_env):
+        env = sentiment_env
+        env.db.messages.add("Thanks for the help today")
+        await env.service.analyze_message_sentiment(_request(1))
+
+        result = await env.service.analyze_message_sentiment(_request(2))
+
+        assert not result.success
+        assert len(env.prompts) == 1
+
+    def test_plain_emoji_response_still_parses(self):
+        chains = SentimentChains(llm=RunnableLambda(lambda _: AIMessage(content="")))
+        assert chains._parse_response("😊") == ("😊", 0.8, "")
+        assert chains._parse_response("😰 | high | Worried about the bill")[:2] == ("😰", 0.8)
+
+
+class TestLocalSentimentGate:
+    """Test cases for the local pre-classifier and LLM escalation."""
+
+    def test_batch_classification(self):
+        ack, angry_es, mixed, unknown = LocalSentimentClassifier().classify_batch([
+            "ok gracias",
+            "el internet no funciona desde ayer, pésimo servicio",
+            "great but the internet is slow",
+            "Hi, my install was scheduled today",
+        ])
+
+        assert (ack.emoji, ack.language) == ("😌", "es") and ack.confidence >= 0.75
+        assert angry_es.emoji in ("😤", "😡") and angry_es.language == "es" and angry_es.confidence >= 0.75
+        assert mixed.sentiment_type == "mixed" and mixed.confidence < 0.75
+        assert unknown.emoji == "😐" and unknown.confidence < 0.75
+
+    @pytest.mark.asyncio
+    async def test_confident_local_result_skips_the_llm(self, local_env):
+        env = local_env
+        env.db.messages.add("Excelente servicio, muchas gracias 😊")
+
+        result = await env.service.analyze_message_sentiment(_request(1))
+
+        assert result.success and result.response.sentiment_emoji in ("😊", "😍")
+        assert env.prompts == []
+        stored = await env.service.get_conversation_sentiment(CONVERSATION_ID)
+        assert stored.rationale.startswith("local:")
+        assert stored.last_inbound_message_id == str(env.db.messages.docs[-1]["_id"])
+        assert env.classifier.get_stats()["skip_rate"] == 1.0
+
+    @pytest.mark.asyncio
+    async def test_mood_shift_escalates_with_a_provisional_update(self, local_env):
+        env = local_env
+        env.db.messages.add("ok gracias")
+        await env.service.analyze_message_sentiment(_request(1))
+        assert env.prompts == []
+
+        env.db.messages.add("terrible, nobody came!")
+        result = await env.service.analyze_message_sentiment(_request(2))
+
+        assert len(env.prompts) == 1 and "terrible, nobody came!" in env.prompts[0]
+        assert result.response.sentiment_emoji == "😤" and result.response.confidence == 0.9
+        provisional = env.notify.await_args_list[-2].args[0]
+        assert provisional.reasoning.startswith("local:")
+        stats = env.classifier.get_stats()
+        assert stats["escalation_reasons"]["shift"] == 1 and stats["skip_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_low_confidence_escalates(self, local_env):
+        env = local_env
+        env.db.messages.add("Hi, my install was scheduled today")
+
+        await env.service.analyze_message_sentiment(_request(1))
+
+        assert len(env.prompts) == 1
+        assert env.classifier.get_stats()["escalation_reasons"]["low_confidence"] == 1
+
+
+class TestSentimentBatching:
+    """Test cases for micro-batched analysis across conversations."""
+
+    @pytest.mark.asyncio
+    async def test_batch_shares_one_prompt_and_one_bulk_write(self, sentiment_env):
+        env = sentiment_env
+        conversation_ids = [str(ObjectId()) for _ in range(3)]
+        for conversation_id in conversation_ids:
+            env.db.messages.add(f"Nobody came to {conversation_id}", conversation_id=conversation_id)
+
+        results = await env.service.analyze_batch([_request(1, conversation_id=cid) for cid in conversation_ids])
+
+        assert all(result.success for result in results)
+        assert [result.response.conversation_id for result in results] == conversation_ids
+        assert len(env.prompts) == 1 and all(cid in env.prompts[0] for cid in conversation_ids)
+        assert env.db.conversation_sentiments.bulk_writes == 1
+        assert env.notify.await_count == 3
+        for conversation_id in conversation_ids:
+            stored = await env.service.get_conversation_sentiment(conversation_id)
+            assert stored.inbound_messages_analyzed == 1
+
+    @pytest.mark.asyncio
+    async def test_conversation_missing_from_answer_is_retried_alone(self, sentiment_env):
+        env = sentiment_env
+        env.omitted_lines.add(2)
+        conversation_ids = [str(ObjectId()) for _ in range(2)]
+        for conversation_id in conversation_ids:
+            env.db.messages.add(f"Still waiting {conversation_id}", conversation_id=conversation_id)
+
+        results = await env.service.analyze_batch([_request(1, conversation_id=cid) for cid in conversation_ids])
+
+        assert all(result.success for result in results)
+        assert len(env.prompts) == 2
+        assert "### Conversation" not in env.prompts[1] and conversation_ids[1] in env.prompts[1]
+
+    @pytest.mark.asyncio
+    async def test_batcher_coalesces_conversations_and_flushes_when_full(self):
+        batches = []
+
+        async def handler(requests):
+            batches.append(requests)
+            return [SentimentAnalysisResult(success=True, processing_time=0.0) for _ in requests]
+
+        batcher = SentimentBatcher(handler, window_ms=20, max_items=10)
+        other = str(ObjectId())
+        results = await asyncio.gather(
+            batcher.submit(_request(1)), batcher.submit(_request(2)), batcher.submit(_request(1, conversation_id=other))
+        )
+
+        assert len(batches) == 1 and len(batches[0]) == 2
+        assert results[0] is results[1]
+        assert batcher.get_stats()["coalesced"] == 1
+
+        full = SentimentBatcher(handler, window_ms=60_000, max_items=2)
+        await asyncio.wait_for(
+            asyncio.gather(full.submit(_request(1)), full.submit(_request(1, conversation_id=other))), timeout=1
+        )
+        assert len(batches) == 2
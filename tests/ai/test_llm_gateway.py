@@ -0,0 +1,119 @@
+"""Tests for the LLM gateway (priority classes, token budgets, coalescing, accounting)."""
+
+import asyncio
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import tool
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai.config import ai_config
+from app.services.ai.shared import llm_gateway as gateway_module
+from app.services.ai.shared import models as shared_models
+from app.services.ai.shared.llm_gateway import GatewayChatModel, LLMGateway, LocalFakeChatModel
+
+
+@pytest.fixture
+def gateway():
+    """Fresh gateway (background class: one slot, small token budget) behind every GatewayChatModel."""
+    fresh = LLMGateway(
+        concurrency={"reply": 4, "assist": 2, "background": 1},
+        tokens_per_minute={"reply": 0, "assist": 0, "background": 50},
+        coalesce=True,
+    )
+    with patch.object(gateway_module, "llm_gateway", fresh):
+        yield fresh
+
+
+def _model(provider, caller="test", priority="reply"):
+    return GatewayChatModel(provider=provider, caller=caller, priority=priority)
+
+
+class TestLLMGateway:
+    """Test cases for admission control and accounting."""
+
+    @pytest.mark.asyncio
+    async def test_identical_in_flight_prompts_share_one_call(self, gateway):
+        provider = LocalFakeChatModel(latency_ms=50)
+        model = _model(provider, caller="writer")
+
+        first, second = await asyncio.gather(model.ainvoke("precio del plan"), model.ainvoke("precio del plan"))
+        third = await model.ainvoke("precio del plan")
+
+        assert provider.calls == 2  # Concurrent pair shared one call; the later one ran again
+        assert first.content == second.content == "echo: precio del plan"
+        stats = gateway.get_stats()["callers"]["writer"]
+        assert stats["calls"] == 3 and stats["coalesced"] == 1 and stats["provider_calls"] == 2
+        assert third.content == first.content
+
+    @pytest.mark.asyncio
+    async def test_background_load_does_not_delay_replies(self, gateway):
+        provider = LocalFakeChatModel(latency_ms=40)
+        background = _model(provider, caller="summarizer", priority="background")
+        reply = _model(provider, caller="whatsapp_agent", priority="reply")
+
+        batch = asyncio.gather(*(background.ainvoke(f"resumen {i}") for i in range(3)))
+        await asyncio.sleep(0.01)
+        assert gateway.get_stats()["classes"]["background"]["waiting"] == 2
+
+        answer = await reply.ainvoke("hola")
+
+        assert answer.content == "echo: hola" and not batch.done()
+        await batch
+        assert gateway.get_stats()["callers"]["summarizer"]["avg_queue_ms"] > 0
+
+    @pytest.mark.asyncio
+    async def test_token_budget_holds_back_its_class_only(self, gateway):
+        background = _model(LocalFakeChatModel(), caller="sentiment", priority="background")
+        reply = _model(LocalFakeChatModel(), caller="whatsapp_agent")
+
+        await background.ainvoke("x" * 160)  # ~41 tokens of a 50-token budget
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(background.ainvoke("y" * 160), timeout=0.1)
+
+        assert (await reply.ainvoke("y" * 160)).content.startswith("echo")
+        assert gateway.get_stats()["classes"]["background"]["budget_waits"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_tokens_cost_and_errors_are_accounted_per_caller(self, gateway):
+        priced = _model(LocalFakeChatModel(model_name="gpt-4o-mini", responses=["Claro"]), caller="verifier")
+        await priced.ainvoke("¿Es útil esta respuesta?")
+
+        class FailingModel(LocalFakeChatModel):
+            async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+                raise RuntimeError("rate limited")
+
+        with pytest.raises(RuntimeError):
+            await _model(FailingModel(), caller="sentiment", priority="background").ainvoke("hola")
+
+        callers = gateway.get_stats()["callers"]
+        assert callers["verifier"]["input_tokens"] > 0 and callers["verifier"]["output_tokens"] == 2
+        assert callers["verifier"]["cost_usd"] > 0
+        assert callers["sentiment"]["errors"] == 1
+        assert gateway.get_stats()["classes"]["background"]["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_fake_provider_through_get_chat_model_streams_and_binds_tools(self, gateway):
+        @tool
+        def get_plans(category: str) -> str:
+            """Look up plans of a category."""
+            return category
+
+        config = ai_config.model_copy(update={"llm_gateway_provider": "fake"})
+        with patch.object(shared_models, "ai_config", config):
+            shared_models.reset_model_pool()
+            model = shared_models.get_chat_model(caller="writer", priority="assist")
+            try:
+                chunks = [chunk.content async for chunk in model.bind_tools([get_plans]).astream([HumanMessage(content="planes hogar")])]
+            finally:
+                shared_models.reset_model_pool()
+
+        assert isinstance(model, GatewayChatModel) and isinstance(model.provider, LocalFakeChatModel)
+        assert "".join(chunks) == "echo: planes hogar"
+        assert gateway.get_stats()["callers"]["writer"]["provider_calls"] == 1
@@ -0,0 +1,295 @@
+"""Tests for the conversation memory stores and memory service (window, summary, eviction)."""
+
+import os
+import sys
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from redis.exceptions import WatchError
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai.shared.memory_store import (
+    InMemoryMemoryStore,
+    MemoryEntry,
+    RedisMemoryStore,
+    fold_into_summary,
+)
+from app.services.ai.shared.memory_service import ConversationMemoryService
+from app.services.ai.agents.whatsapp_agent import runner
+
+
+class FakeRedis:
+    """Minimal redis.asyncio stand-in covering the commands used by RedisMemoryStore."""
+
+    def __init__(self):
+        self.lists = {}
+        self.hashes = {}
+        self.ttls = {}
+        self.versions = {}  # Bumped on every write, for WATCH
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def _touch(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    async def rpush(self, key, *values):
+        self._touch(key)
+        self.lists.setdefault(key, []).extend(values)
+        return len(self.lists[key])
+
+    async def hincrby(self, key, field, amount):
+        self._touch(key)
+        value = int(self.hashes.setdefault(key, {}).get(field, 0)) + amount
+        self.hashes[key][field] = str(value)
+        return value
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        self._touch(key)
+        data = self.hashes.setdefault(key, {})
+        for k, v in (mapping or {field: value}).items():
+            data[k] = str(v)
+        return 1
+
+    async def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def expire(self, key, seconds):
+        self.ttls[key] = seconds
+        return True
+
+    async def lrange(self, key, start, end):
+        values = self.lists.get(key, [])
+        return values[start:] if end == -1 else values[start:end + 1]
+
+    async def ltrim(self, key, start, end):
+        self._touch(key)
+        values = self.lists.get(key, [])
+        self.lists[key] = values[start:] if end == -1 else values[start:end + 1]
+        return True
+
+    async def delete(self, *keys):
+        for key in keys:
+            self._touch(key)
+            self.lists.pop(key, None)
+            self.hashes.pop(key, None)
+        return len(keys)
+
+
+class FakePipeline:
+    """Queued commands; after ``watch`` and before ``multi`` commands run immediately."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+        self.watched = None
+        self.queuing = True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.reset()
+
+    async def watch(self, *keys):
+        self.watched = {key: self.redis.versions.get(key, 0) for key in keys}
+        self.queuing = False
+
+    def multi(self):
+        self.queuing = True
+
+    async def reset(self):
+        self.calls, self.watched, self.queuing = [], None, True
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            if not self.queuing:
+                return getattr(self.redis, name)(*args, **kwargs)
+            self.calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        try:
+            if self.watched and any(self.redis.versions.get(key, 0) != version for key, version in self.watched.items()):
+                raise WatchError("Watched variable changed.")
+            return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+        finally:
+            await self.reset()
+
+
+def _entries(count, role="user", words=20):
+    return [MemoryEntry(role=role, content=f"message {i} " + "word " * words) for i in range(count)]
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    limits = {"window_max_tokens": 200, "summary_max_tokens": 120, "ttl_seconds": 3600}
+    if request.param == "memory":
+        return InMemoryMemoryStore(max_bytes=10_000_000, **limits)
+    return RedisMemoryStore(FakeRedis(), **limits)
+
+
+class TestMemoryStores:
+    """Behaviour shared by the Redis and in-memory stores."""
+
+    @pytest.mark.asyncio
+    async def test_window_is_token_bounded_and_summary_absorbs_overflow(self, store):
+        for entry in _entries(20):
+            await store.append("conv-1", [entry])
+
+        memory = await store.get("conv-1")
+        assert memory.window_tokens <= 200
+        assert sum(entry.tokens for entry in memory.entries) == memory.window_tokens
+        assert memory.entries[-1].content.startswith("message 19")
+        assert memory.summary.startswith("Customer: message")
+        assert "message 19" not in memory.summary
+
+    @pytest.mark.asyncio
+    async def test_replace_marks_hydrated_and_keeps_order(self, store):
+        await store.replace("conv-2", [MemoryEntry(role="user", content="hola"),
+                                       MemoryEntry(role="assistant", content="¡Hola! ¿En qué le ayudo?")])
+        await store.update_session("conv-2", {"language": "es"})
+
+        memory = await store.get("conv-2")
+        assert memory.hydrated is True
+        assert [entry.role for entry in memory.entries] == ["user", "assistant"]
+        assert memory.session_data == {"language": "es"}
+
+        await store.delete("conv-2")
+        assert await store.get("conv-2") is None
+
+
+class TestRedisMemoryStore:
+    """Test cases specific to the Redis store."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_append_during_trim_does_not_evict_twice(self):
+        redis = FakeRedis()
+        store = RedisMemoryStore(redis, window_max_tokens=200, summary_max_tokens=10_000, ttl_seconds=3600)
+        entries = _entries(10)
+        for entry in entries[:8]:
+            await store.append("conv-1", [entry])
+
+        read_head = redis.lrange
+        interleaved = []
+
+        async def lrange_with_concurrent_append(key, start, end):
+            head = await read_head(key, start, end)
+            if not interleaved:
+                interleaved.append(True)
+                await store.append("conv-1", [entries[9]])  # Another worker appends and trims meanwhile
+            return head
+
+        redis.lrange = lrange_with_concurrent_append
+        await store.append("conv-1", [entries[8]])
+
+        memory = await store.get("conv-1")
+        assert memory.window_tokens == sum(entry.tokens for entry in memory.entries) <= 200
+        for index in range(10):
+            in_window = sum(entry.content.startswith(f"message {index} ") for entry in memory.entries)
+            in_summary = memory.summary.count(f"message {index} ")
+            assert in_window + in_summary == 1, index
+        assert store.get_stats()["trim_retries"] == 1
+
+
+class TestInMemoryStoreEviction:
+    """LRU, TTL and byte-ceiling eviction for the process-local store."""
+
+    @pytest.mark.asyncio
+    async def test_byte_ceiling_evicts_least_recently_used(self):
+        store = InMemoryMemoryStore(window_max_tokens=10_000, summary_max_tokens=100,
+                                    ttl_seconds=3600, max_bytes=2_200)
+        # Three conversations (~714 bytes each) fit; a fourth forces an eviction
+        for conversation in ("a", "b", "c"):
+            await store.append(conversation, _entries(3))
+        await store.get("a")  # a becomes most recently used
+        await store.append("d", _entries(3))
+
+        stats = store.get_stats()
+        assert stats["total_bytes"] <= 2_200
+        assert stats["lru_evictions"] >= 1
+        assert await store.get("b") is None
+        assert await store.get("a") is not None
+
+    @pytest.mark.asyncio
+    async def test_idle_conversations_expire(self):
+        store = InMemoryMemoryStore(window_max_tokens=1000, summary_max_tokens=100,
+                                    ttl_seconds=60, max_bytes=1_000_000)
+        await store.append("old", _entries(1))
+        await store.append("new", _entries(1))
+
+        with patch("app.services.ai.shared.memory_store.time.time", return_value=time.time() + 61):
+            assert await store.get("old") is None
+        assert store.get_stats()["ttl_evictions"] == 2
+
+
+class TestConversationMemoryService:
+    """Memory service hydration and append paths."""
+
+    @pytest.mark.asyncio
+    async def test_hydrates_once_then_serves_from_store(self):
+        service = ConversationMemoryService(store=InMemoryMemoryStore(
+            window_max_tokens=1000, summary_max_tokens=100, ttl_seconds=3600, max_bytes=1_000_000))
+        history = [
+            {"role": "user", "content": "hola", "timestamp": None, "message_id": "m1"},
+            {"role": "assistant", "content": "¡Hola!", "timestamp": None, "message_id": "m2"},
+        ]
+
+        with patch.object(service, "load_conversation_history", AsyncMock(return_value=history)) as load:
+            first = await service.get_conversation_context("conv-1")
+            await service.add_interaction_to_memory("conv-1", "precios?", "Desde $100")
+            second = await service.get_conversation_context("conv-1")
+
+        assert load.await_count == 1
+        assert [item["content"] for item in first["history"]] == ["hola", "¡Hola!"]
+        assert [item["content"] for item in second["history"]][-2:] == ["precios?", "Desde $100"]
+        assert second["memory_size"] == 4
+
+    @pytest.mark.asyncio
+    async def test_hydrated_inbound_message_is_not_stored_twice(self):
+        service = ConversationMemoryService(store=InMemoryMemoryStore(
+            window_max_tokens=1000, summary_max_tokens=100, ttl_seconds=3600, max_bytes=1_000_000))
+        # The webhook saved both messages of the merged turn before the run
+        history = [
+            {"role": "user", "content": "hola", "timestamp": None, "message_id": "m1"},
+            {"role": "user", "content": "precios?", "timestamp": None, "message_id": "m2"},
+        ]
+
+        with patch.object(service, "load_conversation_history", AsyncMock(return_value=history)):
+            context = await service.get_conversation_context("conv-1")
+            await service.add_interaction_to_memory(
+                "conv-1", "hola\nprecios?", "Desde $100", message_id="m2", window=context["history"]
+            )
+            after = await service.get_conversation_context("conv-1")
+            await service.add_interaction_to_memory("conv-1", "hola", "¿En qué le ayudo?", message_id="m3")
+            later = await service.get_conversation_context("conv-1")
+
+        assert [item["content"] for item in after["history"]] == ["hola", "precios?", "Desde $100"]
+        assert [item["content"] for item in later["history"]][-2:] == ["hola", "¿En qué le ayudo?"]
+
+    def test_pending_turn_is_matched_by_whole_messages(self):
+        history = [
+            {"role": "assistant", "content": "¿Desea continuar?"},
+            {"role": "user", "content": "si"},
+            {"role": "user", "content": "precios?"},
+        ]
+
+        assert runner._drop_pending_turn(history, "precios?") == history[:2]
+        assert runner._drop_pending_turn(history, "si\nprecios?") == history[:1]
+        # "si" inside the new text is not the unanswered "si" message
+        assert runner._drop_pending_turn(history, "que si\nprecios?") == history[:2]
+        assert runner._drop_pending_turn(history, "dame precios?") == history
+
+
+def test_fold_into_summary_respects_budget():
+    summary = fold_into_summary("", _entries(50, words=40), max_tokens=100)
+    assert sum(len(line) // 4 + 1 for line in summary.splitlines()) <= 100
+    assert summary.splitlines()[-1].startswith("Customer: message 49")
@@ -0,0 +1,118 @@
+"""Tests for parallel MultiQuery fan-out with reciprocal-rank fusion."""
+
+import asyncio
+import os
+import sys
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai.shared.multi_query import ParallelMultiQueryRetriever
+
+
+class FakeSearch:
+    """Base retriever stand-in with per-query latency and canned results."""
+
+    def __init__(self, results, delays=None):
+        self.results = results
+        self.delays = delays or {}
+        self.started = []
+        self.cancelled = []
+
+    async def asearch(self, query):
+        self.started.append(query)
+        try:
+            await asyncio.sleep(self.delays.get(query, 0.0))
+        except asyncio.CancelledError:
+            self.cancelled.append(query)
+            raise
+        return [
+            Document(page_content=f"chunk {point_id}", metadata={"_id": point_id, "_score": score})
+            for point_id, score in self.results.get(query, [])
+        ]
+
+
+def _llm(variants, delay=0.0, error=None):
+    async def respond(prompt):
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return "\n".join(variants)
+    return RunnableLambda(respond)
+
+
+class TestParallelMultiQuery:
+    """Test cases for concurrent fan-out, fusion and early exit."""
+
+    @pytest.mark.asyncio
+    async def test_variants_are_searched_concurrently_and_fused(self):
+        search = FakeSearch(
+            results={
+                "planes": [("a", 0.9), ("b", 0.8)],
+                "tarifas": [("b", 0.85), ("c", 0.7)],
+                "precios": [("b", 0.6), ("a", 0.5)],
+            },
+            delays={"tarifas": 0.1, "precios": 0.1},
+        )
+        retriever = ParallelMultiQueryRetriever(
+            retriever=search, llm=_llm(["1. tarifas", "- precios", "planes"]), k=10, budget_ms=1000,
+        )
+
+        started = asyncio.get_running_loop().time()
+        docs = await retriever.ainvoke("planes")
+        elapsed = asyncio.get_running_loop().time() - started
+
+        assert search.started == ["planes", "tarifas", "precios"]  # The original is not repeated
+        assert elapsed < 0.18  # Variant searches overlapped
+        assert [doc.metadata["_id"] for doc in docs] == ["b", "a", "c"]
+        assert docs[0].metadata["_score"] == 0.85  # Strongest copy of a chunk is kept
+        assert docs[0].metadata["rrf_score"] > docs[1].metadata["rrf_score"]
+
+    @pytest.mark.asyncio
+    async def test_early_exit_cancels_outstanding_work(self):
+        search = FakeSearch(
+            results={"q": [("a", 0.9), ("b", 0.8)], "slow": [("c", 0.9)]},
+            delays={"slow": 5.0},
+        )
+        retriever = ParallelMultiQueryRetriever(
+            retriever=search, llm=_llm(["slow"]), k=2, min_score=0.5, budget_ms=5000,
+        )
+
+        docs = await asyncio.wait_for(retriever.ainvoke("q"), timeout=1.0)
+        await asyncio.sleep(0)
+
+        assert [doc.metadata["_id"] for doc in docs] == ["a", "b"]
+        assert "slow" not in search.started  # LLM expansion was cancelled before it returned
+
+    @pytest.mark.asyncio
+    async def test_budget_returns_what_has_arrived(self):
+        search = FakeSearch(
+            results={"q": [("a", 0.3)], "variant": [("b", 0.9)]},
+            delays={"variant": 5.0},
+        )
+        retriever = ParallelMultiQueryRetriever(
+            retriever=search, llm=_llm(["variant"]), k=5, budget_ms=100,
+        )
+
+        docs = await asyncio.wait_for(retriever.ainvoke("q"), timeout=1.0)
+        await asyncio.sleep(0)
+
+        assert [doc.metadata["_id"] for doc in docs] == ["a"]
+        assert search.cancelled == ["variant"]
+
+    @pytest.mark.asyncio
+    async def test_expansion_failure_falls_back_to_original_query(self):
+        search = FakeSearch(results={"q": [("a", 0.9)]})
+        retriever = ParallelMultiQueryRetriever(
+            retriever=search, llm=_llm([], error=RuntimeError("rate limited")), k=5,
+        )
+
+        docs = await retriever.ainvoke("q")
+
+        assert [doc.metadata["_id"] for doc in docs] == ["a"]
+        assert search.started == ["q"]
@@ -0,0 +1,106 @@
+"""Tests for stable prompt layout (memoized static prefixes, dynamic data last) and prefix-cache stats."""
+
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai.shared.prompt_layout import PromptLayout, cache_eligible_tokens, split_template
+from app.services.ai.agents.whatsapp_agent.graph import agent_graph
+from app.services.ai.agents.writer.prompts.prompts import CUSTOM_CHAT_PROMPT, PREBUILT_CHAT_PROMPT
+from app.services.ai.agents.sentiment_analyzer.chains.sentiment_chains import SentimentChains
+
+
+class TestPromptLayout:
+    """Test cases for static prefix memoization and prefix statistics."""
+
+    def test_static_prefix_is_rendered_once_per_version(self):
+        layout = PromptLayout()
+        render = MagicMock(return_value="Static instructions")
+
+        first = layout.static_prefix("writer", "1", render)
+        again = layout.static_prefix("writer", "1", render)
+        bumped = layout.static_prefix("writer", "2", render)
+
+        assert first is again and bumped is not first
+        assert render.call_count == 2
+
+    def test_chat_prompt_keeps_static_part_byte_identical(self):
+        static, dynamic = split_template("Use {emojis} only.\n<!-- dynamic -->\nMessages: {messages}")
+        prompt = PromptLayout().chat_prompt("sentiment", "1", static, dynamic, emojis=["😊", "😡"])
+
+        first = prompt.format_messages(messages="hola")
+        second = prompt.format_messages(messages="tengo un problema con mi factura")
+
+        assert first[0].content == second[0].content == "Use ['😊', '😡'] only."
+        assert second[1].content == "Messages: tengo un problema con mi factura"
+        assert split_template("No marker {x}") == ("", "No marker {x}")
+
+    def test_observe_reports_stable_and_cache_eligible_tokens(self):
+        layout = PromptLayout()
+        static = SystemMessage(content="x" * 6000)  # ~1500 tokens
+
+        layout.observe("writer", [static, HumanMessage(content="first question")])
+        layout.observe("writer", [static, HumanMessage(content="second question")], cached_tokens=1408)
+
+        stats = layout.get_stats()["callers"]["writer"]
+        assert stats["requests"] == 2
+        assert stats["stable_prefix_tokens"] >= 1500
+        assert stats["cache_eligible_tokens"] == cache_eligible_tokens(stats["stable_prefix_tokens"]) > 1024
+        assert 0.4 < stats["cache_eligible_ratio"] < 0.5  # Second request only; the first had nothing to match
+        assert stats["provider_cached_tokens"] == 1408
+        assert cache_eligible_tokens(1000) == 0 and cache_eligible_tokens(1300) == 1280
+
+
+class TestAgentPromptLayouts:
+    """Test cases for the agents' prompt ordering."""
+
+    @pytest.mark.asyncio
+    async def test_whatsapp_turn_data_follows_the_history(self):
+        model = MagicMock()
+        model.ainvoke = AsyncMock(return_value=AIMessage(content="¡Hola!"))
+        state = {
+            "messages": [SystemMessage(content="runner system"), HumanMessage(content="hola")],
+            "conversation_id": "conv-1",
+            "attempts": 0,
+            "stage": "selection",
+            "contract": {},
+        }
+
+        with patch.object(agent_graph, "_build_model_with_tools", return_value=model):
+            with patch.object(agent_graph, "get_contextual_time_info", return_value="Monday, March 2, 2026"):
+                await agent_graph.call_model(state)
+            with patch.object(agent_graph, "get_contextual_time_info", return_value="Tuesday, March 3, 2026"):
+                await agent_graph.call_model(state)
+
+        first, second = (call.args[0] for call in model.ainvoke.await_args_list)
+        assert first[0].content == second[0].content == agent_graph.get_system_prompt()
+        assert "{" not in first[0].content and "2026" not in first[0].content
+        assert first[1].content == "hola"
+        assert "Monday, March 2, 2026" in first[-1].content and "'stage': 'selection'" in first[-1].content
+
+    @pytest.mark.parametrize("prompt", [PREBUILT_CHAT_PROMPT, CUSTOM_CHAT_PROMPT])
+    def test_writer_instructions_are_static_and_query_is_last(self, prompt):
+        first = prompt.format_messages(query="¿Precio del plan 100 Mbps?", context="Customer: hola")
+        second = prompt.format_messages(query="How do I tell them about the outage?", context="Customer: sin internet")
+
+        assert first[0].content == second[0].content
+        assert "ALWAYS RESPOND IN ENGLISH ONLY" in first[0].content
+        assert second[1].content.endswith("How do I tell them about the outage?")
+
+    def test_sentiment_prompts_render_emojis_into_the_static_prefix(self):
+        chains = SentimentChains(llm=MagicMock())
+        single = chains._load_sentiment_prompt().format_messages(
+            previous_sentiment_context="😐 (0.6)", customer_messages_context="Customer: ya van dos días sin internet"
+        )
+        batch = chains._load_batch_prompt().format_messages(conversation_count=2, conversations_context="1. ...\n2. ...")
+
+        assert "😤" in single[0].content and "Previous Assessment" not in single[0].content
+        assert single[1].content.startswith("## Previous Assessment")
+        assert "{conversation_count}" not in batch[0].content and "## Conversations (2)" in batch[1].content
@@ -0,0 +1,68 @@
+"""Tests for the offline RAG benchmark and regression harness."""
+
+import os
+import sys
+
+import pytest
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+
+from app.services.ai.shared.connection_pool import connection_pool
+from rag_benchmark import (
+    STAGES,
+    HashingEmbeddings,
+    compare_reports,
+    ranked_slugs,
+    retrieval_quality,
+    run_benchmark,
+)
+
+
+class TestMetrics:
+    """Test cases for output parsing and quality metrics."""
+
+    def test_ranked_slugs_follow_tool_output(self):
+        output = "[plan-100-100] Plan 100\n\n---\n\n[contact-phone] Call us"
+        assert ranked_slugs(output) == ["plan-100-100", "contact-phone"]
+        assert ranked_slugs("NO_CONTEXT_AVAILABLE: empty") == []
+
+    def test_recall_and_mrr(self):
+        quality = retrieval_quality(["a", "b", "c", "d"], ["c", "z"])
+        assert quality["recall_at_1"] == 0.0
+        assert quality["recall_at_3"] == 0.5
+        assert quality["mrr"] == pytest.approx(1 / 3)
+
+    def test_hashing_embeddings_are_deterministic(self):
+        embeddings = HashingEmbeddings(dimension=64)
+        first, second = embeddings.embed_query("Plan 100 Mbps"), embeddings.embed_query("plan 100 mbps")
+        assert first == second
+        assert sum(value * value for value in first) == pytest.approx(1.0, rel=1e-5)
+
+
+class TestOfflineBenchmark:
+    """Test cases for the end-to-end offline run."""
+
+    @pytest.mark.asyncio
+    async def test_report_records_stages_quality_and_cache(self):
+        pool_client = connection_pool._async_qdrant_client
+
+        report = await run_benchmark(passes=2, llm_latency_ms=5, overrides={"rag_reranker_fast": "fusion"})
+        cold, warm = report["passes"]
+
+        assert report["queries"] >= 20
+        assert set(cold["latency_ms"]) == {"total", *STAGES}
+        assert cold["latency_ms"]["search"]["p50"] > 0
+        assert cold["latency_ms"]["multiquery"]["max"] >= 5
+        assert cold["quality"]["recall_at_6"] > 0
+        assert cold["cache"]["retrieval_hit_rate"] == 0.0
+        assert warm["cache"]["retrieval_hit_rate"] == 1.0
+        assert warm["quality"] == cold["quality"]
+        # The live pool is restored once the run is over
+        assert connection_pool._async_qdrant_client is pool_client
+
+        comparison = compare_reports(report, report)
+        assert comparison["cold.mrr"]["delta"] == 0
+        assert "warm.latency_ms.total.p95" in comparison
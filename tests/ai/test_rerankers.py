@@ -0,0 +1,126 @@
+"""Tests for the pluggable RAG reranking stage and its offline benchmark."""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from typing import List
+from unittest.mock import patch
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai.shared.rerankers import LocalReranker, ScoreFusionReranker
+from app.services.ai.shared.connection_pool import connection_pool
+from app.services.ai.shared.async_retrieval import AsyncQdrantRetriever
+from app.services.ai.shared.tools.rag.retriever import _determine_retrieval_strategy
+
+
+DOCS = [
+    Document("Contact: Phone +506 4050-5050.", metadata={"slug": "contact-phone", "_score": 0.70}),
+    Document("Plan 500/500 Mbps (most popular) for 4K streaming and gaming.", metadata={"slug": "plan-500", "_score": 0.82}),
+    Document("Residential IPTV add-on: more than 100 channels per device.", metadata={"slug": "addon-iptv", "_score": 0.80}),
+]
+
+
+class UnusedEmbeddings(Embeddings):
+    """Embeddings placeholder for retrievers that are never queried."""
+
+    def embed_documents(self, texts):
+        raise AssertionError("not expected")
+
+    def embed_query(self, text):
+        raise AssertionError("not expected")
+
+
+class SlowReranker(LocalReranker):
+    """CPU-bound stand-in that records the thread it scored on."""
+
+    threads: List[str] = []
+
+    def score(self, query, documents):
+        time.sleep(0.05)
+        self.threads.append(threading.current_thread().name)
+        return [float(i) for i in range(len(documents))]
+
+
+class TestScoreFusionReranker:
+    """Test cases for BM25 + dense score fusion."""
+
+    def test_lexical_match_can_outrank_dense_order(self):
+        reranker = ScoreFusionReranker(top_n=2, dense_weight=0.5)
+        ranked = reranker.compress_documents(DOCS, "How many IPTV channels?")
+
+        assert [doc.metadata["slug"] for doc in ranked] == ["addon-iptv", "plan-500"]
+        assert ranked[0].metadata["relevance_score"] > ranked[1].metadata["relevance_score"]
+        assert "relevance_score" not in DOCS[2].metadata
+
+    def test_accents_are_folded(self):
+        reranker = ScoreFusionReranker(top_n=1)
+        docs = [Document("Cobertura y teléfono"), Document("Planes de internet")]
+        assert reranker.bm25("telefono", docs)[0] > 0
+
+
+class TestRerankExecution:
+    """Test cases for running local rerankers off the event loop."""
+
+    @pytest.mark.asyncio
+    async def test_scoring_runs_in_dedicated_pool_without_blocking_loop(self):
+        reranker = SlowReranker(top_n=2)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        ranked = await reranker.acompress_documents(DOCS, "query")
+        task.cancel()
+
+        assert [doc.metadata["slug"] for doc in ranked] == ["addon-iptv", "plan-500"]
+        assert reranker.threads[-1].startswith("rerank")
+        assert ticks >= 3
+
+
+class TestRerankerSelection:
+    """Test cases for per-strategy reranker selection."""
+
+    def test_strategy_carries_configured_reranker(self):
+        fast = _determine_retrieval_strategy("precios")
+        comprehensive = _determine_retrieval_strategy("¿Cómo contrato internet con televisión y telefonía?")
+
+        assert fast["reranker"] == "fusion" and fast["use_rerank"] is True
+        assert comprehensive["reranker"] == "cohere"
+
+    def test_pool_builds_compression_only_when_reranking(self):
+        base = AsyncQdrantRetriever(async_client=object(), embeddings=UnusedEmbeddings(), collection_name="kb")
+        with patch.object(connection_pool, "get_base_retriever", return_value=base):
+            assert connection_pool.get_compression_retriever(reranker="none") is base
+            compression = connection_pool.get_compression_retriever(reranker="fusion")
+
+        assert isinstance(compression.base_compressor, ScoreFusionReranker)
+        with pytest.raises(ValueError):
+            connection_pool.get_reranker("bogus")
+
+
+class TestRerankBenchmark:
+    """Test cases for the offline benchmark."""
+
+    @pytest.mark.asyncio
+    async def test_fusion_beats_unranked_on_recorded_queries(self):
+        from app.services.ai.shared.rerank_benchmark import run_benchmark
+
+        report = await run_benchmark(rerankers=("none", "fusion"))
+        by_name = {result["reranker"]: result for result in report["results"]}
+
+        assert report["queries"] >= 20
+        assert by_name["fusion"]["quality"]["mrr"] > by_name["none"]["quality"]["mrr"]
+        assert by_name["fusion"]["latency_ms"]["p95"] > 0
@@ -0,0 +1,137 @@
+"""Tests for staged answer verification (heuristics first, verifier model only when unsure)."""
+
+import os
+import sys
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai.config import ai_config
+from app.services.ai.shared import response_verifier as verifier_module
+from app.services.ai.shared.response_verifier import ResponseVerifier, detect_language
+from app.services.ai.agents.whatsapp_agent.graph import agent_graph
+
+
+class TestHeuristics:
+    """Test cases for the local verification stage."""
+
+    def test_language_detection(self):
+        assert detect_language("¿Qué planes tienen para la casa?") == "es"
+        assert detect_language("What plans do you have for my home?") == "en"
+        assert detect_language("ok") is None
+
+    @pytest.mark.parametrize("query, response, expected", [
+        ("¿Cuánto cuesta?", "   ", ("N", "empty")),
+        ("¿Cuánto cuesta?", "Agent error: boom", ("N", "error_text")),
+        ("hola", "¡Hola! ¿En qué te ayudo?", ("Y", "greeting")),
+        ("¿Qué planes tienen para la casa?", "We have several plans for your home, would you like the details?",
+         ("N", "wrong_language")),
+        ("¿Puedo pagar con tarjeta en la tienda?", "Sí, puede pagar con tarjeta en todas nuestras tiendas.",
+         ("Y", "checks_passed")),
+    ])
+    def test_decided_locally(self, query, response, expected):
+        assert ResponseVerifier().heuristic_verdict(query, response) == expected
+
+    @pytest.mark.parametrize("query, response", [
+        ("Which plan is best for gaming?", "I'm sorry, I can't help with that."),
+        ("What is the upload speed?", "I am unable to provide that information."),
+        ("¿Tienen cobertura en Heredia?", "Lo siento, no puedo ayudarle con eso."),
+        ("¿Puedo pagar con tarjeta?", "Como modelo de lenguaje, no tengo acceso a esa información."),
+    ])
+    def test_refusals_are_rejected(self, query, response):
+        assert ResponseVerifier().heuristic_verdict(query, response) == ("N", "refusal")
+
+    def test_refusal_inside_a_longer_answer_goes_to_the_model(self):
+        response = (
+            "Lo siento, no puedo confirmar la cobertura desde este chat. Para verificarla, envíenos su dirección "
+            "exacta y un agente revisará la disponibilidad en su zona; también puede llamarnos al centro de "
+            "atención para agendar una visita técnica."
+        )
+        assert ResponseVerifier().heuristic_verdict("¿Tienen cobertura en Heredia?", response) == \
+            (None, "possible_refusal")
+
+    def test_figures_must_be_grounded_in_tool_results(self):
+        verifier = ResponseVerifier()
+        response = "El plan de 100 Mbps cuesta ₡25.000 al mes."
+        tools = ["Plan Hogar 100 Mbps: precio 25,000 CRC mensuales"]
+
+        assert verifier.heuristic_verdict("¿Precio del plan?", response, tool_results=tools) == ("Y", "grounded")
+        assert verifier.heuristic_verdict("¿Precio del plan?", "Cuesta ₡30.000.", tool_results=tools) == \
+            (None, "ungrounded_figures")
+        assert verifier.heuristic_verdict("¿Precio del plan?", response) == (None, "unverified_figures")
+
+
+class TestVerifierStages:
+    """Test cases for escalation to the verifier model."""
+
+    @pytest.mark.asyncio
+    async def test_model_is_only_called_when_heuristics_are_unsure(self):
+        verifier = ResponseVerifier()
+        judge = AsyncMock(return_value="N")
+
+        local = await verifier.verify("hola", "¡Hola! ¿En qué te ayudo?", judge=judge)
+        escalated = await verifier.verify("¿Precio?", "Cuesta ₡30.000 al mes.", judge=judge)
+
+        assert local.helpful and local.stage == "heuristic" and "model" not in local.timings_ms
+        assert not escalated.helpful and escalated.stage == "model" and "model" in escalated.timings_ms
+        assert judge.await_count == 1
+        assert verifier.get_stats()["model_call_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_policy_always_and_never(self):
+        judge = AsyncMock(return_value="Y")
+
+        with patch.object(verifier_module, "ai_config", ai_config.model_copy(update={"verifier_model_policy": "always"})):
+            verdict = await ResponseVerifier().verify("¿Tienen tienda en Cartago?", "Sí, en el centro de Cartago.", judge=judge)
+        assert verdict.stage == "model" and judge.await_count == 1
+
+        with patch.object(verifier_module, "ai_config", ai_config.model_copy(update={"verifier_model_policy": "never"})):
+            verdict = await ResponseVerifier().verify("¿Precio?", "Cuesta ₡30.000.", judge=judge)
+        assert verdict.helpful and verdict.stage == "heuristic" and judge.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_model_failure_accepts_response(self):
+        verdict = await ResponseVerifier().verify("¿Precio?", "Cuesta ₡30.000.", judge=AsyncMock(side_effect=RuntimeError("down")))
+
+        assert verdict.helpful and verdict.stage == "error"
+
+
+class TestWhatsAppHelpfulnessNode:
+    """Test cases for the agent graph's verification loop budget."""
+
+    @staticmethod
+    def _state(answer, retries=0):
+        return {
+            "messages": [
+                HumanMessage(content="¿Cuánto cuesta el plan de 100 Mbps?"),
+                ToolMessage(content="Plan 100 Mbps: 25.000 CRC", tool_call_id="call-1"),
+                AIMessage(content=answer),
+            ],
+            "conversation_id": "conv-1",
+            "attempts": 1,
+            "verification_retries": retries,
+        }
+
+    @pytest.mark.asyncio
+    async def test_grounded_answer_skips_the_verifier_model(self):
+        judge = AsyncMock(return_value="N")
+        with patch.object(agent_graph, "_judge_helpfulness", judge):
+            update = await agent_graph.helpfulness_node(self._state("El plan de 100 Mbps cuesta ₡25.000."))
+
+        assert update["messages"][0].content == "HELPFULNESS:Y"
+        judge.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_rejection_is_retried_within_budget_then_ends(self):
+        judge = AsyncMock(return_value="N")
+        with patch.object(agent_graph, "_judge_helpfulness", judge):
+            first = await agent_graph.helpfulness_node(self._state("Cuesta ₡99.000."))
+            second = await agent_graph.helpfulness_node(self._state("Cuesta ₡99.000.", retries=1))
+
+        assert first["messages"][0].content == "HELPFULNESS:N" and first["verification_retries"] == 1
+        assert second["messages"][0].content == "HELPFULNESS:END"
@@ -0,0 +1,205 @@
+"""Tests for rolling conversation summaries (message watermark + delta merge)."""
+
+import importlib
+import os
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from bson import ObjectId
+from langchain_core.runnables import RunnableLambda
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai.config import ai_config
+from app.services.ai.agents.conversation_summarizer.chains import summarization_chains as chains_module
+from app.services.ai.agents.conversation_summarizer.chains.summarization_chains import (
+    CombinedSummarySchema,
+    SummarizationChains
+)
+from app.services.ai.agents.conversation_summarizer.schemas import ConversationSummaryRequest
+from app.services.ai.agents.conversation_summarizer.summarizer_service import ConversationSummarizerService
+
+# The package re-exports the service instance under the module's name
+service_module = importlib.import_module("app.services.ai.agents.conversation_summarizer.summarizer_service")
+
+
+CONVERSATION_ID = str(ObjectId())
+
+
+class StructuredFakeLLM:
+    """Records prompts and returns a CombinedSummarySchema per call."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def with_structured_output(self, schema):
+        def respond(prompt_value):
+            self.prompts.append(prompt_value.to_string())
+            return CombinedSummarySchema(
+                summary=f"Summary #{len(self.prompts)}", key_points=["Install pending"], topics=["installation"]
+            )
+        return RunnableLambda(respond)
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.docs = sorted(self.docs, key=lambda doc: doc[field], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length=None):
+        return list(self.docs)
+
+    def batch_size(self, size):
+        return self
+
+    async def __aiter__(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeMessages:
+    def __init__(self):
+        self.docs = []
+
+    def add(self, text, role="customer", sender_name=None):
+        self.docs.append({
+            "_id": ObjectId(), "conversation_id": ObjectId(CONVERSATION_ID), "text_content": text,
+            "sender_role": role, "sender_name": sender_name,
+            "timestamp": datetime(2026, 1, 1, 10, 0) + timedelta(minutes=len(self.docs)),
+        })
+
+    def find(self, query, projection=None):
+        return FakeCursor([doc for doc in self.docs if "_id" not in query or doc["_id"] > query["_id"]["$gt"]])
+
+
+class FakeSummaries:
+    def __init__(self):
+        self.docs = []
+
+    async def find_one(self, query, sort=None):
+        docs = [doc for doc in self.docs if doc["conversation_id"] == query["conversation_id"]]
+        return docs[-1] if docs else None
+
+    async def insert_one(self, doc):
+        self.docs.append(doc)
+        return SimpleNamespace(inserted_id=ObjectId())
+
+
+@pytest.fixture
+def summarizer_env():
+    """Summarizer with a fake structured LLM and fake collections."""
+    llm = StructuredFakeLLM()
+    db = SimpleNamespace(messages=FakeMessages(), conversation_summaries=FakeSummaries())
+    service = ConversationSummarizerService()
+    service.chains = SummarizationChains(llm=llm)
+    conversation = {"_id": CONVERSATION_ID, "customer_phone": "+50688887777", "customer_name": "Ana"}
+
+    with patch.object(service, "_get_db", AsyncMock(return_value=db)), \
+         patch.object(service_module.conversation_service, "get_conversation", AsyncMock(return_value=conversation)), \
+         patch.object(service_module.audit_service, "log_event", AsyncMock()):
+        yield SimpleNamespace(service=service, db=db, llm=llm)
+
+
+def _request():
+    return ConversationSummaryRequest(conversation_id=CONVERSATION_ID, user_id="agent-1")
+
+
+class TestRollingSummaries:
+    """Test cases for summarizing only messages after the stored watermark."""
+
+    @pytest.mark.asyncio
+    async def test_second_summary_merges_only_new_messages(self, summarizer_env):
+        env = summarizer_env
+        env.db.messages.add("My install was scheduled for today")
+        env.db.messages.add("We are checking", role="agent", sender_name="Luis")
+
+        first = await env.service.summarize_conversation(_request())
+        assert first.success and first.summary.message_count == 2
+        assert first.summary.last_message_id == str(env.db.messages.docs[-1]["_id"])
+
+        env.db.messages.add("Nobody came yet")
+        second = await env.service.summarize_conversation(_request())
+
+        assert second.success
+        merge_prompt = env.llm.prompts[1]
+        assert "Previous summary:\nSummary #1" in merge_prompt
+        assert "Nobody came yet" in merge_prompt and "My install was scheduled" not in merge_prompt
+        assert second.summary.message_count == 3
+        assert second.summary.human_agents == [{"name": "Luis", "email": "No email available"}]
+        assert second.summary.last_message_id == str(env.db.messages.docs[-1]["_id"])
+        assert len(env.db.conversation_summaries.docs) == 2
+
+    @pytest.mark.asyncio
+    async def test_no_new_messages_returns_previous_summary(self, summarizer_env):
+        env = summarizer_env
+        env.db.messages.add("Hello, what plans do you have?")
+        await env.service.summarize_conversation(_request())
+        env.service._cache.clear()  # Force the stored summary path
+
+        result = await env.service.summarize_conversation(_request())
+
+        assert result.success and result.summary.summary == "Summary #1"
+        assert len(env.llm.prompts) == 1
+
+    @pytest.mark.asyncio
+    async def test_long_transcript_is_folded_in_chunks(self, summarizer_env):
+        env = summarizer_env
+        for i in range(6):
+            env.db.messages.add(f"message {i} " + "x" * 400)
+
+        with patch.object(chains_module, "ai_config", ai_config.model_copy(update={"summary_chunk_max_tokens": 250})):
+            result = await env.service.summarize_conversation(_request())
+
+        assert result.success and result.summary.metadata["llm_calls"] == 3
+        assert "Previous summary" not in env.llm.prompts[0]
+        assert all("Previous summary" in prompt for prompt in env.llm.prompts[1:])
+        assert all(len(prompt) < 3000 for prompt in env.llm.prompts)
+
+    @pytest.mark.asyncio
+    async def test_delta_over_the_load_budget_is_merged_in_rounds(self, summarizer_env):
+        env = summarizer_env
+        for i in range(5):
+            env.db.messages.add(f"message {i}")
+
+        with patch.object(service_module, "ai_config", ai_config.model_copy(update={"summary_max_messages": 2})):
+            result = await env.service.summarize_conversation(_request())
+
+        assert result.success and len(env.llm.prompts) == 3
+        assert ["message 0" in prompt and "message 1" in prompt for prompt in env.llm.prompts] == [True, False, False]
+        assert "message 4" in env.llm.prompts[2] and "Previous summary:\nSummary #2" in env.llm.prompts[2]
+        assert result.summary.message_count == 5
+        assert result.summary.last_message_id == str(env.db.messages.docs[-1]["_id"])
+        assert len(env.db.conversation_summaries.docs) == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_round_keeps_the_watermark_at_the_last_merged_message(self, summarizer_env):
+        env = summarizer_env
+        for i in range(4):
+            env.db.messages.add(f"message {i}")
+        generate_summary = env.service.chains.generate_summary
+        rounds = []
+
+        async def fail_after_first_round(*args, **kwargs):
+            rounds.append(args)
+            if len(rounds) > 1:
+                return SimpleNamespace(success=False, summary=None, error="rate limited", processing_time=0.0)
+            return await generate_summary(*args, **kwargs)
+
+        with patch.object(service_module, "ai_config", ai_config.model_copy(update={"summary_max_messages": 2})), \
+             patch.object(env.service.chains, "generate_summary", side_effect=fail_after_first_round):
+            result = await env.service.summarize_conversation(_request())
+
+        assert result.success and result.summary.message_count == 2
+        assert result.summary.last_message_id == str(env.db.messages.docs[1]["_id"])
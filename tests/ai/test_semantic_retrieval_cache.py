@@ -0,0 +1,108 @@
+"""Tests for the semantic (near-duplicate) RAG retrieval cache."""
+
+import os
+import sys
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai.shared.retrieval_cache import RetrievalCache, SemanticIndex
+
+
+FAST = {"strategy": "fast", "use_multiquery": False, "reranker": "fusion", "cache_ttl": 600}
+COMPREHENSIVE = {"strategy": "comprehensive", "use_multiquery": True, "reranker": "cohere", "cache_ttl": 300}
+DOCS = [Document(page_content="Plan Hogar 100 Mbps", metadata={"slug": "planes"})]
+
+
+def _vector(*values):
+    return np.asarray(values, dtype=np.float32).tolist()
+
+
+@pytest.fixture
+def cache():
+    """Retrieval cache without Redis (semantic layer only)."""
+    retrieval_cache = RetrievalCache()
+    retrieval_cache.enabled = False
+    retrieval_cache.redis_client = None
+    return retrieval_cache
+
+
+class TestSemanticIndex:
+    """Test cases for the nearest-neighbour ring buffer."""
+
+    def test_returns_closest_entry_above_threshold(self):
+        index = SemanticIndex(max_entries=4)
+        index.add(_vector(1, 0, 0), {"id": "x", "expires_at": float("inf"), "version": 0})
+        index.add(_vector(0, 1, 0), {"id": "y", "expires_at": float("inf"), "version": 0})
+
+        score, entry = index.search(_vector(0.1, 1, 0), threshold=0.9, version=0)
+        assert entry["id"] == "y" and score > 0.99
+        assert index.search(_vector(1, 1, 0), threshold=0.9, version=0) is None
+
+    def test_ring_buffer_replaces_oldest(self):
+        index = SemanticIndex(max_entries=2)
+        for i, vector in enumerate([_vector(1, 0), _vector(0, 1), _vector(1, 1)]):
+            index.add(vector, {"id": i, "expires_at": float("inf"), "version": 0})
+
+        assert len(index) == 2
+        assert index.search(_vector(1, 0), threshold=0.99, version=0) is None
+
+
+class TestRetrievalCacheSemanticLayer:
+    """Test cases for semantic lookups in RetrievalCache."""
+
+    def test_paraphrase_hits_within_strategy_only(self, cache):
+        cache.cache_results("¿Qué planes tienen?", DOCS, FAST, 600, query_vector=_vector(0.6, 0.8, 0))
+
+        hit = cache.get_semantic_results(_vector(0.61, 0.79, 0.01), FAST)
+        assert [doc.page_content for doc in hit] == ["Plan Hogar 100 Mbps"]
+        assert cache.get_semantic_results(_vector(0.61, 0.79, 0.01), COMPREHENSIVE) is None
+        assert cache.get_semantic_results(_vector(0, 0, 1), FAST) is None
+
+    def test_reingestion_invalidates_results(self, cache):
+        cache.cache_results("que planes tienen", DOCS, FAST, 600, query_vector=_vector(0.6, 0.8, 0))
+        cache.invalidate_knowledge_base()
+
+        assert cache.get_semantic_results(_vector(0.6, 0.8, 0), FAST) is None
+
+    def test_expired_entries_are_ignored(self, cache):
+        cache.cache_results("planes", DOCS, FAST, ttl_seconds=-1, query_vector=_vector(1, 0))
+        assert cache.get_semantic_results(_vector(1, 0), FAST) is None
+
+    def test_hit_ratio_by_strategy(self, cache):
+        cache.record_miss(FAST)
+        cache.cache_results("planes", DOCS, FAST, 600, query_vector=_vector(1, 0))
+        cache.get_semantic_results(_vector(1, 0.01), FAST)
+
+        ratios = cache.get_strategy_hit_ratios()
+        assert ratios["fast"]["semantic_hits"] == 1
+        assert ratios["fast"]["hit_rate_percent"] == 50.0
+
+
+class TestRetrieveInformationCaching:
+    """Test cases for cache usage in the RAG tool."""
+
+    @pytest.mark.asyncio
+    async def test_near_duplicate_query_skips_retrieval(self, cache):
+        from app.services.ai.shared.tools.rag import retriever as rag_retriever
+
+        embeddings = {"¿Qué planes tienen?": _vector(0.6, 0.8, 0), "que planes tienen": _vector(0.6, 0.79, 0.02)}
+        fast_retrieve = AsyncMock(return_value=DOCS)
+
+        with patch.object(rag_retriever, "retrieval_cache", cache), \
+             patch.object(rag_retriever.connection_pool, "ensure_collection_ready", AsyncMock(return_value=True)), \
+             patch.object(rag_retriever, "_embed_query", AsyncMock(side_effect=lambda q: embeddings[q])), \
+             patch.object(rag_retriever, "_determine_retrieval_strategy", return_value=dict(FAST)), \
+             patch.object(rag_retriever, "_fast_retrieve", fast_retrieve):
+            first = await rag_retriever.retrieve_information.ainvoke({"query": "¿Qué planes tienen?"})
+            second = await rag_retriever.retrieve_information.ainvoke({"query": "que planes tienen"})
+
+        assert first == second == "[planes] Plan Hogar 100 Mbps"
+        assert fast_retrieve.await_count == 1
+        assert cache.get_strategy_hit_ratios()["fast"]["semantic_hits"] == 1
@@ -0,0 +1,122 @@
+"""Tests for adaptive retrieval strategy selection."""
+
+import asyncio
+import os
+import sys
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai.config import ai_config
+from app.services.ai.shared import strategy_controller as controller_module
+from app.services.ai.shared.performance_monitor import PerformanceMonitor, RetrievalMetrics
+from app.services.ai.shared.strategy_controller import AdaptiveStrategyController
+
+
+SIMPLE = "precios"
+COMPLEX = "¿Cómo contrato internet con televisión y telefonía?"
+
+
+@pytest.fixture
+def monitor():
+    """Isolated monitor and deterministic controller settings (no probes, small sample floor)."""
+    test_monitor = PerformanceMonitor()
+    test_config = ai_config.model_copy(update={
+        "adaptive_probe_rate": 0.0,
+        "adaptive_min_samples": 5,
+        "rag_latency_slo_ms": 1000.0,
+    })
+    with patch.object(controller_module, "performance_monitor", test_monitor), \
+         patch.object(controller_module, "ai_config", test_config):
+        yield test_monitor
+
+
+def _record(monitor, strategy, total_ms, count=10, error=None, top_score=0.6, cache_hit=False):
+    for _ in range(count):
+        monitor.record_retrieval(RetrievalMetrics(
+            query="q", strategy=strategy, total_time_ms=total_ms, cache_hit=cache_hit,
+            documents_found=6, error=error, top_score=top_score,
+        ))
+
+
+class TestTierSelection:
+    """Test cases for choosing a tier from measured latency and quality."""
+
+    def test_nominal_tiers_without_history(self, monitor):
+        controller = AdaptiveStrategyController()
+
+        fast = controller.select(SIMPLE)
+        comprehensive = controller.select(COMPLEX)
+
+        assert fast["strategy"] == "fast" and fast["use_multiquery"] is False
+        assert comprehensive["strategy"] == "comprehensive"
+        assert comprehensive["multiquery_breadth"] == 3 and comprehensive["reranker"] == "cohere"
+        assert comprehensive["timeout_seconds"] == 2.0  # 2x the 1s SLO
+
+    def test_slow_tiers_are_skipped_until_one_fits_the_slo(self, monitor):
+        controller = AdaptiveStrategyController()
+        _record(monitor, "comprehensive", 4000)
+        _record(monitor, "balanced", 1500)
+
+        plan = controller.select(COMPLEX)
+
+        assert plan["strategy"] == "fast"
+        assert controller.get_stats()["current_tier"]["complex"] == "fast"
+
+    def test_error_spike_degrades_and_cache_hits_are_ignored(self, monitor):
+        controller = AdaptiveStrategyController()
+        _record(monitor, "comprehensive", 200, count=4)
+        _record(monitor, "comprehensive", 200, count=4, error="Cohere timeout")
+        _record(monitor, "balanced", 5000, cache_hit=True)
+
+        assert controller.select(COMPLEX)["strategy"] == "balanced"
+
+    def test_weak_matches_escalate_simple_queries(self, monitor):
+        controller = AdaptiveStrategyController()
+        _record(monitor, "fast", 300, top_score=0.1)
+
+        plan = controller.select(SIMPLE)
+
+        assert plan["strategy"] == "balanced"
+        assert plan["use_multiquery"] is True and plan["multiquery_breadth"] == 2
+
+    def test_disabled_controller_keeps_nominal_tier(self, monitor):
+        controller = AdaptiveStrategyController()
+        _record(monitor, "comprehensive", 9000)
+
+        with patch.object(controller_module, "ai_config",
+                          controller_module.ai_config.model_copy(update={"adaptive_strategy_enabled": False})):
+            assert controller.select(COMPLEX)["strategy"] == "comprehensive"
+
+
+class TestRetrieverIntegration:
+    """Test cases for applying the chosen plan in the RAG tool."""
+
+    @pytest.mark.asyncio
+    async def test_multiquery_timeout_falls_back_and_is_recorded(self, monitor):
+        from app.services.ai.shared.tools.rag import retriever as rag_retriever
+
+        async def hang(query):
+            await asyncio.sleep(5)
+
+        slow = AsyncMock()
+        slow.ainvoke.side_effect = hang
+        fast = AsyncMock()
+        fast.ainvoke.return_value = []
+        plan = AdaptiveStrategyController().build_plan("comprehensive", "complex")
+        plan["timeout_seconds"] = 0.05
+
+        def compression_retriever(use_multiquery, **kwargs):
+            return slow if use_multiquery else fast
+
+        with patch.object(rag_retriever.connection_pool, "get_compression_retriever", side_effect=compression_retriever) as factory:
+            docs = await rag_retriever._comprehensive_retrieve(COMPLEX, plan)
+
+        assert docs == []
+        assert plan["timed_out"] is True
+        fallback_kwargs = factory.call_args_list[-1].kwargs
+        assert fallback_kwargs["use_multiquery"] is False and fallback_kwargs["k"] == ai_config.rag_retrieval_k
@@ -0,0 +1,141 @@
+"""Tests for background summary pre-warming on transfer, close and idle events."""
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai.agents.conversation_summarizer import prewarm_worker as prewarm_module
+from app.services.ai.agents.conversation_summarizer.prewarm_worker import SummaryPrewarmWorker
+from app.services.ai.agents.conversation_summarizer.schemas import SummarizationResult
+
+
+class RecordingSummarizer:
+    """Records summarized conversations; blocks until released when gated."""
+
+    def __init__(self, gated=False):
+        self.calls = []
+        self.gate = asyncio.Event()
+        if not gated:
+            self.gate.set()
+
+    async def __call__(self, request):
+        self.calls.append(request.conversation_id)
+        await self.gate.wait()
+        return SummarizationResult(success=True, processing_time=0.0)
+
+
+async def _drain(worker):
+    await worker._queue.join()
+
+
+class TestSummaryPrewarmWorker:
+    """Test cases for the prioritized pre-warm queue."""
+
+    @pytest.mark.asyncio
+    async def test_transfers_run_before_closes_and_idle(self):
+        summarizer = RecordingSummarizer(gated=True)
+        worker = SummaryPrewarmWorker(summarize=summarizer, max_workers=1)
+        try:
+            worker.submit("busy", "idle")
+            await asyncio.sleep(0)  # The single worker is now blocked on "busy"
+
+            worker.submit("idle-1", "idle")
+            worker.submit("closed-1", "close")
+            worker.submit("transferred-1", "transfer")
+            summarizer.gate.set()
+            await _drain(worker)
+
+            assert summarizer.calls == ["busy", "transferred-1", "closed-1", "idle-1"]
+            assert worker.get_stats()["completed"] == 4
+        finally:
+            await worker.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_duplicate_events_are_summarized_once_at_the_highest_priority(self):
+        summarizer = RecordingSummarizer(gated=True)
+        worker = SummaryPrewarmWorker(summarize=summarizer, max_workers=1)
+        try:
+            worker.submit("busy", "idle")
+            await asyncio.sleep(0)
+
+            worker.submit("other", "close")
+            worker.submit("conv", "idle")
+            worker.submit("conv", "idle")
+            worker.submit("conv", "transfer")  # Jumps ahead of "other"
+            summarizer.gate.set()
+            await _drain(worker)
+
+            assert summarizer.calls == ["busy", "conv", "other"]
+            stats = worker.get_stats()
+            assert stats["deduplicated"] == 1 and stats["upgraded"] == 1
+        finally:
+            await worker.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_event_during_a_run_requeues_the_conversation(self):
+        summarizer = RecordingSummarizer(gated=True)
+        worker = SummaryPrewarmWorker(summarize=summarizer, max_workers=2)
+        try:
+            worker.submit("conv", "transfer")
+            await asyncio.sleep(0)
+            worker.submit("conv", "close")  # New messages may have arrived before the close
+            await asyncio.sleep(0)
+            assert summarizer.calls == ["conv"]  # Never summarized twice concurrently
+
+            summarizer.gate.set()
+            await _drain(worker)
+            await _drain(worker)
+
+            assert summarizer.calls == ["conv", "conv"]
+        finally:
+            await worker.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects_new_conversations(self):
+        summarizer = RecordingSummarizer(gated=True)
+        worker = SummaryPrewarmWorker(summarize=summarizer, max_workers=1, max_pending=1)
+        try:
+            assert worker.submit("a", "close")
+            assert not worker.submit("b", "close")
+            assert worker.get_stats()["rejected"] == 1
+        finally:
+            await worker.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_idle_sweep_queues_conversations_that_went_quiet(self):
+        summarizer = RecordingSummarizer()
+        worker = SummaryPrewarmWorker(summarize=summarizer, max_workers=1)
+        queries = []
+
+        class FakeConversations:
+            def find(self, query, projection=None):
+                queries.append(query)
+                docs = [{"_id": "quiet-1"}, {"_id": "quiet-2"}]
+                return SimpleNamespace(limit=lambda count: SimpleNamespace(to_list=lambda length: _docs(docs)))
+
+        async def _docs(docs):
+            return docs
+
+        now = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+        fake_database = SimpleNamespace(db=SimpleNamespace(conversations=FakeConversations()))
+        try:
+            with patch.object(prewarm_module, "database", fake_database):
+                assert await worker.sweep_idle_conversations(now=now) == 2
+                await worker.sweep_idle_conversations(now=now + timedelta(minutes=5))
+            await _drain(worker)
+
+            assert summarizer.calls[:2] == ["quiet-1", "quiet-2"]
+            window = queries[1]["last_message_at"]
+            assert window["$gt"] == queries[0]["last_message_at"]["$lte"]  # Sweeps never overlap
+            assert queries[0]["status"] == {"$ne": "resolved"}
+        finally:
+            await worker.shutdown()
@@ -0,0 +1,168 @@
+"""Tests for the shared token-budgeted transcript service."""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai.shared.transcript_service import TranscriptService, message_text
+from app.services.ai.agents.writer.tools.conversation_tool import _format_message_with_metadata
+
+
+CONVERSATION_ID = str(ObjectId())
+
+
+class FakeCursor:
+    """Async cursor that records how many documents were pulled."""
+
+    def __init__(self, docs, collection):
+        self.docs = docs
+        self.collection = collection
+
+    def sort(self, field, direction):
+        self.docs = sorted(self.docs, key=lambda doc: doc[field], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    async def __aiter__(self):
+        for doc in self.docs:
+            self.collection.pulled += 1
+            yield doc
+
+
+class FakeMessages:
+    def __init__(self):
+        self.docs = []
+        self.pulled = 0
+        self.finds = 0
+
+    def add(self, text, direction="inbound"):
+        self.docs.append({
+            "_id": ObjectId(), "conversation_id": ObjectId(CONVERSATION_ID), "direction": direction,
+            "text_content": text, "timestamp": datetime(2026, 1, 1) + timedelta(minutes=len(self.docs)),
+        })
+
+    def _matches(self, doc, query):
+        if doc["conversation_id"] != query["conversation_id"]:
+            return False
+        if "direction" in query and doc["direction"] != query["direction"]:
+            return False
+        return "_id" not in query or doc["_id"] > query["_id"]["$gt"]
+
+    def find(self, query, projection=None):
+        self.finds += 1
+        return FakeCursor([doc for doc in self.docs if self._matches(doc, query)], self)
+
+    async def find_one(self, query, projection=None, sort=None):
+        docs = [doc for doc in self.docs if self._matches(doc, query)]
+        return max(docs, key=lambda doc: doc["_id"]) if docs else None
+
+
+class FakeDB:
+    def __init__(self):
+        self.messages = FakeMessages()
+
+
+@pytest.fixture
+def db():
+    return FakeDB()
+
+
+class TestTranscriptService:
+    """Test cases for newest-first budgeted transcripts."""
+
+    @pytest.mark.asyncio
+    async def test_budget_keeps_newest_messages_in_order_and_stops_the_cursor(self, db):
+        for i in range(50):
+            db.messages.add(f"message {i:02d} " + "x" * 70)  # ~21 tokens each
+
+        transcript = await TranscriptService().load(CONVERSATION_ID, max_tokens=100, db=db)
+
+        assert transcript.truncated
+        assert [line[:10] for line in transcript.lines] == [f"message {i:02d}" for i in range(46, 50)]
+        assert transcript.token_count <= 100
+        assert transcript.last_message_id == str(db.messages.docs[-1]["_id"])
+        assert db.messages.pulled == 5  # Stopped streaming right after the budget was hit
+
+    @pytest.mark.asyncio
+    async def test_watermark_filters_and_formatter_skips(self, db):
+        for i in range(4):
+            db.messages.add(f"customer {i}")
+            db.messages.add(f"agent {i}", direction="outbound")
+        watermark = str(db.messages.docs[3]["_id"])
+
+        transcript = await TranscriptService().load(
+            CONVERSATION_ID,
+            formatter=lambda msg: message_text(msg) if msg["direction"] == "inbound" else None,
+            after_message_id=watermark,
+            max_messages=10,
+            db=db
+        )
+
+        assert transcript.lines == ["customer 2", "customer 3"]
+        assert not transcript.truncated
+
+    @pytest.mark.asyncio
+    async def test_message_cap_marks_truncation(self, db):
+        for i in range(5):
+            db.messages.add(f"m{i}")
+
+        transcript = await TranscriptService().load(CONVERSATION_ID, max_messages=3, db=db)
+
+        assert transcript.lines == ["m2", "m3", "m4"] and transcript.truncated
+
+    @pytest.mark.asyncio
+    async def test_oldest_first_resumes_after_the_last_kept_message(self, db):
+        for i in range(5):
+            db.messages.add(f"m{i}")
+        service = TranscriptService()
+
+        first = await service.load(CONVERSATION_ID, max_messages=3, oldest_first=True, db=db)
+        rest = await service.load(
+            CONVERSATION_ID, max_messages=3, after_message_id=first.last_message_id, oldest_first=True, db=db
+        )
+
+        assert first.lines == ["m0", "m1", "m2"] and first.truncated
+        assert rest.lines == ["m3", "m4"] and not rest.truncated
+
+    @pytest.mark.asyncio
+    async def test_transcript_is_cached_until_a_new_message_arrives(self, db):
+        service = TranscriptService()
+        db.messages.add("hola")
+
+        first = await service.get_transcript(CONVERSATION_ID, message_text, "plain", max_tokens=500, db=db)
+        second = await service.get_transcript(CONVERSATION_ID, message_text, "plain", max_tokens=500, db=db)
+        assert second is first and db.messages.finds == 1
+
+        db.messages.add("precios?")
+        third = await service.get_transcript(CONVERSATION_ID, message_text, "plain", max_tokens=500, db=db)
+
+        assert third.lines == ["hola", "precios?"]
+        assert db.messages.finds == 2
+        stats = service.get_stats()
+        assert stats["cache_hits"] == 1 and stats["cached_transcripts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cached_writer_transcript_has_no_delivery_status(self, db):
+        service = TranscriptService()
+        db.messages.add("hola")
+        db.messages.docs[0]["status"] = "sent"
+
+        transcript = await service.get_transcript(
+            CONVERSATION_ID, _format_message_with_metadata, "writer_metadata", db=db
+        )
+
+        # The status moves on (sent -> read) without a new message, so it must not be cached
+        assert "Status" not in transcript.text and "hola" in transcript.text
@@ -0,0 +1,113 @@
+"""Tests for cached and speculative Writer Agent suggestions."""
+
+import asyncio
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.schemas.ai.writer_response import WriterAgentResult
+from app.services.ai.config import ai_config
+from app.services.ai.agents.writer import agent_service as writer_module
+from app.services.ai.agents.writer.result_cache import WriterResultCache
+
+
+CONVERSATION_ID = "65f0c0ffee0000000000abcd"
+
+
+class FakeGraph:
+    """Stands in for the writer graph; optionally blocks until released."""
+
+    def __init__(self, gated=False):
+        self.calls = 0
+        self.gate = asyncio.Event()
+        if not gated:
+            self.gate.set()
+
+    async def __call__(self, user_query, conversation_id=None, mode="custom", streamer=None):
+        self.calls += 1
+        await self.gate.wait()
+        return WriterAgentResult(success=True, raw_response=f"Suggestion #{self.calls}", metadata={"mode": mode})
+
+
+@pytest.fixture
+def writer_env():
+    """Writer service with a fake graph, an in-process cache and a fixed last customer message."""
+    with patch.object(writer_module, "WriterAgent", MagicMock()):
+        service = writer_module.WriterAgentService()
+    service.result_cache = WriterResultCache(use_redis=False)
+    graph = FakeGraph()
+    last_inbound = AsyncMock(return_value="m1")
+
+    with patch.object(service, "generate_response", graph), \
+         patch.object(service, "_last_inbound_message_id", last_inbound):
+        yield service, graph, last_inbound
+
+
+class TestWriterResultCache:
+    """Test cases for suggestions keyed by conversation, last customer message and mode."""
+
+    @pytest.mark.asyncio
+    async def test_reopening_the_panel_is_served_from_cache(self, writer_env):
+        service, graph, _ = writer_env
+
+        first = await service.generate_contextual_response(CONVERSATION_ID)
+        second = await service.generate_contextual_response(CONVERSATION_ID)
+
+        assert graph.calls == 1
+        assert first.metadata["cache"] == "miss" and second.metadata["cache"] == "cache"
+        assert second.raw_response == first.raw_response
+
+    @pytest.mark.asyncio
+    async def test_new_customer_message_or_mode_generates_again(self, writer_env):
+        service, graph, last_inbound = writer_env
+
+        await service.generate_contextual_response(CONVERSATION_ID)
+        await service.generate_contextual_response(CONVERSATION_ID, mode="prebuilt")
+        last_inbound.return_value = "m2"
+        latest = await service.generate_contextual_response(CONVERSATION_ID)
+
+        assert graph.calls == 3 and latest.raw_response == "Suggestion #3"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_generation(self, writer_env):
+        service, graph, _ = writer_env
+        graph.gate.clear()
+
+        first = asyncio.create_task(service.generate_contextual_response(CONVERSATION_ID))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(service.generate_contextual_response(CONVERSATION_ID))
+        await asyncio.sleep(0)
+        graph.gate.set()
+        results = await asyncio.gather(first, second)
+
+        assert graph.calls == 1
+        assert [result.metadata["cache"] for result in results] == ["miss", "inflight"]
+
+    @pytest.mark.asyncio
+    async def test_speculative_suggestion_is_ready_when_the_panel_opens(self, writer_env):
+        service, graph, _ = writer_env
+        config = ai_config.model_copy(update={
+            "writer_speculative_enabled": True, "writer_speculative_delay_seconds": 0.0
+        })
+
+        with patch.object(writer_module, "ai_config", config):
+            assert service.schedule_speculative(CONVERSATION_ID, "m0")  # Superseded by m1
+            assert service.schedule_speculative(CONVERSATION_ID, "m1")
+            await asyncio.gather(*service._speculative.values(), return_exceptions=True)
+            result = await service.generate_contextual_response(CONVERSATION_ID, mode="prebuilt")  # As /ai/writer/contextual
+
+        assert graph.calls == 1 and result.metadata["cache"] == "cache"
+        assert service.get_stats()["speculative_superseded"] == 1
+
+    @pytest.mark.asyncio
+    async def test_speculation_is_off_by_default(self, writer_env):
+        service, graph, _ = writer_env
+
+        assert not service.schedule_speculative(CONVERSATION_ID, "m1")
+        assert graph.calls == 0
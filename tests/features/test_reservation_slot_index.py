@@ -0,0 +1,224 @@
+"""Tests for the reservation slot bitmap index and atomic booking."""
+
+import asyncio
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from app.services.business.reservation_slot_index import BITMAP_KEY, ReservationSlotIndex, slot_offset
+
+
+class FakeRedis:
+    """Minimal redis.asyncio stand-in for the bitmap commands."""
+
+    def __init__(self):
+        self.bitmaps = {}
+        self.values = {}
+        self.locks = {}
+        self.calls = 0
+
+    def _bits(self, key):
+        return self.bitmaps.setdefault(key, bytearray())
+
+    async def setbit(self, key, offset, value):
+        self.calls += 1
+        await asyncio.sleep(0)
+        bits = self._bits(key)
+        byte, bit = divmod(offset, 8)
+        if len(bits) <= byte:
+            bits.extend(b"\x00" * (byte + 1 - len(bits)))
+        mask = 0x80 >> bit
+        previous = 1 if bits[byte] & mask else 0
+        bits[byte] = (bits[byte] | mask) if value else (bits[byte] & ~mask)
+        return previous
+
+    def _getbit(self, key, offset):
+        bits = self.bitmaps.get(key, bytearray())
+        byte, bit = divmod(offset, 8)
+        return 1 if byte < len(bits) and bits[byte] & (0x80 >> bit) else 0
+
+    async def bitfield_ro(self, key, encoding, offset, items=None):
+        self.calls += 1
+        width = int(encoding[1:])
+        values = []
+        for _, start in [(encoding, offset)] + list(items or []):
+            value = 0
+            for position in range(width):
+                value = (value << 1) | self._getbit(key, start + position)
+            values.append(value)
+        return values
+
+    async def exists(self, key):
+        return 1 if key in self.values else 0
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.bitmaps.pop(key, None)
+            self.values.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def lock(self, name, timeout=None, blocking_timeout=None):
+        return FakeLock(self.locks.setdefault(name, asyncio.Lock()))
+
+
+class FakeLock:
+    """redis.asyncio Lock over a process-local asyncio.Lock."""
+
+    def __init__(self, lock):
+        self.lock = lock
+
+    async def acquire(self):
+        return await self.lock.acquire()
+
+    async def release(self):
+        self.lock.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.release()
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+        return queue
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        for _ in range(5):
+            await asyncio.sleep(0)  # Room for a concurrent booking while the snapshot is read
+        return self.docs
+
+
+class FakeReservations:
+    """installation_reservations with a unique (date, time_slot) index."""
+
+    def __init__(self):
+        self.docs = []
+        self.scans = 0
+
+    def find(self, query, projection=None):
+        self.scans += 1
+        low, high = query["date"].get("$gte"), query["date"].get("$lte", "9999-12-31")
+        return FakeCursor([doc for doc in self.docs if low <= doc["date"] <= high])
+
+    async def find_one(self, query, projection=None):
+        return next((doc for doc in self.docs if all(doc[k] == v for k, v in query.items())), None)
+
+    async def update_one(self, query, update, upsert=False):
+        await asyncio.sleep(0)
+        if await self.find_one(query):
+            return SimpleNamespace(upserted_id=None)
+        doc = {**query, **update["$setOnInsert"], "_id": f"id-{len(self.docs)}"}
+        self.docs.append(doc)
+        return SimpleNamespace(upserted_id=doc["_id"])
+
+
+def _doc(day, time_slot):
+    return {"date": day.strftime("%Y-%m-%d"), "time_slot": time_slot, "status": "confirmed"}
+
+
+@pytest.fixture
+def db():
+    return SimpleNamespace(installation_reservations=FakeReservations())
+
+
+class TestReservationSlotIndex:
+    """Test cases for availability reads and booking."""
+
+    @pytest.mark.asyncio
+    async def test_availability_is_read_from_the_bitmap(self, db):
+        tomorrow = date.today() + timedelta(days=1)
+        db.installation_reservations.docs = [_doc(tomorrow, "08:00"), _doc(tomorrow + timedelta(days=1), "08:00"),
+                                             _doc(tomorrow + timedelta(days=1), "13:00")]
+        redis = FakeRedis()
+        index = ReservationSlotIndex(redis)
+
+        first = await index.available_slots(db, tomorrow, 31)
+        second = await index.available_slots(db, tomorrow, 31)
+
+        assert first == second
+        assert first[tomorrow.strftime("%Y-%m-%d")] == ["13:00"]
+        assert (tomorrow + timedelta(days=1)).strftime("%Y-%m-%d") not in first
+        assert len(first) == 30
+        assert db.installation_reservations.scans == 1  # Only the initial rebuild touched MongoDB
+        assert index.get_stats()["index_reads"] == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_bookings_of_one_slot_have_one_winner(self, db):
+        day = date.today() + timedelta(days=3)
+        index = ReservationSlotIndex(FakeRedis())
+
+        results = await asyncio.gather(*[index.book(db, _doc(day, "08:00")) for _ in range(10)])
+
+        assert sum(result is not None for result in results) == 1
+        assert len(db.installation_reservations.docs) == 1
+        assert index.get_stats()["conflicts"] == 9
+        assert (await index.available_slots(db, day, 1))[day.strftime("%Y-%m-%d")] == ["13:00"]
+
+    @pytest.mark.asyncio
+    async def test_stale_bit_defers_to_mongodb(self, db):
+        day = date.today() + timedelta(days=2)
+        redis = FakeRedis()
+        index = ReservationSlotIndex(redis)
+        await index.rebuild(db, redis)
+        # Bit set without a reservation behind it (e.g. a booking whose insert failed)
+        await redis.setbit(BITMAP_KEY, slot_offset(day.strftime("%Y-%m-%d"), "13:00"), 1)
+
+        assert await index.book(db, _doc(day, "13:00")) is not None
+
+    @pytest.mark.asyncio
+    async def test_without_redis_mongodb_unique_index_decides(self, db):
+        class Unavailable(ReservationSlotIndex):
+            async def _client(self):
+                return None
+
+        class RacingReservations(FakeReservations):
+            async def update_one(self, query, update, upsert=False):
+                raise DuplicateKeyError("E11000 duplicate key")
+
+        day = date.today() + timedelta(days=1)
+        index = Unavailable()
+
+        assert await index.book(db, _doc(day, "08:00")) is not None
+        assert await index.book(db, _doc(day, "08:00")) is None
+        assert (await index.available_slots(db, day, 1))[day.strftime("%Y-%m-%d")] == ["13:00"]
+        assert index.get_stats()["scan_reads"] == 1
+
+        racing_db = SimpleNamespace(installation_reservations=RacingReservations())
+        assert await index.book(racing_db, _doc(day, "13:00")) is None
+
+    @pytest.mark.asyncio
+    async def test_booking_during_a_rebuild_is_kept_in_the_bitmap(self, db):
+        day = date.today() + timedelta(days=4)
+        redis = FakeRedis()
+        index = ReservationSlotIndex(redis)
+        await index.rebuild(db, redis)
+
+        # The rebuild snapshots MongoDB before the booking lands; the booking must wait for the swap
+        _, reservation_id = await asyncio.gather(index.rebuild(db, redis), index.book(db, _doc(day, "08:00")))
+
+        assert reservation_id is not None
+        assert (await index.available_slots(db, day, 1))[day.strftime("%Y-%m-%d")] == ["13:00"]